@@ -36,6 +36,7 @@ from lib.float import floatAsByteArray
 from lib.text.sectioning import title, subtitle
 from lib.text.string import LIST, PARAGRAPH, SECTION, SUBSECTION, TITLE, to_docstring
 from lib.timing import print_elapsed_time
+from multi import Processor_box
 from pipe_control.interatomic import interatomic_loop
 from pipe_control.mol_res_spin import exists_mol_res_spin_data, return_spin, spin_loop
 from pipe_control.pipes import cdp_name, get_pipe, has_pipe, pipe_names, switch
@@ -125,7 +126,7 @@ class dAuvergne_protocol:
     opt_func_tol = 1e-25
     opt_max_iterations = int(1e7)
 
-    def __init__(self, pipe_name=None, pipe_bundle=None, results_dir=None, write_results_dir=None, diff_model=None, mf_models=['m0', 'm1', 'm2', 'm3', 'm4', 'm5', 'm6', 'm7', 'm8', 'm9'], local_tm_models=['tm0', 'tm1', 'tm2', 'tm3', 'tm4', 'tm5', 'tm6', 'tm7', 'tm8', 'tm9'], grid_inc=11, diff_tensor_grid_inc={'sphere': 11, 'prolate': 11, 'oblate': 11, 'ellipsoid': 6}, min_algor='newton', mc_sim_num=500, max_iter=None, user_fns=None, conv_loop=True):
+    def __init__(self, pipe_name=None, pipe_bundle=None, results_dir=None, write_results_dir=None, diff_model=None, mf_models=['m0', 'm1', 'm2', 'm3', 'm4', 'm5', 'm6', 'm7', 'm8', 'm9'], local_tm_models=['tm0', 'tm1', 'tm2', 'tm3', 'tm4', 'tm5', 'tm6', 'tm7', 'tm8', 'tm9'], grid_inc=11, diff_tensor_grid_inc={'sphere': 11, 'prolate': 11, 'oblate': 11, 'ellipsoid': 6}, min_algor='newton', mc_sim_num=500, max_iter=None, user_fns=None, conv_loop=True, warm_start_tol=None):
         """Perform the full model-free analysis protocol of d'Auvergne and Gooley, 2008b.
 
         @keyword pipe_name:             The name of the data pipe containing the sequence info.  This data pipe should have all values set including the CSA value, the bond length, the heteronucleus name and proton name.  It should also have all relaxation data loaded.
@@ -156,6 +157,8 @@ class dAuvergne_protocol:
         @type user_fns:                 dict
         @keyword conv_loop:             Automatic looping over all rounds until convergence.
         @type conv_loop:                bool
+        @keyword warm_start_tol:        The maximum change of the diffusion tensor parameters between rounds of optimisation for which the model-free model grid searches are skipped, the spins instead starting from the optimised values of the previous round.  The change is relative for the tm and Da parameters and absolute for the others, a value of 0.01 being a reasonable choice.  As the minimisation then starts from a different point, the optimised values and the selected models can differ from those of the protocol of earlier relax versions, which always performed the grid searches.  The default of None turns the warm start off, so that the grid searches are always performed as before.
+        @type warm_start_tol:           float or None
         """
 
         # Initial printout.
@@ -177,6 +180,13 @@ class dAuvergne_protocol:
             self.mc_sim_num = mc_sim_num
             self.max_iter = max_iter
             self.conv_loop = conv_loop
+            self.warm_start_tol = warm_start_tol
+
+            # The round to round cache of the optimised model-free parameter values, keyed by the diffusion model and model-free model.
+            self.mf_cache = {}
+
+            # The pipe bundle of the current diffusion model, only differing from the main bundle when several diffusion models are optimised at once.
+            self.branch_bundle = pipe_bundle
 
             # The model-free data pipe names.
             self.mf_model_pipes = []
@@ -223,27 +233,21 @@ class dAuvergne_protocol:
                     setattr(self.interpreter, name, user_fns[name])
 
             # Execute the protocol.
-            for self.diff_model in self.diff_model_list:
+            for models in self.diff_model_groups():
                 # Wait a little while between diffusion models.
                 sleep(1)
 
+                # Optimise the independent diffusion models MII to MV together.
+                if len(models) > 1:
+                    self.execute_branches(models)
+                    continue
+
                 # Set the global model name.
+                self.diff_model = models[0]
                 status.auto_analysis[self.pipe_bundle].diff_model = self.diff_model
 
                 # Initialise the convergence data structures.
-                self.conv_data = Container()
-                self.conv_data.chi2 = []
-                self.conv_data.models = []
-                self.conv_data.diff_vals = []
-                if self.diff_model == 'sphere':
-                    self.conv_data.diff_params = ['tm']
-                elif self.diff_model == 'oblate' or self.diff_model == 'prolate':
-                    self.conv_data.diff_params = ['tm', 'Da', 'theta', 'phi']
-                elif self.diff_model == 'ellipsoid':
-                    self.conv_data.diff_params = ['tm', 'Da', 'Dr', 'alpha', 'beta', 'gamma']
-                self.conv_data.spin_ids = []
-                self.conv_data.mf_params = []
-                self.conv_data.mf_vals = []
+                self.conv_data = self.init_conv_data(self.diff_model)
 
                 # Execute the analysis for each diffusion model.
                 self.execute()
@@ -353,6 +357,10 @@ class dAuvergne_protocol:
         if not isinstance(self.conv_loop, bool):
             raise RelaxError("The conv_loop user variable '%s' is incorrectly set.  It should be one of the booleans True or False." % self.conv_loop)
 
+        # Warm starts.
+        if self.warm_start_tol != None and not isinstance(self.warm_start_tol, (float, int)):
+            raise RelaxError("The warm_start_tol user variable '%s' is incorrectly set.  It should be a number or None." % self.warm_start_tol)
+
 
     def convergence(self):
         """Test for the convergence of the global model."""
@@ -590,6 +598,70 @@ class dAuvergne_protocol:
         return complete_round + 1
 
 
+    def diff_model_groups(self):
+        """Group the consecutive diffusion models MII to MV of the diffusion model list.
+
+        Once the local tm model MI has been optimised, the models MII to MV are independent of each other and can be optimised together.  The other models are placed in groups of their own.
+
+
+        @return:    The list of groups of diffusion models.
+        @rtype:     list of list of str
+        """
+
+        # The independent global diffusion models.
+        global_models = ['sphere', 'prolate', 'oblate', 'ellipsoid']
+
+        # Loop over the diffusion models.
+        groups = []
+        for model in self.diff_model_list:
+            # Extend the previous group of global models.
+            if model in global_models and len(groups) and groups[-1][-1] in global_models:
+                groups[-1].append(model)
+
+            # A new group.
+            else:
+                groups.append([model])
+
+        # Return the groups.
+        return groups
+
+
+    def diff_tensor_init(self):
+        """Set up the initial round of optimisation of the diffusion tensor, up to and including the grid search."""
+
+        # Run name.
+        name = self.name_pipe(self.diff_model)
+
+        # Create the data pipe (deleting the old one if it exists).
+        if has_pipe(name):
+            self.interpreter.pipe.delete(name)
+        self.interpreter.pipe.create(name, 'mf', bundle=self.branch_bundle)
+
+        # Load the local tm diffusion model MI results.
+        self.interpreter.results.read(file='results', dir=self.results_dir+'local_tm'+sep+'aic')
+
+        # Remove the tm parameter.
+        self.interpreter.model_free.remove_tm()
+
+        # Initialise the diffusion tensor.
+        if self.diff_model == 'sphere':
+            self.interpreter.diffusion_tensor.init(None, fixed=False)
+            inc = self.diff_tensor_grid_inc['sphere']
+        elif self.diff_model == 'prolate':
+            self.interpreter.diffusion_tensor.init((None, None, None, None), spheroid_type='prolate', fixed=False)
+            inc = self.diff_tensor_grid_inc['prolate']
+        elif self.diff_model == 'oblate':
+            self.interpreter.diffusion_tensor.init((None, None, None, None), spheroid_type='oblate', fixed=False)
+            inc = self.diff_tensor_grid_inc['oblate']
+        elif self.diff_model == 'ellipsoid':
+            self.interpreter.diffusion_tensor.init((None, None, None, None, None, None), fixed=False)
+            inc = self.diff_tensor_grid_inc['ellipsoid']
+
+        # Grid search of just the diffusion tensor.
+        self.interpreter.fix('all_spins')
+        self.interpreter.minimise.grid_search(inc=inc)
+
+
     def execute(self):
         """Execute the protocol."""
 
@@ -647,37 +719,8 @@ class dAuvergne_protocol:
                     # Base directory to place files into.
                     self.base_dir = self.results_dir+self.diff_model+sep+'init'+sep
 
-                    # Run name.
-                    name = self.name_pipe(self.diff_model)
-
-                    # Create the data pipe (deleting the old one if it exists).
-                    if has_pipe(name):
-                        self.interpreter.pipe.delete(name)
-                    self.interpreter.pipe.create(name, 'mf', bundle=self.pipe_bundle)
-
-                    # Load the local tm diffusion model MI results.
-                    self.interpreter.results.read(file='results', dir=self.results_dir+'local_tm'+sep+'aic')
-
-                    # Remove the tm parameter.
-                    self.interpreter.model_free.remove_tm()
-
-                    # Initialise the diffusion tensor.
-                    if self.diff_model == 'sphere':
-                        self.interpreter.diffusion_tensor.init(None, fixed=False)
-                        inc = self.diff_tensor_grid_inc['sphere']
-                    elif self.diff_model == 'prolate':
-                        self.interpreter.diffusion_tensor.init((None, None, None, None), spheroid_type='prolate', fixed=False)
-                        inc = self.diff_tensor_grid_inc['prolate']
-                    elif self.diff_model == 'oblate':
-                        self.interpreter.diffusion_tensor.init((None, None, None, None), spheroid_type='oblate', fixed=False)
-                        inc = self.diff_tensor_grid_inc['oblate']
-                    elif self.diff_model == 'ellipsoid':
-                        self.interpreter.diffusion_tensor.init((None, None, None, None, None, None), fixed=False)
-                        inc = self.diff_tensor_grid_inc['ellipsoid']
-
-                    # Minimise just the diffusion tensor.
-                    self.interpreter.fix('all_spins')
-                    self.interpreter.minimise.grid_search(inc=inc)
+                    # Initialise the diffusion tensor and minimise it.
+                    self.diff_tensor_init()
                     self.interpreter.minimise.execute(self.min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations)
 
                     # Write the results.
@@ -758,6 +801,11 @@ class dAuvergne_protocol:
                 if name in self.pipes + self.mf_model_pipes + self.local_tm_model_pipes + [self.name_pipe('aic'), self.name_pipe('previous')]:
                     self.interpreter.pipe.delete(name)
 
+            # Remove the pipe bundles of the diffusion models optimised together.
+            for model in ['sphere', 'prolate', 'oblate', 'ellipsoid']:
+                for name in pipe_names(bundle=self.name_bundle(model)):
+                    self.interpreter.pipe.delete(name)
+
             # Create the local_tm data pipe.
             self.interpreter.pipe.create(self.name_pipe('local_tm'), 'mf', bundle=self.pipe_bundle)
 
@@ -829,13 +877,172 @@ class dAuvergne_protocol:
             raise RelaxError("Unknown diffusion model, change the value of 'self.diff_model'")
 
 
+    def execute_branches(self, models):
+        """Execute the protocol for several of the diffusion models MII to MV at once.
+
+        Once the local tm model MI has been optimised, the diffusion models are independent.  Each model is optimised in its own pipe bundle, and the rounds of all models are run in lock-step.  The grid searches and minimisations of all models are queued together on the processor, so that they are executed concurrently on the slaves.  Models drop out of the rounds as they converge.
+
+
+        @param models:  The diffusion models to optimise.
+        @type models:   list of str
+        """
+
+        # Printout.
+        title(file=sys.stdout, text="Models MII to MV - Concurrent optimisation of the %s diffusion models" % ", ".join(models))
+
+        # No local_tm directory!
+        dir_list = listdir(self.results_dir)
+        if 'local_tm' not in dir_list:
+            raise RelaxError("The local_tm model must be optimised first.")
+
+        # Get the Processor box singleton (it contains the Processor instance) and alias the Processor.
+        processor_box = Processor_box()
+        processor = processor_box.processor
+
+        # Initialise the branches, one for each diffusion model.
+        branches = []
+        for model in models:
+            branch = Container()
+            branch.diff_model = model
+            branch.bundle = self.name_bundle(model)
+            branch.conv_data = self.init_conv_data(model)
+            branch.start_round = self.determine_rnd(model=model)
+            branches.append(branch)
+
+        # Loop over the rounds of optimisation until all diffusion models have converged.
+        try:
+            while len(branches):
+                # Determine which round of optimisation to do for each model (init, round_1, round_2, etc).
+                for branch in branches:
+                    branch.round = self.determine_rnd(model=branch.diff_model)
+                    if branch.round == 0:
+                        branch.base_dir = self.results_dir+branch.diff_model+sep+'init'+sep
+                    else:
+                        branch.base_dir = self.results_dir+branch.diff_model+sep+'round_'+repr(branch.round)+sep
+
+                # Set up the models, executing the grid searches together.
+                processor.hold_queue()
+                try:
+                    for branch in branches:
+                        # Printout.
+                        self.switch_branch(branch)
+                        subtitle(file=sys.stdout, text="The %s diffusion model, round %i of optimisation" % (branch.diff_model, branch.round))
+
+                        # The initial round, optimising just the diffusion tensor.
+                        if branch.round == 0:
+                            self.diff_tensor_init()
+
+                        # Normal rounds, starting with the model-free models.
+                        else:
+                            self.load_tensor()
+                            self.multi_model_start()
+                except:
+                    processor.release_queue(run=False)
+                    raise
+                processor.release_queue()
+
+                # Minimise the models together.
+                processor.hold_queue()
+                try:
+                    for branch in branches:
+                        self.switch_branch(branch)
+                        if branch.round == 0:
+                            self.interpreter.pipe.switch(self.name_pipe(self.diff_model))
+                            self.interpreter.minimise.execute(self.min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations)
+                        else:
+                            self.multi_model_minimise()
+                except:
+                    processor.release_queue(run=False)
+                    raise
+                processor.release_queue()
+
+                # Write the initial round results, or perform the model-free model selection.
+                for branch in branches:
+                    self.switch_branch(branch)
+                    if branch.round == 0:
+                        self.interpreter.pipe.switch(self.name_pipe(self.diff_model))
+                        self.interpreter.results.write(file='results', dir=self.base_dir, force=True)
+                    else:
+                        self.multi_model_finish()
+                        self.model_selection(modsel_pipe=self.name_pipe('aic'), dir=self.base_dir + 'aic')
+
+                # Final optimisation of all diffusion and model-free parameters, minimising the models together.
+                processor.hold_queue()
+                try:
+                    for branch in branches:
+                        if branch.round == 0:
+                            continue
+                        self.switch_branch(branch)
+                        self.interpreter.pipe.switch(self.name_pipe('aic'))
+                        self.interpreter.fix('all', fixed=False)
+                        self.interpreter.minimise.execute(self.min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations)
+                except:
+                    processor.release_queue(run=False)
+                    raise
+                processor.release_queue()
+
+                # Write the results and test for convergence.
+                remaining = []
+                for branch in branches:
+                    # The initial round is always followed by round 1.
+                    if branch.round == 0:
+                        remaining.append(branch)
+                        continue
+
+                    # Write the results.
+                    self.switch_branch(branch)
+                    self.interpreter.pipe.switch(self.name_pipe('aic'))
+                    self.interpreter.results.write(file='results', dir=self.base_dir + 'opt', force=True)
+
+                    # Drop the model if automatic looping is not activated or if convergence has occurred.
+                    converged = self.convergence()
+                    if not converged and self.conv_loop:
+                        remaining.append(branch)
+                branches = remaining
+
+        # Restore the main pipe bundle and unset the status.
+        finally:
+            self.branch_bundle = self.pipe_bundle
+            status.auto_analysis[self.pipe_bundle].round = None
+
+
+    def init_conv_data(self, diff_model):
+        """Initialise the convergence data structures for the diffusion model.
+
+        @param diff_model:  The global diffusion model.
+        @type diff_model:   str
+        @return:            The convergence data container.
+        @rtype:             Container instance
+        """
+
+        # The chi-squared values, model-free models, and diffusion tensor parameters of each round.
+        conv_data = Container()
+        conv_data.chi2 = []
+        conv_data.models = []
+        conv_data.diff_vals = []
+        if diff_model == 'sphere':
+            conv_data.diff_params = ['tm']
+        elif diff_model == 'oblate' or diff_model == 'prolate':
+            conv_data.diff_params = ['tm', 'Da', 'theta', 'phi']
+        elif diff_model == 'ellipsoid':
+            conv_data.diff_params = ['tm', 'Da', 'Dr', 'alpha', 'beta', 'gamma']
+
+        # The model-free parameters of each round.
+        conv_data.spin_ids = []
+        conv_data.mf_params = []
+        conv_data.mf_vals = []
+
+        # Return the container.
+        return conv_data
+
+
     def load_tensor(self):
         """Function for loading the optimised diffusion tensor."""
 
         # Create the data pipe for the previous data (deleting the old data pipe first if necessary).
         if has_pipe(self.name_pipe('previous')):
             self.interpreter.pipe.delete(self.name_pipe('previous'))
-        self.interpreter.pipe.create(self.name_pipe('previous'), 'mf', bundle=self.pipe_bundle)
+        self.interpreter.pipe.create(self.name_pipe('previous'), 'mf', bundle=self.branch_bundle)
 
         # Load the optimised diffusion tensor from the initial round.
         if self.round == 1:
@@ -852,26 +1059,116 @@ class dAuvergne_protocol:
         # Model selection (delete the model selection pipe if it already exists).
         if has_pipe(modsel_pipe):
             self.interpreter.pipe.delete(modsel_pipe)
-        self.interpreter.model_selection(method='AIC', modsel_pipe=modsel_pipe, bundle=self.pipe_bundle, pipes=self.pipes)
+        self.interpreter.model_selection(method='AIC', modsel_pipe=modsel_pipe, bundle=self.branch_bundle, pipes=self.pipes)
 
         # Write the results.
         if write_flag:
             self.interpreter.results.write(file='results', dir=dir, force=True)
 
 
-    def multi_model(self, local_tm=False):
-        """Function for optimisation of all model-free models."""
+    def model_pipes(self, local_tm=False):
+        """Set the names of the model-free model data pipes of the current diffusion model.
 
-        # Set the data pipe names (also the names of preset model-free models).
+        @keyword local_tm:  A flag which if True will use the local tm model-free models.
+        @type local_tm:     bool
+        @return:            The model-free models.
+        @rtype:             list of str
+        """
+
+        # The models.
         if local_tm:
             models = self.local_tm_models
-            self.pipes = self.local_tm_models
         else:
             models = self.mf_models
+
+        # Set the data pipe names.
         self.pipes = []
         for i in range(len(models)):
             self.pipes.append(self.name_pipe(models[i]))
 
+        # Return the models.
+        return models
+
+
+    def multi_model(self, local_tm=False):
+        """Function for optimisation of all model-free models."""
+
+        # Set up the models and perform the grid searches.
+        self.multi_model_start(local_tm=local_tm)
+
+        # Minimise.
+        self.multi_model_minimise(local_tm=local_tm)
+
+        # Model elimination and writing of the results.
+        self.multi_model_finish(local_tm=local_tm)
+
+
+    def multi_model_finish(self, local_tm=False):
+        """Finish the optimisation of all model-free models by model elimination and writing the results.
+
+        @keyword local_tm:  A flag which if True will use the local tm model-free models.
+        @type local_tm:     bool
+        """
+
+        # The models and data pipe names.
+        models = self.model_pipes(local_tm=local_tm)
+
+        # Loop over the data pipes.
+        for i in range(len(models)):
+            # Switch to the data pipe.
+            self.interpreter.pipe.switch(self.pipes[i])
+
+            # Store the optimised values for the next round.
+            if not local_tm:
+                self.warm_start_store(models[i])
+
+            # Model elimination.
+            self.interpreter.eliminate()
+
+            # Write the results.
+            dir = self.base_dir + models[i]
+            self.interpreter.results.write(file='results', dir=dir, force=True)
+
+
+    def multi_model_minimise(self, local_tm=False):
+        """Minimise all model-free models, starting from the grid search results.
+
+        When the processor queue is held, the minimisations are only queued.
+
+
+        @keyword local_tm:  A flag which if True will use the local tm model-free models.
+        @type local_tm:     bool
+        """
+
+        # The models and data pipe names.
+        models = self.model_pipes(local_tm=local_tm)
+
+        # Loop over the data pipes.
+        for i in range(len(models)):
+            # Place the model name into the status container.
+            status.auto_analysis[self.pipe_bundle].current_model = models[i]
+
+            # Minimise.
+            self.interpreter.pipe.switch(self.pipes[i])
+            self.interpreter.minimise.execute(self.min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations)
+
+        # Unset the status.
+        status.auto_analysis[self.pipe_bundle].current_model = None
+
+
+    def multi_model_start(self, local_tm=False):
+        """Set up the data pipes of all model-free models and perform the grid searches.
+
+        When the processor queue is held, the grid searches are only queued.
+
+
+        @keyword local_tm:  A flag which if True will use the local tm model-free models.
+        @type local_tm:     bool
+        """
+
+        # The models and data pipe names.
+        models = self.model_pipes(local_tm=local_tm)
+
         # Loop over the data pipes.
         for i in range(len(models)):
             # Place the model name into the status container.
@@ -880,7 +1177,7 @@ class dAuvergne_protocol:
             # Create the data pipe (by copying).
             if has_pipe(self.pipes[i]):
                 self.interpreter.pipe.delete(self.pipes[i])
-            self.interpreter.pipe.copy(self.pipe_name, self.pipes[i], bundle_to=self.pipe_bundle)
+            self.interpreter.pipe.copy(self.pipe_name, self.pipes[i], bundle_to=self.branch_bundle)
             self.interpreter.pipe.switch(self.pipes[i])
 
             # Copy the diffusion tensor from the 'opt' data pipe and prevent it from being minimised.
@@ -891,21 +1188,30 @@ class dAuvergne_protocol:
             # Select the model-free model.
             self.interpreter.model_free.select_model(model=models[i])
 
-            # Minimise.
-            self.interpreter.minimise.grid_search(inc=self.grid_inc)
-            self.interpreter.minimise.execute(self.min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations)
-
-            # Model elimination.
-            self.interpreter.eliminate()
-
-            # Write the results.
-            dir = self.base_dir + models[i]
-            self.interpreter.results.write(file='results', dir=dir, force=True)
+            # Grid search, unless the spins can start from the optimised values of the previous round.
+            if local_tm or not self.warm_start(models[i]):
+                self.interpreter.minimise.grid_search(inc=self.grid_inc)
 
         # Unset the status.
         status.auto_analysis[self.pipe_bundle].current_model = None
 
 
+    def name_bundle(self, diff_model):
+        """Generate a unique name for the pipe bundle of a diffusion model optimised together with other models.
+
+        @param diff_model:  The global diffusion model.
+        @type diff_model:   str
+        @return:            The pipe bundle name.
+        @rtype:             str
+        """
+
+        # The unique bundle name.
+        name = "%s - %s" % (diff_model, self.pipe_bundle)
+
+        # Return the name.
+        return name
+
+
     def name_pipe(self, prefix):
         """Generate a unique name for the data pipe.
 
@@ -914,7 +1220,7 @@ class dAuvergne_protocol:
         """
 
         # The unique pipe name.
-        name = "%s - %s" % (prefix, self.pipe_bundle)
+        name = "%s - %s" % (prefix, self.branch_bundle)
 
         # Return the name.
         return name
@@ -949,6 +1255,107 @@ class dAuvergne_protocol:
         status.auto_analysis[self.pipe_bundle].convergence = False
 
 
+    def switch_branch(self, branch):
+        """Switch to the diffusion model of one branch of the concurrent optimisation of execute_branches().
+
+        @param branch:  The branch data container.
+        @type branch:   Container instance
+        """
+
+        # The diffusion model data used by the protocol methods.
+        self.diff_model = branch.diff_model
+        self.branch_bundle = branch.bundle
+        self.conv_data = branch.conv_data
+        self.start_round = branch.start_round
+        self.round = branch.round
+        self.base_dir = branch.base_dir
+
+        # Update the status.
+        status.auto_analysis[self.pipe_bundle].diff_model = self.diff_model
+        status.auto_analysis[self.pipe_bundle].round = self.round
+
+
+    def warm_start(self, model):
+        """Set the model-free parameters of the current data pipe to the optimised values of the previous round.
+
+        This is only performed if all the diffusion tensor parameters have changed by less than the warm_start_tol value since the previous round and if the values of all spins are known.
+
+
+        @param model:   The model-free model.
+        @type model:    str
+        @return:        True if the parameter values have been set and the grid search can be skipped, False otherwise.
+        @rtype:         bool
+        """
+
+        # No cached values.
+        key = (self.diff_model, model)
+        if self.warm_start_tol == None or key not in self.mf_cache:
+            return False
+        cache = self.mf_cache[key]
+
+        # The change of the diffusion tensor parameters, relative for tm and Da.
+        tensor = get_pipe(self.name_pipe('previous')).diff_tensor
+        for i in range(len(self.conv_data.diff_params)):
+            param = self.conv_data.diff_params[i]
+            change = abs(getattr(tensor, param) - cache.diff_vals[i])
+            if param in ['tm', 'Da'] and cache.diff_vals[i] != 0.0:
+                change = change / abs(cache.diff_vals[i])
+            if change > self.warm_start_tol:
+                return False
+
+        # All spins with relaxation data must have cached values.
+        for spin, spin_id in spin_loop(return_id=True):
+            if not spin.select or not hasattr(spin, 'ri_data') or spin.ri_data == None:
+                continue
+            if spin_id not in cache.spins:
+                return False
+
+        # Set the parameter values.
+        for spin, spin_id in spin_loop(return_id=True):
+            if spin_id in cache.spins:
+                for param in cache.spins[spin_id]:
+                    setattr(spin, param, cache.spins[spin_id][param])
+
+        # Printout.
+        print("The diffusion tensor has changed by less than %s, skipping the grid search and starting the model '%s' from the optimised values of the previous round." % (self.warm_start_tol, model))
+
+        # Success.
+        return True
+
+
+    def warm_start_store(self, model):
+        """Store the optimised model-free parameter values of the current data pipe for the warm start of the next round.
+
+        @param model:   The model-free model.
+        @type model:    str
+        """
+
+        # The diffusion tensor used in the optimisation.
+        cache = Container()
+        tensor = get_pipe(self.name_pipe('previous')).diff_tensor
+        cache.diff_vals = []
+        for param in self.conv_data.diff_params:
+            cache.diff_vals.append(getattr(tensor, param))
+
+        # The model-free parameter values of all optimised spins.
+        cache.spins = {}
+        for spin, spin_id in spin_loop(return_id=True):
+            # Skip spins without parameters.
+            if not hasattr(spin, 'params') or not spin.params:
+                continue
+
+            # The parameter values, skipping spins with unset values.
+            values = {}
+            for param in spin.params:
+                values[param.lower()] = getattr(spin, param.lower(), None)
+            if None in values.values():
+                continue
+            cache.spins[spin_id] = values
+
+        # Store the cache.
+        self.mf_cache[(self.diff_model, model)] = cache
+
+
     def write_results(self):
         """Create Grace plots of the final model-free results."""
 
@@ -40,6 +40,7 @@ from lib.io import determine_compression, get_file_path
 from lib.text.sectioning import section, subsection, subtitle, title
 from lib.timing import print_elapsed_time
 from lib.warnings import RelaxWarning
+from multi import Processor_box
 from pipe_control.mol_res_spin import return_spin, spin_loop
 from pipe_control.pipes import has_pipe
 from prompt.interpreter import Interpreter
@@ -56,7 +57,7 @@ class Relax_disp:
     opt_func_tol = 1e-25
     opt_max_iterations = int(1e7)
 
-    def __init__(self, pipe_name=None, pipe_bundle=None, results_dir=None, models=[MODEL_R2EFF], grid_inc=11, mc_sim_num=500, exp_mc_sim_num=None, modsel='AIC', pre_run_dir=None, optimise_r2eff=False, insignificance=0.0, numeric_only=False, mc_sim_all_models=False, eliminate=True, set_grid_r20=False, r1_fit=False):
+    def __init__(self, pipe_name=None, pipe_bundle=None, results_dir=None, models=[MODEL_R2EFF], grid_inc=11, mc_sim_num=500, exp_mc_sim_num=None, r2eff_method=None, modsel='AIC', pre_run_dir=None, optimise_r2eff=False, insignificance=0.0, numeric_only=False, mc_sim_all_models=False, eliminate=True, set_grid_r20=False, r1_fit=False):
         """Perform a full relaxation dispersion analysis for the given list of models.
 
         @keyword pipe_name:                 The name of the data pipe containing all of the data for the analysis.
@@ -73,6 +74,8 @@ class Relax_disp:
         @type mc_sim_num:                   int
         @keyword exp_mc_sim_num:            The number of Monte Carlo simulations for the error analysis in the 'R2eff' model when exponential curves are fitted.  This defaults to the value of the mc_sim_num argument when not given.  When set to '-1', the R2eff errors are estimated from the Covariance matrix.  For the 2-point fixed-time calculation for the 'R2eff' model, this argument is ignored.
         @type exp_mc_sim_num:               int or None
+        @keyword r2eff_method:              The method for the exponential curve fitting of the 'R2eff' model.  The default of None optimises the model with the minimise.execute user function, followed by the error analysis set by the exp_mc_sim_num argument.  The value of 'bulk' instead fits the curves of all spins simultaneously through the relax_disp.r2eff_estimate user function, the errors being estimated from the covariance matrix and the grid search and Monte Carlo simulations being skipped.  For the 2-point fixed-time calculation for the 'R2eff' model, this argument is ignored.
+        @type r2eff_method:                 None or str
         @keyword modsel:                    The model selection technique to use in the analysis to determine which model is the best for each spin cluster.  This can currently be one of 'AIC', 'AICc', and 'BIC'.
         @type modsel:                       str
         @keyword pre_run_dir:               The optional directory containing the dispersion auto-analysis results from a previous run.  The optimised parameters from these previous results will be used as the starting point for optimisation rather than performing a grid search.  This is essential for when large spin clusters are specified, as a grid search becomes prohibitively expensive with clusters of three or more spins.  At some point a RelaxError will occur because the grid search is impossibly large.  For the cluster specific parameters, i.e. the populations of the states and the exchange parameters, an average value will be used as the starting point.  For all other parameters, the R20 values for each spin and magnetic field, as well as the parameters related to the chemical shift difference dw, the optimised values of the previous run will be directly copied.
@@ -111,6 +114,7 @@ class Relax_disp:
             self.grid_inc = grid_inc
             self.mc_sim_num = mc_sim_num
             self.exp_mc_sim_num = exp_mc_sim_num
+            self.r2eff_method = r2eff_method
             self.models = models
             self.modsel = modsel
             self.pre_run_dir = pre_run_dir
@@ -153,6 +157,19 @@ class Relax_disp:
             status.exec_lock.release()
 
 
+    def is_bulk_r2eff(self, model=None):
+        """Determine if the curves of the 'R2eff' model are to be fitted simultaneously by the 'bulk' method.
+
+        @keyword model: The model to check.
+        @type model:    str
+        @return:        True if the 'bulk' method is to be used, False otherwise.
+        @rtype:         bool
+        """
+
+        # Only for the exponential curves of the 'R2eff' model.
+        return model == MODEL_R2EFF and self.r2eff_method == 'bulk' and has_exponential_exp_type() and not has_fixed_time_exp_type()
+
+
     def is_model_for_selection(self, model=None):
         """Determine if the model should be used for model selection.
 
@@ -189,6 +206,11 @@ class Relax_disp:
         if self.modsel not in allowed:
             raise RelaxError("The model selection technique '%s' is not in the allowed list of %s." % (self.modsel, allowed))
 
+        # Check the R2eff fitting method.
+        allowed = [None, 'bulk']
+        if self.r2eff_method not in allowed:
+            raise RelaxError("The R2eff fitting method '%s' is not in the allowed list of %s." % (self.r2eff_method, allowed))
+
         # Some warning for the user if the pure numeric solution is selected.
         if self.numeric_only:
             # Loop over all models.
@@ -357,64 +379,117 @@ class Relax_disp:
         return equivalent
 
 
-    def optimise(self, model=None, model_path=None):
-        """Optimise the model, taking model nesting into account.
+    def model_waves(self):
+        """Build the dependency graph of the models and group it into waves of independent models.
 
-        @keyword model:         The model to be optimised.
-        @type model:            str
-        @keyword model_path:    The folder name for the model, where possible spaces has been replaced with underscore.
-        @type model_path:       str
+        A model depends on the 'R2eff' model, from which the R2eff values are copied, and on the simpler model from which its parameters are nested (see the nesting() method), for example 'CR72' for 'CR72 full' or the analytic models for the numeric models.  The models of a wave only depend on models of the earlier waves, so they can be optimised at the same time.  The number of waves is the length of the longest dependency chain.
+
+
+        @return:    The list of waves, each being the list of models in the order of the models argument.
+        @rtype:     list of list of str
         """
 
-        # Printout. 
-        section(file=sys.stdout, text="Optimisation", prespace=2)
+        # The wave index of each model, being one more than that of its latest parent.
+        level = {}
+        for i in range(len(self.models)):
+            model = self.models[i]
 
-        # Deselect insignificant spins.
-        if model not in [MODEL_R2EFF, MODEL_NOREX]:
-            self.interpreter.relax_disp.insignificance(level=self.insignificance)
+            # The parent models.
+            parents = []
+            if MODEL_R2EFF in self.models[:i]:
+                parents.append(MODEL_R2EFF)
+            model_info, comparable_model_info = nesting_model(self_models=self.models, model=model)
+            if comparable_model_info != None:
+                parents.append(comparable_model_info.model)
 
-        # Speed-up grid-search by using minium R2eff value.
-        if self.set_grid_r20 and model != MODEL_R2EFF:
-            self.interpreter.relax_disp.r20_from_min_r2eff(force=True)
+            # The wave.
+            level[model] = 0
+            for parent in parents:
+                level[model] = max(level[model], level[parent] + 1)
 
-        # Use pre-run results as the optimisation starting point.
-        # Test if file exists.
-        if self.pre_run_dir:
-            path = self.pre_run_dir + sep + model_path
-            # File path.
-            file_path = get_file_path('results', path)
+        # Group the models.
+        waves = []
+        for i in range(max(level.values()) + 1):
+            waves.append([model for model in self.models if level[model] == i])
 
-            # Test if the file exists and determine the compression type.
-            try:
-                compress_type, file_path = determine_compression(file_path)
-                res_file_exists = True
+        # Return the waves.
+        return waves
 
-            except RelaxFileError:
-                res_file_exists = False
 
-        if self.pre_run_dir and res_file_exists:
-            self.pre_run_parameters(model=model, model_path=model_path)
+    def optimise_finish(self, model=None, minimised=False):
+        """Finish the optimisation of the model by model elimination and the Monte Carlo simulations.
 
-        # Otherwise use the normal nesting check and grid search if not nested.
-        else:
-            # Nested model simplification.
-            nested = self.nesting(model=model)
+        @keyword model:     The model to be optimised.
+        @type model:        str
+        @keyword minimised: The flag from optimise_minimise() specifying if the model has been minimised.
+        @type minimised:    bool
+        """
 
-            # Otherwise use a grid search of default values to start optimisation with.
-            if not nested:
-                # Grid search.
-                if self.grid_inc:
-                    self.interpreter.minimise.grid_search(inc=self.grid_inc)
+        # Model elimination.
+        if self.eliminate:
+            self.interpreter.eliminate()
 
-                # Default values.
-                else:
-                    # The standard parameters.
-                    for param in MODEL_PARAMS[model]:
-                        self.interpreter.value.set(param=param, index=None)
+        # Monte Carlo simulations.
+        do_monte_carlo = False
+        if model == MODEL_R2EFF:
+            # The constraints flag.
+            constraints = False
 
-                    # The optional R1 parameter.
-                    if is_r1_optimised(model=model):
-                        self.interpreter.value.set(param='r1', index=None)
+            # Both the Jacobian and Hessian matrix has been specified for exponential curve-fitting, allowing for the much faster algorithms to be used.
+            min_algor = 'Newton'
+
+            # Only perform the simulations if the 'r2eff' and 'r2eff_err' values have been optimised, and not by the 'bulk' method which also estimates the errors.
+            do_monte_carlo = minimised and not self.is_bulk_r2eff(model=model)
+
+        elif self.mc_sim_all_models or len(self.models) < 2:
+            do_monte_carlo = True
+            # The constraints flag.
+            constraints = True
+            # The minimisation algorithm to use. If the Jacobian and Hessian matrix have not been specified for fitting, 'simplex' should be used.
+            min_algor = 'simplex'
+
+        # Error estimation by Monte Carlo simulations.
+        if do_monte_carlo:
+            # Set the number of Monte-Carlo simulations.
+            monte_carlo_sim = self.mc_sim_num
+
+            # If the number for exponential curve fitting has been set.
+            if model == MODEL_R2EFF and self.exp_mc_sim_num != None:
+                monte_carlo_sim = self.exp_mc_sim_num
+
+            # When set to minus 1, estimation of the errors will be extracted from the covariance matrix.
+            # This is HIGHLY likely to be wrong, but can be used in an initial test fase.
+            if model == MODEL_R2EFF and self.exp_mc_sim_num == -1:
+                # Print
+                subsection(file=sys.stdout, text="Estimating errors from Covariance matrix", prespace=1)
+
+                # Raise warning.
+                text = 'Estimating errors from the Covariance matrix is highly likely to be "quite" wrong.  Use only with extreme care, and for initial rapid testing of your data.'
+                warn(RelaxWarning(text))
+
+                # Estimate errors
+                self.interpreter.relax_disp.r2eff_err_estimate()
+            else:
+                self.interpreter.monte_carlo.setup(number=monte_carlo_sim)
+                self.interpreter.monte_carlo.create_data()
+                self.interpreter.monte_carlo.initial_values()
+                self.interpreter.minimise.execute(min_algor=min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations, constraints=constraints)
+                if self.eliminate:
+                    self.interpreter.eliminate()
+                self.interpreter.monte_carlo.error_analysis()
+
+
+    def optimise_minimise(self, model=None):
+        """Minimise the model, starting from the parameter values of optimise_start().
+
+        When the processor queue is held, the minimisation is only queued.
+
+
+        @keyword model: The model to be optimised.
+        @type model:    str
+        @return:        True if the model has been minimised, False if the optimisation of the previous R2eff values has been skipped.
+        @rtype:         bool
+        """
 
         # 'R2eff' model minimisation flags.
         do_minimise = False
@@ -457,71 +532,79 @@ class Relax_disp:
             # The minimisation algorithm to use. If the Jacobian and Hessian matrix have not been specified for fitting, 'simplex' should be used.
             min_algor = 'simplex'
 
+        # Fit all R2eff curves simultaneously.
+        if do_minimise and self.is_bulk_r2eff(model=model):
+            self.interpreter.relax_disp.r2eff_estimate(method='bulk')
+
         # Do the minimisation.
-        if do_minimise:
+        elif do_minimise:
             self.interpreter.minimise.execute(min_algor=min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations, constraints=constraints)
 
-        # Model elimination.
-        if self.eliminate:
-            self.interpreter.eliminate()
+        # Return the flag.
+        return do_minimise
 
-        # Monte Carlo simulations.
-        do_monte_carlo = False
-        if model == MODEL_R2EFF:
-            # The constraints flag.
-            constraints = False
 
-            # Both the Jacobian and Hessian matrix has been specified for exponential curve-fitting, allowing for the much faster algorithms to be used.
-            min_algor = 'Newton'
+    def optimise_start(self, model=None, model_path=None):
+        """Set the starting point of the optimisation of the model, taking model nesting into account.
 
-            # Skip optimisation, if 'r2eff' + 'r2eff_err' is present and flag for forcing optimisation is not raised.
-            if has_r2eff and not self.optimise_r2eff:
-                pass
+        When the processor queue is held, the grid search is only queued.
 
-            # Do optimisation, if 'r2eff' + 'r2eff_err' is present and flag for forcing optimisation is raised.
-            elif has_r2eff and self.optimise_r2eff:
-                do_monte_carlo = True
 
-            # Optimise, if no R2eff and error is present.
-            elif not has_r2eff:
-                do_monte_carlo = True
+        @keyword model:         The model to be optimised.
+        @type model:            str
+        @keyword model_path:    The folder name for the model, where possible spaces has been replaced with underscore.
+        @type model_path:       str
+        """
 
-        elif self.mc_sim_all_models or len(self.models) < 2:
-            do_monte_carlo = True
-            # The constraints flag.
-            constraints = True
-            # The minimisation algorithm to use. If the Jacobian and Hessian matrix have not been specified for fitting, 'simplex' should be used.
-            min_algor = 'simplex'
+        # Printout. 
+        section(file=sys.stdout, text="Optimisation", prespace=2)
 
-        # Error estimation by Monte Carlo simulations.
-        if do_monte_carlo:
-            # Set the number of Monte-Carlo simulations.
-            monte_carlo_sim = self.mc_sim_num
+        # Deselect insignificant spins.
+        if model not in [MODEL_R2EFF, MODEL_NOREX]:
+            self.interpreter.relax_disp.insignificance(level=self.insignificance)
 
-            # If the number for exponential curve fitting has been set.
-            if model == MODEL_R2EFF and self.exp_mc_sim_num != None:
-                monte_carlo_sim = self.exp_mc_sim_num
+        # Speed-up grid-search by using minium R2eff value.
+        if self.set_grid_r20 and model != MODEL_R2EFF:
+            self.interpreter.relax_disp.r20_from_min_r2eff(force=True)
 
-            # When set to minus 1, estimation of the errors will be extracted from the covariance matrix.
-            # This is HIGHLY likely to be wrong, but can be used in an initial test fase.
-            if model == MODEL_R2EFF and self.exp_mc_sim_num == -1:
-                # Print
-                subsection(file=sys.stdout, text="Estimating errors from Covariance matrix", prespace=1)
+        # Use pre-run results as the optimisation starting point.
+        # Test if file exists.
+        if self.pre_run_dir:
+            path = self.pre_run_dir + sep + model_path
+            # File path.
+            file_path = get_file_path('results', path)
 
-                # Raise warning.
-                text = 'Estimating errors from the Covariance matrix is highly likely to be "quite" wrong.  Use only with extreme care, and for initial rapid testing of your data.'
-                warn(RelaxWarning(text))
+            # Test if the file exists and determine the compression type.
+            try:
+                compress_type, file_path = determine_compression(file_path)
+                res_file_exists = True
 
-                # Estimate errors
-                self.interpreter.relax_disp.r2eff_err_estimate()
-            else:
-                self.interpreter.monte_carlo.setup(number=monte_carlo_sim)
-                self.interpreter.monte_carlo.create_data()
-                self.interpreter.monte_carlo.initial_values()
-                self.interpreter.minimise.execute(min_algor=min_algor, func_tol=self.opt_func_tol, max_iter=self.opt_max_iterations, constraints=constraints)
-                if self.eliminate:
-                    self.interpreter.eliminate()
-                self.interpreter.monte_carlo.error_analysis()
+            except RelaxFileError:
+                res_file_exists = False
+
+        if self.pre_run_dir and res_file_exists:
+            self.pre_run_parameters(model=model, model_path=model_path)
+
+        # Otherwise use the normal nesting check and grid search if not nested.
+        else:
+            # Nested model simplification.
+            nested = self.nesting(model=model)
+
+            # Otherwise use a grid search of default values to start optimisation with (the 'bulk' R2eff method starts from the log-linear estimates).
+            if not nested and not self.is_bulk_r2eff(model=model):
+                # Grid search.
+                if self.grid_inc:
+                    self.interpreter.minimise.grid_search(inc=self.grid_inc)
+
+                # Default values.
+                else:
+                    # The standard parameters.
+                    for param in MODEL_PARAMS[model]:
+                        self.interpreter.value.set(param=param, index=None)
+
+                    # The optional R1 parameter.
+                    if is_r1_optimised(model=model):
+                        self.interpreter.value.set(param='r1', index=None)
 
 
     def pre_run_parameters(self, model=None, model_path=None):
@@ -573,60 +656,61 @@ class Relax_disp:
             # No print out.
             self.interpreter.relax_disp.r1_fit(fit=self.r1_fit)
 
-        # Loop over the models.
+        # The models for the model selection.
         self.model_pipes = []
         for model in self.models:
-            # Printout.
-            subtitle(file=sys.stdout, text="The '%s' model" % model, prespace=3)
-
-            # The results directory path.
-            model_path = model.replace(" ", "_")
-            path = self.results_dir+sep+model_path
-
-            # The name of the data pipe for the model.
-            model_pipe = self.name_pipe(model)
             if self.is_model_for_selection(model):
-                self.model_pipes.append(model_pipe)
-
-            # Check that results do not already exist - i.e. a previous run was interrupted.
-            path1 = path + sep + 'results'
-            path2 = path1 + '.bz2'
-            path3 = path1 + '.gz'
-            if access(path1, F_OK) or access(path2, F_OK) or access(path2, F_OK):
-                # Printout.
-                print("Detected the presence of results files for the '%s' model - loading these instead of performing optimisation for a second time." % model)
+                self.model_pipes.append(self.name_pipe(model))
 
-                # Create a data pipe and switch to it.
-                self.interpreter.pipe.create(pipe_name=model_pipe, pipe_type='relax_disp', bundle=self.pipe_bundle)
-                self.interpreter.pipe.switch(model_pipe)
-
-                # Load the results.
-                self.interpreter.results.read(file='results', dir=path)
-
-                # Jump to the next model.
-                continue
+        # Get the Processor box singleton (it contains the Processor instance) and alias the Processor.
+        processor_box = Processor_box() 
+        processor = processor_box.processor
 
-            # Create the data pipe by copying the base pipe, then switching to it.
-            self.interpreter.pipe.copy(pipe_from=self.pipe_name, pipe_to=model_pipe, bundle_to=self.pipe_bundle)
-            self.interpreter.pipe.switch(model_pipe)
+        # Loop over the waves of independent models.
+        for wave in self.model_waves():
+            # Set up the models, executing their grid searches together.
+            processor.hold_queue()
+            try:
+                models = []
+                for model in wave:
+                    if self.setup_model(model):
+                        models.append(model)
+            except:
+                processor.release_queue(run=False)
+                raise
+            processor.release_queue()
+
+            # Minimise the models together.
+            minimised = {}
+            processor.hold_queue()
+            try:
+                for model in models:
+                    # Switch to the data pipe.
+                    self.interpreter.pipe.switch(self.name_pipe(model))
 
-            # Select the model.
-            self.interpreter.relax_disp.select_model(model)
+                    # Calculate the R2eff values for the fixed relaxation time period data types.
+                    if model == MODEL_R2EFF and not has_exponential_exp_type():
+                        self.interpreter.minimise.calculate()
 
-            # Copy the R2eff values from the R2eff model data pipe.
-            if model != MODEL_R2EFF and MODEL_R2EFF in self.models:
-                self.interpreter.value.copy(pipe_from=self.name_pipe(MODEL_R2EFF), pipe_to=model_pipe, param='r2eff')
+                    # Optimise the model.
+                    else:
+                        minimised[model] = self.optimise_minimise(model=model)
+            except:
+                processor.release_queue(run=False)
+                raise
+            processor.release_queue()
 
-            # Calculate the R2eff values for the fixed relaxation time period data types.
-            if model == MODEL_R2EFF and not has_exponential_exp_type():
-                self.interpreter.minimise.calculate()
+            # Finish each model.
+            for model in models:
+                # Switch to the data pipe.
+                self.interpreter.pipe.switch(self.name_pipe(model))
 
-            # Optimise the model.
-            else:
-                self.optimise(model=model, model_path=model_path)
+                # Model elimination and error analysis.
+                if model in minimised:
+                    self.optimise_finish(model=model, minimised=minimised[model])
 
-            # Write out the results.
-            self.write_results(path=path, model=model)
+                # Write out the results.
+                self.write_results(path=self.results_dir+sep+model.replace(" ", "_"), model=model)
 
         # The final model selection data pipe.
         if len(self.models) >= 2:
@@ -657,6 +741,65 @@ class Relax_disp:
         self.interpreter.state.save(state='final_state', dir=self.results_dir, force=True)
 
 
+    def setup_model(self, model=None):
+        """Create the data pipe for the model and set the starting point of its optimisation.
+
+        If the results of an interrupted run are present, these are loaded instead.  When the processor queue is held, the grid search is only queued.
+
+
+        @keyword model: The model to set up.
+        @type model:    str
+        @return:        True if the model is to be optimised, False if the previous results have been loaded.
+        @rtype:         bool
+        """
+
+        # Printout.
+        subtitle(file=sys.stdout, text="The '%s' model" % model, prespace=3)
+
+        # The results directory path.
+        model_path = model.replace(" ", "_")
+        path = self.results_dir+sep+model_path
+
+        # The name of the data pipe for the model.
+        model_pipe = self.name_pipe(model)
+
+        # Check that results do not already exist - i.e. a previous run was interrupted.
+        path1 = path + sep + 'results'
+        path2 = path1 + '.bz2'
+        path3 = path1 + '.gz'
+        if access(path1, F_OK) or access(path2, F_OK) or access(path2, F_OK):
+            # Printout.
+            print("Detected the presence of results files for the '%s' model - loading these instead of performing optimisation for a second time." % model)
+
+            # Create a data pipe and switch to it.
+            self.interpreter.pipe.create(pipe_name=model_pipe, pipe_type='relax_disp', bundle=self.pipe_bundle)
+            self.interpreter.pipe.switch(model_pipe)
+
+            # Load the results.
+            self.interpreter.results.read(file='results', dir=path)
+
+            # Nothing more to do.
+            return False
+
+        # Create the data pipe by copying the base pipe, then switching to it.
+        self.interpreter.pipe.copy(pipe_from=self.pipe_name, pipe_to=model_pipe, bundle_to=self.pipe_bundle)
+        self.interpreter.pipe.switch(model_pipe)
+
+        # Select the model.
+        self.interpreter.relax_disp.select_model(model)
+
+        # Copy the R2eff values from the R2eff model data pipe.
+        if model != MODEL_R2EFF and MODEL_R2EFF in self.models:
+            self.interpreter.value.copy(pipe_from=self.name_pipe(MODEL_R2EFF), pipe_to=model_pipe, param='r2eff')
+
+        # Set the starting point of the optimisation, with the fixed relaxation time period R2eff values being calculated instead.
+        if model != MODEL_R2EFF or has_exponential_exp_type():
+            self.optimise_start(model=model, model_path=model_path)
+
+        # The model is to be optimised.
+        return True
+
+
     def write_results(self, path=None, model=None):
         """Create a set of results, text and Grace files for the current data pipe.
 
@@ -247,6 +247,7 @@
 
 # Python module imports.
 from math import pi
+from numpy import ndarray, where
 
 
 # The main functions for the calculation of the Ri components.
@@ -521,11 +522,11 @@ def r1_comps(data, i, params):
     """Calculate the r1 function components."""
 
     # Dipolar constant function value.
-    if data.r_i:
+    if data.r_i is not None:
         comp_dip_const_func(data, params[data.r_i])
 
     # CSA constant function value.
-    if data.csa_i:
+    if data.csa_i is not None:
         comp_csa_const_func(data, params[data.csa_i])
 
     # Dipolar constant components.
@@ -815,11 +816,11 @@ def dr1_comps(data, i, params):
     """Calculate the dr1 gradient components."""
 
     # Dipolar constant gradient value.
-    if data.r_i:
+    if data.r_i is not None:
         comp_dip_const_grad(data, params[data.r_i])
 
     # CSA constant gradient value.
-    if data.csa_i:
+    if data.csa_i is not None:
         comp_csa_const_grad(data, params[data.csa_i])
 
     # Dipolar constant components.
@@ -969,11 +970,11 @@ def d2r1_comps(data, i, params):
     """Calculate the d2ri Hessian components."""
 
     # Dipolar constant gradient value.
-    if data.r_i:
+    if data.r_i is not None:
         comp_dip_const_hess(data, params[data.r_i])
 
     # CSA constant gradient value.
-    if data.csa_i:
+    if data.csa_i is not None:
         comp_csa_const_hess(data, params)
 
     # Dipolar constant components.
@@ -1042,7 +1043,13 @@ def comp_dip_const_func(data, bond_length):
                            4   \ 4.pi /         <r**6>
     """
 
-    if bond_length == 0.0:
+    # The bond lengths of stacked spins, handling the zero values element-wise.
+    if isinstance(bond_length, ndarray):
+        zero = bond_length == 0.0
+        data.dip_const_func = where(zero, 1e99, 0.25 * data.dip_const_fixed * where(zero, 1.0, bond_length)**-6)
+
+    # A single bond length.
+    elif bond_length == 0.0:
         data.dip_const_func = 1e99
     else:
         data.dip_const_func = 0.25 * data.dip_const_fixed * bond_length**-6
@@ -1062,7 +1069,13 @@ def comp_dip_const_grad(data, bond_length):
                              2   \ 4.pi /         <r**7>
     """
 
-    if bond_length == 0.0:
+    # The bond lengths of stacked spins, handling the zero values element-wise.
+    if isinstance(bond_length, ndarray):
+        zero = bond_length == 0.0
+        data.dip_const_grad = where(zero, 1e99, -1.5 * data.dip_const_fixed * where(zero, 1.0, bond_length)**-7)
+
+    # A single bond length.
+    elif bond_length == 0.0:
         data.dip_const_grad = 1e99
     else:
         data.dip_const_grad = -1.5 * data.dip_const_fixed * bond_length**-7
@@ -1082,7 +1095,13 @@ def comp_dip_const_hess(data, bond_length):
                            2    \ 4.pi /         <r**8>
     """
 
-    if bond_length == 0.0:
+    # The bond lengths of stacked spins, handling the zero values element-wise.
+    if isinstance(bond_length, ndarray):
+        zero = bond_length == 0.0
+        data.dip_const_hess = where(zero, 1e99, 10.5 * data.dip_const_fixed * where(zero, 1.0, bond_length)**-8)
+
+    # A single bond length.
+    elif bond_length == 0.0:
         data.dip_const_hess = 1e99
     else:
         data.dip_const_hess = 10.5 * data.dip_const_fixed * bond_length**-8
@@ -23,7 +23,54 @@
 """Module for exponential curve-fitting."""
 
 # Python module imports.
-from math import exp
+import numpy
+from numpy import array, exp, float64, isfinite, log, nonzero, ones, sqrt, transpose, where, zeros
+from numpy.linalg import LinAlgError
+
+# relax module imports.
+from lib.statistics import multifit_covar
+
+
+def estimate_x0_exponential_2param_neg(times=None, values=None, errors=None, mask=None):
+    """Estimate the rates and initial intensities of a set of two parameter decreasing exponential curves.
+
+    Each curve is converted to the linear problem ln(I[j]) = ln(i0) - rate * t[j], which is solved by the weighted linear least squares for all curves simultaneously.  The weight of each point is the inverse variance of ln(I[j]), i.e. (I[j] / sigma[j])^2.  Points with non-positive intensities are skipped.
+
+
+    @keyword times:     The time points of each curve.
+    @type times:        numpy rank-2 float array of rank [N][T]
+    @keyword values:    The measured intensity values of each curve.
+    @type values:       numpy rank-2 float array of rank [N][T]
+    @keyword errors:    The standard deviation of the measured intensity values.
+    @type errors:       numpy rank-2 float array of rank [N][T]
+    @keyword mask:      The flags which are True for the real data points and False for the padding of the shorter curves.
+    @type mask:         numpy rank-2 bool array of rank [N][T]
+    @return:            The estimated rates and initial intensities.
+    @rtype:             numpy rank-1 float array of rank [N], numpy rank-1 float array of rank [N]
+    """
+
+    # The weights of the log-linear problem, excluding the padding and non-positive intensities.
+    valid = mask & (values > 0.0)
+    safe_values = where(valid, values, 1.0)
+    w = where(valid, (safe_values / where(valid, errors, 1.0))**2, 0.0)
+    ln_values = log(safe_values)
+
+    # The weighted sums.
+    sw = numpy.sum(w, axis=1)
+    swt = numpy.sum(w*times, axis=1)
+    swtt = numpy.sum(w*times**2, axis=1)
+    swl = numpy.sum(w*ln_values, axis=1)
+    swtl = numpy.sum(w*times*ln_values, axis=1)
+
+    # Solve the normal equations, falling back to a flat curve through the largest intensity for the degenerate cases.
+    det = sw*swtt - swt**2
+    ok = (det > 0.0) & isfinite(det)
+    det = where(ok, det, 1.0)
+    rate = where(ok, (swt*swl - sw*swtl) / det, 0.0)
+    i0 = where(ok, exp((swtt*swl - swt*swtl) / det), where(mask, values, 0.0).max(axis=1))
+
+    # Return the estimates.
+    return rate, i0
 
 
 def exponential_2param_neg(rate=None, i0=None, x=None, y=None):
@@ -45,3 +92,129 @@ def exponential_2param_neg(rate=None, i0=None, x=None, y=None):
     # Loop over the x-values.
     for i in range(len(x)):
         y[i] = i0 * exp(-rate*x[i])
+
+
+def fit_exponential_2param_neg(times=None, values=None, errors=None, mask=None, ftol=1e-15, xtol=1e-15, max_iterations=1000, epsrel=0.0):
+    """Fit a set of two parameter decreasing exponential curves simultaneously, returning the parameters and their errors.
+
+    All curves are stacked into [N][T] arrays, the shorter curves being padded and the padding excluded via the mask, and fitted by a vectorised Levenberg-Marquardt optimisation of the chi-squared value.  The starting positions are the log-linear estimates of estimate_x0_exponential_2param_neg().  The damping factor and convergence is tracked for each curve separately, and only the curves which have not converged are updated in each iteration.  A curve is converged when an accepted step decreases the chi-squared value by a relative amount of no more than ftol, when the relative parameter step is no more than xtol, or when no step decreasing the chi-squared value can be found.
+
+    The parameter errors are the square roots of the diagonal of the covariance matrix calculated by lib.statistics.multifit_covar() from the Jacobian at the optimised position, using the weights 1/sigma^2.
+
+
+    @keyword times:             The time points of each curve.
+    @type times:                numpy rank-2 float array of rank [N][T]
+    @keyword values:            The measured intensity values of each curve.
+    @type values:               numpy rank-2 float array of rank [N][T]
+    @keyword errors:            The standard deviation of the measured intensity values.
+    @type errors:               numpy rank-2 float array of rank [N][T]
+    @keyword mask:              The flags which are True for the real data points and False for the padding of the shorter curves.  If not supplied, all points are used.
+    @type mask:                 None or numpy rank-2 bool array of rank [N][T]
+    @keyword ftol:              The relative chi-squared decrease tolerance for convergence.
+    @type ftol:                 float
+    @keyword xtol:              The relative parameter step tolerance for convergence.
+    @type xtol:                 float
+    @keyword max_iterations:    The maximum number of iterations for each curve.
+    @type max_iterations:       int
+    @keyword epsrel:            Any columns of R which satisfy |R_{kk}| <= epsrel |R_{11}| are considered linearly-dependent and are excluded from the covariance matrix.
+    @type epsrel:               float
+    @return:                    The optimised [rate, i0] parameters, their errors, the chi-squared values, the number of iterations, the number of function calls and the convergence flags of each curve.
+    @rtype:                     numpy float array of rank [N][2], numpy float array of rank [N][2], numpy float array of rank [N], numpy int array of rank [N], numpy int array of rank [N], numpy bool array of rank [N]
+    """
+
+    # The data structures, with the padding neutralised.
+    times = array(times, float64)
+    values = array(values, float64)
+    errors = array(errors, float64)
+    if mask is None:
+        mask = ones(values.shape, bool)
+    mask = array(mask, bool)
+    times = where(mask, times, 0.0)
+    values = where(mask, values, 0.0)
+    errors = where(mask, errors, 1.0)
+    weights = where(mask, 1.0 / errors**2, 0.0)
+    N = values.shape[0]
+
+    # The starting positions and their chi-squared values.
+    rate, i0 = estimate_x0_exponential_2param_neg(times=times, values=values, errors=errors, mask=mask)
+    chi2 = numpy.sum(weights * (values - i0[:, None] * exp(-rate[:, None] * times))**2, axis=1)
+    chi2 = where(isfinite(chi2), chi2, 1e100)
+
+    # The per curve optimisation state.
+    damping = zeros(N, float64) + 1e-3
+    iter_count = zeros(N, int)
+    f_count = ones(N, int)
+    converged = zeros(N, bool)
+
+    # The Levenberg-Marquardt iterations.
+    for k in range(max_iterations):
+        # The active curves.
+        active = nonzero(~converged)[0]
+        if not len(active):
+            break
+        t = times[active]
+        y = values[active]
+        w = weights[active]
+        r = rate[active]
+        a = i0[active]
+        lam = damping[active]
+        chi2_a = chi2[active]
+
+        # The back calculated values, residuals and Jacobian.
+        e = exp(-r[:, None] * t)
+        res = y - a[:, None] * e
+        jr = -a[:, None] * t * e
+
+        # The 2x2 normal equations.
+        a11 = numpy.sum(w*jr*jr, axis=1)
+        a12 = numpy.sum(w*jr*e, axis=1)
+        a22 = numpy.sum(w*e*e, axis=1)
+        g1 = numpy.sum(w*jr*res, axis=1)
+        g2 = numpy.sum(w*e*res, axis=1)
+
+        # The damped Gauss-Newton step.
+        b11 = a11 * (1.0 + lam)
+        b22 = a22 * (1.0 + lam)
+        det = b11*b22 - a12**2
+        det = where(det == 0.0, 1e-300, det)
+        dr = (b22*g1 - a12*g2) / det
+        da = (b11*g2 - a12*g1) / det
+
+        # The trial position.
+        r_new = r + dr
+        a_new = a + da
+        chi2_new = numpy.sum(w * (y - a_new[:, None] * exp(-r_new[:, None] * t))**2, axis=1)
+        accept = isfinite(chi2_new) & (chi2_new < chi2_a)
+
+        # Update the accepted curves and the damping.
+        rate[active] = where(accept, r_new, r)
+        i0[active] = where(accept, a_new, a)
+        chi2[active] = where(accept, chi2_new, chi2_a)
+        damping[active] = where(accept, lam * 0.1, lam * 10.0)
+        iter_count[active] += 1
+        f_count[active] += 1
+
+        # Convergence.
+        small_f = accept & (chi2_a - chi2_new <= ftol * chi2_a)
+        small_x = (numpy.abs(dr) <= xtol * (numpy.abs(r) + xtol)) & (numpy.abs(da) <= xtol * (numpy.abs(a) + xtol))
+        stuck = (damping[active] > 1e16) | (chi2_a == 0.0)
+        converged[active] = small_f | small_x | stuck
+
+    # The parameter errors from the covariance matrix.
+    params = transpose(array([rate, i0]))
+    param_errors = zeros((N, 2), float64)
+    for i in range(N):
+        # The Jacobian of the real data points.
+        t = times[i][mask[i]]
+        e = exp(-rate[i] * t)
+        J = transpose(array([-i0[i] * t * e, e]))
+
+        # The covariance matrix, with infinite errors for the singular cases.
+        try:
+            pcov = multifit_covar(J=J, epsrel=epsrel, weights=weights[i][mask[i]])
+            param_errors[i] = sqrt(pcov.diagonal())
+        except LinAlgError:
+            param_errors[i] = float('inf')
+
+    # Return the results.
+    return params, param_errors, chi2, iter_count, f_count, converged
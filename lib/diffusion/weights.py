@@ -22,7 +22,6 @@
 
 # Python module imports.
 from math import sqrt
-from numpy import outer
 
 
 ##########
@@ -137,7 +136,7 @@ def calc_spheroid_d2ci(data, diff_data):
     """
 
     # Outer product.
-    op = outer(data.ddz_dO, data.ddz_dO)
+    op = data.ddz_dO[:, None] * data.ddz_dO[None, :]
 
     # Hessian.
     data.d2ci[2:, 2:, 0] = 3.0 * ((9.0 * data.dz**2 - 1.0) * op  +  data.dz * data.three_dz2_one * data.d2dz_dO2)
@@ -788,18 +787,18 @@ def calc_ellipsoid_d2ci(data, diff_data):
     ###############################
 
     # Outer products.
-    op_xx = outer(data.ddx_dO, data.ddx_dO)
-    op_yy = outer(data.ddy_dO, data.ddy_dO)
-    op_zz = outer(data.ddz_dO, data.ddz_dO)
+    op_xx = data.ddx_dO[:, None] * data.ddx_dO[None, :]
+    op_yy = data.ddy_dO[:, None] * data.ddy_dO[None, :]
+    op_zz = data.ddz_dO[:, None] * data.ddz_dO[None, :]
 
-    op_xy = outer(data.ddx_dO, data.ddy_dO)
-    op_yx = outer(data.ddy_dO, data.ddx_dO)
+    op_xy = data.ddx_dO[:, None] * data.ddy_dO[None, :]
+    op_yx = data.ddy_dO[:, None] * data.ddx_dO[None, :]
 
-    op_xz = outer(data.ddx_dO, data.ddz_dO)
-    op_zx = outer(data.ddz_dO, data.ddx_dO)
+    op_xz = data.ddx_dO[:, None] * data.ddz_dO[None, :]
+    op_zx = data.ddz_dO[:, None] * data.ddx_dO[None, :]
 
-    op_yz = outer(data.ddy_dO, data.ddz_dO)
-    op_zy = outer(data.ddz_dO, data.ddy_dO)
+    op_yz = data.ddy_dO[:, None] * data.ddz_dO[None, :]
+    op_zy = data.ddz_dO[:, None] * data.ddy_dO[None, :]
 
     # Components.
     x_comp = data.dx * data.d2dx_dO2 + op_xx
@@ -311,3 +311,100 @@ def r2eff_B14(r20a=None, r20b=None, pA=None, dw=None, dw_orig=None, kex=None, nc
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r2eff_B14_derivs(r20a=None, r20b=None, pA=None, dw=None, kex=None, ncyc=None, inv_tcpmg=None, tcp=None):
+    """Calculate the R2eff values together with their first and second partial derivatives for the B14 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  For the reduced B14 model, the same jet is given for r20a and r20b.  The values which r2eff_B14() replaces are replaced in the same way, together with their derivatives.  The g3 and g4 values are the real and imaginary parts of the principal square root of Psi - i.zeta.
+
+
+    @keyword r20a:          The R20 parameter value of state A (R2 with no exchange).
+    @type r20a:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword r20b:          The R20 parameter value of state B (R2 with no exchange).
+    @type r20b:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword pA:            The population of state A.
+    @type pA:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:            The chemical exchange difference between states A and B in rad/s.
+    @type dw:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:           The kex parameter value (the exchange rate in rad/s).
+    @type kex:              Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword ncyc:          The matrix exponential power array. The number of CPMG blocks.
+    @type ncyc:             numpy int array of rank [NE][NS][NM][NO][ND]
+    @keyword inv_tcpmg:     The inverse of the total duration of the CPMG element (in inverse seconds).
+    @type inv_tcpmg:        numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword tcp:           The tau_CPMG times (1 / 4.nu1).
+    @type tcp:              numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                The R2eff values and their partial derivatives.
+    @rtype:                 Jet instance
+    """
+
+    # Repetitive calculations.
+    k_BA = pA * kex
+    k_AB = (1.0 - pA) * kex
+    deltaR2 = r20a - r20b
+    dw2 = dw**2
+    two_tcp = 2.0 * tcp
+
+    # The alpha, zeta and Psi values.
+    alpha_m = deltaR2 + k_AB - k_BA
+    zeta = 2.0 * dw * alpha_m
+    Psi = alpha_m**2 + 4.0 * k_BA * k_AB - dw2
+
+    # The g3 and g4 values.
+    N = (Psi - zeta*1j).sqrt()
+    g3 = N.real()
+    g4 = N.imag()
+    g32 = g3**2
+    g42 = g4**2
+    NNc = g32 + g42
+
+    # The F factors.
+    F0 = (dw2 + g32) / NNc
+    F2 = (dw2 - g42) / NNc
+    F1b = (dw + g4) * (dw - g3*1j) / NNc
+    F1a_plus_b = (2. * dw2 + zeta*1j) / NNc
+
+    # The E factors.
+    E0 = two_tcp * g3
+    E2 = two_tcp * g4
+    E1 = (g3 - g4*1j) * tcp
+
+    # Catch math domain error of sinh(val > 710), setting E0 to 1.
+    mask_max_e = E0.value >= 700.0
+    E0 = E0.replace(mask_max_e, 1.0)
+
+    # The v factors.
+    v1s = F0 * E0.sinh() - F2 * E2.sin()*1j
+    v4 = F1b * (-alpha_m - g3) + F1b * (dw - g4)*1j
+    v5 = (-deltaR2 + kex + dw*1j) * v1s - 2. * (v4 + k_AB * F1a_plus_b) * E1.sinh()
+    v1c = F0 * E0.cosh() - F2 * E2.cos()
+
+    # Catch math domain error of sqrt of negative, setting v1c to 1.
+    mask_v1c_less_one = v1c.value.real < 1.0
+    v1c = v1c.replace(mask_v1c_less_one, 1.0)
+    v3 = (v1c**2 - 1.).sqrt()
+
+    # The Tog value, catching the division by zero.
+    y = ((v1c - v3) / (v1c + v3))**ncyc
+    Tog_div = 2. * v3 * N
+    mask_v3_N_zero = Tog_div.value == 0.0
+    Tog = 0.5 * (1. + y) + (1. - y) * v5 / Tog_div.replace(mask_v3_N_zero, 1.0)
+
+    # Catch math domain error of log of negative, setting Tog.real to 1.
+    Tog_real = Tog.real()
+    mask_log_tog_neg = Tog_real.value < 0.0
+    Tog_real = Tog_real.replace(mask_log_tog_neg, 1.0)
+
+    # The R2eff values.
+    back_calc = (r20a + r20b + kex) / 2.0 - (v1c.real().arccosh() * ncyc + Tog_real.log()) * inv_tcpmg
+
+    # Replace the values for dw = 0 and for E0 above 700 with R20A.
+    back_calc = back_calc.replace(dw.value == 0.0, r20a)
+    back_calc = back_calc.replace(mask_max_e, r20a)
+
+    # The fill values of the math domain errors.
+    back_calc = back_calc.replace(mask_v1c_less_one | mask_v3_N_zero | mask_log_tog_neg, 1e100)
+
+    # No exchange, for kex = 0 or pA = 1.
+    return back_calc.replace((kex.value == 0.0) | (pA.value == 1.0), r20a)
@@ -206,3 +206,69 @@ def r2eff_CR72(r20a=None, r20a_orig=None, r20b=None, r20b_orig=None, pA=None, dw
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r2eff_CR72_derivs(r20a=None, r20b=None, pA=None, dw=None, kex=None, cpmg_frqs=None, cluster_axes=None):
+    """Calculate the R2eff values together with their first and second partial derivatives for the CR72 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  For the reduced CR72 model, the same jet is given for r20a and r20b.  The values which r2eff_CR72() replaces are replaced in the same way, together with their derivatives.  The invalid arccosh argument is tested for each cluster, as given by the cluster axes.
+
+
+    @keyword r20a:          The R20 parameter value of state A (R2 with no exchange).
+    @type r20a:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword r20b:          The R20 parameter value of state B (R2 with no exchange).
+    @type r20b:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword pA:            The population of state A.
+    @type pA:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:            The chemical exchange difference between states A and B in rad/s.
+    @type dw:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:           The kex parameter value (the exchange rate in rad/s).
+    @type kex:              Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword cpmg_frqs:     The CPMG nu1 frequencies.
+    @type cpmg_frqs:        numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword cluster_axes:  The axes of the values spanning a single cluster of spins, excluding the leading grid dimension and, for stacked clusters, the spin dimension.  If None, all values belong to one cluster.
+    @type cluster_axes:     None or tuple of int
+    @return:                The R2eff values and their partial derivatives.
+    @rtype:                 Jet instance
+    """
+
+    # Repetitive calculations.
+    dw2 = dw**2
+    r20_kex = (r20a + r20b + kex) / 2.0
+    k_BA = pA * kex
+    k_AB = (1.0 - pA) * kex
+
+    # The Psi and zeta values.
+    fact = r20a - r20b - k_BA + k_AB
+    Psi = fact**2 - dw2 + 4.0*k_BA*k_AB
+    zeta = 2.0*dw * fact
+
+    # More repetitive calculations.
+    sqrt_psi2_zeta2 = (Psi**2 + zeta**2).sqrt()
+
+    # The D+/- values.
+    D_part = (0.5*Psi + dw2) / sqrt_psi2_zeta2
+    Dpos = 0.5 + D_part
+    Dneg = -0.5 + D_part
+
+    # The eta+/- values.
+    eta_fact = eta_scale / cpmg_frqs
+    etapos = (Psi + sqrt_psi2_zeta2).sqrt() * eta_fact
+    etaneg = (-Psi + sqrt_psi2_zeta2).sqrt() * eta_fact
+
+    # Catch math domain error of cosh(val > 710), setting etapos to 1 for the arccosh argument.
+    mask_max_etapos = etapos.value >= 700.0
+    fact = Dpos * etapos.replace(mask_max_etapos, 1.0).cosh() - Dneg * etaneg.cos()
+
+    # The R2eff values.
+    back_calc = r20_kex - fact.arccosh() * cpmg_frqs
+
+    # Replace the values for dw = 0 and for etapos above 700 with R20A.
+    back_calc = back_calc.replace(dw.value == 0.0, r20a)
+    back_calc = back_calc.replace(mask_max_etapos, r20a)
+
+    # The invalid arccosh arguments of a cluster.
+    back_calc = back_calc.replace(min(fact.value, axis=cluster_axes, keepdims=True) < 1.0, r20_kex)
+
+    # No exchange, for kex = 0 or pA = 1.
+    return back_calc.replace((kex.value == 0.0) | (pA.value == 1.0), r20a)
@@ -0,0 +1,343 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Module docstring.
+"""Exact first and second partial derivatives of the analytic dispersion models.
+
+Description
+===========
+
+The analytic dispersion models are built from a small number of elementary operations and functions.  The L{Jet} class carries, together with the value of each intermediate quantity, its first and second partial derivatives with respect to a small number of variables.  The arithmetic operators and the elementary functions propagate these by the chain rule, so that evaluating the model equation on L{Jet} objects produces the exact gradient and Hessian of the R2eff or R1rho values.
+
+The values and derivatives are numpy arrays of rank [NE][NS][NM][NO][ND], hence all dispersion points are handled in one vectorised operation.  The first partial derivatives have the additional leading dimension [NV], the number of variables, and the second partial derivatives the leading dimensions [NV][NV].  Complex values are supported for the models which are formulated in terms of complex numbers.  The arrays may also have additional leading dimensions, such as the dimension [G] of a block of grid search points, and with no variables (NV = 0) only the values are propagated.
+"""
+
+# Python module imports.
+from numpy import absolute, arccosh, cos, cosh, errstate, exp, log, shape, sin, sinh, sqrt, tanh, where, zeros
+
+
+class Jet:
+    """A value together with its first and second partial derivatives."""
+
+    # Give the jet operators precedence over the numpy array operators.
+    __array_priority__ = 1000
+    __array_ufunc__ = None
+
+    def __init__(self, value, d, dd):
+        """Set up the jet.
+
+        @param value:   The value.
+        @type value:    numpy array of rank [NE][NS][NM][NO][ND]
+        @param d:       The first partial derivatives.
+        @type d:        numpy array of rank [NV][NE][NS][NM][NO][ND]
+        @param dd:      The second partial derivatives.
+        @type dd:       numpy array of rank [NV][NV][NE][NS][NM][NO][ND]
+        """
+
+        # Store the arrays.
+        self.value = value
+        self.d = d
+        self.dd = dd
+
+
+    def __add__(self, other):
+        """The addition of a jet or constant."""
+
+        # Another jet.
+        if isinstance(other, Jet):
+            return Jet(self.value + other.value, self.d + other.d, self.dd + other.dd)
+
+        # A constant.
+        return Jet(self.value + other, self.d, self.dd)
+
+
+    def __div__(self, other):
+        """Division for Python 2."""
+
+        return self.__truediv__(other)
+
+
+    def __mul__(self, other):
+        """The multiplication by a jet or constant."""
+
+        # Another jet.
+        if isinstance(other, Jet):
+            cross = self.d[:, None] * other.d[None, :]
+            return Jet(self.value * other.value, self.d * other.value + other.d * self.value, self.dd * other.value + other.dd * self.value + cross + cross.swapaxes(0, 1))
+
+        # A constant.
+        return Jet(self.value * other, self.d * other, self.dd * other)
+
+
+    def __neg__(self):
+        """The negation."""
+
+        return Jet(-self.value, -self.d, -self.dd)
+
+
+    def __pow__(self, exponent):
+        """The jet raised to a constant power.
+
+        @param exponent:    The exponent.
+        @type exponent:     float or numpy array of rank [NE][NS][NM][NO][ND]
+        """
+
+        return self.chain(self.value**exponent, exponent * self.value**(exponent - 1.0), exponent * (exponent - 1.0) * self.value**(exponent - 2.0))
+
+
+    def __radd__(self, other):
+        """The addition to a constant."""
+
+        return self.__add__(other)
+
+
+    def __rdiv__(self, other):
+        """The division of a constant for Python 2."""
+
+        return self.__rtruediv__(other)
+
+
+    def __rmul__(self, other):
+        """The multiplication of a constant."""
+
+        return self.__mul__(other)
+
+
+    def __rsub__(self, other):
+        """The subtraction from a constant."""
+
+        return (-self).__add__(other)
+
+
+    def __rtruediv__(self, other):
+        """The division of a constant by the jet."""
+
+        return self.reciprocal() * other
+
+
+    def __sub__(self, other):
+        """The subtraction of a jet or constant."""
+
+        return self.__add__(-other)
+
+
+    def __truediv__(self, other):
+        """The division by a jet or constant."""
+
+        # Another jet.
+        if isinstance(other, Jet):
+            return self * other.reciprocal()
+
+        # A constant.
+        return self * (1.0 / other)
+
+
+    def arccosh(self):
+        """The inverse hyperbolic cosine."""
+
+        # The derivatives.
+        denom = sqrt(self.value**2 - 1.0)
+
+        return self.chain(arccosh(self.value), 1.0 / denom, -self.value / denom**3)
+
+
+    def chain(self, value, deriv, deriv2):
+        """Apply the chain rule for a function of this jet.
+
+        @param value:   The function value.
+        @type value:    numpy array of rank [NE][NS][NM][NO][ND]
+        @param deriv:   The first derivative of the function with respect to its argument.
+        @type deriv:    numpy array of rank [NE][NS][NM][NO][ND]
+        @param deriv2:  The second derivative of the function with respect to its argument.
+        @type deriv2:   numpy array of rank [NE][NS][NM][NO][ND]
+        @return:        The jet of the function.
+        @rtype:         Jet instance
+        """
+
+        return Jet(value, deriv * self.d, deriv * self.dd + deriv2 * self.d[:, None] * self.d[None, :])
+
+
+    def cos(self):
+        """The cosine."""
+
+        # Repetitive calculations.
+        cos_value = cos(self.value)
+
+        return self.chain(cos_value, -sin(self.value), -cos_value)
+
+
+    def cosh(self):
+        """The hyperbolic cosine."""
+
+        # Repetitive calculations.
+        cosh_value = cosh(self.value)
+
+        return self.chain(cosh_value, sinh(self.value), cosh_value)
+
+
+    def exp(self):
+        """The exponential."""
+
+        # Repetitive calculations.
+        exp_value = exp(self.value)
+
+        return self.chain(exp_value, exp_value, exp_value)
+
+
+    def imag(self):
+        """The imaginary part."""
+
+        return Jet(self.value.imag, self.d.imag, self.dd.imag)
+
+
+    def log(self):
+        """The natural logarithm."""
+
+        # Repetitive calculations.
+        inv = 1.0 / self.value
+
+        return self.chain(log(self.value), inv, -inv**2)
+
+
+    def real(self):
+        """The real part."""
+
+        return Jet(self.value.real, self.d.real, self.dd.real)
+
+
+    def reciprocal(self):
+        """The reciprocal."""
+
+        # Repetitive calculations.
+        inv = 1.0 / self.value
+
+        return self.chain(inv, -inv**2, 2.0 * inv**3)
+
+
+    def replace(self, mask, other):
+        """Replace the elements selected by the mask, as for the fill values of the dispersion model functions.
+
+        @param mask:    The elements to replace.
+        @type mask:     numpy bool array broadcasting against the values
+        @param other:   The replacement.  For a constant fill value, the partial derivatives of the replaced elements are zero.
+        @type other:    Jet instance or float
+        @return:        The jet with the replaced elements.
+        @rtype:         Jet instance
+        """
+
+        # A constant.
+        if not isinstance(other, Jet):
+            return Jet(where(mask, other, self.value), where(mask, 0.0, self.d), where(mask, 0.0, self.dd))
+
+        # Another jet.
+        return Jet(where(mask, other.value, self.value), where(mask, other.d, self.d), where(mask, other.dd, self.dd))
+
+
+    def sin(self):
+        """The sine."""
+
+        # Repetitive calculations.
+        sin_value = sin(self.value)
+
+        return self.chain(sin_value, cos(self.value), -sin_value)
+
+
+    def sinc(self):
+        """The unnormalised sinc function sin(x)/x, using the limit of 1 at x = 0.
+
+        Close to zero, the function and its derivatives are evaluated from their Taylor series to avoid the cancellation errors of the closed forms.
+        """
+
+        # Small values, replaced by 1 in the closed forms to avoid the division by zero.
+        x = self.value
+        small = absolute(x) < 1e-2
+        x_safe = where(small, 1.0, x)
+
+        # The closed forms.
+        with errstate(all='ignore'):
+            value = sin(x_safe) / x_safe
+            deriv = (cos(x_safe) - value) / x_safe
+            deriv2 = -value - 2.0 * deriv / x_safe
+
+        # The Taylor series close to zero.
+        x2 = x**2
+        value = where(small, 1.0 - x2/6.0 + x2**2/120.0, value)
+        deriv = where(small, x * (-1.0/3.0 + x2/30.0 - x2**2/840.0), deriv)
+        deriv2 = where(small, -1.0/3.0 + x2/10.0 - x2**2/168.0, deriv2)
+
+        return self.chain(value, deriv, deriv2)
+
+
+    def sinh(self):
+        """The hyperbolic sine."""
+
+        # Repetitive calculations.
+        sinh_value = sinh(self.value)
+
+        return self.chain(sinh_value, cosh(self.value), sinh_value)
+
+
+    def sqrt(self):
+        """The square root, using the principal branch for complex values."""
+
+        # Repetitive calculations.
+        sqrt_value = sqrt(self.value)
+
+        return self.chain(sqrt_value, 0.5 / sqrt_value, -0.25 / sqrt_value**3)
+
+
+    def tanh(self):
+        """The hyperbolic tangent."""
+
+        # Repetitive calculations.
+        tanh_value = tanh(self.value)
+        sech2 = 1.0 - tanh_value**2
+
+        return self.chain(tanh_value, sech2, -2.0 * tanh_value * sech2)
+
+
+
+def variable(value, index=None, deriv=1.0, num=None):
+    """Create the jet for one of the variables of the partial derivatives.
+
+    The variables are linear in the model parameters, so that only the first partial derivative of the variable itself is non-zero.
+
+
+    @param value:   The value of the variable.
+    @type value:    numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword index: The index of the variable.
+    @type index:    int
+    @keyword deriv: The partial derivative of the variable with respect to its model parameter, for example the spectrometer frequency for the conversion of dw from ppm to rad/s.
+    @type deriv:    float or numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword num:   The total number of variables [NV].  For zero, the jet only carries the value.
+    @type num:      int
+    @return:        The jet of the variable.
+    @rtype:         Jet instance
+    """
+
+    # The derivatives, skipped if only the values are propagated.
+    d = zeros((num,) + shape(value), value.dtype)
+    if num:
+        d[index] = deriv
+    dd = zeros((num, num) + shape(value), value.dtype)
+
+    # Return the jet.
+    return Jet(value, d, dd)
@@ -134,3 +134,36 @@ def r1rho_DPL94(r1rho_prime=None, phi_ex=None, kex=None, theta=None, R1=0.0, spi
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r1rho_DPL94_derivs(r1rho_prime=None, phi_ex=None, kex=None, theta=None, R1=0.0, spin_lock_fields2=None):
+    """Calculate the R1rho values together with their first and second partial derivatives for the DPL94 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  As in r1rho_DPL94(), the values for a zero denominator are replaced by the fill value of 1e100.  For a zero numerator, the equation itself gives the values without exchange.
+
+
+    @keyword r1rho_prime:       The R1rho_prime parameter value (R1rho with no exchange).
+    @type r1rho_prime:          Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword phi_ex:            The phi_ex parameter value (pA * pB * delta_omega^2).
+    @type phi_ex:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:               The kex parameter value (the exchange rate in rad/s).
+    @type kex:                  Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword theta:             The rotating frame tilt angles for each dispersion point.
+    @type theta:                numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword R1:                The R1 relaxation rate, either fixed or optimised.
+    @type R1:                   numpy float array or Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword spin_lock_fields2: The R1rho spin-lock field strengths squared (in rad^2.s^-2).
+    @type spin_lock_fields2:    numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                    The R1rho values and their partial derivatives.
+    @rtype:                     Jet instance
+    """
+
+    # Repetitive calculations.
+    sin_theta2 = sin(theta)**2
+
+    # The denominator.
+    denom = kex**2 + spin_lock_fields2
+
+    # The R1rho values, catching the division by zero.
+    mask_denom_zero = denom.value == 0.0
+    return (r1rho_prime * sin_theta2 + R1 * cos(theta)**2 + phi_ex * kex * sin_theta2 / denom.replace(mask_denom_zero, 1.0)).replace(mask_denom_zero, 1e100)
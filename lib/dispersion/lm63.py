@@ -118,3 +118,32 @@ def r2eff_LM63(r20=None, phi_ex=None, kex=None, cpmg_frqs=None, back_calc=None):
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r2eff_LM63_derivs(r20=None, phi_ex=None, kex=None, cpmg_frqs=None):
+    """Calculate the R2eff values together with their first and second partial derivatives for the LM63 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  As in r2eff_LM63(), the values for kex = 0 are replaced by R20.  For phi_ex = 0, the equation itself gives R20.
+
+
+    @keyword r20:           The R20 parameter value (R2 with no exchange).
+    @type r20:              Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword phi_ex:        The phi_ex parameter value (pA * pB * delta_omega^2).
+    @type phi_ex:           Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:           The kex parameter value (the exchange rate in rad/s).
+    @type kex:              Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword cpmg_frqs:     The CPMG nu1 frequencies.
+    @type cpmg_frqs:        numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                The R2eff values and their partial derivatives.
+    @rtype:                 Jet instance
+    """
+
+    # Repetitive calculations.
+    rex = phi_ex / kex
+    kex_4 = 4.0 / kex
+
+    # The R2eff values.
+    back_calc = r20 + rex * (1.0 - kex_4 * cpmg_frqs * (kex / (4.0 * cpmg_frqs)).tanh())
+
+    # No exchange, for kex = 0.
+    return back_calc.replace(kex.value == 0.0, r20)
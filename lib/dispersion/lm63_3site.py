@@ -149,3 +149,45 @@ def r2eff_LM63_3site(r20=None, phi_ex_B=None, phi_ex_C=None, kB=None, kC=None, c
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r2eff_LM63_3site_derivs(r20=None, phi_ex_B=None, phi_ex_C=None, kB=None, kC=None, cpmg_frqs=None, cluster_axes=None):
+    """Calculate the R2eff values together with their first and second partial derivatives for the LM63 3-site model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  The values which r2eff_LM63_3site() replaces are replaced in the same way, together with their derivatives.  The zero rex values are tested for each cluster, as given by the cluster axes.
+
+
+    @keyword r20:           The R20 parameter value (R2 with no exchange).
+    @type r20:              Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword phi_ex_B:      The fast exchange factor between sites A and B (rad^2.s^-2).
+    @type phi_ex_B:         Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword phi_ex_C:      The fast exchange factor between sites A and C (rad^2.s^-2).
+    @type phi_ex_C:         Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kB:            Approximate chemical exchange rate constant between sites A and B (the exchange rate in rad/s).
+    @type kB:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kC:            Approximate chemical exchange rate constant between sites A and C (the exchange rate in rad/s).
+    @type kC:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword cpmg_frqs:     The CPMG nu1 frequencies.
+    @type cpmg_frqs:        numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword cluster_axes:  The axes of the values spanning a single cluster of spins, excluding the leading grid dimension and, for stacked clusters, the spin dimension.  If None, all values belong to one cluster.
+    @type cluster_axes:     None or tuple of int
+    @return:                The R2eff values and their partial derivatives.
+    @rtype:                 Jet instance
+    """
+
+    # Repetitive calculations.
+    rex_B = phi_ex_B / kB
+    rex_C = phi_ex_C / kC
+    quart_kB = kB / 4.0
+    quart_kC = kC / 4.0
+
+    # The exchange terms, dropping the terms of the zero rate constants.
+    term_B = (rex_B * (1.0 - (quart_kB / cpmg_frqs).tanh() * cpmg_frqs / quart_kB)).replace(kB.value == 0.0, 0.0)
+    term_C = (rex_C * (1.0 - (quart_kC / cpmg_frqs).tanh() * cpmg_frqs / quart_kC)).replace(kC.value == 0.0, 0.0)
+
+    # The R2eff values.
+    back_calc = r20 + term_B + term_C
+
+    # If rex is zero for both sites of a cluster, replace the values of all zero rex values with R20.
+    t_rex_zero = (min(fabs(rex_B.value), axis=cluster_axes, keepdims=True) == 0.0) & (min(fabs(rex_C.value), axis=cluster_axes, keepdims=True) == 0.0)
+    return back_calc.replace(t_rex_zero & ((rex_B.value == 0.0) | (rex_C.value == 0.0)), r20)
@@ -132,3 +132,34 @@ def r1rho_M61b(r1rho_prime=None, pA=None, dw=None, kex=None, spin_lock_fields2=N
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r1rho_M61b_derivs(r1rho_prime=None, pA=None, dw=None, kex=None, spin_lock_fields2=None):
+    """Calculate the R1rho values together with their first and second partial derivatives for the M61 skew model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  As in r1rho_M61b(), the values for a zero denominator are replaced by the fill value of 1e100.  For a zero numerator, the equation itself gives R1rho'.
+
+
+    @keyword r1rho_prime:       The R1rho_prime parameter value (R1rho with no exchange).
+    @type r1rho_prime:          Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword pA:                The population of state A.
+    @type pA:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:                The chemical exchange difference between states A and B in rad/s.
+    @type dw:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:               The kex parameter value (the exchange rate in rad/s).
+    @type kex:                  Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword spin_lock_fields2: The R1rho spin-lock field strengths squared (in rad^2.s^-2).
+    @type spin_lock_fields2:    numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                    The R1rho values and their partial derivatives.
+    @rtype:                     Jet instance
+    """
+
+    # Repetitive calculations.
+    pA2dw2 = pA**2 * dw**2
+
+    # The denominator.
+    denom = kex**2 + pA2dw2 + spin_lock_fields2
+
+    # The R1rho values, catching the division by zero.
+    mask_denom_zero = denom.value == 0.0
+    return (r1rho_prime + pA2dw2 * (1.0 - pA) * kex / denom.replace(mask_denom_zero, 1.0)).replace(mask_denom_zero, 1e100)
@@ -24,9 +24,31 @@
 """Module for the calculation of the matrix exponential, for higher dimensional data."""
 
 # Python module imports.
-from numpy import array, any, complex128, dot, einsum, eye, exp, iscomplex, int16, newaxis, multiply, tile, sqrt, version, zeros
+from numpy import array, any, ceil, complex64, complex128, dot, einsum, errstate, eye, exp, expm1, iscomplex, isfinite, int16, log2, matmul, newaxis, multiply, result_type, tile, sqrt, version, where, zeros
 from numpy.lib.stride_tricks import as_strided
-from numpy.linalg import eig, inv
+from numpy.linalg import eig, inv, solve
+
+# relax module imports.
+from lib.errors import RelaxError
+
+
+# The Pade approximant coefficients of degree 3 to 13 (Higham 2005, Table 10.4).
+PADE_COEFF = {
+    3: [120.0, 60.0, 12.0, 1.0],
+    5: [30240.0, 15120.0, 3360.0, 420.0, 30.0, 1.0],
+    7: [17297280.0, 8648640.0, 1995840.0, 277200.0, 25200.0, 1512.0, 56.0, 1.0],
+    9: [17643225600.0, 8821612800.0, 2075673600.0, 302702400.0, 30270240.0, 2162160.0, 110880.0, 3960.0, 90.0, 1.0],
+    13: [64764752532480000.0, 32382376266240000.0, 7771770303897600.0, 1187353796428800.0, 129060195264000.0, 10559470521600.0, 670442572800.0, 33522128640.0, 1323241920.0, 40840800.0, 960960.0, 16380.0, 182.0, 1.0]
+}
+
+# The maximum 1-norms for which each Pade approximant is accurate to double precision (Higham 2005, Table 10.2).
+PADE_THETA = {
+    3: 1.495585217958292e-002,
+    5: 2.539398330063230e-001,
+    7: 9.504178996162932e-001,
+    9: 2.097847961257068e+000,
+    13: 5.371920351148152e+000
+}
 
 
 def create_index(NE=None, NS=None, NM=None, NO=None, ND=None):
@@ -165,31 +187,28 @@ def data_view_via_striding_array_row_col(data_array=None):
     return data_view
 
 
-def matrix_exponential(A, dtype=None):
-    """Calculate the exact matrix exponential using the eigenvalue decomposition approach, for higher dimensional data.  This of dimension [NE][NS][NM][NO][ND][X][X] or [NS][NM][NO][ND][X][X].
+def matrix_exponential(A, dtype=None, method=None):
+    """Calculate the exact matrix exponential for higher dimensional data.  This of dimension [NE][NS][NM][NO][ND][X][X] or [NS][NM][NO][ND][X][X].
+
+    Here X is the Row and Column length, of the outer square matrix.  Three back ends are available:
+
+        - 'closed', the closed form solution for 2x2 matrices (see matrix_exponential_closed_2_2()),
+        - 'pade', the Pade approximant with scaling and squaring (see matrix_exponential_pade()),
+        - 'eig', the eigenvalue decomposition approach (see matrix_exponential_eig()).
+
+    By default, the closed form is used for the 2x2 matrices and the Pade approximant for all others.
 
-    Here X is the Row and Column length, of the outer square matrix.
 
     @param A:               The square matrix to calculate the matrix exponential of.
     @type A:                numpy float array of rank [NE][NS][NM][NO][ND][X][X]
     @param dtype:           If provided, forces the calculation to use the data type specified.
     @type dtype:            data-type, optional
+    @keyword method:        The back end to use, one of 'closed', 'pade', or 'eig'.  If None, this is chosen from the size of the matrices.
+    @type method:           None or str
     @return:                The matrix exponential.  This will have the same dimensionality as the A matrix.
     @rtype:                 numpy float array of rank [NE][NS][NM][NO][ND][X][X]
     """
 
-    # Get the expected shape of the higher dimensional column numpy array.
-    if len(A.shape) == 7:
-        # Extract shapes from data.
-        NE, NS, NM, NO, ND, Row, Col = A.shape
-
-    else:
-        # Extract shapes from data.
-        NS, NM, NO, ND, Row, Col = A.shape
-
-        # Set NE to None.
-        NE = None
-
     # Convert dtype, if specified.
     if dtype != None:
         dtype_mat = A.dtype
@@ -202,6 +221,117 @@ def matrix_exponential(A, dtype=None):
     # Is the original matrix real?
     complex_flag = any(iscomplex(A))
 
+    # The default back end.
+    if method == None:
+        if A.shape[-1] == 2:
+            method = 'closed'
+        else:
+            method = 'pade'
+
+    # The closed form.
+    if method == 'closed':
+        eA = matrix_exponential_closed_2_2(A)
+
+    # The Pade approximant.
+    elif method == 'pade':
+        eA = matrix_exponential_pade(A)
+
+    # The eigenvalue decomposition.
+    elif method == 'eig':
+        eA = matrix_exponential_eig(A, dtype=dtype)
+
+    # Unknown back end.
+    else:
+        raise RelaxError("The matrix exponential method '%s' is unknown." % method)
+
+    # Return the complex matrix.
+    if complex_flag:
+        return array(eA)
+
+    # Return only the real part.
+    else:
+        return array(eA.real)
+
+
+def matrix_exponential_closed_2_2(A):
+    """Calculate the matrix exponential of 2x2 matrices using the closed form solution, for data of any dimension.
+
+    The matrix is split into A = s.I + B, where s is half the trace and B is traceless, so that B^2 = q.I with q = -det(B).  With z = sqrt(q), the exponential is then::
+
+        e^A = e^s.(cosh(z).I + sinh(z)/z.B)
+            = ((e^(s+z) + e^(s-z)).I + (e^(s+z) - e^(s-z))/z.B) / 2,
+
+    where s+z and s-z are the eigenvalues of A.  For small z, the sinh(z)/z term is calculated as e^(s-z).expm1(2z)/(2z) to avoid cancellation.  Repeated eigenvalues are handled exactly, as the formula has no eigenvectors.
+
+
+    @param A:   The 2x2 matrices to calculate the matrix exponential of.
+    @type A:    numpy float or complex array of rank [...][2][2]
+    @return:    The matrix exponential, as complex numbers.  This will have the same dimensionality as the A matrix.
+    @rtype:     numpy complex array of rank [...][2][2]
+    """
+
+    # The matrix elements, as complex numbers for the square root of negative values.
+    a11 = A[..., 0, 0].astype(complex128)
+    a12 = A[..., 0, 1]
+    a21 = A[..., 1, 0]
+    a22 = A[..., 1, 1]
+
+    # The trace part and the traceless part, B.
+    s = 0.5 * (a11 + a22)
+    p = a11 - s
+    z = sqrt(p**2 + a12*a21)
+
+    # Suppress the warnings from the unused branches of the where() statements.
+    with errstate(all='ignore'):
+        # The exponentials of the eigenvalues.
+        e_pos = exp(s + z)
+        e_neg = exp(s - z)
+
+        # The e^s.cosh(z) term.
+        cosh_term = 0.5 * (e_pos + e_neg)
+
+        # The e^s.sinh(z)/z term, using expm1() for small z and with the z = 0 limit of e^s.
+        small = abs(z) < 0.5
+        z_safe = where(z == 0.0, 1.0, z)
+        sinh_term = where(small, e_neg * expm1(2.0*z) / (2.0*z_safe), (e_pos - e_neg) / (2.0*z_safe))
+        sinh_term = where(z == 0.0, exp(s), sinh_term)
+
+    # Assemble the matrix exponential.
+    eA = zeros(A.shape, result_type(A.dtype, complex64))
+    eA[..., 0, 0] = cosh_term + sinh_term * p
+    eA[..., 0, 1] = sinh_term * a12
+    eA[..., 1, 0] = sinh_term * a21
+    eA[..., 1, 1] = cosh_term - sinh_term * p
+
+    # Return the matrix exponential.
+    return eA
+
+
+def matrix_exponential_eig(A, dtype=None):
+    """Calculate the exact matrix exponential using the eigenvalue decomposition approach, for higher dimensional data.  This of dimension [NE][NS][NM][NO][ND][X][X] or [NS][NM][NO][ND][X][X].
+
+    Here X is the Row and Column length, of the outer square matrix.
+
+    @param A:               The square matrix to calculate the matrix exponential of.
+    @type A:                numpy float array of rank [NE][NS][NM][NO][ND][X][X]
+    @param dtype:           If provided, the data type of the results.
+    @type dtype:            data-type, optional
+    @return:                The complex matrix exponential.  This will have the same dimensionality as the A matrix.
+    @rtype:                 numpy complex array of rank [NE][NS][NM][NO][ND][X][X]
+    """
+
+    # Get the expected shape of the higher dimensional column numpy array.
+    if len(A.shape) == 7:
+        # Extract shapes from data.
+        NE, NS, NM, NO, ND, Row, Col = A.shape
+
+    else:
+        # Extract shapes from data.
+        NS, NM, NO, ND, Row, Col = A.shape
+
+        # Set NE to None.
+        NE = None
+
     # If numpy is under 1.8, there would be a need to do eig(A) per matrix.
     if float(version.version[:3]) < 1.8:
         # Make array to store results
@@ -300,13 +430,8 @@ def matrix_exponential(A, dtype=None):
         # Calculate the exact exponential.
         eA = einsum('...ij, ...jk', dot_V_W, inv_V)
 
-    # Return the complex matrix.
-    if complex_flag:
-        return array(eA)
-
-    # Return only the real part.
-    else:
-        return array(eA.real)
+    # Return the matrix exponential.
+    return eA
 
 
 def matrix_exponential_rank_NS_NM_NO_ND_2_2(A, dtype=None):
@@ -404,3 +529,91 @@ def matrix_exponential_rank_NS_NM_NO_ND_2_2(A, dtype=None):
         eA_mat[si, mi, oi, di, :] = eA_m
 
     return eA_mat
+
+
+def matrix_exponential_pade(A):
+    """Calculate the matrix exponential using the Pade approximant with scaling and squaring, for data of any dimension.
+
+    This is the algorithm of Higham (2005), The scaling and squaring method for the matrix exponential revisited, SIAM J. Matrix Anal. Appl., 26, 1179-1193, vectorised over all matrices.  The lowest degree Pade approximant accurate to double precision for the largest 1-norm of the data is used.  If the degree 13 approximant is required, each matrix is scaled by its own power of 2 and then squared back individually.  As there is no eigenvalue decomposition, the result is accurate for the repeated eigenvalues and the non-normal matrices of the Bloch-McConnell equations.
+
+
+    @param A:   The square matrices to calculate the matrix exponential of.
+    @type A:    numpy float or complex array of rank [...][X][X]
+    @return:    The matrix exponential.  This will have the same dimensionality and data type as the A matrix.
+    @rtype:     numpy float or complex array of rank [...][X][X]
+    """
+
+    # The 1-norms of all matrices.
+    norms = abs(A).sum(axis=-2).max(axis=-1)
+    norm_max = norms.max()
+
+    # The identity matrix and matrix squares.
+    ident = eye(A.shape[-1], dtype=A.dtype)
+    A2 = matmul(A, A)
+
+    # The Pade approximants of degree 3 to 9, when sufficiently accurate without scaling.
+    for m in [3, 5, 7, 9]:
+        if norm_max <= PADE_THETA[m]:
+            # The powers of A.
+            powers = [ident, A2]
+            for i in range((m - 1) // 2 - 1):
+                powers.append(matmul(powers[-1], A2))
+
+            # The odd and even parts.
+            b = PADE_COEFF[m]
+            U = matmul(A, sum_powers(powers, b[1::2]))
+            V = sum_powers(powers, b[0::2])
+
+            # Return the approximant.
+            return solve(V - U, V + U)
+
+    # The scaling, as the number of squarings for each matrix.
+    with errstate(all='ignore'):
+        squarings = ceil(log2(norms / PADE_THETA[13]))
+    squarings = where(isfinite(squarings) & (squarings > 0), squarings, 0).astype(int)
+    scale = 2.0**(-squarings)[..., newaxis, newaxis]
+
+    # The scaled matrix powers.
+    A = A * scale
+    A2 = A2 * scale**2
+    A4 = matmul(A2, A2)
+    A6 = matmul(A4, A2)
+
+    # The odd and even parts of the degree 13 approximant.
+    b = PADE_COEFF[13]
+    U = matmul(A, matmul(A6, b[13]*A6 + b[11]*A4 + b[9]*A2) + b[7]*A6 + b[5]*A4 + b[3]*A2 + b[1]*ident)
+    V = matmul(A6, b[12]*A6 + b[10]*A4 + b[8]*A2) + b[6]*A6 + b[4]*A4 + b[2]*A2 + b[0]*ident
+
+    # The approximant.
+    eA = solve(V - U, V + U)
+
+    # Undo the scaling by repeated squaring, only for the matrices which require it.
+    for i in range(squarings.max()):
+        mask = squarings > i
+        if mask.all():
+            eA = matmul(eA, eA)
+        else:
+            eA[mask] = matmul(eA[mask], eA[mask])
+
+    # Return the matrix exponential.
+    return eA
+
+
+def sum_powers(powers, coeff):
+    """Return the sum of the matrix powers multiplied by the coefficients.
+
+    @param powers:  The matrix powers.
+    @type powers:   list of numpy arrays of rank [...][X][X]
+    @param coeff:   The coefficients.
+    @type coeff:    list of float
+    @return:        The sum of the terms.
+    @rtype:         numpy array of rank [...][X][X]
+    """
+
+    # Sum the terms.
+    total = coeff[0] * powers[0]
+    for i in range(1, len(powers)):
+        total = total + coeff[i] * powers[i]
+
+    # Return the sum.
+    return total
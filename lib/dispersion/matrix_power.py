@@ -24,7 +24,7 @@
 
 # Python module imports.
 from numpy.lib.stride_tricks import as_strided
-from numpy import float64, int16, zeros
+from numpy import asarray, broadcast_to, eye, float64, int16, matmul, newaxis, where, zeros
 from numpy.linalg import matrix_power
 
 
@@ -47,6 +47,47 @@ def create_index(data):
     return index
 
 
+def matrix_power_rank_N(data, power):
+    """Calculate the matrix powers of higher dimensional data by repeated squaring, for all matrices at once.
+
+    The binary expansion of the powers is processed bit by bit.  The squares data^(2^k) are formed once for all matrices in a single batched multiplication, and the running product is only updated for the matrices whose power has the current bit set.  Hence the number of batched multiplications is set by the number of bits of the largest power, and there is no Python loop over the dispersion points.
+
+
+    @param data:    The square matrices to raise to the powers.
+    @type data:     numpy float or complex array of rank [...][X][X]
+    @param power:   The non-negative integer power for each matrix.
+    @type power:    numpy int array of rank [...]
+    @return:        The matrix powers.  This will have the same dimensionality as the data matrix.
+    @rtype:         numpy float or complex array of rank [...][X][X]
+    """
+
+    # The powers as integers, and the largest power.
+    power = asarray(power).astype(int)
+    max_power = int(power.max())
+
+    # Initialise the products to the identity matrix.
+    calc = broadcast_to(eye(data.shape[-1], dtype=data.dtype), data.shape).copy()
+
+    # Loop over the bits of the powers.
+    square = data
+    bit = 0
+    while max_power >> bit:
+        # Multiply the matrices which have this bit set by the current square.
+        mask = ((power >> bit) & 1).astype(bool)
+        if mask.all():
+            calc = matmul(calc, square)
+        elif mask.any():
+            calc = where(mask[..., newaxis, newaxis], matmul(calc, square), calc)
+
+        # The next square, if still needed.
+        bit += 1
+        if max_power >> bit:
+            square = matmul(square, square)
+
+    # Return the powers.
+    return calc
+
+
 def matrix_power_strided_rank_NE_NS_NM_NO_ND_x_x(data, power):
     """Calculate the exact matrix power by striding through higher dimensional data.  This of dimension [NE][NS][NM][NO][ND][X][X].
 
@@ -167,3 +167,54 @@ def r1rho_MP05(r1rho_prime=None, omega=None, offset=None, pA=None, dw=None, kex=
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r1rho_MP05_derivs(r1rho_prime=None, omega=None, offset=None, pA=None, dw=None, kex=None, R1=0.0, spin_lock_fields2=None):
+    """Calculate the R1rho values together with their first and second partial derivatives for the MP05 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  The squared sines of the rotating frame tilt angles are calculated directly from the spin-lock field strength and the offsets, avoiding the arctan2() function.  The values which r1rho_MP05() replaces for a zero numerator are those of the equation itself, so that no values are replaced here.
+
+
+    @keyword r1rho_prime:       The R1rho_prime parameter value (R1rho with no exchange).
+    @type r1rho_prime:          Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword omega:             The chemical shift for the spin in rad/s.
+    @type omega:                numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword offset:            The spin-lock offsets for the data.
+    @type offset:               numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword pA:                The population of state A.
+    @type pA:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:                The chemical exchange difference between states A and B in rad/s.
+    @type dw:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:               The kex parameter value (the exchange rate in rad/s).
+    @type kex:                  Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword R1:                The R1 relaxation rate, either fixed or optimised.
+    @type R1:                   numpy float array or Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword spin_lock_fields2: The R1rho spin-lock field strengths squared (in rad^2.s^-2).
+    @type spin_lock_fields2:    numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                    The R1rho values and their partial derivatives.
+    @rtype:                     Jet instance
+    """
+
+    # Repetitive calculations.
+    pB = 1.0 - pA
+    kex2 = kex**2
+    Wa = omega
+    Wb = dw + omega
+    W = pA*Wa + pB*Wb
+    da = Wa - offset
+    db = Wb - offset
+    d = W - offset
+    phi_ex = pA * pB * dw**2
+    numer = phi_ex * kex
+    waeff2 = spin_lock_fields2 + da**2
+    wbeff2 = db**2 + spin_lock_fields2
+    weff2 = d**2 + spin_lock_fields2
+
+    # The rotating frame tilt angles.
+    sin_theta2 = spin_lock_fields2 / weff2
+
+    # The R1rho values.
+    waeff2_wbeff2 = wbeff2 * waeff2
+    fact = 1.0 + 2.0*kex2*(pA*waeff2 + pB*wbeff2) / (waeff2_wbeff2 + weff2*kex2)
+    denom = waeff2_wbeff2/weff2 + kex2 - sin_theta2*phi_ex*fact
+    return R1 * (1.0 - sin_theta2) + r1rho_prime * sin_theta2 + sin_theta2 * numer / denom
@@ -50,13 +50,11 @@ More information on the NS MMQ 2-site model can be found in the:
 """
 
 # Python module imports.
-from math import floor
-from numpy import array, conj, complex128, dot, einsum, float64, log, multiply
-from numpy.linalg import matrix_power
+from numpy import arange, array, conj, complex128, einsum, errstate, float64, log, multiply, newaxis, where
 
 # relax module imports.
-from lib.float import isNaN
 from lib.dispersion.matrix_exponential import matrix_exponential
+from lib.dispersion.matrix_power import matrix_power_rank_N
 
 # Repetitive calculations (to speed up calculations).
 m_r20a = array([
@@ -212,88 +210,40 @@ def r2eff_ns_mmq_2site_mq(M0=None, F_vector=array([1, 0], float64), R20A=None, R
     M1_M2_M2_M1_star_mat = einsum('...ij, ...jk', M1_M2_star_mat, M2_M1_star_mat)
     M2_M1_M1_M2_star_mat = einsum('...ij, ...jk', M2_M1_star_mat, M1_M2_star_mat)
 
-    # Loop over spins.
-    for si in range(NS):
-        # Loop over the spectrometer frequencies.
-        for mi in range(NM):
-            # Loop over offsets:
-            for oi in range(NO):
-                num_points_i = num_points[si, mi, oi]
-
-                # Loop over the time points, back calculating the R2eff values.
-                for i in range(num_points_i):
-                    # Extract data from array.
-                    power_i = int(power[si, mi, oi, i])
-                    M1_M2_i = M1_M2_mat[si, mi, oi, i]
-                    M1_M2_star_i = M1_M2_star_mat[si, mi, oi, i]
-                    M2_M1_i = M2_M1_mat[si, mi, oi, i]
-                    M2_M1_star_i = M2_M1_star_mat[si, mi, oi, i]
-                    M1_M2_M2_M1_i = M1_M2_M2_M1_mat[si, mi, oi, i]
-                    M2_M1_M1_M2_star_i = M2_M1_M1_M2_star_mat[si, mi, oi, i]
-                    M2_M1_M1_M2_i = M2_M1_M1_M2_mat[si, mi, oi, i]
-                    M1_M2_M2_M1_star_i = M1_M2_M2_M1_star_mat[si, mi, oi, i]
-
-                    # Special case of 1 CPMG block - the power is zero.
-                    if power_i == 1:
-                        # M1.M2.
-                        A = M1_M2_i
-
-                        # M1*.M2*.
-                        B = M1_M2_star_i
-
-                        # M2.M1.
-                        C = M2_M1_i
-
-                        # M2*.M1*.
-                        D = M2_M1_star_i
-
-                    # Matrices for even number of CPMG blocks.
-                    elif power_i % 2 == 0:
-                        # The power factor (only calculate once).
-                        fact = int(floor(power_i / 2))
-
-                        # (M1.M2.M2.M1)^(n/2).
-                        A = matrix_power(M1_M2_M2_M1_i, fact)
-
-                        # (M2*.M1*.M1*.M2*)^(n/2).
-                        B = matrix_power(M2_M1_M1_M2_star_i, fact)
-
-                        # (M2.M1.M1.M2)^(n/2).
-                        C = matrix_power(M2_M1_M1_M2_i, fact)
-
-                        # (M1*.M2*.M2*.M1*)^(n/2).
-                        D = matrix_power(M1_M2_M2_M1_star_i, fact)
-
-                    # Matrices for odd number of CPMG blocks.
-                    else:
-                        # The power factor (only calculate once).
-                        fact = int(floor((power_i - 1) / 2))
-
-                        # (M1.M2.M2.M1)^((n-1)/2).M1.M2.
-                        A = matrix_power(M1_M2_M2_M1_i, fact)
-                        A = dot(A, M1_M2_i)
-
-                        # (M1*.M2*.M2*.M1*)^((n-1)/2).M1*.M2*.
-                        B = matrix_power(M1_M2_M2_M1_star_i, fact)
-                        B = dot(B, M1_M2_star_i)
-
-                        # (M2.M1.M1.M2)^((n-1)/2).M2.M1.
-                        C = matrix_power(M2_M1_M1_M2_i, fact)
-                        C = dot(C, M2_M1_i)
-
-                        # (M2*.M1*.M1*.M2*)^((n-1)/2).M2*.M1*.
-                        D = matrix_power(M2_M1_M1_M2_star_i, fact)
-                        D = dot(D, M2_M1_star_i)
-
-                    # The next lines calculate the R2eff using a two-point approximation, i.e. assuming that the decay is mono-exponential.
-                    A_B = dot(A, B)
-                    C_D = dot(C, D)
-                    Mx = dot(dot(F_vector, (A_B + C_D)), M0)
-                    Mx = Mx.real / 2.0
-                    if Mx <= 0.0 or isNaN(Mx):
-                        back_calc[si, mi, oi, i] = 1e99
-                    else:
-                        back_calc[si, mi, oi, i]= -inv_tcpmg[si, mi, oi, i] * log(Mx / pA)
+    # The data points present.
+    ND = power.shape[-1]
+    mask = arange(ND) < num_points[..., newaxis]
+
+    # The power factors for all points (the padding points are raised to the power zero), and the odd number of CPMG blocks.
+    fact = (power * mask) // 2
+    odd = (power % 2 == 1)[..., newaxis, newaxis]
+
+    # Matrices for even number of CPMG blocks:
+    #     A = (M1.M2.M2.M1)^(n/2),
+    #     B = (M2*.M1*.M1*.M2*)^(n/2),
+    #     C = (M2.M1.M1.M2)^(n/2),
+    #     D = (M1*.M2*.M2*.M1*)^(n/2).
+    # Matrices for odd number of CPMG blocks (including the special case of 1 CPMG block):
+    #     A = (M1.M2.M2.M1)^((n-1)/2).M1.M2,
+    #     B = (M1*.M2*.M2*.M1*)^((n-1)/2).M1*.M2*,
+    #     C = (M2.M1.M1.M2)^((n-1)/2).M2.M1,
+    #     D = (M2*.M1*.M1*.M2*)^((n-1)/2).M2*.M1*.
+    A = matrix_power_rank_N(M1_M2_M2_M1_mat, fact)
+    A = where(odd, einsum('...ij, ...jk', A, M1_M2_mat), A)
+    B = matrix_power_rank_N(where(odd, M1_M2_M2_M1_star_mat, M2_M1_M1_M2_star_mat), fact)
+    B = where(odd, einsum('...ij, ...jk', B, M1_M2_star_mat), B)
+    C = matrix_power_rank_N(M2_M1_M1_M2_mat, fact)
+    C = where(odd, einsum('...ij, ...jk', C, M2_M1_mat), C)
+    D = matrix_power_rank_N(where(odd, M2_M1_M1_M2_star_mat, M1_M2_M2_M1_star_mat), fact)
+    D = where(odd, einsum('...ij, ...jk', D, M2_M1_star_mat), D)
+
+    # The next lines calculate the R2eff using a two-point approximation, i.e. assuming that the decay is mono-exponential.
+    A_B_C_D = einsum('...ij, ...jk', A, B) + einsum('...ij, ...jk', C, D)
+    Mx = einsum('i, ...ij, j', F_vector, A_B_C_D, M0)
+    Mx = Mx.real / 2.0
+    with errstate(all='ignore'):
+        r2eff = where(Mx > 0.0, -inv_tcpmg * log(Mx / pA), 1e99)
+    back_calc[mask] = r2eff[mask]
 
 
 def r2eff_ns_mmq_2site_sq_dq_zq(M0=None, F_vector=array([1, 0], float64), R20A=None, R20B=None, pA=None, dw=None, dwH=None, kex=None, inv_tcpmg=None, tcp=None, back_calc=None, num_points=None, power=None):
@@ -359,28 +309,16 @@ def r2eff_ns_mmq_2site_sq_dq_zq(M0=None, F_vector=array([1, 0], float64), R20A=N
     evol_block_mat = einsum('...ij, ...jk', A_neg_mat, evol_block_mat)
     evol_block_mat = einsum('...ij, ...jk', A_pos_mat, evol_block_mat)
 
-    # Loop over spins.
-    for si in range(NS):
-        # Loop over the spectrometer frequencies.
-        for mi in range(NM):
-            # Loop over offsets:
-            for oi in range(NO):
-                # Extract number of points.
-                num_points_i = num_points[si, mi, oi]
-
-                # Loop over the time points, back calculating the R2eff values.
-                for i in range(num_points_i):
-                    # Extract data from array.
-                    power_i = int(power[si, mi, oi, i])
-                    evol_block_i = evol_block_mat[si, mi, oi, i]
-
-                    # The full evolution.
-                    evol = matrix_power(evol_block_i, power_i)
-
-                    # The next lines calculate the R2eff using a two-point approximation, i.e. assuming that the decay is mono-exponential.
-                    Mx = dot(F_vector, dot(evol, M0))
-                    Mx = Mx.real
-                    if Mx <= 0.0 or isNaN(Mx):
-                        back_calc[si, mi, oi, i] = 1e99
-                    else:
-                        back_calc[si, mi, oi, i] = -inv_tcpmg[si, mi, oi, i] * log(Mx / pA)
+    # The data points present.
+    ND = power.shape[-1]
+    mask = arange(ND) < num_points[..., newaxis]
+
+    # The full evolution, for all points at once (the padding points are raised to the power zero).
+    evol_mat = matrix_power_rank_N(evol_block_mat, power * mask)
+
+    # The next lines calculate the R2eff using a two-point approximation, i.e. assuming that the decay is mono-exponential.
+    Mx = einsum('i, ...ij, j', F_vector, evol_mat, M0)
+    Mx = Mx.real
+    with errstate(all='ignore'):
+        r2eff = where(Mx > 0.0, -inv_tcpmg * log(Mx / pA), 1e99)
+    back_calc[mask] = r2eff[mask]
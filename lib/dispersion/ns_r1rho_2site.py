@@ -254,7 +254,7 @@ def rr1rho_3d_2site_rankN(R1=None, r1rho_prime=None, dw=None, omega=None, offset
 def ns_r1rho_2site(M0=None, M0_T=None, r1rho_prime=None, omega=None, offset=None, r1=0.0, pA=None, dw=None, kex=None, spin_lock_fields=None, relax_time=None, inv_relax_time=None, back_calc=None):
     """The 2-site numerical solution to the Bloch-McConnell equation for R1rho data.
 
-    This function calculates and stores the R1rho values.
+    This function calculates and stores the R1rho values.  The data structures can either be of rank [NE][NS][NM][NO][ND] or the packed rank [N] of only the real data points, as the dispersion points are all handled independently.
 
 
     @keyword M0:                This is a vector that contains the initial magnetizations corresponding to the A and B state transverse magnetizations.
@@ -300,7 +300,7 @@ def ns_r1rho_2site(M0=None, M0_T=None, r1rho_prime=None, omega=None, offset=None
     Rexpo_M0_mat = einsum('...ij, ...jk', Rexpo_mat, M0)
 
     # Magnetization evolution, which include all dimensions.
-    MA_mat = einsum('...ij, ...jk', M0_T, Rexpo_M0_mat)[:, :, :, :, :, 0, 0]
+    MA_mat = einsum('...ij, ...jk', M0_T, Rexpo_M0_mat)[..., 0, 0]
 
     # Insert safe checks.
     if min(MA_mat) < 0.0:
@@ -289,7 +289,7 @@ def rr1rho_3d_3site_rankN(R1=None, r1rho_prime=None, dw_AB=None, dw_AC=None, ome
 def ns_r1rho_3site(M0=None, M0_T=None, r1rho_prime=None, omega=None, offset=None, r1=0.0, pA=None, pB=None, dw_AB=None, dw_BC=None, kex_AB=None, kex_BC=None, kex_AC=None, spin_lock_fields=None, relax_time=None, inv_relax_time=None, back_calc=None, num_points=None):
     """The 3-site numerical solution to the Bloch-McConnell equation for R1rho data.
 
-    This function calculates and stores the R1rho values.
+    This function calculates and stores the R1rho values.  The data structures can either be of rank [NE][NS][NM][NO][ND] or the packed rank [N] of only the real data points, as the dispersion points are all handled independently.
 
 
     @keyword M0:                This is a vector that contains the initial magnetizations corresponding to the A and B state transverse magnetizations.
@@ -368,7 +368,7 @@ def ns_r1rho_3site(M0=None, M0_T=None, r1rho_prime=None, omega=None, offset=None
     Rexpo_M0_mat = einsum('...ij, ...jk', Rexpo_mat, M0)
 
     # Magnetization evolution, which include all dimensions.
-    MA_mat = einsum('...ij, ...jk', M0_T, Rexpo_M0_mat)[:, :, :, :, :, 0, 0]
+    MA_mat = einsum('...ij, ...jk', M0_T, Rexpo_M0_mat)[..., 0, 0]
 
     # Insert safe checks.
     if min(MA_mat) < 0.0:
@@ -184,3 +184,65 @@ def r1rho_TAP03(r1rho_prime=None, omega=None, offset=None, pA=None, dw=None, kex
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r1rho_TAP03_derivs(r1rho_prime=None, omega=None, offset=None, pA=None, dw=None, kex=None, R1=0.0, spin_lock_fields2=None):
+    """Calculate the R1rho values together with their first and second partial derivatives for the TAP03 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.  The squared sines of the rotating frame tilt angles are calculated directly from the spin-lock field strength and the offsets, avoiding the arctan2() function.  As in r1rho_TAP03(), the values for a negative gamma factor are replaced by the fill value of 1e100.  For a zero numerator, the equation itself gives the values without exchange.
+
+
+    @keyword r1rho_prime:       The R1rho_prime parameter value (R1rho with no exchange).
+    @type r1rho_prime:          Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword omega:             The chemical shift for the spin in rad/s.
+    @type omega:                numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword offset:            The spin-lock offsets for the data.
+    @type offset:               numpy float array of rank [NE][NS][NM][NO][ND]
+    @keyword pA:                The population of state A.
+    @type pA:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:                The chemical exchange difference between states A and B in rad/s.
+    @type dw:                   Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword kex:               The kex parameter value (the exchange rate in rad/s).
+    @type kex:                  Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword R1:                The R1 relaxation rate, either fixed or optimised.
+    @type R1:                   numpy float array or Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword spin_lock_fields2: The R1rho spin-lock field strengths squared (in rad^2.s^-2).
+    @type spin_lock_fields2:    numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                    The R1rho values and their partial derivatives.
+    @rtype:                     Jet instance
+    """
+
+    # Repetitive calculations.
+    pB = 1.0 - pA
+    kex2 = kex**2
+    Wa = omega
+    Wb = dw + omega
+    W = pA*Wa + pB*Wb
+    da = Wa - offset
+    db = Wb - offset
+    d = W - offset
+    phi_ex = pA * pB * dw**2
+    numer = phi_ex * kex
+    sigma = pB*da + pA*db
+    sigma2 = sigma**2
+
+    # The gamma factor, setting the bad values to zero.
+    gamma = 1.0 + phi_ex*(sigma2 - kex2 + spin_lock_fields2) / (sigma2 + kex2 + spin_lock_fields2)**2
+    mask_gamma_neg = gamma.value < 0.0
+    gamma = gamma.replace(mask_gamma_neg, 0.0)
+
+    # Effective field.
+    waeff2 = gamma*spin_lock_fields2 + da**2
+    wbeff2 = gamma*spin_lock_fields2 + db**2
+    weff2 = gamma*spin_lock_fields2 + d**2
+
+    # The rotating frame tilt angles.
+    sin_theta2 = spin_lock_fields2 / (d**2 + spin_lock_fields2)
+    hat_sin_theta2 = gamma*spin_lock_fields2 / weff2
+
+    # The R1rho values.
+    denom = waeff2*wbeff2/weff2 + kex2 - 2.0*hat_sin_theta2*phi_ex + (1.0 - gamma)*spin_lock_fields2
+    back_calc = R1 * (1.0 - sin_theta2) + r1rho_prime * sin_theta2 + hat_sin_theta2 * numer / denom / gamma
+
+    # The bad gamma values.
+    return back_calc.replace(mask_gamma_neg, 1e100)
@@ -116,6 +116,10 @@ def r2eff_TSMFK01(r20a=None, dw=None, dw_orig=None, k_AB=None, tcp=None, back_ca
     if min(fabs(numer)) == 0.0:
         # Calculate R2eff for forward.
         back_calc[:] = r20a + k_AB
+
+        # Calculate R2eff for the remaining points, as the zeros may only be for some of the spins.
+        mask_numer = numer != 0.0
+        back_calc[mask_numer] -= k_AB * numer[mask_numer] / denom[mask_numer]
     else:
         # Calculate R2eff.
         back_calc[:] = r20a + k_AB - k_AB * numer / denom
@@ -130,3 +134,25 @@ def r2eff_TSMFK01(r20a=None, dw=None, dw_orig=None, k_AB=None, tcp=None, back_ca
     if not isfinite(sum(back_calc)):
         # Replaces nan, inf, etc. with fill value.
         fix_invalid(back_calc, copy=False, fill_value=1e100)
+
+
+def r2eff_TSMFK01_derivs(r20a=None, dw=None, k_AB=None, tcp=None):
+    """Calculate the R2eff values together with their first and second partial derivatives for the TSMFK01 model.
+
+    All parameters are L{lib.dispersion.derivatives.Jet} objects carrying the derivatives with respect to the optimised variables.
+
+
+    @keyword r20a:          The R20 parameter value of state A (R2 with no exchange).
+    @type r20a:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword dw:            The chemical exchange difference between states A and B in rad/s.
+    @type dw:               Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword k_AB:          The k_AB parameter value (the forward exchange rate in rad/s).
+    @type k_AB:             Jet instance of rank [NE][NS][NM][NO][ND]
+    @keyword tcp:           The tau_CPMG times (1 / 4.nu1).
+    @type tcp:              numpy float array of rank [NE][NS][NM][NO][ND]
+    @return:                The R2eff values and their partial derivatives.
+    @rtype:                 Jet instance
+    """
+
+    # The R2eff values, using the sin(x)/x limit of 1 for dw = 0 where there is no exchange.
+    return r20a + k_AB - k_AB * (dw * tcp).sinc()
@@ -457,6 +457,9 @@ MODEL_LIST_DW_MIX_QUADRUPLE = [MODEL_NS_MMQ_3SITE, MODEL_NS_MMQ_3SITE_LINEAR]
 # The models which currently support R1 fitting via target function switching.
 MODEL_LIST_FIT_R1 = [MODEL_NOREX, MODEL_DPL94, MODEL_TP02, MODEL_TAP03, MODEL_MP05, MODEL_NS_R1RHO_2SITE]
 
+# The models with the chi-squared gradient and Hessian, allowing for gradient based optimisation.
+MODEL_LIST_DERIVS = [MODEL_NOREX, MODEL_LM63, MODEL_LM63_3SITE, MODEL_CR72, MODEL_CR72_FULL, MODEL_TSMFK01, MODEL_B14, MODEL_B14_FULL, MODEL_M61, MODEL_M61B, MODEL_DPL94, MODEL_TP02, MODEL_TAP03, MODEL_MP05]
+
 
 # The defined models, which is used for nesting.
 MODEL_NEST_CPMG = MODEL_CR72
@@ -23,6 +23,7 @@
 """The relax-lib NMR package - a library of functions for advanced linear algebra not present in numpy."""
 
 __all__ = [
+    'block_arrow',
     'kronecker_product',
     'matrix_exponential',
     'matrix_power'
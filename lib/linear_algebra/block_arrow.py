@@ -0,0 +1,107 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Module docstring.
+"""Module for solving linear systems with a block-arrow matrix.
+
+The block-arrow matrix has the form::
+
+    | A    B_1^T  B_2^T  ...  B_n^T |
+    | B_1  C_1    0      ...  0     |
+    | B_2  0      C_2    ...  0     |
+    | ...  ...    ...    ...  ...   |
+    | B_n  0      0      ...  C_n   |
+
+The system is solved via the Schur complement of the diagonal C_i blocks, so that the cost is linear in the number of blocks rather than cubic in the total size of the matrix.
+"""
+
+# Python module imports.
+from numpy import concatenate, dot, einsum, float64, zeros
+from numpy.linalg import LinAlgError, solve
+
+# relax module imports.
+from lib.errors import RelaxError
+
+
+def block_arrow_solve(A=None, B=None, C=None, a=None, c=None):
+    """Solve the block-arrow linear system for the vectors x and y_i.
+
+    The system is::
+
+        A.x + sum_i B_i^T.y_i = a,
+        B_i.x + C_i.y_i = c_i.
+
+    The B_i, C_i, and c_i blocks are supplied as lists of batches, each batch consisting of blocks of equal size stacked along the first axis.
+
+
+    @keyword A: The dense top left block, of size k*k.
+    @type A:    numpy rank-2 array
+    @keyword B: The off-diagonal blocks, as a list of batches of size N*n*k.
+    @type B:    list of numpy rank-3 arrays
+    @keyword C: The diagonal blocks, as a list of batches of size N*n*n.
+    @type C:    list of numpy rank-3 arrays
+    @keyword a: The right hand side vector for the top block, of size k.
+    @type a:    numpy rank-1 array
+    @keyword c: The right hand side vectors for the diagonal blocks, as a list of batches of size N*n.
+    @type c:    list of numpy rank-2 arrays
+    @return:    The solution vector x and the list of batches of the solution vectors y_i, of size N*n.
+    @rtype:     numpy rank-1 array, list of numpy rank-2 arrays
+    """
+
+    # Initialise the Schur complement and its right hand side.
+    schur = A * 1.0
+    rhs = a * 1.0
+
+    # Loop over the batches, storing C_i^-1.B_i and C_i^-1.c_i.
+    inv_B = []
+    inv_c = []
+    for i in range(len(C)):
+        # Empty blocks.
+        if C[i].shape[1] == 0:
+            inv_B.append(zeros(B[i].shape, float64))
+            inv_c.append(zeros(c[i].shape, float64))
+            continue
+
+        # Solve for both B_i and c_i at once.
+        try:
+            sol = solve(C[i], concatenate([B[i], c[i][:, :, None]], axis=2))
+        except LinAlgError:
+            raise RelaxError("The diagonal blocks of the block-arrow matrix are singular.")
+        inv_B.append(sol[:, :, :-1])
+        inv_c.append(sol[:, :, -1])
+
+        # Subtract the B_i^T.C_i^-1.B_i and B_i^T.C_i^-1.c_i contributions.
+        schur -= einsum('sik,sil->kl', B[i], inv_B[i])
+        rhs -= einsum('sik,si->k', B[i], inv_c[i])
+
+    # Solve the Schur complement system.
+    try:
+        x = solve(schur, rhs)
+    except LinAlgError:
+        raise RelaxError("The Schur complement of the block-arrow matrix is singular.")
+
+    # Back-substitution, y_i = C_i^-1.c_i - C_i^-1.B_i.x.
+    y = []
+    for i in range(len(C)):
+        y.append(inv_c[i] - dot(inv_B[i], x))
+
+    # Return the solution.
+    return x, y
@@ -26,7 +26,7 @@
 1 Introduction
 ==============
 
-This package is an abstraction of specific multi-processor implementations or fabrics such as MPI via mpi4py.  It is designed to be extended for use on other fabrics such as grid computing via SSH tunnelling, threading, etc.  It also has a uni-processor mode as the default fabric.
+This package is an abstraction of specific multi-processor implementations or fabrics such as MPI via mpi4py, a local process pool via the Python multiprocessing module, or a pool of threads for calculations which release the global interpreter lock.  It is designed to be extended for use on other fabrics such as grid computing via SSH tunnelling, etc.  It also has a uni-processor mode as the default fabric.
 
 
 2 API
@@ -118,15 +118,19 @@ This appears to be an OpenMPI problem with late 2.6 Linux kernels.
 """
 
 
-__all__ = ['memo',
+__all__ = ['journal',
+           'memo',
            'misc',
            'mpi4py_processor',
            'multi_processor_base',
+           'pool_processor',
            'processor',
            'processor_io',
+           'profiler',
            'result_commands',
            'result_queue',
            'slave_commands',
+           'thread_processor',
            'uni_processor']
 
 # Python module imports.
@@ -164,7 +168,7 @@ def load_multiprocessor(processor_name, callback, processor_size, verbosity=1):
     """
 
     # Check that the processor type is supported.
-    if processor_name not in ['uni', 'mpi4py']:
+    if processor_name not in ['uni', 'mpi4py', 'pool', 'thread']:
         _sys.stderr.write("The processor type '%s' is not supported.\n" % processor_name)
         _sys.exit()
 
@@ -0,0 +1,156 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Module docstring.
+"""Module containing the on-disk journal of result commands for resuming interrupted calculations."""
+
+# Python module imports.
+import os
+import pickle
+from struct import calcsize, pack, unpack
+import sys
+
+# relax module imports.
+from lib.errors import RelaxError
+
+
+# The marker and byte length framing each record.
+MAGIC = b'RJNL'
+HEADER = '>4sQ'
+
+
+class Result_journal(object):
+    """An append-only journal of the result commands processed on the master.
+
+    Each result command is pickled to the journal file together with the key returned by the Memo.journal_key() method of its memo, directly after the result has been processed by the master.  The pickle is preceded by a header of a marker and its byte length, so that a record cut short by a crash can be told apart from a complete record which cannot be unpickled.  The file is flushed and synced after each record so that a crash of the program loses at most the result being written.  When an existing journal is opened, all complete records are loaded so that the results of already finished commands can be replayed rather than recalculated.
+    """
+
+    def __init__(self, file=None, context=None):
+        """Open the journal, loading all prior records.
+
+        @keyword file:      The name of the journal file.  This will be created if it does not exist.
+        @type file:         str
+        @keyword context:   A string identifying the calculation, for example the data pipe name.  Only records of the same context are loaded, allowing the journal to be shared between calculations.
+        @type context:      str
+        """
+
+        # Store the arguments.
+        self.file_name = file
+        self.context = context
+
+        # Load the prior records.
+        self.records = {}
+        self.load()
+
+        # Open the file for appending.
+        self.file = open(self.file_name, 'ab')
+
+
+    def close(self):
+        """Close the journal file."""
+
+        self.file.close()
+
+
+    def fetch(self, key):
+        """Return the journaled result commands for the given memo key.
+
+        @param key: The key, as returned by Memo.journal_key().
+        @type key:  tuple
+        @return:    The list of result commands, or None if the key has not been journaled.
+        @rtype:     list of Result_command instances or None
+        """
+
+        # Return the results.
+        return self.records.get(key)
+
+
+    def load(self):
+        """Load all complete records from the journal file.
+
+        Only a short read at the end of the file is treated as a record truncated by a crash, and removed so that new records can be appended.  Complete records which cannot be unpickled, for example as a class has since been renamed, are skipped with a warning and left in the file.
+
+        @raises RelaxError: If a record header is corrupted.
+        """
+
+        # No file.
+        if not os.path.isfile(self.file_name):
+            return
+
+        # Read until the end of the file or a truncated final record.
+        file = open(self.file_name, 'rb')
+        end = 0
+        while True:
+            # The header, stopping at the end of the file or a short read.
+            header = file.read(calcsize(HEADER))
+            if len(header) < calcsize(HEADER):
+                break
+            magic, size = unpack(HEADER, header)
+
+            # A corrupted journal.
+            if magic != MAGIC:
+                file.close()
+                raise RelaxError("The record at byte %s of the result journal '%s' is corrupted." % (end, self.file_name))
+
+            # The pickled record, stopping at a short read.
+            data = file.read(size)
+            if len(data) < size:
+                break
+            end = file.tell()
+
+            # Unpickle, skipping unloadable records.
+            try:
+                context, key, result = pickle.loads(data)
+            except Exception:
+                sys.stderr.write("warning: skipping the unloadable record ending at byte %s of the result journal '%s'.\n" % (end, self.file_name))
+                continue
+
+            # Skip records of other calculations.
+            if context != self.context:
+                continue
+
+            # Store the record.
+            if key not in self.records:
+                self.records[key] = []
+            self.records[key].append(result)
+        file.close()
+
+        # Remove any truncated record from a crash, so that new records can be appended.
+        if os.path.getsize(self.file_name) > end:
+            file = open(self.file_name, 'r+b')
+            file.truncate(end)
+            file.close()
+
+
+    def record(self, key, result):
+        """Append the result command to the journal.
+
+        @param key:     The key, as returned by Memo.journal_key().
+        @type key:      tuple
+        @param result:  The processed result command.
+        @type result:   Result_command instance
+        """
+
+        # Write the header and pickle in one go, then flush and sync.
+        data = pickle.dumps((self.context, key, result), 2)
+        self.file.write(pack(HEADER, MAGIC, len(data)) + data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
@@ -41,3 +41,15 @@ class Memo(object):
         """
 
         return id(self)
+
+
+    def journal_key(self):
+        """Get the key identifying the calculation in a result journal - designed for overriding.
+
+        The key must be identical between program runs, so that the results of an interrupted calculation can be found in the journal (see multi.journal.Result_journal).  The default of None excludes the results from journaling.
+
+        @return:    A key unique to the calculation, or None.
+        @rtype:     tuple or None
+        """
+
+        return None
@@ -27,14 +27,65 @@ This is for internal use only.  To access the multi-processor API, see the __ini
 """
 
 # Python module imports.
+import hashlib
 try:
     import importlib
 except:
     importlib = None
+import pickle
 import sys
 import traceback, textwrap
 
 
+def data_hash(value):
+    """Return the content hash of a data structure for use as a key in the slave data cache.
+
+    Numpy arrays are hashed directly from their data buffers, and lists and tuples are recursed into, so that the cost of pickling the data is avoided.  All other objects are hashed from their pickled form.
+
+
+    @param value:   The data structure to hash.
+    @type value:    anything
+    @return:        The hexadecimal SHA1 digest of the content.
+    @rtype:         str
+    """
+
+    # Build and return the digest.
+    digest = hashlib.sha1()
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _update_hash(digest, value):
+    """Recursively add the content of the data structure to the digest.
+
+    @param digest:  The hash object to update.
+    @type digest:   hashlib hash instance
+    @param value:   The data structure to hash.
+    @type value:    anything
+    """
+
+    # Lists and tuples, recording the type and length so that different nestings give different hashes.
+    if isinstance(value, (list, tuple)):
+        digest.update(('%s%i[' % (type(value).__name__, len(value))).encode())
+        for elem in value:
+            _update_hash(digest, elem)
+        digest.update(b']')
+
+    # Numpy arrays of objects.
+    elif hasattr(value, 'dtype') and value.dtype.hasobject:
+        digest.update(('objarray%s' % repr(value.shape)).encode())
+        _update_hash(digest, value.tolist())
+
+    # Numpy arrays and scalars.
+    elif hasattr(value, 'dtype') and hasattr(value, 'tobytes'):
+        digest.update(('array%s%s' % (value.dtype.str, repr(getattr(value, 'shape', ())))).encode())
+        digest.update(value.tobytes())
+
+    # Everything else.
+    else:
+        digest.update(pickle.dumps(value, 2))
+
+
 def import_module(module_path):
     """Import the python module named by module_path.
 
@@ -160,6 +211,23 @@ class Capturing_exception(Exception):
 
 
 
+class Data_reference(object):
+    """A reference to data held in the content-addressed data cache of the slave processor.
+
+    This replaces the cached data attributes of a Slave_command on the master prior to sending, and is swapped back for the real data on the slave via Slave_command.restore_cached_data().
+    """
+
+    def __init__(self, name):
+        """Set up the reference.
+
+        @param name:    The name of the data structure in the data store of the slave.
+        @type name:     str
+        """
+
+        self.name = name
+
+
+
 class Result(object):
     """A basic result object returned from a slave processor via return_object.
 
@@ -215,6 +283,23 @@ class Result(object):
 
 
 # TODO: make this a result_command
+class Heartbeat(Result):
+    """A signal sent periodically by a busy slave to inform the master that it is still alive.
+
+    This is not processed as a result on the master, but is used to detect slaves which have died or hung (see Processor.run_command_queue()).
+    """
+
+    def __init__(self, processor):
+        """Initialise the heartbeat.
+
+        @param processor:   The slave processor instance.
+        @type processor:    Processor instance
+        """
+
+        super(Heartbeat, self).__init__(processor=processor, completed=False)
+
+
+
 class Result_string(Result):
     """A simple result from a slave containing a result.
 
@@ -34,6 +34,7 @@ except ImportError:
     MPI = None
 import os
 import sys
+import time
 
 # relax module imports.
 from multi.slave_commands import Exit_command
@@ -61,19 +62,28 @@ class Mpi4py_processor(Multi_processor):
 
         super(Mpi4py_processor, self).__init__(processor_size=mpi_processor_size, callback=callback)
 
+        # The heartbeats are sent from a second thread on the slaves, which requires full MPI thread support.  Without heartbeats, long calculations cannot be distinguished from hung slaves.
+        if MPI.Query_thread() < MPI.THREAD_MULTIPLE:
+            self.heartbeat_interval = None
+            self.slave_timeout = None
+
+            # Warn the user, once from the master.
+            if MPI.COMM_WORLD.rank == 0:
+                sys.stderr.write("warning: the MPI library does not provide the MPI_THREAD_MULTIPLE thread support level, so the slave heartbeats are turned off and hung or failed slave processors will not be detected.\n")
+
         # Initialise a flag for determining if we are in the run() method or not.
         self.in_main_loop = False
 
 
     def _broadcast_command(self, command):
         for i in range(1, MPI.COMM_WORLD.size):
-            if i != 0:
+            if i != 0 and i not in self.dead_ranks:
                 MPI.COMM_WORLD.send(obj=command, dest=i)
 
 
     def _ditch_all_results(self):
         for i in range(1, MPI.COMM_WORLD.size):
-            if i != 0:
+            if i != 0 and i not in self.dead_ranks:
                 while True:
                     result = MPI.COMM_WORLD.recv(source=i)
                     if result.completed:
@@ -172,15 +182,25 @@ class Mpi4py_processor(Multi_processor):
         MPI.COMM_WORLD.send(obj=command, dest=dest)
 
 
-    def master_receive_result(self):
+    def master_receive_result(self, timeout=None):
         """Slave to master processor data transfer - receive the result command from the slave.
 
         This is invoked by the master processor.
 
-        @return:        The result command sent by the slave.
-        @rtype:         Result_command instance
+        @keyword timeout:   The maximum time, in seconds, to wait for a result.  If None, this will block until a result is received.
+        @type timeout:      float or None
+        @return:            The result command sent by the slave, or None if the timeout was reached.
+        @rtype:             Result_command instance or None
         """
 
+        # Poll for a message until the timeout is reached.
+        if timeout is not None:
+            end_time = time.time() + timeout
+            while not MPI.COMM_WORLD.Iprobe(source=MPI.ANY_SOURCE):
+                if time.time() > end_time:
+                    return None
+                time.sleep(0.001)
+
         # Catch and return the result command.
         return MPI.COMM_WORLD.recv(source=MPI.ANY_SOURCE)
 
@@ -33,9 +33,8 @@ including, for example:
 """
 
 # Python module imports.
-from copy import copy
-import math
 import sys
+import time
 
 # multi module imports.
 from multi.misc import raise_unimplemented, Result, Result_string, Verbosity; verbosity = Verbosity()
@@ -62,31 +61,16 @@ class Multi_processor(Processor):
 
     #TODO: move up a level
     def add_to_queue(self, command, memo=None):
+        # Skip commands with results in the result journal.
+        if self.journal_replay(memo):
+            return
+
         self.command_queue.append(command)
         if memo != None:
             command.set_memo_id(memo)
             self.memo_map[memo.memo_id()] = memo
 
 
-    #TODO: move up a level
-    def chunk_queue(self, queue):
-        lqueue = copy(queue)
-        result = []
-        processors = self.processor_size()
-        chunks = processors * self.grainyness
-        chunk_size = int(math.floor(float(len(queue)) / float(chunks)))
-
-        if chunk_size < 1:
-            result = queue
-        else:
-            for i in range(chunks):
-                result.append(lqueue[:chunk_size])
-                del lqueue[:chunk_size]
-            for i, elem in enumerate(lqueue):
-                result[i].append(elem)
-        return result
-
-
     # FIXME move to lower level
     def on_master(self):
         if self.rank() == 0:
@@ -117,7 +101,13 @@ class Multi_processor(Processor):
                 memo = None
                 if result.memo_id != None:
                     memo = self.memo_map[result.memo_id]
+                start_time = time.time()
                 result.run(self, memo)
+                self.journal_record(result, memo)
+
+                # Profile the result processing (the batch contents are timed individually).
+                if self.profiling and not isinstance(result, Batched_result_command):
+                    self.profiler.add_result_time(time.time() - start_time)
                 if result.memo_id != None and result.completed:
                     del self.memo_map[result.memo_id]
 
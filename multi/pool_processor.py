@@ -0,0 +1,300 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Module docstring.
+"""The local process pool fabric via the Python multiprocessing module.
+
+This fabric allows all cores of a single machine to be used without an MPI installation.  A pool of slave processes is created by the master at start up, each with its own rank, command pipe and data store, and the results are sent back to the master via a single shared result queue.  The slaves execute the standard Processor.run() slave loop, so all Slave_command, Result_command and Slave_storage_command subclasses used with the mpi4py fabric will work unmodified.
+"""
+
+# Python module imports.
+import multiprocessing
+import os
+import platform
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+import signal
+import sys
+
+# multi module imports.
+from multi.slave_commands import Exit_command
+from multi.multi_processor_base import Multi_processor, Too_few_slaves_exception
+
+
+class Pool_processor(Multi_processor):
+    """The local process pool multi-processor class."""
+
+    def __init__(self, processor_size, callback):
+        """Initialise the process pool processor.
+
+        @param processor_size:  The number of slave processes to create.  If set to -1, the number of CPUs of the machine will be used.
+        @type processor_size:   int
+        @param callback:        The callback object.
+        @type callback:         multi.Application_callback instance
+        """
+
+        # Default to the number of CPUs.
+        if processor_size == -1:
+            processor_size = multiprocessing.cpu_count()
+
+        # At least one slave is required.
+        if processor_size < 1:
+            raise Too_few_slaves_exception()
+
+        # The rank of the master, the slaves will reset this after forking (this is needed by the base class).
+        self._rank = 0
+
+        super(Pool_processor, self).__init__(processor_size=processor_size, callback=callback)
+
+        # The process context (forking is required so that the slaves inherit the program state).  Python versions prior to 3.4 have no contexts, but fork on all POSIX systems.
+        if not hasattr(multiprocessing, 'get_context'):
+            self._context = multiprocessing
+        elif 'fork' in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context('fork')
+        else:
+            self._context = multiprocessing.get_context()
+
+        # The communication structures.
+        self._command_queues = []
+        self._result_queue = None
+        self._slaves = []
+
+        # Initialise a flag for determining if we are in the run() method or not.
+        self.in_main_loop = False
+
+
+    def _broadcast_command(self, command):
+        """Send the command to all slave processes.
+
+        @param command: The command to send.
+        @type command:  Slave_command instance
+        """
+
+        for i in range(self.processor_size()):
+            self._command_queues[i].put(command)
+
+
+    def _ditch_all_results(self):
+        """Receive and discard the final results from all live slaves."""
+
+        # The ranks to wait for.
+        ranks = set([i for i in range(1, self.processor_size()+1) if i not in self.dead_ranks])
+
+        # Receive until all have completed, skipping any late results from failed slaves.
+        while len(ranks):
+            result = self._result_queue.get()
+            if result.completed:
+                ranks.discard(result.rank)
+
+
+    def _kill_slave(self, rank):
+        """Kill the given slave process.
+
+        The slave may be stopped, so SIGTERM is not sufficient.  SIGKILL is sent directly as Process.kill() is only available from Python 3.7 onwards.
+
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        """
+
+        # The slave has already terminated.
+        slave = self._slaves[rank-1]
+        if not slave.is_alive():
+            return
+
+        # Send SIGKILL, falling back to terminate() on systems without the signal.
+        if hasattr(signal, 'SIGKILL'):
+            os.kill(slave.pid, signal.SIGKILL)
+        else:
+            slave.terminate()
+
+
+    def _slave_main(self, rank):
+        """The target function of the slave processes.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        """
+
+        # Store the rank of this slave.
+        self._rank = rank
+
+        # Execute the slave loop of the base class.
+        super(Pool_processor, self).run()
+
+
+    def abort(self):
+        """Terminate all slave processes and exit."""
+
+        # Kill the slaves.
+        for slave in self._slaves:
+            if slave.is_alive():
+                slave.terminate()
+        self._slaves = []
+
+        # Exit.
+        sys.exit(1)
+
+
+    def assert_on_master(self):
+        """Make sure that this is the master processor and not a slave.
+
+        @raises Exception:  If not on the master processor.
+        """
+
+        # Check if this processor is a slave, and if so throw an exception.
+        if self.on_slave():
+            msg = 'running on slave when expected master with rank == 0, rank was %d'% self.rank()
+            raise Exception(msg)
+
+
+    def exit(self, status=0):
+        """Exit the process pool processor with the given status.
+
+        @keyword status:    The program exit status.
+        @type status:       int
+        """
+
+        # Execution on the slave.
+        if self.on_slave():
+            raise Exception('sys.exit unexpectedly called on slave!')
+
+        # Slave clean up.
+        if len(self._slaves):
+            # Kill any hung slaves.
+            for rank in self.dead_ranks:
+                self._kill_slave(rank)
+
+            # Send the exit command to all slaves.
+            self._broadcast_command(Exit_command())
+
+            # Dump all results.
+            self._ditch_all_results()
+
+            # Wait for the slaves to terminate.
+            for slave in self._slaves:
+                slave.join()
+            self._slaves = []
+
+        # Exit the program with the given status.
+        sys.exit(status)
+
+
+    def get_intro_string(self):
+        """Return the string to append to the end of the relax introduction string.
+
+        @return:    The string describing this Processor fabric.
+        @rtype:     str
+        """
+
+        # Return the string.
+        return "Local process pool with %i slave processors & 1 master." % self.processor_size()
+
+
+    def get_name(self):
+        return '%s-pid%s' % (platform.node(), os.getpid())
+
+
+    def master_queue_command(self, command, dest):
+        """Master to slave processor data transfer - send the command to the given slave.
+
+        @param command: The command to send to the slave.
+        @type command:  Slave_command instance or list of Slave_command instances
+        @param dest:    The destination processor's rank.
+        @type dest:     int
+        """
+
+        # The commands are pickled by the queue.
+        self._command_queues[dest-1].put(command)
+
+
+    def master_receive_result(self, timeout=None):
+        """Slave to master processor data transfer - receive the result command from the slave.
+
+        This is invoked by the master processor.
+
+        @keyword timeout:   The maximum time, in seconds, to wait for a result.  If None, this will block until a result is received.
+        @type timeout:      float or None
+        @return:            The result command sent by the slave, or None if the timeout was reached.
+        @rtype:             Result_command instance or None
+        """
+
+        # Catch and return the result command.
+        try:
+            return self._result_queue.get(timeout=timeout)
+
+        # Nothing received.
+        except queue.Empty:
+            return None
+
+
+    def pre_run(self):
+        """Create the slave processes prior to starting the application main loop."""
+
+        # Execute the base class method.
+        super(Pool_processor, self).pre_run()
+
+        # Only the master creates the slaves.
+        if self.on_slave():
+            return
+
+        # The shared result queue.
+        self._result_queue = self._context.Queue()
+
+        # Create and start the slaves.
+        for rank in range(1, self.processor_size()+1):
+            self._command_queues.append(self._context.Queue())
+            slave = self._context.Process(target=self._slave_main, args=(rank,))
+            slave.daemon = True
+            slave.start()
+            self._slaves.append(slave)
+
+
+    def rank(self):
+        return self._rank
+
+
+    def return_result_command(self, result_object):
+        self._result_queue.put(result_object)
+
+
+    def run(self):
+        self.in_main_loop = True
+        super(Pool_processor, self).run()
+        self.in_main_loop = False
+
+
+    def slave_alive(self, rank):
+        """Determine if the slave process of the given rank is still running.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        @return:        False if the slave process has terminated, True otherwise.
+        @rtype:         bool
+        """
+
+        return self._slaves[rank-1].is_alive()
+
+
+    def slave_receive_commands(self):
+        return self._command_queues[self._rank-1].get()
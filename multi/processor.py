@@ -98,14 +98,39 @@ The following are yet to be implemented:
 #TODO: check exceptions on master.
 
 # Python module imports.
-import time, datetime, math, sys
+from copy import copy
+import time, datetime, math, sys, threading
 
 # multi module imports.
-from multi.misc import Capturing_exception, raise_unimplemented, Verbosity; verbosity = Verbosity()
-from multi.result_queue import Threaded_result_queue
+from multi.journal import Result_journal
+from multi.misc import Capturing_exception, Data_reference, data_hash, Heartbeat, raise_unimplemented, Verbosity; verbosity = Verbosity()
+from multi.profiler import Command_profiler, pickled_size
+from multi.result_queue import Immediate_result_queue, Threaded_result_queue
 from multi.processor_io import Redirect_text
 from multi.result_commands import Batched_result_command, Null_result_command, Result_exception
-from multi.slave_commands import Slave_storage_command
+from multi.slave_commands import Slave_cache_command, Slave_storage_command
+
+
+def command_cost(command):
+    """Return the expected cost of a queued command or list of batched commands.
+
+    @param command: The slave command or list of slave commands.
+    @type command:  Slave_command instance or list of Slave_command instances
+    @return:        The cost hint, this being the sum of the hints for a list of commands.
+    @rtype:         float
+    """
+
+    # Batched commands.
+    if isinstance(command, list):
+        return sum([command_cost(elem) for elem in command])
+
+    # Commands without a hint have the default unit cost.
+    if not hasattr(command, 'cost'):
+        return 1.0
+
+    # The hint from the command itself.
+    return command.cost()
+
 
 
 class Data_store:
@@ -155,8 +180,8 @@ class Processor(object):
 
         @see:  Application_callback."""
 
-        self.grainyness = 1
-        """The number of sub jobs to queue for each processor if we have more jobs than processors."""
+        self.batch_time = 1.0
+        """The target wall time, in seconds, for each batch of commands sent to a slave."""
 
 #        # CHECKME: am I implemented?, should I be an application callback function
 #        self.pre_queue_command = None
@@ -179,6 +204,36 @@ class Processor(object):
         self.threaded_result_processing = True
         """Flag for the handling of result processing via self.run_command_queue()."""
 
+        self.utilisation = {}
+        """The fraction of time each slave rank spent executing commands in the last self.run_command_queue() call."""
+
+        self.journal = None
+        """The result journal for resuming interrupted calculations (see self.journal_open())."""
+
+        self.profiler = None
+        """The command profiler, active between the self.profile_start() and self.profile_stop() calls."""
+
+        self.profiling = False
+        """Flag which if True will cause the timings and transport sizes of all commands to be recorded."""
+
+        self.slave_cache = {}
+        """The keys of the data held in the content-addressed data cache of each slave rank for the current command queue."""
+
+        self.heartbeat_interval = 10.0
+        """The time, in seconds, between the heartbeats sent by busy slaves to the master.  If None, no heartbeats are sent."""
+
+        self.slave_timeout = 300.0
+        """The time, in seconds, without a heartbeat or result from a busy slave after which it is considered dead.  If None, failed slaves are not detected."""
+
+        self.max_retries = 2
+        """The number of times a command lost to a failed slave or slave exception is re-queued before the failure is raised."""
+
+        self.dead_ranks = set()
+        """The ranks of the slaves which have failed and are no longer sent commands."""
+
+        self.queue_held = False
+        """Flag which if True will cause self.run_queue() to keep the queued commands for a later self.release_queue() call."""
+
 
     def abort(self):
         """Shutdown the multi processor in exceptional conditions - designed for overriding.
@@ -224,6 +279,59 @@ class Processor(object):
         raise_unimplemented(self.assert_on_master)
 
 
+    def cache_batch(self, batch, dest):
+        """Replace the cacheable data of the commands by references to the data cache of the slave.
+
+        The data listed in the Slave_command.cache_names attribute is keyed by its content hash.  If the destination slave does not already hold the data, a Slave_cache_command is prepended to the batch to send it.  The commands are shallow copied so that the originals on the master are not modified.
+
+
+        @param batch:   The batch of commands to send.
+        @type batch:    list of Slave_command instances
+        @param dest:    The destination processor's rank.
+        @type dest:     int
+        @return:        The batch of commands to send in place of the original.
+        @rtype:         list of Slave_command instances
+        """
+
+        # The cache keys held by the slave (None if the cache of a previous queue must first be cleared).
+        held = self.slave_cache[dest]
+        reset = held is None
+        if reset:
+            held = set()
+
+        # The storage command for the new data.
+        store = Slave_cache_command(reset=reset)
+
+        # Loop over the commands.
+        new_batch = []
+        for command in batch:
+            # Nothing to cache.
+            if not len(getattr(command, 'cache_names', [])):
+                new_batch.append(command)
+                continue
+
+            # Replace the cacheable data with references.
+            command = copy(command)
+            for name in command.cache_names:
+                value = getattr(command, name)
+                if value is None:
+                    continue
+                key = 'cache_' + data_hash(value)
+                if key not in held:
+                    store.add(key, value)
+                    held.add(key)
+                setattr(command, name, Data_reference(key))
+            new_batch.append(command)
+
+        # Send the new data first.
+        if len(store.names):
+            self.slave_cache[dest] = held
+            new_batch.insert(0, store)
+
+        # Return the modified batch.
+        return new_batch
+
+
     def exit(self, status=0):
         """Exit the processor with the given status.
 
@@ -344,6 +452,61 @@ class Processor(object):
         return time_delta_str
 
 
+    def heartbeat_start(self):
+        """Start a thread on the slave which periodically sends heartbeats to the master.
+
+        @return:    The stop event and heartbeat thread to pass to self.heartbeat_stop(), or None if heartbeats are turned off.
+        @rtype:     tuple of threading.Event and threading.Thread instances or None
+        """
+
+        # Heartbeats are turned off.
+        if self.heartbeat_interval is None:
+            return None
+
+        # The heartbeat loop.
+        stop = threading.Event()
+        def beat():
+            while not stop.wait(self.heartbeat_interval):
+                self.return_result_command(Heartbeat(processor=self))
+
+        # Start the thread.
+        thread = threading.Thread(target=beat)
+        thread.daemon = True
+        thread.start()
+
+        # Return the stop event and thread.
+        return stop, thread
+
+
+    def heartbeat_stop(self, heartbeat):
+        """Stop the heartbeat thread started by self.heartbeat_start().
+
+        The thread is joined so that no heartbeat can be sent after the results of the commands.
+
+
+        @param heartbeat:   The return value of self.heartbeat_start().
+        @type heartbeat:    tuple or None
+        """
+
+        # Heartbeats are turned off.
+        if heartbeat is None:
+            return
+
+        # Stop and wait for the thread.
+        stop, thread = heartbeat
+        stop.set()
+        thread.join()
+
+
+    def hold_queue(self):
+        """Hold the command queue, so that self.run_queue() calls only accumulate the queued commands.
+
+        This allows the commands of independent calculations, for example the optimisation of different models in separate data pipes, to be executed together on the slaves via a single self.release_queue() call.  The results are processed via the memos, so the calculations must not depend on each other's results.
+        """
+
+        self.queue_held = True
+
+
     def is_queued(self):
         """Determine if any slave commands are queued.
 
@@ -359,6 +522,74 @@ class Processor(object):
         return False
 
 
+    def journal_close(self):
+        """Close the result journal opened by self.journal_open()."""
+
+        # Close and remove the journal.
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+    def journal_open(self, file=None, context=None):
+        """Open a result journal, so that processed results are recorded and already journaled commands are skipped.
+
+        @keyword file:      The name of the journal file.
+        @type file:         str
+        @keyword context:   A string identifying the calculation, for example the data pipe name.
+        @type context:      str
+        """
+
+        # Open the journal.
+        self.journal = Result_journal(file=file, context=context)
+
+
+    def journal_record(self, result, memo):
+        """Record the processed result command in the result journal, if one is open.
+
+        @param result:  The result command processed on the master.
+        @type result:   Result_command instance
+        @param memo:    The memo of the result command.
+        @type memo:     Memo instance or None
+        """
+
+        # No journal or memo.
+        if self.journal is None or memo is None:
+            return
+
+        # Record the result if the memo supports journaling.
+        key = memo.journal_key()
+        if key is not None:
+            self.journal.record(key, result)
+
+
+    def journal_replay(self, memo):
+        """Process the results of the memo found in the result journal, if one is open.
+
+        @param memo:    The memo of the command about to be queued.
+        @type memo:     Memo instance or None
+        @return:        True if the journaled results were processed and the command does not need to be executed.
+        @rtype:         bool
+        """
+
+        # No journal or memo.
+        if self.journal is None or memo is None:
+            return False
+
+        # Fetch the results.
+        key = memo.journal_key()
+        if key is None:
+            return False
+        results = self.journal.fetch(key)
+        if results is None:
+            return False
+
+        # Process the results on the master as if they were freshly returned.
+        for result in results:
+            result.run(self, memo)
+        return True
+
+
     def master_queue_command(self, command, dest):
         """Slave to master processor data transfer - send the result command from the slave.
 
@@ -374,18 +605,57 @@ class Processor(object):
         raise_unimplemented(self.master_queue_command)
 
 
-    def master_receive_result(self):
+    def master_receive_result(self, timeout=None):
         """Slave to master processor data transfer - receive the result command from the slave.
 
         This is invoked by the master processor.
 
-        @return:        The result command sent by the slave.
-        @rtype:         Result_command instance
+        @keyword timeout:   The maximum time, in seconds, to wait for a result.  If None, this will block until a result is received.
+        @type timeout:      float or None
+        @return:            The result command sent by the slave, or None if the timeout was reached.
+        @rtype:             Result_command instance or None
         """
 
         raise_unimplemented(self.master_receive_result)
 
 
+    def next_batch(self, queue, time_per_cost=None):
+        """Pop the next batch of commands to send to a slave off the end of the queue.
+
+        The batch size is adapted to the measured command run times so that each batch takes approximately self.batch_time seconds.  To avoid starving the slaves, a batch is never larger than an equal share of the remaining queue.
+
+
+        @param queue:           The command queue, sorted so that the end holds the next commands to send.
+        @type queue:            list of Slave_command instances
+        @keyword time_per_cost: The measured run time per unit of command cost.  If None, then single commands are sent out until timings are available.
+        @type time_per_cost:    None or float
+        @return:                The batch of commands.
+        @rtype:                 list of Slave_command instances
+        """
+
+        # The first command.
+        batch = [queue.pop()]
+
+        # No timing information yet, so send out single commands.
+        if not time_per_cost:
+            return batch
+
+        # The fair share of the remaining queue.
+        max_size = max(1, int(math.ceil(float(len(queue)) / float(self.processor_size()))))
+
+        # Fill the batch up to the target wall time.
+        cost = command_cost(batch[0])
+        while len(queue) != 0 and len(batch) < max_size:
+            next_cost = command_cost(queue[-1])
+            if (cost + next_cost) * time_per_cost > self.batch_time:
+                break
+            batch.append(queue.pop())
+            cost += next_cost
+
+        # Return the commands.
+        return batch
+
+
     def post_run(self):
         """Method called after the application main loop has finished - designed for overriding.
 
@@ -424,6 +694,76 @@ class Processor(object):
         return self._processor_size
 
 
+    def profile_batch(self, batch):
+        """Measure the serialisation of a batch of commands about to be sent to a slave for the profiler.
+
+        @param batch:   The batch of commands.
+        @type batch:    list of Slave_command instances
+        @return:        The command class names, the time required to pickle the batch, and the pickled size of each command.
+        @rtype:         list of str, float, list of int
+        """
+
+        # The command names.
+        names = [command.__class__.__name__ for command in batch]
+
+        # No size measurements, so avoid the pickling.
+        if not self.profiler.sizes:
+            return names, 0.0, [0]*len(batch)
+
+        # Pickle each command.
+        start_time = time.time()
+        sizes = [pickled_size(command) for command in batch]
+        serialise_time = time.time() - start_time
+
+        # Return the data.
+        return names, serialise_time, sizes
+
+
+    def profile_result(self, result, round_trip, batch_profile):
+        """Record the batch of commands and its returned result in the profiler.
+
+        @param result:          The final result command of the batch returned by the slave.
+        @type result:           Result_command instance
+        @param round_trip:      The time between sending the batch and receiving the result.
+        @type round_trip:       float
+        @param batch_profile:   The data returned by self.profile_batch() for the batch.
+        @type batch_profile:    tuple
+        """
+
+        # Unpack the batch data.
+        names, serialise_time, sizes = batch_profile
+
+        # The slave side timings.
+        timings = getattr(result, 'timings', None)
+
+        # The result size.
+        result_bytes = 0
+        if self.profiler.sizes:
+            result_bytes = pickled_size(result)
+
+        # Record.
+        self.profiler.add_batch(rank=result.rank, names=names, serialise_time=serialise_time, command_bytes=sizes, round_trip=round_trip, compute_times=timings, result_bytes=result_bytes)
+
+
+    def profile_start(self, sizes=True):
+        """Start the profiling of all commands executed via the command queue, discarding any prior profile.
+
+        @keyword sizes: A flag which if True will cause the pickled sizes of the commands and results to be measured.  This requires each command and result to be pickled an extra time.
+        @type sizes:    bool
+        """
+
+        # A new profiler.
+        self.profiler = Command_profiler(fabric=self.__class__.__name__, processors=self.processor_size(), sizes=sizes)
+        self.profiling = True
+
+
+    def profile_stop(self):
+        """Stop the profiling of commands, keeping the profile for reporting."""
+
+        # Turn off the flag.
+        self.profiling = False
+
+
     def rank(self):
         """Get the rank of this processor - an abstract method.
 
@@ -463,6 +803,54 @@ class Processor(object):
         return int(math.ceil(math.log10(self.processor_size())))
 
 
+    def release_queue(self, run=True):
+        """Release the command queue held by self.hold_queue(), executing all accumulated commands.
+
+        @keyword run:   A flag which if False will cause the accumulated commands to be discarded rather than executed, for example when the set up of the calculations has failed.
+        @type run:      bool
+        """
+
+        # Release the hold.
+        self.queue_held = False
+
+        # Execute the accumulated commands.
+        if run:
+            self.run_queue()
+
+        # Discard them.
+        else:
+            del self.command_queue[:]
+            self.memo_map.clear()
+
+
+    def requeue(self, queue, batch, failures):
+        """Place the commands of a failed batch back onto the command queue.
+
+        The commands are appended to the end of the queue, so that they are the next to be sent out.
+
+
+        @param queue:       The command queue.
+        @type queue:        list of Slave_command instances
+        @param batch:       The commands of the failed batch.
+        @type batch:        list of Slave_command instances
+        @param failures:    The number of failures of each command, keyed by the command ID.  This is updated in place.
+        @type failures:     dict of int
+        @return:            True if the commands were re-queued, False if the maximum number of retries of one of the commands has been reached.
+        @rtype:             bool
+        """
+
+        # Check the retries.
+        for command in batch:
+            if failures.get(id(command), 0) >= self.max_retries:
+                return False
+
+        # Re-queue.
+        for command in batch:
+            failures[id(command)] = failures.get(id(command), 0) + 1
+            queue.append(command)
+        return True
+
+
     def return_object(self, result):
         """Return a result to the master processor from a slave - an abstract method.
 
@@ -528,20 +916,34 @@ class Processor(object):
                     # Capture the standard IO streams for the slaves.
                     self.stdio_capture()
 
+                    # Inform the master that this slave is alive during long calculations.
+                    heartbeat = self.heartbeat_start()
+
                     # Execute each command, one by one.
-                    for i, command in enumerate(commands):
-                        # Set the completed flag if this is the last command.
-                        completed = (i == len(commands)-1)
+                    timings = []
+                    try:
+                        for i, command in enumerate(commands):
+                            # Set the completed flag if this is the last command.
+                            completed = (i == len(commands)-1)
+
+                            # Swap in any data from the slave's data cache.
+                            command.restore_cached_data(self)
 
-                        # Execute the calculation.
-                        command.run(self, completed)
+                            # Execute the calculation, timing it for the profiler of the master.
+                            start_time = time.time()
+                            command.run(self, completed)
+                            timings.append(time.time() - start_time)
+
+                    # Stop the heartbeats.
+                    finally:
+                        self.heartbeat_stop(heartbeat)
 
                     # Restore the IO.
                     self.stdio_restore()
 
                     # Process the batched results.
                     if self.batched_returns:
-                        self.return_object(Batched_result_command(processor=self, result_commands=self.result_list, io_data=self.io_data))
+                        self.return_object(Batched_result_command(processor=self, result_commands=self.result_list, io_data=self.io_data, timings=timings))
                         self.result_list = None
 
                 # Capture and process all slave exceptions.
@@ -576,6 +978,11 @@ class Processor(object):
     def run_command_queue(self, queue):
         """Process all commands on the queue and wait for completion.
 
+        The commands are dispatched in a streaming fashion, in which each slave is sent a new batch of commands as soon as the result of its last batch has been received.  The queue is first sorted so that the commands with the highest cost hint, as returned by Slave_command.cost(), are sent out first.  The batch sizes are adapted to the run times measured from the returned results (see self.next_batch()).  The fraction of the total run time that each slave spent executing commands is stored in the self.utilisation dictionary and printed out if the verbosity level is non-zero.  If profiling has been activated via self.profile_start(), the timings and pickled sizes of all commands and results are recorded in the self.profiler object.
+
+        The master tracks the batch of commands held by each slave.  Busy slaves send periodic heartbeats, and a slave which has died or which has not been heard from within self.slave_timeout seconds is dropped and its commands are re-queued for the healthy slaves.  The commands of a batch which raised an exception on the slave are also re-queued, up to self.max_retries times, before the exception is raised on the master.
+
+
         @param queue:   The command queue.
         @type queue:    list of Command instances
         """
@@ -583,47 +990,147 @@ class Processor(object):
         # This must only be run on the master processor.
         self.assert_on_master()
 
+        # Sort the queue so that the most expensive commands are popped off the end first.
+        queue.sort(key=command_cost)
+
         running_set = set()
-        idle_set = set([i for i in range(1, self.processor_size()+1)])
+        idle_set = set([i for i in range(1, self.processor_size()+1) if i not in self.dead_ranks])
 
         if self.threaded_result_processing:
             result_queue = Threaded_result_queue(self)
         else:
             result_queue = Immediate_result_queue(self)
 
-        while len(queue) != 0:
-
-            while len(idle_set) != 0:
-                if len(queue) != 0:
-                    command = queue.pop()
-                    dest = idle_set.pop()
-                    self.master_queue_command(command=command, dest=dest)
-                    running_set.add(dest)
+        # Initialise the timing of the slaves for the utilisation statistics.
+        start_time = time.time()
+        dispatch_time = {}
+        dispatch_cost = {}
+        busy_time = {}
+        dispatch_profile = {}
+        for rank in idle_set:
+            busy_time[rank] = 0.0
+
+        # Reset the slave data cache so that the data of the last queue is cleared on the first send.
+        for rank in idle_set:
+            self.slave_cache[rank] = None
+
+        # The measured run time per unit of command cost, for adaptive batching.
+        total_busy = 0.0
+        total_cost = 0.0
+        time_per_cost = None
+
+        # The failure detection structures - the commands held by each slave, the time each slave was last heard from, and the failure counts of the commands.
+        held = {}
+        last_seen = {}
+        failures = {}
+        if self.slave_timeout is None:
+            poll_time = None
+        else:
+            poll_time = min(1.0, self.slave_timeout)
+
+        # Loop until the queue of calculations is depleted and all results have been returned.
+        while len(queue) != 0 or len(running_set) != 0:
+            # Refill all idle slaves.
+            while len(idle_set) != 0 and len(queue) != 0:
+                batch = self.next_batch(queue, time_per_cost=time_per_cost)
+                dest = idle_set.pop()
+                dispatch_time[dest] = time.time()
+                dispatch_cost[dest] = command_cost(batch)
+                held[dest] = batch
+                last_seen[dest] = dispatch_time[dest]
+                batch = self.cache_batch(batch, dest)
+                if self.profiling:
+                    dispatch_profile[dest] = self.profile_batch(batch)
+                self.master_queue_command(command=batch, dest=dest)
+                running_set.add(dest)
+
+            # All slaves have failed.
+            if len(running_set) == 0 and len(idle_set) == 0:
+                raise Exception("All slave processors have failed, %i commands could not be executed." % len(queue))
+
+            # Get the result.
+            result = self.master_receive_result(timeout=poll_time)
+
+            # Drop all failed slaves, re-queueing their commands.
+            for rank in list(running_set):
+                if rank == getattr(result, 'rank', None):
+                    continue
+                if not self.slave_alive(rank):
+                    reason = "the process has died"
+                elif self.slave_timeout is not None and time.time() - last_seen[rank] > self.slave_timeout:
+                    reason = "no response has been received within %s seconds" % self.slave_timeout
                 else:
-                    break
-
-            # Loop until the queue of calculations is depleted.
-            while len(running_set) != 0:
-                # Get the result.
-                result = self.master_receive_result()
-
-                # Debugging printout.
-                if verbosity.level():
-                    print('\nIdle set:    %s' % idle_set)
-                    print('Running set: %s' % running_set)
-
-                # Shift the processor rank to the idle set.
-                if result.completed:
-                    idle_set.add(result.rank)
-                    running_set.remove(result.rank)
-
-                # Add to the result queue for instant or threaded processing.
-                result_queue.put(result)
+                    continue
+                self.dead_ranks.add(rank)
+                running_set.remove(rank)
+                dispatch_time.pop(rank)
+                dispatch_cost.pop(rank)
+                dispatch_profile.pop(rank, None)
+                batch = held.pop(rank)
+                if not self.requeue(queue, batch, failures):
+                    raise Exception("The slave processor of rank %i has failed as %s, and the maximum of %i retries of its commands has been reached." % (rank, reason, self.max_retries))
+                sys.stderr.write("Warning: the slave processor of rank %i has failed as %s, its %i commands have been re-queued.\n" % (rank, reason, len(batch)))
+
+            # Nothing received.
+            if result is None:
+                continue
+
+            # Ignore all late results from dropped slaves.
+            if result.rank in self.dead_ranks:
+                continue
+
+            # A heartbeat from a busy slave.
+            last_seen[result.rank] = time.time()
+            if isinstance(result, Heartbeat):
+                continue
+
+            # Debugging printout.
+            if verbosity.level():
+                print('\nIdle set:    %s' % idle_set)
+                print('Running set: %s' % running_set)
+
+            # Re-queue the batch after a slave exception, if retries remain.
+            if isinstance(result, Result_exception) and result.rank in held and self.requeue(queue, held[result.rank], failures):
+                sys.stderr.write("Warning: the slave processor of rank %i raised an exception, its %i commands have been re-queued:\n%s\n" % (result.rank, len(held[result.rank]), result.exception))
+                del held[result.rank]
+                idle_set.add(result.rank)
+                running_set.remove(result.rank)
+                busy_time[result.rank] += time.time() - dispatch_time.pop(result.rank)
+                dispatch_cost.pop(result.rank)
+                dispatch_profile.pop(result.rank, None)
+                continue
+
+            # Shift the processor rank to the idle set, so that it can be immediately refilled.
+            if result.completed:
+                held.pop(result.rank, None)
+                idle_set.add(result.rank)
+                running_set.remove(result.rank)
+                elapsed = time.time() - dispatch_time.pop(result.rank)
+                busy_time[result.rank] += elapsed
+
+                # Record the batch in the profile.
+                if result.rank in dispatch_profile:
+                    self.profile_result(result, elapsed, dispatch_profile.pop(result.rank))
+
+                # Update the timing estimate.
+                total_busy += elapsed
+                total_cost += dispatch_cost.pop(result.rank)
+                if total_cost > 0.0:
+                    time_per_cost = total_busy / total_cost
+
+            # Add to the result queue for instant or threaded processing.
+            result_queue.put(result)
 
         # Process the threaded results.
         if self.threaded_result_processing:
             result_queue.run_all()
 
+        # The slave utilisation.
+        total_time = time.time() - start_time
+        self.utilisation_stats(busy_time=busy_time, total_time=total_time)
+        if self.profiling:
+            self.profiler.add_queue(busy_time=busy_time, total_time=total_time)
+
 
     def run_queue(self):
         """Run the processor queue - an abstract method.
@@ -632,9 +1139,12 @@ class Processor(object):
         thread to block until the command has completed.
         """
 
+        # The queue is held, so keep the commands for the self.release_queue() call.
+        if self.queue_held:
+            return
+
         #FIXME: need a finally here to cleanup exceptions states
-        lqueue = self.chunk_queue(self.command_queue)
-        self.run_command_queue(lqueue)
+        self.run_command_queue(self.command_queue[:])
 
         del self.command_queue[:]
         self.memo_map.clear()
@@ -667,6 +1177,42 @@ class Processor(object):
         self.run_queue()
 
 
+    def slave_alive(self, rank):
+        """Determine if the slave process of the given rank is still running - designed for overriding.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        @return:        False if the slave is known to have died, True otherwise.
+        @rtype:         bool
+        """
+
+        return True
+
+
+    def utilisation_stats(self, busy_time=None, total_time=None):
+        """Store and print out the per-rank utilisation of the slaves for the last command queue.
+
+        @keyword busy_time:     The time spent executing commands, keyed by slave rank.
+        @type busy_time:        dict of float
+        @keyword total_time:    The total wall time of the command queue execution.
+        @type total_time:       float
+        """
+
+        # Store the fractions.
+        self.utilisation = {}
+        for rank in busy_time:
+            if total_time > 0.0:
+                self.utilisation[rank] = busy_time[rank] / total_time
+            else:
+                self.utilisation[rank] = 0.0
+
+        # Printout.
+        if verbosity.level():
+            print("\nSlave utilisation (total time of %.3f s):" % total_time)
+            for rank in sorted(self.utilisation):
+                print("    Rank %s:  %6.1f%% (%.3f s busy)" % (self.rank_format_string() % rank, 100.0*self.utilisation[rank], busy_time[rank]))
+
+
     def stdio_capture(self):
         """Enable capture of the STDOUT and STDERR.
         
@@ -0,0 +1,244 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Module docstring.
+"""Module containing the profiler for the instrumentation of the command execution and transport."""
+
+# Python module imports.
+import json
+import pickle
+
+
+def pickled_size(obj):
+    """Return the size of the object once pickled, as sent between processors.
+
+    @param obj: The object to measure.
+    @type obj:  anything
+    @return:    The number of bytes.
+    @rtype:     int
+    """
+
+    return len(pickle.dumps(obj, 2))
+
+
+
+class Command_profiler(object):
+    """Storage and reporting of the timings and transport sizes of all commands executed on the slaves.
+
+    For each command, the time spent serialising it on the master, its pickled size, the compute time on the slave, the transfer overhead (the round trip time of its batch minus the slave compute time), and the pickled size of the returned results are recorded.  The time spent processing the results on the master and the busy and idle times of each slave rank are also accumulated.  As the sizes are measured by pickling the commands and results an extra time, their measurement can be turned off.
+    """
+
+    def __init__(self, fabric=None, processors=None, sizes=True):
+        """Initialise the data structures.
+
+        @keyword fabric:        The name of the processor fabric.
+        @type fabric:           str
+        @keyword processors:    The number of slave processors.
+        @type processors:       int
+        @keyword sizes:         A flag which if True will cause the pickled sizes and serialisation times of the commands and results to be measured.
+        @type sizes:            bool
+        """
+
+        # Store the arguments.
+        self.fabric = fabric
+        self.processors = processors
+        self.sizes = sizes
+
+        # The per-command records.
+        self.commands = []
+
+        # The per-rank statistics.
+        self.busy_time = {}
+        self.total_time = {}
+
+        # The master side result processing.
+        self.result_time = 0.0
+        self.result_count = 0
+
+        # The number of command queues executed.
+        self.queue_count = 0
+
+
+    def add_batch(self, rank=None, names=None, serialise_time=0.0, command_bytes=None, round_trip=0.0, compute_times=None, result_bytes=0):
+        """Record the execution of a batch of commands.
+
+        The batch level serialisation time, transfer overhead and result size are divided evenly between the commands.
+
+
+        @keyword rank:              The rank of the slave which executed the batch.
+        @type rank:                 int
+        @keyword names:             The class names of the commands.
+        @type names:                list of str
+        @keyword serialise_time:    The time spent pickling the batch on the master.
+        @type serialise_time:       float
+        @keyword command_bytes:     The pickled size of each command.
+        @type command_bytes:        list of int
+        @keyword round_trip:        The time between sending the batch and receiving the final result.
+        @type round_trip:           float
+        @keyword compute_times:     The run time of each command on the slave.  This can be shorter than the list of names if the timings were not returned.
+        @type compute_times:        list of float
+        @keyword result_bytes:      The pickled size of the returned result.
+        @type result_bytes:         int
+        """
+
+        # Nothing to do.
+        num = len(names)
+        if not num:
+            return
+
+        # The slave compute times.
+        if compute_times is None:
+            compute_times = []
+        compute = sum(compute_times)
+
+        # Store the per-command records.
+        for i in range(num):
+            self.commands.append({
+                'command': names[i],
+                'rank': rank,
+                'serialise_time': serialise_time / num,
+                'command_bytes': command_bytes[i],
+                'compute_time': compute_times[i] if i < len(compute_times) else 0.0,
+                'transfer_time': max(0.0, round_trip - compute) / num,
+                'result_bytes': result_bytes / float(num)
+            })
+
+
+    def add_queue(self, busy_time=None, total_time=None):
+        """Record the slave utilisation of a command queue.
+
+        @keyword busy_time:     The time spent executing commands, keyed by slave rank.
+        @type busy_time:        dict of float
+        @keyword total_time:    The total wall time of the command queue execution.
+        @type total_time:       float
+        """
+
+        # Accumulate.
+        self.queue_count += 1
+        for rank in busy_time:
+            self.busy_time[rank] = self.busy_time.get(rank, 0.0) + busy_time[rank]
+            self.total_time[rank] = self.total_time.get(rank, 0.0) + total_time
+
+
+    def add_result_time(self, seconds):
+        """Record the time spent processing a result command on the master.
+
+        @param seconds: The processing time.
+        @type seconds:  float
+        """
+
+        self.result_time += seconds
+        self.result_count += 1
+
+
+    def report(self):
+        """Assemble the profiling report.
+
+        @return:    The report, consisting of the summary, the per-rank, per-command type and per-command statistics.
+        @rtype:     dict
+        """
+
+        # The per-rank statistics.
+        ranks = {}
+        for rank in sorted(self.busy_time):
+            ranks[str(rank)] = {
+                'busy_time': self.busy_time[rank],
+                'idle_time': self.total_time[rank] - self.busy_time[rank],
+                'utilisation': self.busy_time[rank] / self.total_time[rank] if self.total_time[rank] > 0.0 else 0.0
+            }
+
+        # The per-command type statistics.
+        keys = ['serialise_time', 'command_bytes', 'compute_time', 'transfer_time', 'result_bytes']
+        types = {}
+        for record in self.commands:
+            if record['command'] not in types:
+                types[record['command']] = {'count': 0}
+                for key in keys:
+                    types[record['command']][key] = 0.0
+            types[record['command']]['count'] += 1
+            for key in keys:
+                types[record['command']][key] += record[key]
+
+        # The summary.
+        summary = {
+            'fabric': self.fabric,
+            'processors': self.processors,
+            'sizes': self.sizes,
+            'queues': self.queue_count,
+            'commands': len(self.commands),
+            'result_count': self.result_count,
+            'result_time': self.result_time
+        }
+        for key in keys:
+            summary[key] = sum([record[key] for record in self.commands])
+
+        # Return the full report.
+        return {'summary': summary, 'ranks': ranks, 'command_types': types, 'commands': self.commands}
+
+
+    def write_json(self, file):
+        """Write the profiling report in the JSON format.
+
+        @param file:    The writable file object.
+        @type file:     file object
+        """
+
+        json.dump(self.report(), file, indent=4, sort_keys=True)
+        file.write("\n")
+
+
+    def write_text(self, file):
+        """Write a human readable summary of the profiling report.
+
+        @param file:    The writable file object.
+        @type file:     file object
+        """
+
+        # The report.
+        report = self.report()
+        summary = report['summary']
+
+        # The summary.
+        file.write("Processor fabric:             %s (%s slaves)\n" % (summary['fabric'], summary['processors']))
+        file.write("Command queues:               %i\n" % summary['queues'])
+        file.write("Commands:                     %i\n" % summary['commands'])
+        file.write("Master serialisation time:    %.6f s\n" % summary['serialise_time'])
+        file.write("Transfer time:                %.6f s\n" % summary['transfer_time'])
+        file.write("Slave compute time:           %.6f s\n" % summary['compute_time'])
+        file.write("Master result processing:     %.6f s (%i results)\n" % (summary['result_time'], summary['result_count']))
+        if summary['sizes']:
+            file.write("Commands sent:                %i bytes\n" % summary['command_bytes'])
+            file.write("Results returned:             %i bytes\n" % summary['result_bytes'])
+        else:
+            file.write("Commands sent:                not measured\n")
+            file.write("Results returned:             not measured\n")
+
+        # The ranks.
+        file.write("\n%-10s %15s %15s %12s\n" % ("Rank", "Busy (s)", "Idle (s)", "Utilisation"))
+        for rank in sorted(report['ranks'], key=int):
+            stats = report['ranks'][rank]
+            file.write("%-10s %15.6f %15.6f %11.1f%%\n" % (rank, stats['busy_time'], stats['idle_time'], 100.0*stats['utilisation']))
+
+        # The command types.
+        file.write("\n%-35s %8s %15s %15s %15s %15s %15s\n" % ("Command", "Count", "Serialise (s)", "Transfer (s)", "Compute (s)", "Sent (bytes)", "Return (bytes)"))
+        for name in sorted(report['command_types']):
+            stats = report['command_types'][name]
+            file.write("%-35s %8i %15.6f %15.6f %15.6f %15i %15i\n" % (name, stats['count'], stats['serialise_time'], stats['transfer_time'], stats['compute_time'], stats['command_bytes'], stats['result_bytes']))
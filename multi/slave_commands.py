@@ -24,7 +24,7 @@
 """Module containing command objects sent from the master to the slaves."""
 
 # multi module imports.
-from multi.misc import raise_unimplemented
+from multi.misc import Data_reference, raise_unimplemented
 
 
 class Slave_command(object):
@@ -42,10 +42,44 @@ class Slave_command(object):
     @see:   multi.commands.Get_name_command.
     """
 
+    cache_names = []
+    """The names of the data attributes which can be held in the content-addressed data cache of the slaves, rather than being sent with every command."""
+
     def __init__(self):
         self.memo_id = None
 
 
+    def cost(self):
+        """Return a hint as to the relative cost of the command - designed for overriding.
+
+        This is used by the master processor to schedule the most expensive commands first, so that the slaves finish as close together as possible.  The absolute value is irrelevant, only the ratio between commands of the same queue matters.
+
+
+        @return:    The expected relative cost of executing the command.
+        @rtype:     float
+        """
+
+        # Unit cost by default.
+        return 1.0
+
+
+    def restore_cached_data(self, processor):
+        """Replace all references to data in the slave data cache with the real data.
+
+        This is run on the slave processor prior to the run() method.
+
+
+        @param processor:   The slave processor the command is running on.
+        @type processor:    Processor instance
+        """
+
+        # Loop over the cached data attributes.
+        for name in self.cache_names:
+            value = getattr(self, name)
+            if isinstance(value, Data_reference):
+                setattr(self, name, processor.fetch_data(name=value.name))
+
+
     def run(self, processor, completed):
         """Run the slave command on the slave processor
         
@@ -155,3 +189,50 @@ class Slave_storage_command(Slave_command):
 
         # Clear the data.
         self.clear()
+
+
+
+class Slave_cache_command(Slave_storage_command):
+    """Special command for sending data to the content-addressed data cache of the slaves.
+
+    The data is stored in the slave's data store in the same way as the Slave_storage_command, but the names of all cached structures are recorded so that the cache can be cleared at the start of the next command queue.
+    """
+
+    def __init__(self, reset=False):
+        """Set up the command.
+
+        @keyword reset: A flag which if True will cause all previously cached data on the slave to be deleted.
+        @type reset:    bool
+        """
+
+        # Initialise the base class.
+        super(Slave_cache_command, self).__init__()
+
+        # Store the argument.
+        self.reset = reset
+
+
+    def run(self, processor, completed):
+        """Clear the old cache if required and store the data on the slave.
+
+        @param processor:   The slave processor the command is running on.  Results from the command are returned via calls to processor.return_object.
+        @type processor:    Processor instance
+        @param completed:   The flag used in batching result returns to indicate that the sequence of batched result commands has completed.
+        @type completed:    bool
+        """
+
+        # Initialise the list of cached names.
+        if not hasattr(processor.data_store, 'cached_data_names'):
+            processor.data_store.cached_data_names = []
+
+        # Clear the old cache.
+        if self.reset:
+            for name in processor.data_store.cached_data_names:
+                delattr(processor.data_store, name)
+            processor.data_store.cached_data_names = []
+
+        # Record the new names.
+        processor.data_store.cached_data_names += self.names
+
+        # Store the data.
+        super(Slave_cache_command, self).run(processor, completed)
@@ -0,0 +1,315 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Module docstring.
+"""The thread pool fabric for calculations which release the global interpreter lock.
+
+This fabric runs the standard Processor.run() slave loop in a pool of threads within the master process.  The slaves therefore share the memory of the master so that no commands or results are pickled and no processes need to be started, while the existing Memo and Result_command mechanisms are used unchanged.  Only calculations which spend most of their time in code releasing the global interpreter lock, such as the numpy linear algebra of the numeric dispersion models and the frame order PCS integration, will use more than one core.
+"""
+
+# Python module imports.
+import multiprocessing
+import os
+import platform
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+import sys
+import threading
+
+# multi module imports.
+from multi.slave_commands import Exit_command
+from multi.multi_processor_base import Multi_processor, Too_few_slaves_exception
+
+
+class Thread_state(threading.local):
+    """The per-thread state of the processor, so that the slave loops of the different threads do not interfere."""
+
+    def __init__(self):
+        """Set up the initial state for each thread, that of the master."""
+
+        self.rank = 0
+        self.do_quit = False
+        self.result_list = None
+        self.io_data = None
+
+
+def thread_local(name):
+    """Create a property redirecting the processor attribute to the per-thread state.
+
+    @param name:    The name of the attribute of the Thread_state object.
+    @type name:     str
+    @return:        The property.
+    @rtype:         property
+    """
+
+    # The getter and setter.
+    def get(self):
+        return getattr(self._state, name)
+    def set(self, value):
+        setattr(self._state, name, value)
+
+    # Return the property.
+    return property(get, set)
+
+
+
+class Thread_processor(Multi_processor):
+    """The thread pool multi-processor class."""
+
+    # The attributes modified by the slave loop, which must be specific to each thread.
+    do_quit = thread_local('do_quit')
+    result_list = thread_local('result_list')
+    io_data = thread_local('io_data')
+
+    def __init__(self, processor_size, callback):
+        """Initialise the thread pool processor.
+
+        @param processor_size:  The number of slave threads to create.  If set to -1, the number of CPUs of the machine will be used.
+        @type processor_size:   int
+        @param callback:        The callback object.
+        @type callback:         multi.Application_callback instance
+        """
+
+        # Default to the number of CPUs.
+        if processor_size == -1:
+            processor_size = multiprocessing.cpu_count()
+
+        # At least one slave is required.
+        if processor_size < 1:
+            raise Too_few_slaves_exception()
+
+        # The per-thread state (this is needed by the base class).
+        self._state = Thread_state()
+
+        super(Thread_processor, self).__init__(processor_size=processor_size, callback=callback)
+
+        # The slaves cannot die independently of the master, so failure detection is not needed.
+        self.heartbeat_interval = None
+        self.slave_timeout = None
+
+        # The communication structures.
+        self._command_queues = []
+        self._result_queue = queue.Queue()
+        self._slaves = []
+
+
+    def _broadcast_command(self, command):
+        """Send the command to all slave threads.
+
+        @param command: The command to send.
+        @type command:  Slave_command instance
+        """
+
+        for i in range(self.processor_size()):
+            self._command_queues[i].put(command)
+
+
+    def _ditch_all_results(self):
+        """Receive and discard the final results from all slaves."""
+
+        for i in range(self.processor_size()):
+            while True:
+                result = self._result_queue.get()
+                if result.completed:
+                    break
+
+
+    def _slave_main(self, rank):
+        """The target function of the slave threads.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        """
+
+        # Store the rank of this slave.
+        self._state.rank = rank
+
+        # Execute the slave loop of the base class.
+        super(Thread_processor, self).run()
+
+
+    def abort(self):
+        """Terminate the program, including all slave threads."""
+
+        # Threads cannot be killed, and this may be called from a thread other than the main one, so the process is terminated directly.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
+
+
+    def assert_on_master(self):
+        """Make sure that this is the master thread and not a slave.
+
+        @raises Exception:  If not on the master thread.
+        """
+
+        # Check if this processor is a slave, and if so throw an exception.
+        if self.on_slave():
+            msg = 'running on slave when expected master with rank == 0, rank was %d'% self.rank()
+            raise Exception(msg)
+
+
+    def cache_batch(self, batch, dest):
+        """The slaves share the memory of the master, so the data cache is not used.
+
+        @param batch:   The batch of commands.
+        @type batch:    list of Slave_command instances
+        @param dest:    The rank of the slave.
+        @type dest:     int
+        @return:        The unmodified batch.
+        @rtype:         list of Slave_command instances
+        """
+
+        return batch
+
+
+    def exit(self, status=0):
+        """Exit the thread pool processor with the given status.
+
+        @keyword status:    The program exit status.
+        @type status:       int
+        """
+
+        # Execution on the slave.
+        if self.on_slave():
+            raise Exception('sys.exit unexpectedly called on slave!')
+
+        # Slave clean up.
+        if len(self._slaves):
+            # Send the exit command to all slaves.
+            self._broadcast_command(Exit_command())
+
+            # Dump all results.
+            self._ditch_all_results()
+
+            # Wait for the slaves to terminate.
+            for slave in self._slaves:
+                slave.join()
+            self._slaves = []
+
+        # Exit the program with the given status.
+        sys.exit(status)
+
+
+    def get_intro_string(self):
+        """Return the string to append to the end of the relax introduction string.
+
+        @return:    The string describing this Processor fabric.
+        @rtype:     str
+        """
+
+        # Return the string.
+        return "Thread pool with %i slave threads & 1 master." % self.processor_size()
+
+
+    def get_name(self):
+        return '%s-pid%s-%s' % (platform.node(), os.getpid(), threading.current_thread().name)
+
+
+    def master_queue_command(self, command, dest):
+        """Master to slave processor data transfer - send the command to the given slave.
+
+        @param command: The command to send to the slave.
+        @type command:  Slave_command instance or list of Slave_command instances
+        @param dest:    The destination processor's rank.
+        @type dest:     int
+        """
+
+        # The commands are passed by reference.
+        self._command_queues[dest-1].put(command)
+
+
+    def master_receive_result(self, timeout=None):
+        """Slave to master processor data transfer - receive the result command from the slave.
+
+        This is invoked by the master processor.
+
+        @keyword timeout:   The maximum time, in seconds, to wait for a result.  If None, this will block until a result is received.
+        @type timeout:      float or None
+        @return:            The result command sent by the slave, or None if the timeout was reached.
+        @rtype:             Result_command instance or None
+        """
+
+        # Catch and return the result command.
+        try:
+            return self._result_queue.get(timeout=timeout)
+
+        # Nothing received.
+        except queue.Empty:
+            return None
+
+
+    def pre_run(self):
+        """Create the slave threads prior to starting the application main loop."""
+
+        # Execute the base class method.
+        super(Thread_processor, self).pre_run()
+
+        # Only the master creates the slaves.
+        if self.on_slave():
+            return
+
+        # Create and start the slaves.
+        for rank in range(1, self.processor_size()+1):
+            self._command_queues.append(queue.Queue())
+            slave = threading.Thread(target=self._slave_main, args=(rank,), name='slave-%i' % rank)
+            slave.daemon = True
+            slave.start()
+            self._slaves.append(slave)
+
+
+    def rank(self):
+        return self._state.rank
+
+
+    def return_result_command(self, result_object):
+        self._result_queue.put(result_object)
+
+
+    def slave_alive(self, rank):
+        """Determine if the slave thread of the given rank is still running.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        @return:        False if the slave thread has terminated, True otherwise.
+        @rtype:         bool
+        """
+
+        return self._slaves[rank-1].is_alive()
+
+
+    def slave_receive_commands(self):
+        return self._command_queues[self._state.rank-1].get()
+
+
+    def stdio_capture(self):
+        """The standard IO streams are shared by all threads, so the slave output is not captured."""
+
+        self.io_data = []
+
+
+    def stdio_restore(self):
+        """The standard IO streams are not captured, so there is nothing to restore."""
+
+        pass
@@ -25,11 +25,12 @@
 
 
 # Python module imports.
-import sys, os
+import sys, os, time
 
 # multi module imports.
 from multi.misc import Result_string
 from multi.processor import Processor
+from multi.profiler import pickled_size
 from multi.result_commands import Result_command
 
 
@@ -53,8 +54,16 @@ class Uni_processor(Processor):
         self.command_queue = []
         self.memo_map = {}
 
+        # The result processing time and sizes for the command being profiled.
+        self._profile_result_time = 0.0
+        self._profile_result_bytes = 0
+
 
     def add_to_queue(self, command, memo=None):
+        # Skip commands with results in the result journal.
+        if self.journal_replay(memo):
+            return
+
         self.command_queue.append(command)
         if memo != None:
             command.set_memo_id(memo)
@@ -111,14 +120,16 @@ class Uni_processor(Processor):
         self._result_command_queue = command
 
 
-    def master_receive_result(self):
+    def master_receive_result(self, timeout=None):
         """Slave to master processor data transfer - receive the result command from the slave.
 
         This mimics a slave to master data transfer initiated by a slave by holding the result command so that the matching self.master_receive_result(), which is called by the master processor, can return it.  As the master and slave processors are one and the same, the command is just held as a private class variable.
 
 
-        @return:        The result command sent by the slave.
-        @rtype:         Result_command instance
+        @keyword timeout:   The maximum time to wait for a result.  This is ignored as the result is always present.
+        @type timeout:      float or None
+        @return:            The result command sent by the slave.
+        @rtype:             Result_command instance
         """
 
         # Remove the command from the class namespace.
@@ -163,7 +174,17 @@ class Uni_processor(Processor):
             memo = None
             if result.memo_id != None:
                 memo = self.memo_map[result.memo_id]
+            start_time = time.time()
             result.run(self, memo)
+            self.journal_record(result, memo)
+
+            # Profile the result processing, including the size the result would have if sent between processors.
+            if self.profiling:
+                elapsed = time.time() - start_time
+                self.profiler.add_result_time(elapsed)
+                self._profile_result_time += elapsed
+                if self.profiler.sizes:
+                    self._profile_result_bytes += pickled_size(result)
             if result.memo_id != None and result.completed:
                 del self.memo_map[result.memo_id]
 
@@ -177,13 +198,36 @@ class Uni_processor(Processor):
     def run_queue(self):
         """Safely run each command in the queue, cleaning up after failures."""
 
+        # The queue is held, so keep the commands for the release_queue() call.
+        if self.queue_held:
+            return
+
         # Run each command in the queue.
         try:
+            queue_start = time.time()
+            busy_time = 0.0
             last_command = len(self.command_queue)-1
             for i, command  in enumerate(self.command_queue):
                 completed = (i == last_command)
 
+                # Execute without profiling.
+                if not self.profiling:
+                    command.run(self, completed)
+                    continue
+
+                # Execute, recording the command timings and sizes (the results are processed within the command execution, so their processing time is subtracted).
+                names, serialise_time, sizes = self.profile_batch([command])
+                self._profile_result_time = 0.0
+                self._profile_result_bytes = 0
+                start_time = time.time()
                 command.run(self, completed)
+                compute_time = time.time() - start_time - self._profile_result_time
+                busy_time += compute_time
+                self.profiler.add_batch(rank=0, names=names, serialise_time=serialise_time, command_bytes=sizes, round_trip=compute_time, compute_times=[compute_time], result_bytes=self._profile_result_bytes)
+
+            # The utilisation of the single processor.
+            if self.profiling:
+                self.profiler.add_queue(busy_time={0: busy_time}, total_time=time.time() - queue_start)
 
         # Clear the queue, even if a failure occurs.
         finally:
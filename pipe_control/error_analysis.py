@@ -24,8 +24,11 @@
 """Module for performing Monte Carlo simulations for error analysis."""
 
 # Python module imports.
-from numpy import diag, ndarray, sqrt
-from random import gauss
+from hashlib import sha1
+from numbers import Number
+from numpy import array, diag, float64, frombuffer, sqrt, uint32, zeros
+from numpy.random import RandomState
+from os import urandom
 
 # relax module imports.
 from lib import statistics
@@ -73,15 +76,114 @@ def covariance_matrix(epsrel=0.0, verbosity=2):
             index = index + 1
 
 
-def monte_carlo_create_data(method=None, distribution=None, fixed_error=None):
+def monte_carlo_converged(sim_count=None, sd_prev=None):
+    """Check the convergence of the parameter errors for the adaptive Monte Carlo simulation mode.
+
+    For each model which has not yet converged, the parameter standard deviations from the first sim_count simulations are compared to those of the previous check.  Once the relative change of all standard deviations is below cdp.sim_tolerance, the model is converged and all simulations from sim_count onwards are deselected, so that these are neither optimised nor used in the error analysis.
+
+
+    @keyword sim_count: The number of simulations which have been run so far.
+    @type sim_count:    int
+    @keyword sd_prev:   The standard deviations of the previous check, keyed by model index.  This is updated in place, with converged models set to None.
+    @type sd_prev:      dict of list of float or None
+    @return:            True if all models have converged.
+    @rtype:             bool
+    """
+
+    # The specific analysis API object.
+    api = return_api()
+
+    # Loop over the models.
+    all_converged = True
+    model_index = -1
+    for model_info in api.model_loop():
+        # Increment the model index.
+        model_index += 1
+
+        # Skip function.
+        if api.skip_function(model_info=model_info):
+            continue
+
+        # Already converged.
+        if model_index in sd_prev and sd_prev[model_index] == None:
+            continue
+
+        # The standard deviations of all parameters for the simulations run so far.
+        select_sim = api.sim_return_selected(model_info=model_info)
+        sd_flat = []
+        index = 0
+        while True:
+            # Get the array of simulation parameters for the index.
+            param_array = api.sim_return_param(index, model_info=model_info)
+
+            # Break (no more parameters).
+            if param_array == None:
+                break
+
+            # Flatten the SD structure.
+            sd = sim_sd(param_array[:sim_count], select_sim[:sim_count])
+            if isinstance(sd, dict):
+                sd_flat += [sd[key] for key in sorted(sd)]
+            elif isinstance(sd, list):
+                sd_flat += sd
+            else:
+                sd_flat.append(sd)
+
+            # Increment the parameter index.
+            index = index + 1
+
+        # The relative changes since the last check.
+        converged = False
+        if model_index in sd_prev and len(sd_prev[model_index]) == len(sd_flat):
+            converged = True
+            for i in range(len(sd_flat)):
+                # Skip parameters without errors.
+                if sd_flat[i] == None or sd_prev[model_index][i] == None:
+                    continue
+
+                # No change.
+                if sd_flat[i] == sd_prev[model_index][i]:
+                    continue
+
+                # The relative change.
+                if sd_flat[i] == 0.0 or abs(sd_flat[i] - sd_prev[model_index][i]) / abs(sd_flat[i]) > cdp.sim_tolerance:
+                    converged = False
+                    break
+
+        # Not converged, so store the SDs for the next check.
+        if not converged:
+            sd_prev[model_index] = sd_flat
+            all_converged = False
+            continue
+
+        # Deselect the remaining simulations.
+        select_sim = list(select_sim)
+        for i in range(sim_count, len(select_sim)):
+            select_sim[i] = False
+        api.set_selected_sim(select_sim, model_info=model_info)
+        sd_prev[model_index] = None
+
+        # Printout.
+        print("The parameter errors of the model \"%s\" have converged after %i simulations." % (api.model_desc(model_info=model_info), sim_count))
+
+    # Return the convergence status of all models.
+    return all_converged
+
+
+def monte_carlo_create_data(method=None, distribution=None, fixed_error=None, seed=None):
     """Function for creating simulation data.
 
+    The data for all simulations of each base data block is drawn in a single vectorised call.  The random numbers for each block come from a separate stream seeded from the global seed and the identifiers of the block (the spin IDs, alignment IDs, etc.), so that the simulation data is independent of the order of the data blocks and of the processor fabric.
+
+
     @keyword method:        The type of Monte Carlo simulation to perform.
     @type method:           str
     @keyword distribution:  Which gauss distribution to draw errors from. Can be: 'measured', 'red_chi2', 'fixed'.
     @type distribution:     str
     @keyword fixed_error:   If distribution is set to 'fixed', use this value as the standard deviation for the gauss distribution.
     @type fixed_error:      float
+    @keyword seed:          The seed for the random number generator.  If None, a random seed will be used.  The seed is stored as cdp.sim_seed so that the data can be regenerated.
+    @type seed:             int or None
     """
 
     # Test if the current data pipe exists.
@@ -109,6 +211,11 @@ def monte_carlo_create_data(method=None, distribution=None, fixed_error=None):
     if distribution == 'fixed' and fixed_error == None:
         raise RelaxError("The argument 'distribution' is set to 'fixed', but you have not provided a value to the argument 'fixed_error'.")
 
+    # The random seed.
+    if seed == None:
+        seed = int(frombuffer(urandom(4), dtype=uint32)[0])
+    cdp.sim_seed = seed
+
     # The specific analysis API object.
     api = return_api()
 
@@ -127,65 +234,58 @@ def monte_carlo_create_data(method=None, distribution=None, fixed_error=None):
             continue
 
         # Possible get the errors from reduced chi2 distribution.
+        error_red_chi2 = None
         if distribution == 'red_chi2':
             error_red_chi2 = api.return_error_red_chi2(data_index)
 
         # Get the errors.
         error = api.return_error(data_index)
 
-        # List type data.
-        if isinstance(data, list) or isinstance(data, ndarray):
-            # Loop over the Monte Carlo simulations.
-            random = []
-            for j in range(cdp.sim_number):
-                # Randomise the data.
-                random.append([])
-                for k in range(len(data)):
-                    # No data or errors.
-                    if data[k] == None or error[k] == None:
-                        random[j].append(None)
-                        continue
-
-                    # Gaussian randomisation.
-                    if distribution == 'fixed':
-                        random[j].append(gauss(data[k], float(fixed_error)))
-
-                    else:
-                        random[j].append(gauss(data[k], error[k]))
-
-        # Dictionary type data.
+        # The element keys - indices for list type data and the keys for dictionary type data.
+        if isinstance(data, dict):
+            keys = list(data.keys())
+        else:
+            keys = list(range(len(data)))
+
+        # The values and standard deviations, with missing data flagged.
+        values = zeros(len(keys), float64)
+        sd = zeros(len(keys), float64)
+        missing = []
+        for k in range(len(keys)):
+            # No data or errors.
+            if data[keys[k]] == None or error[keys[k]] == None:
+                missing.append(k)
+                continue
+
+            # The value.
+            values[k] = data[keys[k]]
+
+            # If errors are drawn from the reduced chi2 distribution (dictionary type data only), the gauss error is scaled by the point error.
+            if distribution == 'red_chi2' and isinstance(data, dict):
+                sd[k] = error_red_chi2[keys[k]] * error[keys[k]]
+
+            # If errors are drawn from fixed distribution.
+            elif distribution == 'fixed':
+                sd[k] = float(fixed_error)
+
+            # If errors are drawn from measured values.
+            else:
+                sd[k] = error[keys[k]]
+
+        # Gaussian randomisation of all simulations at once, using the random stream of this data block.
+        stream = random_stream(seed, data_index)
+        sims = (values + stream.standard_normal((cdp.sim_number, len(keys))) * sd).tolist()
+
+        # Remove the missing data.
+        for j in range(cdp.sim_number):
+            for k in missing:
+                sims[j][k] = None
+
+        # Convert to the data type.
         if isinstance(data, dict):
-            # Loop over the Monte Carlo simulations.
-            random = []
-            for j in range(cdp.sim_number):
-                # Randomise the data.
-                random.append({})
-                for id in data:
-                    # No data or errors.
-                    if data[id] == None or error[id] == None:
-                        random[j][id] = None
-                        continue
-
-                    # If errors are drawn from the reduced chi2 distribution.
-                    if distribution == 'red_chi2':
-                        # Gaussian randomisation, centered at 0, with width of reduced chi2 distribution.
-                        g_error = gauss(0.0, error_red_chi2[id])
-
-                        # We need to scale the gauss error, before adding to datapoint.
-                        new_point = data[id] + g_error * error[id]
-
-                    # If errors are drawn from fixed distribution.
-                    elif distribution == 'fixed':
-                        # Gaussian randomisation, centered at data point, with width of fixed error.
-                        new_point = gauss(data[id], float(fixed_error))
-
-                    # If errors are drawn from measured values.
-                    else:
-                        # Gaussian randomisation, centered at data point, with width of measured error.
-                        new_point = gauss(data[id], error[id])
-
-                    # Assign datapoint the new value.
-                    random[j][id] = new_point
+            random = [dict(zip(keys, sims[j])) for j in range(cdp.sim_number)]
+        else:
+            random = sims
 
         # Pack the simulation data.
         api.sim_pack_data(data_index, random)
@@ -233,43 +333,8 @@ def monte_carlo_error_analysis():
             if param_array == None:
                 break
 
-            # Handle dictionary type parameters.
-            if isinstance(param_array[0], dict):
-                # Initialise the standard deviation structure as a dictionary.
-                sd = {}
-
-                # Loop over each key.
-                for key in param_array[0]:
-                    # Create a list of the values for the current key.
-                    data = []
-                    for i in range(len(param_array)):
-                        data.append(param_array[i][key])
-
-                    # Calculate and store the SD.
-                    sd[key] = statistics.std(values=data, skip=select_sim)
-
-            # Handle list type parameters.
-            elif isinstance(param_array[0], list):
-                # Initialise the standard deviation structure as a list.
-                sd = []
-
-                # Loop over each element.
-                for j in range(len(param_array[0])):
-                    # Create a list of the values for the current key.
-                    data = []
-                    for i in range(len(param_array)):
-                        data.append(param_array[i][j])
-
-                    # Calculate and store the SD.
-                    sd.append(statistics.std(values=data, skip=select_sim))
-
-             # SD of simulation parameters with values (ie not None).
-            elif param_array[0] != None:
-                sd = statistics.std(values=param_array, skip=select_sim)
-
-            # Simulation parameters with the value None.
-            else:
-                sd = None
+            # The standard deviation.
+            sd = sim_sd(param_array, select_sim)
 
             # Set the parameter error.
             api.set_error(index, sd, model_info=model_info)
@@ -362,13 +427,17 @@ def monte_carlo_select_all_sims(number=None, all_select_sim=None):
         i += 1
 
 
-def monte_carlo_setup(number=None, all_select_sim=None):
+def monte_carlo_setup(number=None, all_select_sim=None, tolerance=None, block=50):
     """Store the Monte Carlo simulation number.
 
-    @keyword number:            The number of Monte Carlo simulations to set up.
+    @keyword number:            The number of Monte Carlo simulations to set up.  In the adaptive mode, this is the maximum number.
     @type number:               int
     @keyword all_select_sim:    The selection status of the Monte Carlo simulations.  The first dimension of this matrix corresponds to the simulation and the second corresponds to the instance.
     @type all_select_sim:       list of lists of bool
+    @keyword tolerance:         The relative change of the parameter errors between blocks of simulations below which the simulations of a model are stopped.  If None, all simulations will be run.
+    @type tolerance:            float or None
+    @keyword block:             The number of simulations per block for the adaptive mode.
+    @type block:                int
     """
 
     # Test if the current data pipe exists.
@@ -378,9 +447,117 @@ def monte_carlo_setup(number=None, all_select_sim=None):
     if number < 3:
         raise RelaxError("A minimum of 3 Monte Carlo simulations is required.")
 
+    # Check the adaptive mode values.
+    if tolerance != None:
+        if tolerance <= 0.0:
+            raise RelaxError("The Monte Carlo error tolerance must be positive.")
+        if block < 3:
+            raise RelaxError("A minimum of 3 Monte Carlo simulations per block is required.")
+
     # Create a number of MC sim data structures.
     cdp.sim_number = number
+    cdp.sim_number_used = number
     cdp.sim_state = True
 
+    # The adaptive mode.
+    cdp.sim_tolerance = tolerance
+    cdp.sim_block = block
+
     # Select all simulations.
     monte_carlo_select_all_sims(number=number, all_select_sim=all_select_sim)
+
+
+def random_stream(seed, data_index):
+    """Create the random number generator for the simulations of a base data block.
+
+    The stream is seeded from the global seed together with a hash of the identifiers of the data block, as yielded by the base_data_loop() API method.  Spin and interatomic data containers are identified by their spin IDs, and all other objects by their class name.
+
+
+    @param seed:        The global random seed.
+    @type seed:         int
+    @param data_index:  The base data block information.
+    @type data_index:   anything
+    @return:            The random number generator.
+    @rtype:             numpy.random.RandomState instance
+    """
+
+    # Convert the data block information into a list of identifying strings.
+    if not isinstance(data_index, (list, tuple)):
+        data_index = [data_index]
+    ids = []
+    for element in data_index:
+        # Basic types.
+        if element == None or isinstance(element, (str, Number)):
+            ids.append(str(element))
+
+        # Spin containers.
+        elif hasattr(element, '_spin_ids') and len(element._spin_ids):
+            ids.append(element._spin_ids[0])
+
+        # Interatomic data containers.
+        elif hasattr(element, 'spin_id1'):
+            ids.append("%s - %s" % (element.spin_id1, element.spin_id2))
+
+        # Anything else.
+        else:
+            ids.append(element.__class__.__name__)
+
+    # The hash of the identifiers, as 32-bit words.
+    digest = sha1(repr(ids).encode('utf-8')).digest()
+    words = frombuffer(digest, dtype=uint32)
+
+    # Seed the generator with the global seed and the hash words.
+    return RandomState(array([seed % 2**32] + list(words), uint32))
+
+
+def sim_sd(param_array, select_sim):
+    """Calculate the standard deviation of the simulation values of a single parameter.
+
+    @param param_array: The simulation values of the parameter, as returned by the sim_return_param() API method.
+    @type param_array:  list of float, list of list of float, or list of dict of float
+    @param select_sim:  The simulation selection flags.
+    @type select_sim:   list of bool
+    @return:            The standard deviation, with the same structure as the simulation elements.
+    @rtype:             float, list of float, dict of float, or None
+    """
+
+    # Handle dictionary type parameters.
+    if isinstance(param_array[0], dict):
+        # Initialise the standard deviation structure as a dictionary.
+        sd = {}
+
+        # Loop over each key.
+        for key in param_array[0]:
+            # Create a list of the values for the current key.
+            data = []
+            for i in range(len(param_array)):
+                data.append(param_array[i][key])
+
+            # Calculate and store the SD.
+            sd[key] = statistics.std(values=data, skip=select_sim)
+
+    # Handle list type parameters.
+    elif isinstance(param_array[0], list):
+        # Initialise the standard deviation structure as a list.
+        sd = []
+
+        # Loop over each element.
+        for j in range(len(param_array[0])):
+            # Create a list of the values for the current key.
+            data = []
+            for i in range(len(param_array)):
+                data.append(param_array[i][j])
+
+            # Calculate and store the SD.
+            sd.append(statistics.std(values=data, skip=select_sim))
+
+     # SD of simulation parameters with values (ie not None).
+    elif param_array[0] != None:
+        sd = statistics.std(values=param_array, skip=select_sim)
+
+    # Simulation parameters with the value None.
+    else:
+        sd = None
+
+    # Return the SD.
+    return sd
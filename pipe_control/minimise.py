@@ -32,6 +32,7 @@ from lib.errors import RelaxError, RelaxIntListIntError, RelaxLenError
 from lib.float import isNaN
 from lib.io import write_data
 from multi import Processor_box
+from pipe_control.error_analysis import monte_carlo_converged
 from pipe_control.mol_res_spin import return_spin, spin_loop
 from pipe_control import pipes
 from pipe_control.pipes import check_pipe
@@ -429,7 +430,7 @@ def grid_zoom(level=0):
     cdp.grid_zoom_level = level
 
 
-def minimise(min_algor=None, line_search=None, hessian_mod=None, hessian_type=None, func_tol=None, grad_tol=None, max_iter=None, constraints=True, scaling=True, verbosity=1, sim_index=None):
+def minimise(min_algor=None, line_search=None, hessian_mod=None, hessian_type=None, func_tol=None, grad_tol=None, max_iter=None, constraints=True, scaling=True, verbosity=1, sim_index=None, journal=None):
     """Minimisation function.
 
     @keyword min_algor:         The minimisation algorithm to use.
@@ -454,6 +455,8 @@ def minimise(min_algor=None, line_search=None, hessian_mod=None, hessian_type=No
     @type verbosity:            int
     @keyword sim_index:         The index of the simulation to optimise.  This should be None if normal optimisation is desired.
     @type sim_index:            None or int
+    @keyword journal:           The optional name of the file in which to journal the Monte Carlo simulation results as they arrive.  If the file already exists, the simulations already present will be skipped.
+    @type journal:              None or str
     """
 
     # Test if the current data pipe exists.
@@ -498,28 +501,56 @@ def minimise(min_algor=None, line_search=None, hessian_mod=None, hessian_type=No
 
     # Monte Carlo simulation minimisation.
     elif hasattr(cdp, 'sim_state') and cdp.sim_state == 1:
-        for i in range(cdp.sim_number):
-            # Reset the minimisation statistics.
-            reset_min_stats(sim_index=i, verbosity=verbosity)
-
-            # Status.
+        # Open the journal, so that completed simulations are skipped and new results recorded.
+        if journal:
+            processor.journal_open(file=journal, context=pipes.cdp_name())
+
+        # The simulation blocks, for checking the convergence of the errors in the adaptive mode.
+        block = cdp.sim_number
+        if getattr(cdp, 'sim_tolerance', None) != None:
+            block = cdp.sim_block
+        sd_prev = {}
+        cdp.sim_number_used = cdp.sim_number
+
+        try:
+            for block_start in range(0, cdp.sim_number, block):
+                block_end = min(block_start + block, cdp.sim_number)
+                for i in range(block_start, block_end):
+                    # Reset the minimisation statistics.
+                    reset_min_stats(sim_index=i, verbosity=verbosity)
+
+                    # Status.
+                    if status.current_analysis:
+                        status.auto_analysis[status.current_analysis].mc_number = i
+                    else:
+                        status.mc_number = i
+
+                    # Optimisation.
+                    api.minimise(min_algor=min_algor, min_options=min_options, func_tol=func_tol, grad_tol=grad_tol, max_iterations=max_iter, constraints=constraints, scaling_matrix=scaling_matrix, verbosity=verbosity-1, sim_index=i)
+
+                    # Print out.
+                    if verbosity and not processor.is_queued():
+                        print("Simulation " + repr(i+1))
+
+                # Adaptive mode, so stop once the errors of all models have converged.
+                if block_end < cdp.sim_number:
+                    processor.run_queue()
+                    if monte_carlo_converged(sim_count=block_end, sd_prev=sd_prev):
+                        cdp.sim_number_used = block_end
+                        break
+
+            # Unset the status.
             if status.current_analysis:
-                status.auto_analysis[status.current_analysis].mc_number = i
+                status.auto_analysis[status.current_analysis].mc_number = None
             else:
-                status.mc_number = i
+                status.mc_number = None
 
-            # Optimisation.
-            api.minimise(min_algor=min_algor, min_options=min_options, func_tol=func_tol, grad_tol=grad_tol, max_iterations=max_iter, constraints=constraints, scaling_matrix=scaling_matrix, verbosity=verbosity-1, sim_index=i)
+            # Execute any queued commands.
+            processor.run_queue()
 
-            # Print out.
-            if verbosity and not processor.is_queued():
-                print("Simulation " + repr(i+1))
-
-        # Unset the status.
-        if status.current_analysis:
-            status.auto_analysis[status.current_analysis].mc_number = None
-        else:
-            status.mc_number = None
+        # Close the journal.
+        finally:
+            processor.journal_close()
 
     # Standard minimisation.
     else:
@@ -27,6 +27,9 @@ from os import chdir, getcwd
 
 # relax module imports.
 import lib.arg_check
+from lib.errors import RelaxError
+from lib.io import open_write_file
+from multi import Processor_box
 from status import Status; status = Status()
 
 
@@ -76,3 +79,59 @@ def pwd(verbose=True):
         print("The current working directory is: %s"%cwd)
 
     return cwd
+
+
+def profile(flag=True, sizes=True):
+    """Turn the profiling of the commands executed by the multi-processor on or off.
+
+    @keyword flag:  The flag which if True will start a new profile, and if False will stop the profiling.
+    @type flag:     bool
+    @keyword sizes: The flag which if True will cause the byte counts of the commands and results to be measured, requiring them to be pickled an extra time.
+    @type sizes:    bool
+    """
+
+    # The processor.
+    processor = Processor_box().processor
+
+    # Start or stop.
+    if flag:
+        processor.profile_start(sizes=sizes)
+        print("Profiling of the multi-processor commands has started.")
+    else:
+        processor.profile_stop()
+        print("Profiling of the multi-processor commands has stopped.")
+
+
+def profile_write(file=None, dir=None, format='text', force=False):
+    """Write out the multi-processor command profile.
+
+    @keyword file:      The name of the file to create.
+    @type file:         str
+    @keyword dir:       The directory to place the file into.
+    @type dir:          str or None
+    @keyword format:    The format of the report, either 'text' or 'json'.
+    @type format:       str
+    @keyword force:     A flag which if True will cause any pre-existing file to be overwritten.
+    @type force:        bool
+    """
+
+    # The profiler.
+    profiler = Processor_box().processor.profiler
+    if profiler is None:
+        raise RelaxError("No multi-processor profile is present, the system.profile user function must first be used to turn profiling on.")
+
+    # Check the format.
+    if format not in ['text', 'json']:
+        raise RelaxError("The format '%s' is unknown, it must be one of 'text' or 'json'." % format)
+
+    # Open the file for writing.
+    file = open_write_file(file, dir, force)
+
+    # Write the report.
+    if format == 'json':
+        profiler.write_json(file)
+    else:
+        profiler.write_text(file)
+
+    # Close the file.
+    file.close()
@@ -293,7 +293,7 @@ class Relax:
 
         # Recognised command line options for the multiprocessor.
         group = OptionGroup(parser, 'Multi-processor options')
-        group.add_option('-m', '--multi', action='store', type='string', dest='multiprocessor', default='uni', help='set multi processor method')
+        group.add_option('-m', '--multi', action='store', type='string', dest='multiprocessor', default='uni', help='set multi processor method (uni, mpi4py, pool, or thread)')
         group.add_option('-n', '--processors', action='store', type='int', dest='n_processors', default=-1, help='set number of processors (may be ignored)')
         parser.add_option_group(group)
 
@@ -180,6 +180,9 @@ MC_NUM = 500
 # Automatic looping over all rounds until convergence (must be a boolean value of True or False).
 CONV_LOOP = True
 
+# The maximum change of the diffusion tensor between rounds for which the model-free grid searches are skipped, the spins starting from the values of the previous round instead, for example 0.01.  This changes the results compared to earlier relax versions.  The default of None always performs the grid searches.
+WARM_START_TOL = None
+
 
 
 # Set up the data pipe.
@@ -238,4 +241,4 @@ value.set(-172 * 1e-6, 'csa', spin_id='@N*')
 ############
 
 # Do not change!
-dAuvergne_protocol(pipe_name=name, pipe_bundle=pipe_bundle, diff_model=DIFF_MODEL, mf_models=MF_MODELS, local_tm_models=LOCAL_TM_MODELS, grid_inc=GRID_INC, min_algor=MIN_ALGOR, mc_sim_num=MC_NUM, conv_loop=CONV_LOOP)
+dAuvergne_protocol(pipe_name=name, pipe_bundle=pipe_bundle, diff_model=DIFF_MODEL, mf_models=MF_MODELS, local_tm_models=LOCAL_TM_MODELS, grid_inc=GRID_INC, min_algor=MIN_ALGOR, mc_sim_num=MC_NUM, conv_loop=CONV_LOOP, warm_start_tol=WARM_START_TOL)
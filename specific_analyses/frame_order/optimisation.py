@@ -1074,10 +1074,28 @@ class Frame_order_memo(Memo):
         self.scaling_matrix = scaling_matrix
 
 
+    def journal_key(self):
+        """Return the key identifying the Monte Carlo simulation in a result journal.
+
+        @return:    The simulation index, or None for normal optimisation.
+        @rtype:     tuple or None
+        """
+
+        # Only journal the simulations.
+        if self.sim_index is None:
+            return None
+
+        # The key.
+        return ('frame_order', self.sim_index)
+
+
 
 class Frame_order_minimise_command(Slave_command):
     """Command class for relaxation dispersion optimisation on the slave processor."""
 
+    # The data which is identical between the Monte Carlo simulations, to be held in the slave data cache.
+    cache_names = ['full_tensors', 'full_in_ref_frame', 'rdc_err', 'rdc_weight', 'rdc_vect', 'rdc_const', 'pcs_err', 'pcs_weight', 'atomic_pos', 'paramag_centre', 'scaling_matrix', 'A', 'b']
+
     def __init__(self, min_algor=None, min_options=None, func_tol=None, grad_tol=None, max_iterations=None, scaling_matrix=None, constraints=False, sim_index=None, model=None, param_vector=None, full_tensors=None, full_in_ref_frame=None, rdcs=None, rdc_err=None, rdc_weight=None, rdc_vect=None, rdc_const=None, pcs=None, pcs_err=None, pcs_weight=None, atomic_pos=None, temp=None, frq=None, paramag_centre=None, com=None, ave_pos_pivot=None, pivot=None, pivot_opt=None, sobol_max_points=None, sobol_oversample=None, verbosity=None, quad_int=False):
         """Initialise the base class, storing all the master data to be sent to the slave processor.
 
@@ -26,10 +26,13 @@
 """The model-free analysis optimisation functions."""
 
 # Python module imports.
+from math import sqrt
 from minfx.generic import generic_minimise
 from minfx.grid import grid, grid_point_array
 from numpy import array, dot, float64
+from re import match
 import sys
+from warnings import warn
 
 # relax module imports.
 import lib.arg_check
@@ -37,6 +40,7 @@ from lib.errors import RelaxError, RelaxInfError, RelaxMultiVectorError, RelaxNa
 from lib.float import isNaN, isInf
 from lib.periodic_table import periodic_table
 from lib.text.sectioning import subsection
+from lib.warnings import RelaxWarning
 from multi import Memo, Result_command, Slave_command
 from pipe_control import pipes
 from pipe_control.interatomic import return_interatom_list
@@ -206,6 +210,109 @@ def disassemble_result(param_vector=None, func=None, iter=None, fc=None, gc=None
             cdp.warning = warning
 
 
+def minimise_block_arrow_newton(mf=None, x0=None, func_tol=None, grad_tol=None, maxiter=None, verbosity=0):
+    """Unconstrained Newton minimisation of the 'all' model type using the block-arrow Hessian structure.
+
+    This is selected by the 'block-arrow' Hessian modification of the Newton algorithm.  The Newton step is obtained from the Schur complement of the per-spin Hessian blocks so that the full Hessian is never built or factorised.  If the step is not a descent direction, the diagonal of the Hessian is shifted until it is.  A backtracking line search satisfying the sufficient decrease condition is then used.
+
+
+    @keyword mf:        The model-free target function class instance.
+    @type mf:           target_functions.mf.Mf instance
+    @keyword x0:        The initial scaled parameter vector.
+    @type x0:           numpy rank-1 array
+    @keyword func_tol:  The function tolerance.
+    @type func_tol:     float
+    @keyword grad_tol:  The gradient tolerance.
+    @type grad_tol:     None or float
+    @keyword maxiter:   The maximum number of iterations.
+    @type maxiter:      int
+    @keyword verbosity: The amount of information to print.  The higher the value, the greater the verbosity.
+    @type verbosity:    int
+    @return:            The optimisation results consisting of the parameter vector, function value, iteration count, function count, gradient count, Hessian count, and warnings.
+    @rtype:             tuple of numpy array, float, int, int, int, int, str
+    """
+
+    # Printout.
+    if verbosity >= 1:
+        print("\nBlock-arrow Newton minimisation\n")
+
+    # Initial function value.
+    xk = x0 * 1.0
+    fk = mf.func(xk)
+    fc, gc, hc = 1, 0, 0
+    warning = None
+
+    # Iterate.
+    iter = 0
+    while True:
+        # Maximum number of iterations.
+        if iter >= maxiter:
+            warning = "Maximum number of iterations reached"
+            break
+
+        # The gradient and its tolerance.
+        dfk = mf.dfunc(xk)
+        gc += 1
+        if grad_tol != None and sqrt(dot(dfk, dfk)) <= grad_tol:
+            break
+
+        # The Newton step, shifting the Hessian diagonal until a descent direction is found.
+        shift = 0.0
+        for i in range(50):
+            try:
+                pk = mf.newton_step_all(xk, shift=shift)
+                hc += 1
+            except RelaxError:
+                pk = None
+            if pk is not None and dot(dfk, pk) < 0.0:
+                break
+            shift = max(10.0 * shift, 1e-8 * sqrt(dot(dfk, dfk)), 1e-8)
+
+        # Fall back to the steepest descent direction.
+        if pk is None or dot(dfk, pk) >= 0.0:
+            pk = -dfk
+
+        # Backtracking line search.
+        alpha = 1.0
+        for i in range(50):
+            xk_new = xk + alpha * pk
+            fk_new = mf.func(xk_new)
+            fc += 1
+            if fk_new <= fk + 1e-4 * alpha * dot(dfk, pk):
+                break
+            alpha = 0.5 * alpha
+        else:
+            warning = "Line search failure"
+            break
+
+        # Printout.
+        iter += 1
+        if verbosity >= 2:
+            print("%-3s%-8i%-4s%-65s%-4s%-20s" % ("k:", iter, "xk:", repr(xk_new), "fk:", repr(fk_new)))
+
+        # The function tolerance.
+        converged = abs(fk - fk_new) <= func_tol
+
+        # Update.
+        xk = xk_new
+        fk = fk_new
+        if converged:
+            break
+
+    # Printout.
+    if verbosity >= 1:
+        print("%-20s%-20s" % ("Parameter values:", repr(xk)))
+        print("%-20s%-20s" % ("Function value:", repr(fk)))
+        print("%-20s%-20s" % ("Iterations:", repr(iter)))
+        print("%-20s%-20s" % ("Function calls:", repr(fc)))
+        print("%-20s%-20s" % ("Gradient calls:", repr(gc)))
+        print("%-20s%-20s" % ("Hessian calls:", repr(hc)))
+        print("%-20s%-20s" % ("Warning:", repr(warning)))
+
+    # Return the results.
+    return xk, fk, iter, fc, gc, hc, warning
+
+
 def minimise_data_setup(data_store, min_algor, num_data_sets, min_options, spin=None, sim_index=None):
     """Set up all the data required for minimisation.
 
@@ -521,6 +628,29 @@ class MF_memo(Memo):
         self.sim_index = sim_index
         self.scaling_matrix = scaling_matrix
 
+        # The data pipe, as the processor queue may be held and the results of several data pipes processed together.
+        self.pipe_name = pipes.cdp_name()
+
+
+    def journal_key(self):
+        """Return the key identifying the Monte Carlo simulation of the model in a result journal.
+
+        @return:    The model type, simulation index and spin ID, or None for normal optimisation.
+        @rtype:     tuple or None
+        """
+
+        # Only journal the simulations.
+        if self.sim_index is None:
+            return None
+
+        # The spin ID for the spin specific models.
+        spin_id = None
+        if self.spin is not None and len(self.spin._spin_ids):
+            spin_id = self.spin._spin_ids[0]
+
+        # The key.
+        return ('model_free', self.model_type, self.sim_index, spin_id)
+
 
 
 class MF_minimise_command(Slave_command):
@@ -540,8 +670,25 @@ class MF_minimise_command(Slave_command):
         @rtype:     tuple of numpy array, float, int, int, int, int, str
         """
 
+        # The minimisation options.
+        min_options = self.opt_params.min_options
+
+        # The block-arrow Newton minimisation, explicitly selected by the 'block-arrow' Hessian modification.
+        if isinstance(min_options, tuple) and 'block-arrow' in min_options:
+            # Remove the option, as it is unknown to minfx.
+            min_options = tuple([option for option in min_options if option != 'block-arrow'])
+
+            # Unconstrained Newton minimisation of the global model, using the block-arrow structure of the Hessian.
+            if self.data.model_type == 'all' and self.opt_params.A is None and match('^[Nn]ewton$', self.opt_params.min_algor):
+                if len(min_options):
+                    warn(RelaxWarning("The minimisation options %s are not used by the block-arrow Newton minimisation." % repr(min_options)))
+                return minimise_block_arrow_newton(mf=self.mf, x0=self.opt_params.param_vector, func_tol=self.opt_params.func_tol, grad_tol=self.opt_params.grad_tol, maxiter=self.opt_params.max_iterations, verbosity=self.opt_params.verbosity)
+
+            # Fall back to minfx.
+            warn(RelaxWarning("The block-arrow Hessian modification is only available for the unconstrained Newton minimisation of the 'all' model type, the default minfx Hessian modification will be used instead."))
+
         # Minimisation.
-        results = generic_minimise(func=self.mf.func, dfunc=self.mf.dfunc, d2func=self.mf.d2func, args=(), x0=self.opt_params.param_vector, min_algor=self.opt_params.min_algor, min_options=self.opt_params.min_options, func_tol=self.opt_params.func_tol, grad_tol=self.opt_params.grad_tol, maxiter=self.opt_params.max_iterations, A=self.opt_params.A, b=self.opt_params.b, full_output=True, print_flag=self.opt_params.verbosity)
+        results = generic_minimise(func=self.mf.func, dfunc=self.mf.dfunc, d2func=self.mf.d2func, args=(), x0=self.opt_params.param_vector, min_algor=self.opt_params.min_algor, min_options=min_options, func_tol=self.opt_params.func_tol, grad_tol=self.opt_params.grad_tol, maxiter=self.opt_params.max_iterations, A=self.opt_params.A, b=self.opt_params.b, full_output=True, print_flag=self.opt_params.verbosity)
 
         # Return the minfx results unmodified.
         return results
@@ -646,5 +793,14 @@ class MF_result_command(Result_command):
         @type memo:         memo
         """
 
-        # Disassemble the results.
-        disassemble_result(param_vector=self.param_vector, func=self.func, iter=self.iter, fc=self.fc, gc=self.gc, hc=self.hc, warning=self.warning, spin=memo.spin, sim_index=memo.sim_index, model_type=memo.model_type, scaling_matrix=memo.scaling_matrix)
+        # Switch to the data pipe of the optimisation.
+        pipe_orig = pipes.cdp_name()
+        if memo.pipe_name != pipe_orig:
+            pipes.switch(memo.pipe_name)
+
+        # Disassemble the results, switching back to the original data pipe.
+        try:
+            disassemble_result(param_vector=self.param_vector, func=self.func, iter=self.iter, fc=self.fc, gc=self.gc, hc=self.hc, warning=self.warning, spin=memo.spin, sim_index=memo.sim_index, model_type=memo.model_type, scaling_matrix=memo.scaling_matrix)
+        finally:
+            if memo.pipe_name != pipe_orig:
+                pipes.switch(pipe_orig)
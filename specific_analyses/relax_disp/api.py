@@ -36,7 +36,7 @@ from types import MethodType
 
 # relax module imports.
 from lib.arg_check import is_list, is_str_list
-from lib.dispersion.variables import EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, MODEL_LIST_MMQ, MODEL_R2EFF, PARAMS_R20
+from lib.dispersion.variables import EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, MODEL_LIST_DERIVS, MODEL_LIST_MMQ, MODEL_R2EFF, PARAMS_R20
 from lib.errors import RelaxError, RelaxImplementError
 from lib.text.sectioning import subsection
 from multi import Processor_box
@@ -49,8 +49,8 @@ from pipe_control.sequence import return_attached_protons
 from specific_analyses.api_base import API_base
 from specific_analyses.api_common import API_common
 from specific_analyses.relax_disp.checks import check_model_type
-from specific_analyses.relax_disp.data import average_intensity, calc_rotating_frame_params, find_intensity_keys, generate_r20_key, has_exponential_exp_type, has_proton_mmq_cpmg, loop_cluster, loop_exp_frq, loop_exp_frq_offset_point, loop_time, pack_back_calc_r2eff, return_param_key_from_data, spin_ids_to_containers
-from specific_analyses.relax_disp.optimisation import Disp_memo, Disp_minimise_command, back_calc_peak_intensities, back_calc_r2eff, calculate_r2eff, minimise_r2eff
+from specific_analyses.relax_disp.data import average_intensity, calc_rotating_frame_params, clear_data_sets, find_intensity_keys, generate_r20_key, has_exponential_exp_type, has_proton_mmq_cpmg, loop_cluster, loop_exp_frq, loop_exp_frq_offset_point, loop_time, pack_back_calc_r2eff, return_param_key_from_data, spin_ids_to_containers
+from specific_analyses.relax_disp.optimisation import Disp_memo, Disp_minimise_command, Disp_minimise_stacked_command, Disp_stacked_memo, back_calc_peak_intensities, back_calc_r2eff, calculate_r2eff, is_feasible, minimise_r2eff
 from specific_analyses.relax_disp.parameter_object import Relax_disp_params
 from specific_analyses.relax_disp.parameters import get_param_names, get_value, loop_parameters, param_conversion, param_index_to_param_info, param_num, r1_setup
 
@@ -740,7 +740,7 @@ class Relax_disp(API_base, API_common):
                 elif match('^[Ll]og [Bb]arrier$', algor):
                     allow = True
 
-            # If the Jacobian and Hessian matrix have not been specified for fitting, 'simplex' should be used.
+            # The dispersion models.
             else:
                 if match('^[Gg]rid$', algor):
                     allow = True
@@ -748,6 +748,15 @@ class Relax_disp(API_base, API_common):
                 elif match('^[Ss]implex$', algor):
                     allow = True
 
+                # The gradient based methods, only if the gradient and Hessian have been implemented for the models of all selected spins.
+                elif match('^[Bb][Ff][Gg][Ss]$', algor) or match('^[Nn]ewton$', algor) or match('^[Mm][Oo][Mm]$', algor) or match('[Mm]ethod of [Mm]ultipliers$', algor):
+                    allow = True
+                    for spin in spin_loop(skip_desel=True):
+                        if spin.model not in MODEL_LIST_DERIVS:
+                            allow = False
+                            model_type = spin.model
+                            break
+
         # Do not allow, if no model has been specified.
         else:
             model_type = 'None'
@@ -779,6 +788,10 @@ class Relax_disp(API_base, API_common):
             fields = cdp.spectrometer_frq_list
             field_count = cdp.spectrometer_frq_count
 
+        # The lock-step optimisation of the single spin clusters, only for the simplex algorithm.
+        lockstep = getattr(cdp, 'lockstep', False) and match('^[Ss]implex$', algor)
+        stacks = {}
+
         # Loop over the spin blocks.
         model_index = -1
         for spin_ids in self.model_loop():
@@ -796,6 +809,15 @@ class Relax_disp(API_base, API_common):
             if skip:
                 continue
 
+            # Skip clusters for which the adaptive Monte Carlo simulations have converged.
+            if sim_index != None and getattr(cdp, 'sim_tolerance', None) != None:
+                skip = True
+                for spin in spins:
+                    if spin.select_sim[sim_index]:
+                        skip = False
+                if skip:
+                    continue
+
             # Alias the grid options.
             lower_i, upper_i, inc_i = None, None, None
             if min_algor == 'grid':
@@ -815,6 +837,15 @@ class Relax_disp(API_base, API_common):
                 # Skip the rest.
                 continue
 
+            # Collect the single spin clusters for the lock-step optimisation, grouped by model and scaling.  Clusters starting outside of the linear constraints are left to the minfx simplex, as the extreme barrier of the lock-step simplex cannot leave the infeasible region.
+            if lockstep and len(spins) == 1 and spins[0].model in MODEL_LIST_DERIVS and (not constraints or is_feasible(spins=spins, scaling_matrix=scaling_matrix[model_index])):
+                key = (spins[0].model, tuple(scaling_matrix[model_index].diagonal()))
+                if key not in stacks:
+                    stacks[key] = [scaling_matrix[model_index], [], []]
+                stacks[key][1].append(spins[0])
+                stacks[key][2].append(spin_ids[0])
+                continue
+
             # Set up the slave command object.
             command = Disp_minimise_command(spins=spins, spin_ids=spin_ids, sim_index=sim_index, scaling_matrix=scaling_matrix[model_index], min_algor=min_algor, min_options=min_options, func_tol=func_tol, grad_tol=grad_tol, max_iterations=max_iterations, constraints=constraints, verbosity=verbosity, lower=lower_i, upper=upper_i, inc=inc_i, fields=fields, param_names=get_param_names(spins=spins, full=True))
 
@@ -824,6 +855,22 @@ class Relax_disp(API_base, API_common):
             # Add the slave command and memo to the processor queue.
             processor.add_to_queue(command, memo)
 
+        # Loop over the groups of single spin clusters for the lock-step optimisation.
+        for key in sorted(stacks):
+            # Unpack the group.
+            group_scaling_matrix, spins, spin_ids = stacks[key]
+
+            # Set up the slave command object for all clusters of the group.
+            command = Disp_minimise_stacked_command(spins=spins, spin_ids=spin_ids, sim_index=sim_index, scaling_matrix=group_scaling_matrix, func_tol=func_tol, max_iterations=max_iterations, constraints=constraints, verbosity=verbosity, fields=fields, param_names=get_param_names(spins=spins[:1], full=True))
+
+            # Set up the memos of the individual clusters.
+            memos = []
+            for i in range(len(spins)):
+                memos.append(Disp_memo(spins=[spins[i]], spin_ids=[spin_ids[i]], sim_index=sim_index, scaling_matrix=group_scaling_matrix, verbosity=verbosity))
+
+            # Add the slave command and memo to the processor queue.
+            processor.add_to_queue(command, Disp_stacked_memo(memos=memos))
+
 
     def model_desc(self, model_info=None):
         """Return a description of the model.
@@ -1341,6 +1388,9 @@ class Relax_disp(API_base, API_common):
         # Get the minimisation statistic object names.
         min_names = self.data_names(set='min')
 
+        # Remove the compiled data sets of any previous simulations.
+        clear_data_sets()
+
         # Set the Monte Carlo parameter values.
         for spin_ids in self.model_loop():
             spins = spin_ids_to_containers(spin_ids)
@@ -62,7 +62,7 @@ import sys
 from warnings import warn
 
 # relax module imports.
-from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_DESC_CPMG_DQ, EXP_TYPE_DESC_CPMG_MQ, EXP_TYPE_DESC_CPMG_PROTON_MQ, EXP_TYPE_DESC_CPMG_PROTON_SQ, EXP_TYPE_DESC_CPMG_SQ, EXP_TYPE_DESC_CPMG_ZQ, EXP_TYPE_DESC_R1RHO, EXP_TYPE_LIST, EXP_TYPE_LIST_CPMG, EXP_TYPE_LIST_R1RHO, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_DPL94, MODEL_LIST_FIT_R1, MODEL_LIST_MMQ, MODEL_LIST_NUMERIC_CPMG, MODEL_LIST_R1RHO_FULL, MODEL_LIST_R1RHO_ON_RES, MODEL_MP05, MODEL_NOREX, MODEL_NS_R1RHO_2SITE, MODEL_PARAMS, MODEL_R2EFF, MODEL_TAP03, MODEL_TP02, PARAMS_R20
+from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_DESC_CPMG_DQ, EXP_TYPE_DESC_CPMG_MQ, EXP_TYPE_DESC_CPMG_PROTON_MQ, EXP_TYPE_DESC_CPMG_PROTON_SQ, EXP_TYPE_DESC_CPMG_SQ, EXP_TYPE_DESC_CPMG_ZQ, EXP_TYPE_DESC_R1RHO, EXP_TYPE_LIST, EXP_TYPE_LIST_CPMG, EXP_TYPE_LIST_R1RHO, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_DPL94, MODEL_LIST_DERIVS, MODEL_LIST_FIT_R1, MODEL_LIST_MMQ, MODEL_LIST_NUMERIC_CPMG, MODEL_LIST_R1RHO_FULL, MODEL_LIST_R1RHO_ON_RES, MODEL_MP05, MODEL_NOREX, MODEL_NS_R1RHO_2SITE, MODEL_PARAMS, MODEL_R2EFF, MODEL_TAP03, MODEL_TP02, PARAMS_R20
 from lib.errors import RelaxError, RelaxNoSpectraError, RelaxNoSpinError, RelaxSpinTypeError
 from lib.float import isNaN
 from lib.io import extract_data, get_file_path, open_write_file, strip, write_data
@@ -73,8 +73,9 @@ from lib.plotting.grace import script_grace2images
 from lib.sequence import read_spin_data, write_spin_data
 from lib.text.sectioning import section
 from lib.warnings import RelaxWarning, RelaxNoSpinWarning
+from multi import Processor_box, Slave_command
 from pipe_control.mol_res_spin import check_mol_res_spin_data, exists_mol_res_spin_data, generate_spin_id_unique, generate_spin_string, return_spin, spin_loop
-from pipe_control.pipes import check_pipe
+from pipe_control.pipes import cdp_name, check_pipe
 from pipe_control.result_files import add_result_file
 from pipe_control.selection import desel_spin
 from pipe_control.sequence import return_attached_protons
@@ -104,6 +105,9 @@ INTERPOLATE_OFFSET = "offset"
 # Default hardcoded colours (one colour for each magnetic field strength).
 COLOUR_ORDER = [4, 15, 2, 13, 11, 1, 3, 5, 6, 7, 8, 9, 10, 12, 14] * 1000
 
+# The compiled data sets of the spin clusters for the Monte Carlo simulations, with the data pipe name and spin IDs as keys.
+DATA_SETS = {}
+
 
 def average_intensity(spin=None, exp_type=None, frq=None, offset=None, point=None, time=None, sim_index=None, error=False):
     """Return the average peak intensity for the spectrometer frequency, dispersion point, and relaxation time.
@@ -296,6 +300,13 @@ def check_intensity_errors(spin_id=None):
             error_analysis(subset=ids)
 
 
+def clear_data_sets():
+    """Remove all compiled data sets of the spin clusters, forcing them to be rebuilt from the relax data store."""
+
+    # Empty the module cache.
+    DATA_SETS.clear()
+
+
 def count_exp():
     """Count the number of experiments present.
 
@@ -822,7 +833,7 @@ def insignificance(level=0.0):
             desel_spin(spin_id)
 
 
-def interpolate_disp(spin=None, spin_id=None, si=None, num_points=None, extend_hz=None, relax_times=None):
+def interpolate_disp(spin=None, spin_id=None, si=None, num_points=None, extend_hz=None, relax_times=None, stack_spins=None, stack_spin_ids=None):
     """Interpolate function for 2D Grace plotting function for the dispersion curves.
 
     @keyword spin:          The specific spin data container.
@@ -837,6 +848,10 @@ def interpolate_disp(spin=None, spin_id=None, si=None, num_points=None, extend_h
     @type extend_hz:        float
     @keyword relax_times:   The experiment specific fixed time period for relaxation (in seconds).  The dimensions are {Ei, Mi, Oi, Di, Ti}.
     @type relax_times:      rank-4 list of floats
+    @keyword stack_spins:   The spin containers of the single spin clusters of the model of the given spin to back calculate together, stacked in one target function call, instead of the given spin alone.  The back calculated values are then those of these spins along the Si dimension.  For an empty list, the back calculation is skipped.
+    @type stack_spins:      None or list of SpinContainer instances
+    @keyword stack_spin_ids:    The spin ID strings of the stacked spins.
+    @type stack_spin_ids:       None or list of str
     @return:                The interpolated_flag, list of back calculated R2eff/R1rho values in rad/s {Ei, Si, Mi, Oi, Di}, list of interpolated frequencies for cpmg_frqs in Hz {Ei, Si, Mi, Oi, Di}, interpolated spin-lock offsets in rad/s {Ei, Si, Mi, Oi}, list of interpolated spin-lock field strength frequencies for spin_lock_nu1_new in Hz {Ei, Si, Mi, Oi, Di}, chemical shifts in rad/s {Ei, Si, Mi}, interpolated rotating frame tilt angles theta {Ei, Si, Mi, Oi, Di}, interpolated average resonance offset in the rotating frame Omega in rad/s {Ei, Si, Mi, Oi, Di} and the interpolated effective field in rotating frame w_eff in rad/s {Ei, Si, Mi, Oi, Di}.
     @rtype:                 boolean, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-3 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-2 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays
     """
@@ -1001,8 +1016,11 @@ def interpolate_disp(spin=None, spin_id=None, si=None, num_points=None, extend_h
     else:
         offsets, spin_lock_fields_inter, chemical_shifts, tilt_angles, Delta_omega, w_eff = return_offset_data(spins=[spin], spin_ids=[spin_id], field_count=field_count, fields=cpmg_frqs_new)
 
-    if spin.model == MODEL_R2EFF:
+    if spin.model == MODEL_R2EFF or (stack_spins != None and not len(stack_spins)):
         back_calc = None
+    elif stack_spins != None:
+        # Back calculate R2eff data for all stacked spins at once.
+        back_calc = specific_analyses.relax_disp.optimisation.back_calc_r2eff(spins=stack_spins, spin_ids=stack_spin_ids, cpmg_frqs=cpmg_frqs_new, spin_lock_nu1=spin_lock_nu1_new, relax_times_new=relax_times_new, stacked=True)
     else:
         # Back calculate R2eff data for the second sets of plots.
         back_calc = specific_analyses.relax_disp.optimisation.back_calc_r2eff(spins=[spin], spin_ids=[spin_id], cpmg_frqs=cpmg_frqs_new, spin_lock_nu1=spin_lock_nu1_new, relax_times_new=relax_times_new)
@@ -1010,7 +1028,7 @@ def interpolate_disp(spin=None, spin_id=None, si=None, num_points=None, extend_h
     return interpolated_flag, back_calc, cpmg_frqs_new, offsets, spin_lock_fields_inter, chemical_shifts, tilt_angles, Delta_omega, w_eff
 
 
-def interpolate_offset(spin=None, spin_id=None, si=None, num_points=None, extend_ppm=None, relax_times=None):
+def interpolate_offset(spin=None, spin_id=None, si=None, num_points=None, extend_ppm=None, relax_times=None, stack_spins=None, stack_spin_ids=None):
     """Interpolate function for 2D Grace plotting function for the dispersion curves, interpolating through spin-lock offset in rad/s.
 
     @keyword spin:          The specific spin data container.
@@ -1025,6 +1043,10 @@ def interpolate_offset(spin=None, spin_id=None, si=None, num_points=None, extend
     @type extend_ppm:       float
     @keyword relax_times:   The experiment specific fixed time period for relaxation (in seconds).  The dimensions are {Ei, Mi, Oi, Di, Ti}.
     @type relax_times:      rank-4 list of floats
+    @keyword stack_spins:   The spin containers of the single spin clusters of the model of the given spin to back calculate together, stacked in one target function call, instead of the given spin alone.  The back calculated values are then those of these spins along the Si dimension.  For an empty list, the back calculation is skipped.
+    @type stack_spins:      None or list of SpinContainer instances
+    @keyword stack_spin_ids:    The spin ID strings of the stacked spins.
+    @type stack_spin_ids:       None or list of str
     @return:                The interpolated_flag, list of back calculated R2eff/R1rho values in rad/s {Ei, Si, Mi, Oi, Di}, list of interpolated frequencies for cpmg_frqs in Hz {Ei, Si, Mi, Oi, Di}, interpolated spin-lock offsets in rad/s {Ei, Si, Mi, Oi}, list of interpolated spin-lock field strength frequencies for spin_lock_nu1_new in Hz {Ei, Si, Mi, Oi, Di}, chemical shifts in rad/s {Ei, Si, Mi}, interpolated rotating frame tilt angles theta {Ei, Si, Mi, Oi, Di}, interpolated average resonance offset in the rotating frame Omega in rad/s {Ei, Si, Mi, Oi, Di} and the interpolated effective field in rotating frame w_eff in rad/s {Ei, Si, Mi, Oi, Di}.
     @rtype:                 boolean, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-3 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-2 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays, rank-4 list of numpy rank-1 float arrays
     """
@@ -1110,8 +1132,12 @@ def interpolate_offset(spin=None, spin_id=None, si=None, num_points=None, extend
                     for di in range(len(tilt_angles[ei][0][mi][oi])):
                         relax_times_new[ei][mi][oi].append(relax_time_temp)
 
-    if spin.model == MODEL_R2EFF:
+    if spin.model == MODEL_R2EFF or (stack_spins != None and not len(stack_spins)):
         back_calc = None
+    elif stack_spins != None:
+        # Back calculate R1rho data for all stacked spins at once, the interpolated offsets being the same for each spin.
+        spin_lock_offset_stack = [[spin_lock_offset_new[ei][0]] * len(stack_spins) for ei in range(len(spin_lock_offset_new))]
+        back_calc = specific_analyses.relax_disp.optimisation.back_calc_r2eff(spins=stack_spins, spin_ids=stack_spin_ids, spin_lock_offset=spin_lock_offset_stack, spin_lock_nu1=spin_lock_fields_inter, relax_times_new=relax_times_new, stacked=True)
     else:
         # Back calculate R2eff data for the second sets of plots.
         back_calc = specific_analyses.relax_disp.optimisation.back_calc_r2eff(spins=[spin], spin_ids=[spin_id], spin_lock_offset=spin_lock_offset_new, spin_lock_nu1=spin_lock_fields_inter, relax_times_new=relax_times_new)
@@ -2017,8 +2043,8 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
     @type proton_mmq_flag:      bool
     """%(Y_AXIS_R2_EFF, Y_AXIS_R2_R1RHO, X_AXIS_DISP, X_AXIS_W_EFF, X_AXIS_THETA, INTERPOLATE_DISP, INTERPOLATE_OFFSET)
 
-    # Loop over each spin. Initialise spin counter.
-    si = 0
+    # Collect the spins to plot.
+    spins = []
     for spin, mol_name, res_num, res_name, spin_id in spin_loop(full_info=True, return_id=True, skip_desel=True):
         if not hasattr(spin, "model"):
             raise RelaxError("No model information is stored for the spin.  Please use the function: relax_disp.select_model(model='%s')"%MODEL_R2EFF)
@@ -2027,6 +2053,42 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
         if spin.model in MODEL_LIST_MMQ and spin.isotope == '1H':
             continue
 
+        # Store the spin.
+        spins.append([spin, mol_name, res_num, res_name, spin_id])
+
+    # Group the spins of the models with the derivs methods of the target function, so that the curves of all spins of one model are back calculated together as stacked single spin clusters.
+    stacks = {}
+    stack_index = []
+    for spin, mol_name, res_num, res_name, spin_id in spins:
+        stack_index.append(None)
+        if spin.model not in MODEL_LIST_DERIVS:
+            continue
+        if spin.model not in stacks:
+            stacks[spin.model] = [[], []]
+        stack_index[-1] = len(stacks[spin.model][0])
+        stacks[spin.model][0].append(spin)
+        stacks[spin.model][1].append(spin_id)
+
+    # The back calculated values of all stacked spins of each model.
+    stack_back_calc = {}
+
+    # Number of spectrometer fields.
+    fields = [None]
+    field_count = 1
+    if hasattr(cdp, 'spectrometer_frq_count'):
+        fields = cdp.spectrometer_frq_list
+        field_count = cdp.spectrometer_frq_count
+
+    # Get the Processor box singleton (it contains the Processor instance) and alias the Processor.
+    processor_box = Processor_box()
+    processor = processor_box.processor
+
+    # Loop over each spin. Initialise spin counter.
+    si = 0
+    for spin_index in range(len(spins)):
+        # Unpack the spin data.
+        spin, mol_name, res_num, res_name, spin_id = spins[spin_index]
+
         # Initialise some data structures.
         data = []
         set_labels = []
@@ -2040,13 +2102,6 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
         linetype = []
         linestyle = []
 
-        # Number of spectrometer fields.
-        fields = [None]
-        field_count = 1
-        if hasattr(cdp, 'spectrometer_frq_count'):
-            fields = cdp.spectrometer_frq_list
-            field_count = cdp.spectrometer_frq_count
-
         # Get the relax_times.
         values, errors, missing, frqs, frqs_H, exp_types, relax_times = return_r2eff_arrays(spins=[spin], spin_ids=[spin_id], fields=fields, field_count=field_count)
 
@@ -2056,21 +2111,33 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
         # The unique file name.
         file_name = "%s%s.agr" % (file_name_ini, spin_id.replace('#', '_').replace(':', '_').replace('@', '_'))
 
+        # The spins to back calculate together - all spins of the model for the first spin of a stack, none for the rest.
+        stack_spins, stack_spin_ids = None, None
+        if stack_index[spin_index] != None:
+            stack_spins, stack_spin_ids = stacks[spin.model]
+            if spin.model in stack_back_calc:
+                stack_spins, stack_spin_ids = [], []
+
         if interpolate == INTERPOLATE_DISP:
             # Interpolate through disp points.
-            interpolated_flag, back_calc, cpmg_frqs_new, offsets_inter, spin_lock_nu1_new, chemical_shifts, tilt_angles_inter, Delta_omega_inter, w_eff_inter = interpolate_disp(spin=spin, spin_id=spin_id, si=si, num_points=num_points, extend_hz=extend_hz, relax_times=relax_times)
+            interpolated_flag, back_calc, cpmg_frqs_new, offsets_inter, spin_lock_nu1_new, chemical_shifts, tilt_angles_inter, Delta_omega_inter, w_eff_inter = interpolate_disp(spin=spin, spin_id=spin_id, si=si, num_points=num_points, extend_hz=extend_hz, relax_times=relax_times, stack_spins=stack_spins, stack_spin_ids=stack_spin_ids)
 
         elif interpolate == INTERPOLATE_OFFSET:
             # Interpolate through disp points.
-            interpolated_flag, back_calc, cpmg_frqs_new, offsets_inter, spin_lock_nu1_new, chemical_shifts, tilt_angles_inter, Delta_omega_inter, w_eff_inter = interpolate_offset(spin=spin, spin_id=spin_id, si=si, num_points=num_points, extend_ppm=extend_ppm, relax_times=relax_times)
+            interpolated_flag, back_calc, cpmg_frqs_new, offsets_inter, spin_lock_nu1_new, chemical_shifts, tilt_angles_inter, Delta_omega_inter, w_eff_inter = interpolate_offset(spin=spin, spin_id=spin_id, si=si, num_points=num_points, extend_ppm=extend_ppm, relax_times=relax_times, stack_spins=stack_spins, stack_spin_ids=stack_spin_ids)
+
+        # Extract the back calculated values of the spin from the stack.
+        if stack_index[spin_index] != None:
+            if stack_spins:
+                stack_back_calc[spin.model] = back_calc
+            back_calc = [[stack_back_calc[spin.model][ei][stack_index[spin_index]]] for ei in range(len(stack_back_calc[spin.model]))]
 
         # Do not interpolate, if model is R2eff.
         if spin.model == MODEL_R2EFF:
             interpolated_flag = False
 
-        # Open the file for writing.
+        # The file path.
         file_path = get_file_path(file_name, dir)
-        file = open_write_file(file_name, dir, force)
 
         # Get the attached proton.
         proton = None
@@ -2105,15 +2172,7 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
             # Increment the graph index.
             graph_index += 1
 
-        # Remove all NaN values.
-        for i in range(len(data)):
-            for j in range(len(data[i])):
-                for k in range(len(data[i][j])):
-                    for l in range(len(data[i][j][k])):
-                        if isNaN(data[i][j][k][l]):
-                            data[i][j][k][l] = 0.0
-
-        # Write the header.
+        # The header.
         spin_string = generate_spin_string(spin=spin, mol_name=mol_name, res_num=res_num, res_name=res_name)
         title = "Relaxation dispersion plot for: %s"%(spin_string)
         if interpolate == INTERPOLATE_DISP:
@@ -2128,20 +2187,22 @@ def plot_disp_curves_to_file(file_name_ini=None, dir=None, y_axis=None, x_axis=N
             sets.append(len(data[gi]))
             legend.append(False)
         legend[0] = True
-        write_xy_header(format='grace', file=file, title=title, subtitle=subtitle, graph_num=graph_num, sets=sets, set_names=set_labels, set_colours=set_colours, x_axis_type_zero=x_axis_type_zero, symbols=symbols, symbol_sizes=symbol_sizes, linetype=linetype, linestyle=linestyle, axis_labels=axis_labels, legend=legend, legend_box_fill_pattern=[0]*graph_num, legend_char_size=[0.8]*graph_num)
+        header = {'title': title, 'subtitle': subtitle, 'graph_num': graph_num, 'sets': sets, 'set_names': set_labels, 'set_colours': set_colours, 'x_axis_type_zero': x_axis_type_zero, 'symbols': symbols, 'symbol_sizes': symbol_sizes, 'linetype': linetype, 'linestyle': linestyle, 'axis_labels': axis_labels, 'legend': legend, 'legend_box_fill_pattern': [0]*graph_num, 'legend_char_size': [0.8]*graph_num}
 
-        # Write the data.
+        # The graph type.
         graph_type = 'xy'
         if err:
             graph_type = 'xydy'
-        write_xy_data(format='grace', data=data, file=file, graph_type=graph_type)
 
-        # Close the file.
-        file.close()
+        # Queue the writing of the file, to be performed by the slave processors.
+        processor.add_to_queue(Plot_disp_curves_command(file_name=file_name, dir=dir, force=force, header=header, data=data, graph_type=graph_type))
 
         # Add the file to the results file list.
         add_result_file(type='grace', label='Grace', file=file_path)
 
+    # Write all files.
+    processor.run_queue()
+
 
 def plot_exp_curves(file=None, dir=None, force=None, norm=None):
     """Custom 2D Grace plotting function for the exponential curves.
@@ -2870,6 +2931,37 @@ def return_cpmg_frqs_single(exp_type=None, frq=None, offset=None, time=None, ref
     return array(cpmg_frqs, float64)
 
 
+def return_data_set(spins=None, spin_ids=None, fields=None, sim_index=None):
+    """Return the compiled dispersion data set of the spin cluster.
+
+    For the Monte Carlo simulations, the data set is built once per cluster and cached until the simulations are next initialised.  Only the R2eff/R1rho values are then repacked for each simulation.  For the normal data, a new data set is always built so that changes to the relax data store are picked up.
+
+
+    @keyword spins:     The list of spin containers in the cluster.
+    @type spins:        list of SpinContainer instances
+    @keyword spin_ids:  The list of spin IDs for the cluster.
+    @type spin_ids:     list of str
+    @keyword fields:    The list of spectrometer field strengths.
+    @type fields:       list of float
+    @keyword sim_index: The index of the simulation, or None for the normal data.
+    @type sim_index:    None or int
+    @return:            The compiled data set.
+    @rtype:             Disp_data_set instance
+    """
+
+    # The normal data.
+    if sim_index == None:
+        return Disp_data_set(spins=spins, spin_ids=spin_ids, fields=fields)
+
+    # Build and cache the data set the first time.
+    key = (cdp_name(), tuple(spin_ids))
+    if key not in DATA_SETS:
+        DATA_SETS[key] = Disp_data_set(spins=spins, spin_ids=spin_ids, fields=fields)
+
+    # Return the data set.
+    return DATA_SETS[key]
+
+
 def return_grace_data_vs_disp(y_axis=None, x_axis=None, interpolate=None, exp_type=None, ei=None, current_spin=None, spin_id=None, si=None, back_calc=None, cpmg_frqs_new=None, spin_lock_nu1_new=None, chemical_shifts=None, offsets_inter=None, tilt_angles_inter=None, Delta_omega_inter=None, w_eff_inter=None, interpolated_flag=None, graph_index=None, data=None, set_labels=None, set_colours=None, x_axis_type_zero=None, symbols=None, symbol_sizes=None, linetype=None, linestyle=None, axis_labels=None):
     """Return data in lists for 2D Grace plotting function, to prepate plotting R1rho R2 as function of effective field in rotating frame w_eff.
 
@@ -4449,7 +4541,7 @@ def return_r1_err_data(spins=None, spin_ids=None, field_count=None, sim_index=No
     return r1_err
 
 
-def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None, sim_index=None):
+def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None, sim_index=None, return_keys=False):
     """Return numpy arrays of the R2eff/R1rho values and errors.
 
     @keyword spins:         The list of spin containers in the cluster.
@@ -4462,7 +4554,9 @@ def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None
     @type field_count:      int
     @keyword sim_index:     The index of the simulation to return the data of.  This should be None if the normal data is required.
     @type sim_index:        None or int
-    @return:                The numpy array structures of the R2eff/R1rho values, errors, missing data, and corresponding Larmor frequencies.  For each structure, the first dimension corresponds to the experiment types, the second the spins of a spin block, the third to the spectrometer field strength, and the fourth is the dispersion points.  For the Larmor frequency structure, the fourth dimension is omitted.  For R1rho-type data, an offset dimension is inserted between the spectrometer field strength and the dispersion points.
+    @keyword return_keys:   A flag which if True will cause the spin container, R2eff/R1rho key and {Ei, Si, Mi, Oi, Di} indices of each data point present to be returned as well, for repacking the values of the Monte Carlo simulations.
+    @type return_keys:      bool
+    @return:                The numpy array structures of the R2eff/R1rho values, errors, missing data, and corresponding Larmor frequencies.  For each structure, the first dimension corresponds to the experiment types, the second the spins of a spin block, the third to the spectrometer field strength, and the fourth is the dispersion points.  For the Larmor frequency structure, the fourth dimension is omitted.  For R1rho-type data, an offset dimension is inserted between the spectrometer field strength and the dispersion points.  If return_keys is set, the list of data point keys is appended.
     @rtype:                 lists of numpy float arrays, lists of numpy float arrays, lists of numpy float arrays, numpy rank-2 int array
     """
 
@@ -4481,6 +4575,7 @@ def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None
     frqs = []
     frqs_H = []
     relax_times = []
+    keys = []
     for exp_type, ei in loop_exp(return_indices=True):
         values.append([])
         errors.append([])
@@ -4583,6 +4678,9 @@ def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None
             else:
                 missing[ei][si][mi][oi].append(0)
 
+            # The key and indices of the data point.
+            keys.append((current_spin, key, ei, si, mi, oi, len(values[ei][si][mi][oi])))
+
             # The values.
             if sim_index == None:
                 values[ei][si][mi][oi].append(current_spin.r2eff[key])
@@ -4611,6 +4709,8 @@ def return_r2eff_arrays(spins=None, spin_ids=None, fields=None, field_count=None
                         relax_times[ei][mi][oi][di] = array(relax_times[ei][mi][oi][di], float64)
 
     # Return the structures.
+    if return_keys:
+        return values, errors, missing, frqs, frqs_H, exp_types, relax_times, keys
     return values, errors, missing, frqs, frqs_H, exp_types, relax_times
 
 
@@ -5143,3 +5243,119 @@ def write_disp_curves(dir=None, force=None):
 
             # Add the file to the results file list.
             add_result_file(type='text', label='Text', file=file_path)
+
+
+
+class Disp_data_set:
+    """The compiled dispersion data of a spin cluster.
+
+    All data apart from the R2eff/R1rho values is identical for the Monte Carlo simulations, hence the frequencies, offsets, times, errors and missing data masks are assembled once and only the values are repacked per simulation.
+    """
+
+    def __init__(self, spins=None, spin_ids=None, fields=None):
+        """Assemble the data of the cluster from the relax data store.
+
+        @keyword spins:     The list of spin containers in the cluster.
+        @type spins:        list of SpinContainer instances
+        @keyword spin_ids:  The list of spin IDs for the cluster.
+        @type spin_ids:     list of str
+        @keyword fields:    The list of spectrometer field strengths.
+        @type fields:       list of float
+        """
+
+        # The R2eff/R1rho data, together with the key and indices of each data point present.
+        self.values, self.errors, self.missing, self.frqs, self.frqs_H, self.exp_types, self.relax_times, self.keys = return_r2eff_arrays(spins=spins, spin_ids=spin_ids, fields=fields, field_count=len(fields), return_keys=True)
+
+        # The offset data.
+        self.offsets, spin_lock_fields_inter, self.chemical_shifts, self.tilt_angles, self.Delta_omega, self.w_eff = return_offset_data(spins=spins, spin_ids=spin_ids, field_count=len(fields))
+
+        # The dispersion data.
+        self.dispersion_points = cdp.dispersion_points
+        self.cpmg_frqs = return_cpmg_frqs(ref_flag=False)
+        self.spin_lock_nu1 = return_spin_lock_nu1(ref_flag=False)
+
+
+    def return_values(self, sim_index=None):
+        """Return the R2eff/R1rho values of the normal data or of a Monte Carlo simulation.
+
+        @keyword sim_index: The index of the simulation, or None for the normal data.
+        @type sim_index:    None or int
+        @return:            The R2eff/R1rho values, with the missing data points set to zero.
+        @rtype:             rank-4 list of numpy float arrays
+        """
+
+        # The normal data.
+        if sim_index == None:
+            return self.values
+
+        # Copy the value arrays, and swap in the simulated values of the data points present.
+        values = [[[[point_values.copy() for point_values in offset_values] for offset_values in frq_values] for frq_values in spin_values] for spin_values in self.values]
+        for spin, key, ei, si, mi, oi, di in self.keys:
+            values[ei][si][mi][oi][di] = spin.r2eff_sim[sim_index][key]
+
+        # Return the values.
+        return values
+
+
+
+class Plot_disp_curves_command(Slave_command):
+    """Command class for writing the Grace file of the dispersion curves of one spin on the slave processor."""
+
+    def __init__(self, file_name=None, dir=None, force=None, header=None, data=None, graph_type=None):
+        """Store all the master data to be sent to the slave processor.
+
+        @keyword file_name:     The name of the Grace file.
+        @type file_name:        str
+        @keyword dir:           The optional directory to place the file into.
+        @type dir:              str
+        @keyword force:         Boolean argument which if True causes the file to be overwritten if it already exists.
+        @type force:            bool
+        @keyword header:        The keyword arguments of the lib.plotting.api.write_xy_header() function, excluding the format and file.
+        @type header:           dict
+        @keyword data:          The graph data, with the dimensions {graph, set, point, x/y/dy}.
+        @type data:             rank-4 list of floats
+        @keyword graph_type:    The Grace graph type, either 'xy' or 'xydy'.
+        @type graph_type:       str
+        """
+
+        # Execute the base class __init__() method.
+        super(Plot_disp_curves_command, self).__init__()
+
+        # Store the arguments.
+        self.file_name = file_name
+        self.dir = dir
+        self.force = force
+        self.header = header
+        self.data = data
+        self.graph_type = graph_type
+
+
+    def run(self, processor, completed):
+        """Write the Grace file.
+
+        @param processor:   The slave processor.
+        @type processor:    Processor instance
+        @param completed:   The flag which indicates the completion of the slave command.
+        @type completed:    bool
+        """
+
+        # Remove all NaN values.
+        for i in range(len(self.data)):
+            for j in range(len(self.data[i])):
+                for k in range(len(self.data[i][j])):
+                    for l in range(len(self.data[i][j][k])):
+                        if isNaN(self.data[i][j][k][l]):
+                            self.data[i][j][k][l] = 0.0
+
+        # Open the file for writing.
+        file = open_write_file(self.file_name, self.dir, self.force)
+
+        # Write the header and data.
+        write_xy_header(format='grace', file=file, **self.header)
+        write_xy_data(format='grace', data=self.data, file=file, graph_type=self.graph_type)
+
+        # Close the file.
+        file.close()
+
+        # Nothing to return.
+        processor.return_object(processor.NULL_RESULT)
@@ -31,6 +31,7 @@ from warnings import warn
 
 # relax module imports.
 from dep_check import C_module_exp_fn, scipy_module
+from lib.curve_fit.exponential import fit_exponential_2param_neg
 from lib.dispersion.variables import MODEL_R2EFF
 from lib.errors import RelaxError
 from lib.statistics import multifit_covar
@@ -506,8 +507,10 @@ def estimate_r2eff(method='minfx', min_algor='simplex', c_code=True, constraints
     Initial guess for the starting parameter x0 = [r2eff_est, i0_est], is by converting the exponential curve to a linear problem.
     Then solving initial guess by linear least squares of: ln(Intensity[j]) = ln(i0) - time[j]* r2eff.
 
+    The 'bulk' method fits all curves of all spins simultaneously, see estimate_r2eff_bulk().
 
-    @keyword method:            The method to minimise and estimate errors.  Options are: 'minfx' or 'scipy.optimize.leastsq'.
+
+    @keyword method:            The method to minimise and estimate errors.  Options are: 'minfx', 'scipy.optimize.leastsq' or 'bulk'.
     @type method:               string
     @keyword min_algor:         The minimisation algorithm
     @type min_algor:            string
@@ -538,6 +541,11 @@ def estimate_r2eff(method='minfx', min_algor='simplex', c_code=True, constraints
     if not C_module_exp_fn and method == 'minfx':
         raise RelaxError("Relaxation curve fitting is not available.  Try compiling the C modules on your platform.")
 
+    # The vectorised fitting of all curves at once.
+    if method == 'bulk':
+        estimate_r2eff_bulk(spin_id=spin_id, ftol=ftol, xtol=xtol, max_iterations=maxfev, verbosity=verbosity)
+        return
+
     # Set class scipy setting.
     E = Exp(verbosity=verbosity)
     E.set_settings_leastsq(ftol=ftol, xtol=xtol, maxfev=maxfev, factor=factor)
@@ -605,7 +613,7 @@ def estimate_r2eff(method='minfx', min_algor='simplex', c_code=True, constraints
                 # Acquire results.
                 results = minimise_minfx(E=E)
             else:
-                raise RelaxError("Method for minimisation not known. Try setting: method='scipy.optimize.leastsq'.")
+                raise RelaxError("Method for minimisation not known. Try setting: method='scipy.optimize.leastsq' or method='bulk'.")
 
             # Unpack results
             param_vector, param_vector_error, chi2, iter_count, f_count, g_count, h_count, warning = results
@@ -658,6 +666,123 @@ def estimate_r2eff(method='minfx', min_algor='simplex', c_code=True, constraints
                     print(print_string),
 
 
+def estimate_r2eff_bulk(spin_id=None, ftol=1e-15, xtol=1e-15, max_iterations=1000, verbosity=1):
+    """Estimate r2eff and errors by the simultaneous exponential curve fitting of all spins and dispersion points.
+
+    The intensity decay curves of all selected spins and all dispersion points are stacked into [N][T] arrays and fitted together by the vectorised Levenberg-Marquardt optimisation of lib.curve_fit.exponential.fit_exponential_2param_neg(), starting from the log-linear estimates.  The errors are from the covariance matrix of lib.statistics.multifit_covar().  The chi-squared value and function count stored in each spin are the sums over its dispersion points.
+
+
+    @keyword spin_id:           The spin identification string.
+    @type spin_id:              str
+    @keyword ftol:              The relative chi-squared decrease tolerance for the convergence of each curve.
+    @type ftol:                 float
+    @keyword xtol:              The relative parameter step tolerance for the convergence of each curve.
+    @type xtol:                 float
+    @keyword max_iterations:    The maximum number of iterations for each curve.
+    @type max_iterations:       int
+    @keyword verbosity:         The amount of information to print.  The higher the value, the greater the verbosity.
+    @type verbosity:            int
+    """
+
+    # Perform checks.
+    check_model_type(model=MODEL_R2EFF)
+
+    # Collect the curves of all spins and dispersion points.
+    spins = []
+    curves = []
+    for cur_spin, mol_name, resi, resn, cur_spin_id in spin_loop(selection=spin_id, full_info=True, return_id=True, skip_desel=True):
+        # The spin and the indices of its curves.
+        spin_string = generate_spin_string(spin=cur_spin, mol_name=mol_name, res_num=resi, res_name=resn)
+        spins.append([cur_spin, spin_string, []])
+
+        # Loop over each spectrometer frequency and dispersion point.
+        for exp_type, frq, offset, point, ei, mi, oi, di in loop_exp_frq_offset_point(return_indices=True):
+            # The parameter key.
+            param_key = return_param_key_from_data(exp_type=exp_type, frq=frq, offset=offset, point=point)
+
+            # The peak intensities, errors and times.
+            values = []
+            errors = []
+            times = []
+            for time in loop_time(exp_type=exp_type, frq=frq, offset=offset, point=point):
+                values.append(average_intensity(spin=cur_spin, exp_type=exp_type, frq=frq, offset=offset, point=point, time=time))
+                errors.append(average_intensity(spin=cur_spin, exp_type=exp_type, frq=frq, offset=offset, point=point, time=time, error=True))
+                times.append(time)
+
+            # Store the curve.
+            spins[-1][2].append(len(curves))
+            curves.append([param_key, exp_type, frq, offset, point, times, values, errors])
+
+    # Nothing to do.
+    if not len(curves):
+        return
+
+    # Pack the curves, padding the shorter ones.
+    N = len(curves)
+    T = max([len(curve[5]) for curve in curves])
+    times = zeros((N, T))
+    values = zeros((N, T))
+    errors = ones((N, T))
+    mask = zeros((N, T), bool)
+    for i in range(N):
+        num = len(curves[i][5])
+        times[i, :num] = curves[i][5]
+        values[i, :num] = curves[i][6]
+        errors[i, :num] = curves[i][7]
+        mask[i, :num] = True
+
+    # Fit all curves.
+    params, param_errors, chi2, iter_count, f_count, converged = fit_exponential_2param_neg(times=times, values=values, errors=errors, mask=mask, ftol=ftol, xtol=xtol, max_iterations=max_iterations)
+
+    # Loop over the spins, storing the results.
+    for cur_spin, spin_string, indices in spins:
+        # Print information.
+        if verbosity >= 1:
+            # Individual spin block section.
+            top = 2
+            if verbosity >= 2:
+                top += 2
+            subsection(file=sys.stdout, text="Fitting with bulk to: %s"%spin_string, prespace=top)
+
+        # Initialise the statistics.
+        cur_spin.chi2 = 0.0
+        cur_spin.f_count = 0
+        cur_spin.warning = None
+
+        # Loop over the curves of the spin.
+        for i in indices:
+            # Unpack.
+            param_key, exp_type, frq, offset, point = curves[i][:5]
+            r2eff, i0 = params[i]
+            r2eff_err, i0_err = param_errors[i]
+
+            # Disassemble the parameter vector.
+            disassemble_param_vector(param_vector=params[i], spins=[cur_spin], key=param_key)
+
+            # Errors.
+            if not hasattr(cur_spin, 'r2eff_err'):
+                setattr(cur_spin, 'r2eff_err', deepcopy(getattr(cur_spin, 'r2eff')))
+            if not hasattr(cur_spin, 'i0_err'):
+                setattr(cur_spin, 'i0_err', deepcopy(getattr(cur_spin, 'i0')))
+
+            # Set error.
+            cur_spin.r2eff_err[param_key] = r2eff_err
+            cur_spin.i0_err[param_key] = i0_err
+
+            # The statistics.
+            cur_spin.chi2 += chi2[i]
+            cur_spin.f_count += f_count[i]
+            if not converged[i]:
+                cur_spin.warning = "Maximum number of iterations reached"
+
+            # Print information.
+            if verbosity >= 1:
+                print("%s at %3.1f MHz, for offset=%3.3f ppm and dispersion point %-5.1f, with %i time points." % (exp_type, frq/1E6, offset, point, mask[i].sum()))
+                print("r2eff=%3.3f r2eff_err=%3.4f, i0=%6.1f, i0_err=%3.4f, chi2=%3.3f.\n" % (r2eff, r2eff_err, i0, i0_err, chi2[i]))
+                if verbosity >= 2:
+                    print('For time array: '+', '.join(map(str, times[i][mask[i]]))+'.\n\n')
+
+
 def minimise_leastsq(E=None):
     """Estimate r2eff and errors by exponential curve fitting with scipy.optimize.leastsq.
 
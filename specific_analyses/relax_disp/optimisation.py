@@ -26,7 +26,7 @@
 # Python module imports.
 from minfx.generic import generic_minimise
 from minfx.grid import grid
-from numpy import dot, float64, int32, ones, zeros
+from numpy import all, any, arange, argmin, argsort, array, dot, errstate, eye, float64, inf, int32, isfinite, linspace, nonzero, ones, prod, transpose, unravel_index, where, zeros
 from numpy.linalg import inv
 from operator import mul
 from re import match, search
@@ -41,14 +41,22 @@ from lib.errors import RelaxError
 from lib.text.sectioning import subsection
 from lib.warnings import RelaxWarning
 from multi import Memo, Result_command, Slave_command
+from pipe_control import pipes
 from pipe_control.mol_res_spin import generate_spin_string, spin_loop
 from specific_analyses.relax_disp.checks import check_disp_points, check_exp_type, check_exp_type_fixed_time
-from specific_analyses.relax_disp.data import average_intensity, count_spins, find_intensity_keys, has_exponential_exp_type, has_proton_mmq_cpmg, is_r1_optimised, loop_exp, loop_exp_frq_offset_point, loop_exp_frq_offset_point_time, loop_frq, loop_offset, loop_time, pack_back_calc_r2eff, return_cpmg_frqs, return_offset_data, return_param_key_from_data, return_r1_data, return_r2eff_arrays, return_spin_lock_nu1
+from specific_analyses.relax_disp.data import average_intensity, count_spins, find_intensity_keys, has_exponential_exp_type, has_proton_mmq_cpmg, is_r1_optimised, loop_exp, loop_exp_frq_offset_point, loop_exp_frq_offset_point_time, loop_frq, loop_offset, loop_time, pack_back_calc_r2eff, return_cpmg_frqs, return_data_set, return_offset_data, return_param_key_from_data, return_r1_data, return_r2eff_arrays, return_spin_lock_nu1
 from specific_analyses.relax_disp.parameters import assemble_param_vector, disassemble_param_vector, linear_constraints, param_conversion, param_num, r1_setup
 from target_functions.relax_disp import Dispersion
 from target_functions.relax_fit_wrapper import Relax_fit_opt
 
 
+# The memory budget, in bytes, for each block of points of the vectorised grid search.
+GRID_BLOCK_MEMORY = 2**27
+
+# The approximate number of double precision arrays the size of the dispersion data structure which are alive at once for each grid point, when evaluating the most complex models.
+GRID_BLOCK_ARRAYS = 50
+
+
 def back_calc_peak_intensities(spin=None, spin_id=None, exp_type=None, frq=None, offset=None, point=None):
     """Back-calculation of peak intensity for the given relaxation time.
 
@@ -116,7 +124,7 @@ def back_calc_peak_intensities(spin=None, spin_id=None, exp_type=None, frq=None,
     return results
 
 
-def back_calc_r2eff(spins=None, spin_ids=None, cpmg_frqs=None, spin_lock_offset=None, spin_lock_nu1=None, relax_times_new=None, store_chi2=False):
+def back_calc_r2eff(spins=None, spin_ids=None, cpmg_frqs=None, spin_lock_offset=None, spin_lock_nu1=None, relax_times_new=None, store_chi2=False, stacked=False):
     """Back-calculation of R2eff/R1rho values for the given spin.
 
     @keyword spins:             The list of specific spin data container for cluster.
@@ -133,12 +141,19 @@ def back_calc_r2eff(spins=None, spin_ids=None, cpmg_frqs=None, spin_lock_offset=
     @type relax_times_new:      rank-4 list of floats
     @keyword store_chi2:        A flag which if True will cause the spin specific chi-squared value to be stored in the spin container.
     @type store_chi2:           bool
+    @keyword stacked:           A flag which if True will cause the spins to be treated as independent single spin clusters of the same model, stacked along the spin dimension of the target function so that all spins are back-calculated in one call.  This is only possible for the models with the derivs methods of the target function.
+    @type stacked:              bool
     @return:                    The back-calculated R2eff/R1rho value for the given spin.
     @rtype:                     numpy rank-1 float array
     """
 
-    # Create the initial parameter vector.
-    param_vector = assemble_param_vector(spins=spins)
+    # Create the initial parameter vector, one per spin for the stacked clusters.
+    if stacked:
+        param_vector = array([assemble_param_vector(spins=[spin]) for spin in spins])
+        num_params = param_num(spins=spins[:1])
+    else:
+        param_vector = assemble_param_vector(spins=spins)
+        num_params = param_num(spins=spins)
 
     # Number of spectrometer fields.
     fields = [None]
@@ -222,15 +237,21 @@ def back_calc_r2eff(spins=None, spin_ids=None, cpmg_frqs=None, spin_lock_offset=
                         missing[ei][si][mi].append(zeros(num, int32))
 
     # Initialise the relaxation dispersion fit functions.
-    model = Dispersion(model=spins[0].model, num_params=param_num(spins=spins), num_spins=len(spins), num_frq=field_count, exp_types=exp_types, values=values, errors=errors, missing=missing, frqs=frqs, frqs_H=frqs_H, cpmg_frqs=cpmg_frqs, spin_lock_nu1=spin_lock_nu1, chemical_shifts=chemical_shifts, offset=offsets, tilt_angles=tilt_angles, r1=r1, relax_times=relax_times, recalc_tau=recalc_tau, r1_fit=r1_fit)
+    model = Dispersion(model=spins[0].model, num_params=num_params, num_spins=len(spins), num_frq=field_count, exp_types=exp_types, values=values, errors=errors, missing=missing, frqs=frqs, frqs_H=frqs_H, cpmg_frqs=cpmg_frqs, spin_lock_nu1=spin_lock_nu1, chemical_shifts=chemical_shifts, offset=offsets, tilt_angles=tilt_angles, r1=r1, relax_times=relax_times, recalc_tau=recalc_tau, r1_fit=r1_fit, stacked=stacked)
 
     # Make a single function call.  This will cause back calculation and the data will be stored in the class instance.
-    chi2 = model.func(param_vector)
+    if stacked:
+        chi2 = model.calc_stacked_chi2(param_vector)
+    else:
+        chi2 = model.func(param_vector)
 
     # Store the chi-squared value.
     if store_chi2:
-        for spin in spins:
-            spin.chi2 = chi2
+        for si in range(len(spins)):
+            if stacked:
+                spins[si].chi2 = float(chi2[si])
+            else:
+                spins[si].chi2 = chi2
 
     # Return the structure.
     return model.get_back_calc()
@@ -310,6 +331,100 @@ def calculate_r2eff():
                 spin.r2eff_err[param_key] = calc_two_point_r2eff_err(relax_time=time, I_ref=ref_intensity, I=intensity, I_ref_err=ref_intensity_err, I_err=intensity_err)
 
 
+def grid_vectorised(func=None, num_incs=None, lower=None, upper=None, A=None, b=None, block_size=None, verbosity=0):
+    """A grid search whereby blocks of grid points are evaluated in single vectorised target function calls.
+
+    The grid is that of the minfx grid search, the points of each dimension being evenly spaced between the lower and upper bounds, or the mid point for a single increment.  The points violating the linear constraints A.x >= b are eliminated.
+
+
+    @keyword func:          The target function, taking the block of parameter vectors of rank [G][N] and returning the chi-squared values of rank [G].
+    @type func:             method
+    @keyword num_incs:      The number of increments for each dimension of the grid.
+    @type num_incs:         list of int
+    @keyword lower:         The lower bounds of the grid.
+    @type lower:            list of float
+    @keyword upper:         The upper bounds of the grid.
+    @type upper:            list of float
+    @keyword A:             The linear constraint matrix.
+    @type A:                None or numpy rank-2 float array
+    @keyword b:             The linear constraint scalar vector.
+    @type b:                None or numpy rank-1 float array
+    @keyword block_size:    The maximum number of grid points per target function call.
+    @type block_size:       int
+    @keyword verbosity:     The amount of information to print.  The higher the value, the greater the verbosity.
+    @type verbosity:        int
+    @return:                The parameter vector and chi-squared value of the grid minimum, the number of grid points evaluated, and the warning.
+    @rtype:                 numpy rank-1 float array, float, int, None
+    """
+
+    # The values of each dimension.
+    n = len(num_incs)
+    values = []
+    for i in range(n):
+        if num_incs[i] == 1:
+            values.append(array([(lower[i] + upper[i]) / 2.0]))
+        else:
+            values.append(linspace(lower[i], upper[i], num_incs[i]))
+
+    # Printout.
+    total = int(prod(num_incs))
+    if verbosity:
+        print("Vectorised grid search of %i points in blocks of up to %i points." % (total, block_size))
+
+    # Loop over the blocks of grid points.
+    param_vector = None
+    chi2_min = None
+    count = 0
+    for start in range(0, total, block_size):
+        # The grid point values.
+        indices = unravel_index(arange(start, min(start + block_size, total)), num_incs)
+        points = transpose([values[i][indices[i]] for i in range(n)])
+
+        # Eliminate the points outside of the linear constraints.
+        if A is not None:
+            points = points[all(dot(points, transpose(A)) - b >= 0.0, axis=1)]
+            if not len(points):
+                continue
+
+        # The chi-squared values.
+        chi2 = func(points)
+        count += len(points)
+
+        # A new minimum.
+        index = argmin(chi2)
+        if chi2_min is None or chi2[index] < chi2_min:
+            param_vector = points[index]
+            chi2_min = chi2[index]
+
+    # No points.
+    if param_vector is None:
+        raise RelaxError("All points of the grid search violate the linear constraints.")
+
+    # Return the minimum.
+    return param_vector, chi2_min, count, None
+
+
+def is_feasible(spins=None, scaling_matrix=None):
+    """Determine if the current parameter values of the cluster satisfy the linear constraints.
+
+    @keyword spins:             The list of spin data containers for the cluster.
+    @type spins:                list of SpinContainer instances
+    @keyword scaling_matrix:    The diagonal, square scaling matrix.
+    @type scaling_matrix:       numpy diagonal matrix
+    @return:                    True if the parameter values are within the linear constraints, False otherwise.
+    @rtype:                     bool
+    """
+
+    # The scaled parameter vector.
+    param_vector = assemble_param_vector(spins=spins)
+    if len(scaling_matrix):
+        param_vector = dot(param_vector, inv(scaling_matrix))
+
+    # Check the linear constraints A.x >= b.
+    A, b = linear_constraints(spins=spins, scaling_matrix=scaling_matrix)
+    return bool(all(dot(A, param_vector) - b >= 0.0))
+
+
 def minimise_r2eff(spins=None, spin_ids=None, min_algor=None, min_options=None, func_tol=None, grad_tol=None, max_iterations=None, constraints=False, scaling_matrix=None, verbosity=0, sim_index=None, lower=None, upper=None, inc=None):
     """Optimise the R2eff model by fitting the 2-parameter exponential curves.
 
@@ -499,6 +614,121 @@ def minimise_r2eff(spins=None, spin_ids=None, min_algor=None, min_options=None,
                 spins[si].warning = warning
 
 
+def simplex_lockstep(func=None, x0=None, func_tol=1e-25, max_iterations=1e7, A=None, b=None, verbosity=0):
+    """Nelder-Mead simplex optimisation of many independent problems moving in lock-step.
+
+    Each row of x0 is the starting point of an independent optimisation problem, and the simplices of all problems are reflected, expanded, contracted and shrunk together so that the target function is called once per step for all problems.  Each problem has its own convergence mask, and once converged, its simplex is frozen and the problem is no longer passed to the target function.  The initial simplex and the simplex coefficients are those of the minfx simplex algorithm.  The linear constraints A.x >= b are imposed by an extreme barrier, the points violating the constraints having an infinite function value.  Problems for which no vertex of the initial simplex satisfies the constraints cannot be optimised and are returned unchanged with the 'Infeasible start' warning.
+
+
+    @keyword func:              The target function, taking the parameter vectors of rank [C'][N] and the indices of the C' problems to evaluate and returning the function values of rank [C'].
+    @type func:                 method
+    @keyword x0:                The starting parameter vectors.
+    @type x0:                   numpy rank-2 float array of rank [C][N]
+    @keyword func_tol:          The function tolerance which, when the difference between the worst and best vertices of the simplex of a problem is reached, terminates its optimisation.
+    @type func_tol:             float
+    @keyword max_iterations:    The maximum number of iterations for each problem.
+    @type max_iterations:       int
+    @keyword A:                 The linear constraint matrix.
+    @type A:                    None or numpy rank-2 float array
+    @keyword b:                 The linear constraint scalar vector.
+    @type b:                    None or numpy rank-1 float array
+    @keyword verbosity:         The amount of information to print.  The higher the value, the greater the verbosity.
+    @type verbosity:            int
+    @return:                    The optimised parameter vectors, the function values, the iteration and function counts, and the optimisation warnings of each problem.
+    @rtype:                     numpy rank-2 float array, numpy rank-1 float array, numpy rank-1 int array, numpy rank-1 int array, list of str or None
+    """
+
+    # The extreme barrier for the linear constraints.
+    def target(x, index):
+        f = func(x, index)
+        if A is not None:
+            f = where(all(dot(x, transpose(A)) - b >= 0.0, axis=1), f, inf)
+        return f
+
+    # The initial simplex of rank [C][N+1][N], the vertices being unit steps from the starting point.
+    C, n = x0.shape
+    rows = arange(C)
+    simplex = x0[:, None, :] + ones((C, 1, 1)) * eye(n + 1, n, -1)
+    f = zeros((C, n + 1), float64)
+    for i in range(n + 1):
+        f[:, i] = target(simplex[:, i], rows)
+
+    # The statistics and convergence mask.
+    iter_count = zeros(C, int)
+    f_count = zeros(C, int) + n + 1
+    active = ones(C, bool)
+
+    # Iterate until all problems have converged.
+    while True:
+        # Order the vertices of each simplex from best to worst.
+        order = argsort(f, axis=1)
+        simplex = simplex[rows[:, None], order]
+        f = f[rows[:, None], order]
+
+        # Update the convergence mask, the problems with no finite vertex (an infeasible start) being terminated.
+        with errstate(invalid='ignore'):
+            active &= isfinite(f[:, 0]) & (f[:, -1] - f[:, 0] > func_tol) & (iter_count < max_iterations)
+        index = nonzero(active)[0]
+        if not len(index):
+            break
+        iter_count[index] += 1
+
+        # The simplices of the active problems.
+        simplex_i = simplex[index]
+        f_i = f[index]
+
+        # The centroid of all but the worst vertex, and the reflection of the worst vertex.
+        centroid = simplex_i[:, :-1].mean(axis=1)
+        worst = simplex_i[:, -1]
+        xr = 2.0*centroid - worst
+        fr = target(xr, index)
+
+        # The expansion, outside contraction and inside contraction points, all evaluated together although each problem only needs one or none.
+        expand = fr < f_i[:, 0]
+        contract = fr >= f_i[:, -2]
+        outside = contract & (fr < f_i[:, -1])
+        x2 = where(expand[:, None], 3.0*centroid - 2.0*worst, where(outside[:, None], 1.5*centroid - 0.5*worst, 0.5*(centroid + worst)))
+        f2 = target(x2, index)
+        f_count[index] += 1 + (expand | contract)
+
+        # The acceptance of the trial points.
+        use_xr = (~expand & ~contract) | (expand & (f2 >= fr))
+        use_x2 = (expand & (f2 < fr)) | (outside & (f2 <= fr)) | (contract & ~outside & (f2 < f_i[:, -1]))
+        shrink = contract & ~use_x2
+
+        # Replace the worst vertex.
+        simplex_i[:, -1] = where(use_xr[:, None], xr, where(use_x2[:, None], x2, worst))
+        f_i[:, -1] = where(use_xr, fr, where(use_x2, f2, f_i[:, -1]))
+
+        # Shrink the simplices towards the best vertex.
+        if any(shrink):
+            simplex_i[shrink, 1:] = simplex_i[shrink, :1] + 0.5*(simplex_i[shrink, 1:] - simplex_i[shrink, :1])
+            for i in range(1, n + 1):
+                f_i[shrink, i] = target(simplex_i[:, i], index)[shrink]
+            f_count[index[shrink]] += n
+
+        # Store the simplices.
+        simplex[index] = simplex_i
+        f[index] = f_i
+
+    # The warnings.
+    warnings = []
+    for i in range(C):
+        if not isfinite(f[i, 0]):
+            warnings.append("Infeasible start")
+        elif iter_count[i] >= max_iterations:
+            warnings.append("Maximum number of iterations reached")
+        else:
+            warnings.append(None)
+
+    # Printout.
+    if verbosity:
+        print("Lock-step simplex optimisation of %i problems in %i iterations." % (C, iter_count.max()))
+
+    # Return the best vertices.
+    return simplex[:, 0], f[:, 0], iter_count, f_count, warnings
+
+
 
 class Disp_memo(Memo):
     """The relaxation dispersion memo class."""
@@ -531,11 +761,32 @@ class Disp_memo(Memo):
         self.scaling_matrix = scaling_matrix
         self.verbosity = verbosity
 
+        # The data pipe, as the processor queue may be held and the results of several data pipes processed together.
+        self.pipe_name = pipes.cdp_name()
+
+
+    def journal_key(self):
+        """Return the key identifying the Monte Carlo simulation of the cluster in a result journal.
+
+        @return:    The simulation index and spin IDs of the cluster, or None for normal optimisation.
+        @rtype:     tuple or None
+        """
+
+        # Only journal the simulations.
+        if self.sim_index is None:
+            return None
+
+        # The key.
+        return ('relax_disp', self.sim_index, tuple(self.spin_ids))
+
 
 
 class Disp_minimise_command(Slave_command):
     """Command class for relaxation dispersion optimisation on the slave processor."""
 
+    # The data which is identical between the Monte Carlo simulations, to be held in the slave data cache.
+    cache_names = ['errors', 'missing', 'frqs', 'frqs_H', 'exp_types', 'relax_times', 'offsets', 'chemical_shifts', 'tilt_angles', 'cpmg_frqs', 'spin_lock_nu1', 'scaling_matrix']
+
     def __init__(self, spins=None, spin_ids=None, sim_index=None, scaling_matrix=None, min_algor=None, min_options=None, func_tol=None, grad_tol=None, max_iterations=None, constraints=False, verbosity=0, lower=None, upper=None, inc=None, fields=None, param_names=None):
         """Initialise the base class, storing all the master data to be sent to the slave processor.
 
@@ -610,12 +861,18 @@ class Disp_minimise_command(Slave_command):
         if spins[0].model in [MODEL_LM63, MODEL_CR72, MODEL_CR72_FULL, MODEL_M61, MODEL_TP02, MODEL_TAP03, MODEL_MP05] and not hasattr(cdp, 'spectrometer_frq'):
             raise RelaxError("The spectrometer frequency information has not been specified.")
 
+        # The compiled data set of the cluster, built once for all Monte Carlo simulations.
+        data = return_data_set(spins=spins, spin_ids=spin_ids, fields=fields, sim_index=sim_index)
+
         # The R2eff/R1rho data.
-        self.values, self.errors, self.missing, self.frqs, self.frqs_H, self.exp_types, self.relax_times = return_r2eff_arrays(spins=spins, spin_ids=spin_ids, fields=fields, field_count=len(fields), sim_index=sim_index)
+        self.values = data.return_values(sim_index=sim_index)
+        self.errors, self.missing, self.frqs, self.frqs_H, self.exp_types, self.relax_times = data.errors, data.missing, data.frqs, data.frqs_H, data.exp_types, data.relax_times
 
-        # The offset and R1 data.
+        # The offset data.
+        self.offsets, self.chemical_shifts, self.tilt_angles, self.Delta_omega, self.w_eff = data.offsets, data.chemical_shifts, data.tilt_angles, data.Delta_omega, data.w_eff
+
+        # The R1 data, randomised for the Monte Carlo simulations.
         r1_setup()
-        self.offsets, spin_lock_fields_inter, self.chemical_shifts, self.tilt_angles, self.Delta_omega, self.w_eff = return_offset_data(spins=spins, spin_ids=spin_ids, field_count=len(fields))
         self.r1 = return_r1_data(spins=spins, spin_ids=spin_ids, field_count=len(fields), sim_index=sim_index)
         self.r1_fit = is_r1_optimised(spins[0].model)
 
@@ -623,9 +880,33 @@ class Disp_minimise_command(Slave_command):
         self.param_num = param_num(spins=spins)
 
         # The dispersion data.
-        self.dispersion_points = cdp.dispersion_points
-        self.cpmg_frqs = return_cpmg_frqs(ref_flag=False)
-        self.spin_lock_nu1 = return_spin_lock_nu1(ref_flag=False)
+        self.dispersion_points = data.dispersion_points
+        self.cpmg_frqs = data.cpmg_frqs
+        self.spin_lock_nu1 = data.spin_lock_nu1
+
+
+    def cost(self):
+        """Return the relative cost of the optimisation, used for scheduling the most expensive clusters first.
+
+        @return:    The number of data points of the cluster, multiplied by the grid size for a grid search.
+        @rtype:     float
+        """
+
+        # Count the data points.
+        points = 0
+        for ei in range(len(self.missing)):
+            for si in range(len(self.missing[ei])):
+                for mi in range(len(self.missing[ei][si])):
+                    for oi in range(len(self.missing[ei][si][mi])):
+                        points += len(self.missing[ei][si][mi][oi])
+
+        # The grid search size.
+        if search('^[Gg]rid', self.min_algor):
+            for x in self.inc:
+                points *= x
+
+        # Return the cost.
+        return float(points)
 
 
     def run(self, processor, completed):
@@ -651,7 +932,17 @@ class Disp_minimise_command(Slave_command):
 
         # Grid search.
         if search('^[Gg]rid', self.min_algor):
-            results = grid(func=model.func, args=(), num_incs=self.inc, lower=self.lower, upper=self.upper, A=self.A, b=self.b, verbosity=self.verbosity)
+            # The vectorised grid search for the analytic models, followed by the back-calculation for the minimum.
+            if model.derivs is not None:
+                block_size = max(1, GRID_BLOCK_MEMORY // (model.values.size * 8 * GRID_BLOCK_ARRAYS))
+                results = grid_vectorised(func=model.calc_grid_chi2, num_incs=self.inc, lower=self.lower, upper=self.upper, A=self.A, b=self.b, block_size=block_size, verbosity=self.verbosity)
+
+                # Re-score the grid minimum with the target function, so that the chi-squared value matches the back-calculated values.
+                results = (results[0], model.func(results[0])) + tuple(results[2:])
+
+            # The point by point grid search.
+            else:
+                results = grid(func=model.func, args=(), num_incs=self.inc, lower=self.lower, upper=self.upper, A=self.A, b=self.b, verbosity=self.verbosity)
 
             # Unpack the results.
             param_vector, chi2, iter_count, warning = results
@@ -661,7 +952,7 @@ class Disp_minimise_command(Slave_command):
 
         # Minimisation.
         else:
-            results = generic_minimise(func=model.func, args=(), x0=self.param_vector, min_algor=self.min_algor, min_options=self.min_options, func_tol=self.func_tol, grad_tol=self.grad_tol, maxiter=self.max_iterations, A=self.A, b=self.b, full_output=True, print_flag=self.verbosity)
+            results = generic_minimise(func=model.func, dfunc=model.dfunc, d2func=model.d2func, args=(), x0=self.param_vector, min_algor=self.min_algor, min_options=self.min_options, func_tol=self.func_tol, grad_tol=self.grad_tol, maxiter=self.max_iterations, A=self.A, b=self.b, full_output=True, print_flag=self.verbosity)
 
             # Unpack the results.
             if results == None:
@@ -679,6 +970,130 @@ class Disp_minimise_command(Slave_command):
 
 
 
+class Disp_minimise_stacked_command(Disp_minimise_command):
+    """Command class for the lock-step relaxation dispersion optimisation of many single spin clusters on the slave processor.
+
+    The spins of the clusters are stacked along the spin dimension of the target function data structures, and all clusters are optimised together by the lock-step simplex algorithm.
+    """
+
+    def __init__(self, spins=None, spin_ids=None, sim_index=None, scaling_matrix=None, func_tol=None, max_iterations=None, constraints=False, verbosity=0, fields=None, param_names=None):
+        """Initialise the base class, storing all the master data to be sent to the slave processor.
+
+        This method is run on the master processor whereas the run() method is run on the slave processor.
+
+
+        @keyword spins:             The list of spin data containers, one per single spin cluster.  All spins must have the same model.
+        @type spins:                list of SpinContainer instances
+        @keyword spin_ids:          The list of spin ID strings corresponding to the spins argument.
+        @type spin_ids:             list of str
+        @keyword sim_index:         The index of the simulation to optimise.  This should be None if normal optimisation is desired.
+        @type sim_index:            None or int
+        @keyword scaling_matrix:    The diagonal, square scaling matrix of a single spin, identical for all clusters.
+        @type scaling_matrix:       numpy diagonal matrix
+        @keyword func_tol:          The function tolerance which, when reached, terminates optimisation of a cluster.
+        @type func_tol:             float
+        @keyword max_iterations:    The maximum number of iterations for the algorithm.
+        @type max_iterations:       int
+        @keyword constraints:       If True, constraints are used during optimisation.
+        @type constraints:          bool
+        @keyword verbosity:         The amount of information to print.  The higher the value, the greater the verbosity.
+        @type verbosity:            int
+        @keyword fields:            The list of unique of spectrometer field strengths.
+        @type fields:               int
+        @keyword param_names:       The list of parameter names of a single spin to use in printouts.
+        @type param_names:          str
+        """
+
+        # Execute the Slave_command base class __init__() method, as the cluster set up of the parent class is replaced.
+        Slave_command.__init__(self)
+
+        # Store the arguments needed by the run() method.
+        self.spins = spins
+        self.spin_ids = spin_ids
+        self.sim_index = sim_index
+        self.scaling_matrix = scaling_matrix
+        self.verbosity = verbosity
+        self.min_algor = 'simplex'
+        self.func_tol = func_tol
+        self.max_iterations = max_iterations
+        self.fields = fields
+        self.param_names = param_names
+
+        # Create the initial parameter vectors, one per cluster.
+        self.param_vector = array([assemble_param_vector(spins=[spin]) for spin in spins])
+        if len(scaling_matrix):
+            self.param_vector = dot(self.param_vector, inv(scaling_matrix))
+
+        # Linear constraints, identical for all clusters.
+        self.A, self.b = None, None
+        if constraints:
+            self.A, self.b = linear_constraints(spins=spins[:1], scaling_matrix=scaling_matrix)
+
+        # Test if the spectrometer frequencies have been set.
+        if spins[0].model in [MODEL_LM63, MODEL_CR72, MODEL_CR72_FULL, MODEL_M61, MODEL_TP02, MODEL_TAP03, MODEL_MP05] and not hasattr(cdp, 'spectrometer_frq'):
+            raise RelaxError("The spectrometer frequency information has not been specified.")
+
+        # The compiled data set of the cluster, built once for all Monte Carlo simulations.
+        data = return_data_set(spins=spins, spin_ids=spin_ids, fields=fields, sim_index=sim_index)
+
+        # The R2eff/R1rho data of all spins.
+        self.values = data.return_values(sim_index=sim_index)
+        self.errors, self.missing, self.frqs, self.frqs_H, self.exp_types, self.relax_times = data.errors, data.missing, data.frqs, data.frqs_H, data.exp_types, data.relax_times
+
+        # The offset data.
+        self.offsets, self.chemical_shifts, self.tilt_angles, self.Delta_omega, self.w_eff = data.offsets, data.chemical_shifts, data.tilt_angles, data.Delta_omega, data.w_eff
+
+        # The R1 data, randomised for the Monte Carlo simulations.
+        r1_setup()
+        self.r1 = return_r1_data(spins=spins, spin_ids=spin_ids, field_count=len(fields), sim_index=sim_index)
+        self.r1_fit = is_r1_optimised(spins[0].model)
+
+        # Parameter number of a single spin.
+        self.param_num = param_num(spins=spins[:1])
+
+        # The dispersion data.
+        self.dispersion_points = data.dispersion_points
+        self.cpmg_frqs = data.cpmg_frqs
+        self.spin_lock_nu1 = data.spin_lock_nu1
+
+
+    def run(self, processor, completed):
+        """Set up and perform the lock-step optimisation."""
+
+        # Print out.
+        if self.verbosity >= 1:
+            top = 2
+            if self.verbosity >= 2:
+                top += 2
+            subsection(file=sys.stdout, text="Lock-step fitting of the %i single spin clusters %s" % (len(self.spin_ids), self.spin_ids), prespace=top)
+
+        # Initialise the function to minimise, with the spins stacked as independent clusters.
+        model = Dispersion(model=self.spins[0].model, num_params=self.param_num, num_spins=len(self.spins), num_frq=len(self.fields), exp_types=self.exp_types, values=self.values, errors=self.errors, missing=self.missing, frqs=self.frqs, frqs_H=self.frqs_H, cpmg_frqs=self.cpmg_frqs, spin_lock_nu1=self.spin_lock_nu1, chemical_shifts=self.chemical_shifts, offset=self.offsets, tilt_angles=self.tilt_angles, r1=self.r1, relax_times=self.relax_times, scaling_matrix=self.scaling_matrix, r1_fit=self.r1_fit, stacked=True)
+
+        # Minimisation.
+        param_vector, chi2, iter_count, f_count, warning = simplex_lockstep(func=model.calc_stacked_chi2, x0=self.param_vector, func_tol=self.func_tol, max_iterations=self.max_iterations, A=self.A, b=self.b, verbosity=self.verbosity)
+
+        # The back-calculated values for the optimised parameters.
+        model.calc_stacked_chi2(param_vector)
+        back_calc = model.get_back_calc()
+
+        # Loop over the clusters.
+        results = []
+        for si in range(len(self.spins)):
+            # Optimisation printout.
+            if self.verbosity:
+                print("\nOptimised parameter values of the cluster %s:" % self.spin_ids[si])
+                for i in range(self.param_num):
+                    print("%-20s %25.15f" % (self.param_names[i], param_vector[si, i]*self.scaling_matrix[i, i]))
+
+            # The result command of the cluster, with the data of the spin extracted.
+            results.append(Disp_result_command(processor=processor, param_vector=param_vector[si], chi2=float(chi2[si]), iter_count=int(iter_count[si]), f_count=int(f_count[si]), g_count=0, h_count=0, warning=warning[si], missing=[[self.missing[ei][si]] for ei in range(len(self.missing))], back_calc=[[back_calc[ei][si]] for ei in range(len(back_calc))], completed=False))
+
+        # Create the result command object to send back to the master.
+        processor.return_object(Disp_stacked_result_command(processor=processor, memo_id=self.memo_id, results=results, completed=False))
+
+
+
 class Disp_result_command(Result_command):
     """Class for processing the dispersion optimisation results.
 
@@ -740,6 +1155,26 @@ class Disp_result_command(Result_command):
         @type memo:         memo
         """
 
+        # Switch to the data pipe of the optimisation.
+        pipe_orig = pipes.cdp_name()
+        if memo.pipe_name != pipe_orig:
+            pipes.switch(memo.pipe_name)
+
+        # Disassemble the results, switching back to the original data pipe.
+        try:
+            self.store_results(memo)
+        finally:
+            if memo.pipe_name != pipe_orig:
+                pipes.switch(pipe_orig)
+
+
+    def store_results(self, memo):
+        """Disassemble the optimisation results into the spin containers of the current data pipe.
+
+        @param memo:    The dispersion memo.
+        @type memo:     memo
+        """
+
         # Printout.
         if memo.sim_index != None:
             print("Simulation %s, cluster %s" % (memo.sim_index+1, memo.spin_ids))
@@ -819,3 +1254,82 @@ class Disp_result_command(Result_command):
 
                 # Increment the spin index.
                 si += 1
+
+
+
+class Disp_stacked_memo(Memo):
+    """The relaxation dispersion memo class for the lock-step optimisation of many single spin clusters."""
+
+    def __init__(self, memos=None):
+        """Initialise the relaxation dispersion memo class for the stacked clusters.
+
+        @keyword memos: The relaxation dispersion memos of the individual clusters.
+        @type memos:    list of Disp_memo instances
+        """
+
+        # Execute the base class __init__() method.
+        super(Disp_stacked_memo, self).__init__()
+
+        # Store the arguments.
+        self.memos = memos
+
+
+    def journal_key(self):
+        """Return the key identifying the Monte Carlo simulation of the stacked clusters in a result journal.
+
+        @return:    The simulation index and spin IDs of all clusters, or None for normal optimisation.
+        @rtype:     tuple or None
+        """
+
+        # Only journal the simulations.
+        if self.memos[0].sim_index is None:
+            return None
+
+        # The key.
+        spin_ids = []
+        for memo in self.memos:
+            spin_ids += memo.spin_ids
+        return ('relax_disp', self.memos[0].sim_index, tuple(spin_ids))
+
+
+
+class Disp_stacked_result_command(Result_command):
+    """Class for processing the lock-step dispersion optimisation results of many single spin clusters.
+
+    This object will be sent from the slave back to the master to have its run() method executed.
+    """
+
+    def __init__(self, processor=None, memo_id=None, results=None, completed=True):
+        """Set up this class object on the slave, placing the minimisation results here.
+
+        @keyword processor:     The processor object.
+        @type processor:        multi.processor.Processor instance
+        @keyword memo_id:       The memo identification string.
+        @type memo_id:          str
+        @keyword results:       The result commands of the individual clusters.
+        @type results:          list of Disp_result_command instances
+        @keyword completed:     A flag which if True signals that the optimisation successfully completed.
+        @type completed:        bool
+        """
+
+        # Execute the base class __init__() method.
+        super(Disp_stacked_result_command, self).__init__(processor=processor, completed=completed)
+
+        # Store the arguments (to be sent back to the master).
+        self.memo_id = memo_id
+        self.results = results
+        self.completed = completed
+
+
+    def run(self, processor=None, memo=None):
+        """Disassemble the optimisation results of each cluster (on the master).
+
+        @param processor:   The master processor.
+        @type processor:    Processor instance
+        @param memo:        The stacked dispersion memo, holding the memos of the individual clusters.
+        @type memo:         Disp_stacked_memo instance
+        """
+
+        # Loop over the clusters.
+        for i in range(len(self.results)):
+            self.results[i].run(processor=processor, memo=memo.memos[i])
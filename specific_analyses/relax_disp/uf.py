@@ -103,6 +103,17 @@ def cluster_ids():
     return ids
 
 
+def lockstep(flag=True):
+    """Set the flag for the lock-step optimisation of the single spin clusters.
+
+    @keyword flag:  The lock-step optimisation flag.
+    @type flag:     bool
+    """
+
+    # Simply store the value for later use.
+    cdp.lockstep = flag
+
+
 def model_setup(model, params):
     """Update various model specific data structures.
 
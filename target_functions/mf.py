@@ -24,7 +24,7 @@
 
 # Python module imports.
 from math import pi
-from numpy import dot, float64, ones, sum, transpose, zeros
+from numpy import arange, array, dot, eye, float64, moveaxis, ndarray, ones, sum, transpose, zeros
 
 # relax module imports.
 from lib.auto_relaxation.ri import calc_noe, calc_dnoe, calc_d2noe, calc_r1, calc_dr1, calc_d2r1, extract_r1, extract_dr1, extract_d2r1
@@ -34,10 +34,18 @@ from lib.diffusion.correlation_time import calc_sphere_ti, calc_sphere_dti, calc
 from lib.diffusion.direction_cosine import calc_ellipsoid_di, calc_ellipsoid_ddi, calc_ellipsoid_d2di, calc_spheroid_di, calc_spheroid_ddi, calc_spheroid_d2di
 from lib.diffusion.weights import calc_sphere_ci, calc_spheroid_ci, calc_spheroid_dci, calc_spheroid_d2ci, calc_ellipsoid_ci, calc_ellipsoid_dci, calc_ellipsoid_d2ci
 from lib.errors import RelaxError
+from lib.linear_algebra.block_arrow import block_arrow_solve
 from lib.spectral_densities.model_free import calc_jw, calc_S2_jw, calc_S2_te_jw, calc_S2f_S2_ts_jw, calc_S2f_tf_S2_ts_jw, calc_S2f_S2s_ts_jw, calc_S2f_tf_S2s_ts_jw, calc_diff_djw_dGj, calc_ellipsoid_djw_dGj, calc_diff_S2_djw_dGj, calc_ellipsoid_S2_djw_dGj, calc_diff_S2_te_djw_dGj, calc_ellipsoid_S2_te_djw_dGj, calc_diff_djw_dOj, calc_diff_S2_djw_dOj, calc_diff_S2_te_djw_dOj, calc_S2_djw_dS2, calc_S2_te_djw_dS2, calc_S2_te_djw_dte, calc_diff_S2f_S2_ts_djw_dGj, calc_ellipsoid_S2f_S2_ts_djw_dGj, calc_diff_S2f_tf_S2_ts_djw_dGj, calc_ellipsoid_S2f_tf_S2_ts_djw_dGj, calc_diff_S2f_S2_ts_djw_dOj, calc_diff_S2f_tf_S2_ts_djw_dOj, calc_S2f_S2_ts_djw_dS2, calc_S2f_S2_ts_djw_dS2f, calc_S2f_tf_S2_ts_djw_dS2f, calc_S2f_tf_S2_ts_djw_dtf, calc_S2f_S2_ts_djw_dts, calc_diff_S2f_S2s_ts_djw_dGj, calc_ellipsoid_S2f_S2s_ts_djw_dGj, calc_diff_S2f_tf_S2s_ts_djw_dGj, calc_ellipsoid_S2f_tf_S2s_ts_djw_dGj, calc_diff_S2f_S2s_ts_djw_dOj, calc_diff_S2f_tf_S2s_ts_djw_dOj, calc_S2f_S2s_ts_djw_dS2f, calc_S2f_tf_S2s_ts_djw_dS2f, calc_S2f_tf_S2s_ts_djw_dS2s, calc_S2f_tf_S2s_ts_djw_dtf, calc_S2f_S2s_ts_djw_dts, calc_diff_d2jw_dGjdGk, calc_ellipsoid_d2jw_dGjdGk, calc_diff_S2_d2jw_dGjdGk, calc_ellipsoid_S2_d2jw_dGjdGk, calc_diff_S2_te_d2jw_dGjdGk, calc_ellipsoid_S2_te_d2jw_dGjdGk, calc_diff_d2jw_dGjdOj, calc_ellipsoid_d2jw_dGjdOj, calc_diff_S2_d2jw_dGjdOj, calc_ellipsoid_S2_d2jw_dGjdOj, calc_diff_S2_te_d2jw_dGjdOj, calc_ellipsoid_S2_te_d2jw_dGjdOj, calc_diff_S2_d2jw_dGjdS2, calc_ellipsoid_S2_d2jw_dGjdS2, calc_diff_S2_te_d2jw_dGjdS2, calc_ellipsoid_S2_te_d2jw_dGjdS2, calc_diff_S2_te_d2jw_dGjdte, calc_ellipsoid_S2_te_d2jw_dGjdte, calc_diff_d2jw_dOjdOk, calc_diff_S2_d2jw_dOjdOk, calc_diff_S2_te_d2jw_dOjdOk, calc_diff_S2_d2jw_dOjdS2, calc_diff_S2_te_d2jw_dOjdS2, calc_diff_S2_te_d2jw_dOjdte, calc_S2_te_d2jw_dS2dte, calc_S2_te_d2jw_dte2, calc_diff_S2f_S2_ts_d2jw_dGjdGk, calc_ellipsoid_S2f_S2_ts_d2jw_dGjdGk, calc_diff_S2f_tf_S2_ts_d2jw_dGjdGk, calc_ellipsoid_S2f_tf_S2_ts_d2jw_dGjdGk, calc_diff_S2f_S2_ts_d2jw_dGjdOj, calc_ellipsoid_S2f_S2_ts_d2jw_dGjdOj, calc_diff_S2f_tf_S2_ts_d2jw_dGjdOj, calc_ellipsoid_S2f_tf_S2_ts_d2jw_dGjdOj, calc_diff_S2f_S2_ts_d2jw_dGjdS2, calc_ellipsoid_S2f_S2_ts_d2jw_dGjdS2, calc_diff_S2f_S2_ts_d2jw_dGjdS2f, calc_ellipsoid_S2f_S2_ts_d2jw_dGjdS2f, calc_diff_S2f_tf_S2_ts_d2jw_dGjdS2f, calc_ellipsoid_S2f_tf_S2_ts_d2jw_dGjdS2f, calc_diff_S2f_tf_S2_ts_d2jw_dGjdtf, calc_ellipsoid_S2f_tf_S2_ts_d2jw_dGjdtf, calc_diff_S2f_S2_ts_d2jw_dGjdts, calc_ellipsoid_S2f_S2_ts_d2jw_dGjdts, calc_diff_S2f_S2_ts_d2jw_dOjdOk, calc_diff_S2f_tf_S2_ts_d2jw_dOjdOk, calc_diff_S2f_S2_ts_d2jw_dOjdS2, calc_diff_S2f_S2_ts_d2jw_dOjdS2f, calc_diff_S2f_tf_S2_ts_d2jw_dOjdS2f, calc_diff_S2f_tf_S2_ts_d2jw_dOjdtf, calc_diff_S2f_S2_ts_d2jw_dOjdts, calc_S2f_S2_ts_d2jw_dS2dts, calc_S2f_tf_S2_ts_d2jw_dS2fdtf, calc_S2f_S2_ts_d2jw_dS2fdts, calc_S2f_tf_S2_ts_d2jw_dtf2, calc_S2f_S2_ts_d2jw_dts2, calc_diff_S2f_S2s_ts_d2jw_dGjdGk, calc_ellipsoid_S2f_S2s_ts_d2jw_dGjdGk, calc_diff_S2f_tf_S2s_ts_d2jw_dGjdGk, calc_ellipsoid_S2f_tf_S2s_ts_d2jw_dGjdGk, calc_diff_S2f_S2s_ts_d2jw_dGjdOj, calc_ellipsoid_S2f_S2s_ts_d2jw_dGjdOj, calc_diff_S2f_tf_S2s_ts_d2jw_dGjdOj, calc_ellipsoid_S2f_tf_S2s_ts_d2jw_dGjdOj, calc_diff_S2f_S2s_ts_d2jw_dGjdS2f, calc_ellipsoid_S2f_S2s_ts_d2jw_dGjdS2f, calc_diff_S2f_tf_S2s_ts_d2jw_dGjdS2f, calc_ellipsoid_S2f_tf_S2s_ts_d2jw_dGjdS2f, calc_diff_S2f_S2s_ts_d2jw_dGjdS2s, calc_ellipsoid_S2f_S2s_ts_d2jw_dGjdS2s, calc_diff_S2f_tf_S2s_ts_d2jw_dGjdtf, calc_ellipsoid_S2f_tf_S2s_ts_d2jw_dGjdtf, calc_diff_S2f_S2s_ts_d2jw_dGjdts, calc_ellipsoid_S2f_S2s_ts_d2jw_dGjdts, calc_diff_S2f_S2s_ts_d2jw_dOjdOk, calc_diff_S2f_tf_S2s_ts_d2jw_dOjdOk, calc_diff_S2f_S2s_ts_d2jw_dOjdS2f, calc_diff_S2f_tf_S2s_ts_d2jw_dOjdS2f, calc_diff_S2f_tf_S2s_ts_d2jw_dOjdtf, calc_diff_S2f_S2s_ts_d2jw_dOjdts, calc_S2f_S2s_ts_d2jw_dS2fdS2s, calc_S2f_tf_S2s_ts_d2jw_dS2fdtf, calc_S2f_S2s_ts_d2jw_dS2fdts, calc_S2f_S2s_ts_d2jw_dS2sdts, calc_S2f_tf_S2s_ts_d2jw_dtf2, calc_S2f_S2s_ts_d2jw_dts2
 from lib.spectral_densities.model_free_components import calc_S2_te_jw_comps, calc_S2f_S2_ts_jw_comps, calc_S2f_S2s_ts_jw_comps, calc_S2f_tf_S2_ts_jw_comps, calc_S2f_tf_S2s_ts_jw_comps, calc_diff_djw_comps, calc_S2_te_djw_comps, calc_diff_S2_te_djw_comps, calc_S2f_S2_ts_djw_comps, calc_diff_S2f_S2_ts_djw_comps, calc_S2f_tf_S2_ts_djw_comps, calc_diff_S2f_tf_S2_ts_djw_comps, calc_S2f_S2s_ts_djw_comps, calc_diff_S2f_S2s_ts_djw_comps, calc_S2f_tf_S2s_ts_djw_comps, calc_diff_S2f_tf_S2s_ts_djw_comps
 from target_functions.chi2 import chi2, dchi2_element, d2chi2_element
 
+# The caches of the spin specific data which is independent of the model-free model, shared by the target functions of all models of the same spin.
+FIXED_DIFF_CACHE = {}
+FRQ_CACHE = {}
+
+# The maximum number of entries in each cache, after which the cache is emptied.
+CACHE_SIZE = 10000
+
 
 class Mf:
     def __init__(self, init_params=None, model_type=None, diff_type=None, diff_params=None, scaling_matrix=None, num_spins=None, equations=None, param_types=None, param_values=None, relax_data=None, errors=None, bond_length=None, csa=None, num_frq=0, frq=None, num_ri=None, remap_table=None, noe_r1_table=None, ri_labels=None, gx=0, gh=0, h_bar=0, mu0=0, num_params=None, vectors=None):
@@ -255,20 +263,7 @@ class Mf:
             self.data[i].num_indices = self.diff_data.num_indices
 
             # Calculate the five frequencies per field strength which cause R1, R2, and NOE relaxation.
-            self.data[i].frq_list = zeros((num_frq[i], 5), float64)
-            self.data[i].frq_list_ext = zeros((num_frq[i], 5, self.diff_data.num_indices), float64)
-            self.data[i].frq_sqrd_list_ext = zeros((num_frq[i], 5, self.diff_data.num_indices), float64)
-            for j in range(num_frq[i]):
-                frqH = 2.0 * pi * frq[i][j]
-                frqX = frqH / g_ratio
-                self.data[i].frq_list[j, 1] = frqX
-                self.data[i].frq_list[j, 2] = frqH - frqX
-                self.data[i].frq_list[j, 3] = frqH
-                self.data[i].frq_list[j, 4] = frqH + frqX
-            self.data[i].frq_sqrd_list = self.data[i].frq_list ** 2
-            for j in range(self.diff_data.num_indices):
-                self.data[i].frq_list_ext[:,:, j] = self.data[i].frq_list
-                self.data[i].frq_sqrd_list_ext[:,:, j] = self.data[i].frq_sqrd_list
+            self.init_frq_data(self.data[i], frq[i], g_ratio)
 
             # Store supplied data in self.data
             self.data[i].gh = gh[i]
@@ -323,12 +318,15 @@ class Mf:
             elif self.model_type == 'diff' or self.model_type == 'all':
                 self.diff_data.params = self.params[0:self.diff_end_index]
 
-            # Calculate the correlation times ti.
-            self.diff_data.calc_ti(self.data[i], self.diff_data)
+            # The fixed diffusion tensor components, shared by all model-free models of the spin.
+            if self.model_type == 'mf':
+                self.init_fixed_diff_data(self.data[i], self.diff_data)
 
-            # ti spectral density components.
-            self.data[i].w_ti_sqrd = self.data[i].frq_sqrd_list_ext * self.data[i].ti ** 2
-            self.data[i].fact_ti = 1.0 / (1.0 + self.data[i].w_ti_sqrd)
+            # Otherwise calculate the initial correlation times ti and the ti spectral density components.
+            else:
+                self.diff_data.calc_ti(self.data[i], self.diff_data)
+                self.data[i].w_ti_sqrd = self.data[i].frq_sqrd_list_ext * self.data[i].ti ** 2
+                self.data[i].fact_ti = 1.0 / (1.0 + self.data[i].w_ti_sqrd)
 
             # Initialise the R1 data class.  This is used only if an NOE data set is collected but the R1 data of the same frequency has not.
             missing_r1 = 0
@@ -338,6 +336,10 @@ class Mf:
             if missing_r1:
                 self.init_res_r1_data(self.data[i])
 
+        # Stack the data of the spins sharing the same model-free model for the optimisation of the diffusion tensor.
+        if self.model_type == 'diff' or self.model_type == 'all':
+            self.init_stacked_data()
+
         # Scaling initialisation.
         if self.scaling_matrix is not None:
             self.scaling_flag = 1
@@ -396,17 +398,7 @@ class Mf:
         if self.scaling_flag:
             params = dot(params, self.scaling_matrix)
 
-        # Direction cosine calculations.
-        if self.diff_data.calc_di:
-            self.diff_data.calc_di(data, self.diff_data)
-
-        # Diffusion tensor weight calculations.
-        self.diff_data.calc_ci(data, self.diff_data)
-
-        # Diffusion tensor correlation times.
-        self.diff_data.calc_ti(data, self.diff_data)
-
-        # Calculate the components of the spectral densities.
+        # Calculate the components of the spectral densities (the fixed diffusion tensor components are pre-calculated).
         if data.calc_jw_comps:
             data.calc_jw_comps(data, params)
 
@@ -505,10 +497,8 @@ class Mf:
         # Set the total chi2 to zero.
         self.total_chi2 = 0.0
 
-        # Loop over the residues.
-        for i in range(self.num_spins):
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_di:
@@ -546,8 +536,8 @@ class Mf:
             # Calculate the chi-squared value.
             data.chi2 = chi2(data.relax_data, data.ri, data.errors)
 
-            # Add the residue specific chi2 to the total chi2.
-            self.total_chi2 = self.total_chi2 + data.chi2
+            # Add the residue specific chi2 values to the total chi2.
+            self.total_chi2 = self.total_chi2 + sum(data.chi2)
 
         return self.total_chi2
 
@@ -572,10 +562,8 @@ class Mf:
         # Set the total chi2 to zero.
         self.total_chi2 = 0.0
 
-        # Loop over the residues.
-        for i in range(self.num_spins):
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_di:
@@ -613,8 +601,8 @@ class Mf:
             # Calculate the chi-squared value.
             data.chi2 = chi2(data.relax_data, data.ri, data.errors)
 
-            # Add the residue specific chi2 to the total chi2.
-            self.total_chi2 = self.total_chi2 + data.chi2
+            # Add the residue specific chi2 values to the total chi2.
+            self.total_chi2 = self.total_chi2 + sum(data.chi2)
 
         return self.total_chi2
 
@@ -759,11 +747,8 @@ class Mf:
         # Set the total chi2 gradient to zero.
         self.total_dchi2 = self.total_dchi2 * 0.0
 
-        # Loop over the residues.
-        for i in range(self.num_spins):
-
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_ddi:
@@ -798,7 +783,7 @@ class Mf:
                 data.dri[j] = data.dri_prime[j]
                 for m in range(data.num_ri):
                     if data.create_dri[m]:
-                        data.create_dri[m](data, m, data.remap_table[m], data.get_dr1, params, j)
+                        data.create_dri[m](data, m, data.remap_table[m], data.get_dr1, data.param_values, j)
 
                 # Calculate the chi-squared gradient.
                 data.dchi2[j] = dchi2_element(data.relax_data, data.ri, data.dri[j], data.errors)
@@ -807,7 +792,7 @@ class Mf:
             index = self.diff_data.num_params
 
             # Diffusion parameter part of the global generic model-free gradient.
-            self.total_dchi2[0:index] = self.total_dchi2[0:index] + data.dchi2[0:index]
+            self.total_dchi2[0:index] = self.total_dchi2[0:index] + sum(data.dchi2[0:index], axis=1)
 
         # Diagonal scaling.
         if self.scaling_flag:
@@ -841,10 +826,8 @@ class Mf:
         # Set the total chi2 gradient to zero.
         self.total_dchi2 = self.total_dchi2 * 0.0
 
-        # Loop over the residues.
-        for i in range(self.num_spins):
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_ddi:
@@ -888,10 +871,10 @@ class Mf:
             index = self.diff_data.num_params
 
             # Diffusion parameter part of the global generic model-free gradient.
-            self.total_dchi2[0:index] = self.total_dchi2[0:index] + data.dchi2[0:index]
+            self.total_dchi2[0:index] = self.total_dchi2[0:index] + sum(data.dchi2[0:index], axis=1)
 
             # Model-free parameter part of the global generic model-free gradient.
-            self.total_dchi2[data.start_index:data.end_index] = self.total_dchi2[data.start_index:data.end_index] + data.dchi2[index:]
+            self.total_dchi2[data.mf_indices] = self.total_dchi2[data.mf_indices] + data.dchi2[index:]
 
         # Diagonal scaling.
         if self.scaling_flag:
@@ -1025,10 +1008,8 @@ class Mf:
         # Set the total chi2 Hessian to zero.
         self.total_d2chi2 = self.total_d2chi2 * 0.0
 
-        # Loop over the residues.
-        for i in range(self.num_spins):
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_d2di:
@@ -1062,13 +1043,13 @@ class Mf:
                     data.d2ri[j, k] = data.d2ri_prime[j, k]
                     for m in range(data.num_ri):
                         if data.create_d2ri[m]:
-                            data.create_d2ri[m](data, m, data.remap_table[m], data.get_d2r1, params, j, k)
+                            data.create_d2ri[m](data, m, data.remap_table[m], data.get_d2r1, data.param_values, j, k)
 
                     # Calculate the chi-squared Hessian.
                     data.d2chi2[j, k] = data.d2chi2[k, j] = d2chi2_element(data.relax_data, data.ri, data.dri[j], data.dri[k], data.d2ri[j, k], data.errors)
 
             # Pure diffusion parameter part of the global generic model-free Hessian.
-            self.total_d2chi2 = self.total_d2chi2 + data.d2chi2
+            self.total_d2chi2 = self.total_d2chi2 + sum(data.d2chi2, axis=2)
 
         # Diagonal scaling.
         if self.scaling_flag:
@@ -1085,6 +1066,49 @@ class Mf:
         parameters.
         """
 
+        # Calculate the Hessian blocks of the groups of spins.
+        self.d2func_all_blocks(params)
+
+        # Set the total chi2 Hessian to zero.
+        self.total_d2chi2 = self.total_d2chi2 * 0.0
+
+        # Loop over the groups of spins.
+        for data in self.stacked_data:
+            # Index for the construction of the global generic model-free Hessian.
+            index = self.diff_data.num_params
+
+            # Pure diffusion parameter part of the global generic model-free Hessian.
+            self.total_d2chi2[0:index, 0:index] = self.total_d2chi2[0:index, 0:index] + sum(data.d2chi2[0:index, 0:index], axis=2)
+
+            # The model-free and diffusion parameter row and column indices, broadcast to the [param, param, spin] blocks.
+            mf_rows = data.mf_indices[:, None]
+            mf_cols = data.mf_indices[None, :]
+            diff_rows = arange(index)[:, None, None]
+            diff_cols = arange(index)[None, :, None]
+
+            # Pure model-free parameter part of the global generic model-free Hessian.
+            self.total_d2chi2[mf_rows, mf_cols] = self.total_d2chi2[mf_rows, mf_cols] + data.d2chi2[index:, index:]
+
+            # Off diagonal diffusion and model-free parameter parts of the global generic model-free Hessian.
+            self.total_d2chi2[diff_rows, mf_cols] = self.total_d2chi2[diff_rows, mf_cols] + data.d2chi2[0:index, index:]
+            self.total_d2chi2[mf_rows, diff_cols] = self.total_d2chi2[mf_rows, diff_cols] + data.d2chi2[index:, 0:index]
+
+        # Diagonal scaling.
+        if self.scaling_flag:
+            self.total_d2chi2 = dot(self.scaling_matrix, dot(self.total_d2chi2, self.scaling_matrix))
+
+        # Return a copy of the Hessian.
+        return self.total_d2chi2 * 1.0
+
+
+    def d2func_all_blocks(self, params):
+        """Function for calculating the chi-squared Hessian blocks of each group of spins.
+
+        Used in the minimisation of diffusion tensor parameters together with all model-free
+        parameters.  The unscaled Hessians are left in the d2chi2 structures of the stacked data
+        containers.
+        """
+
         # Test if the gradient has already been called, otherwise run self.dfunc.
         if sum(params == self.grad_test) != self.total_num_params:
             self.dfunc(params)
@@ -1096,13 +1120,8 @@ class Mf:
         # Diffusion tensor parameters.
         self.diff_data.params = params[0:self.diff_end_index]
 
-        # Set the total chi2 Hessian to zero.
-        self.total_d2chi2 = self.total_d2chi2 * 0.0
-
-        # Loop over the residues.
-        for i in range(self.num_spins):
-            # Set self.data[i] to data.
-            data = self.data[i]
+        # Loop over the groups of spins, all spins of a group being handled at once.
+        for data in self.stacked_data:
 
             # Direction cosine calculations.
             if self.diff_data.calc_d2di:
@@ -1141,26 +1160,6 @@ class Mf:
                     # Calculate the chi-squared Hessian.
                     data.d2chi2[j, k] = data.d2chi2[k, j] = d2chi2_element(data.relax_data, data.ri, data.dri[j], data.dri[k], data.d2ri[j, k], data.errors)
 
-            # Index for the construction of the global generic model-free Hessian.
-            index = self.diff_data.num_params
-
-            # Pure diffusion parameter part of the global generic model-free Hessian.
-            self.total_d2chi2[0:index, 0:index] = self.total_d2chi2[0:index, 0:index] + data.d2chi2[0:index, 0:index]
-
-            # Pure model-free parameter part of the global generic model-free Hessian.
-            self.total_d2chi2[data.start_index:data.end_index, data.start_index:data.end_index] = self.total_d2chi2[data.start_index:data.end_index, data.start_index:data.end_index] + data.d2chi2[index:, index:]
-
-            # Off diagonal diffusion and model-free parameter parts of the global generic model-free Hessian.
-            self.total_d2chi2[0:index, data.start_index:data.end_index] = self.total_d2chi2[0:index, data.start_index:data.end_index] + data.d2chi2[0:index, index:]
-            self.total_d2chi2[data.start_index:data.end_index, 0:index] = self.total_d2chi2[data.start_index:data.end_index, 0:index] + data.d2chi2[index:, 0:index]
-
-        # Diagonal scaling.
-        if self.scaling_flag:
-            self.total_d2chi2 = dot(self.scaling_matrix, dot(self.total_d2chi2, self.scaling_matrix))
-
-        # Return a copy of the Hessian.
-        return self.total_d2chi2 * 1.0
-
 
     def calc_ri(self):
         """Function for calculating relaxation values."""
@@ -1298,6 +1297,101 @@ class Mf:
             diff_data.d2dz_dgamma2 = zeros(3, float64)
 
 
+    def init_fixed_diff_data(self, data, diff_data):
+        """Initialise the components of a spin which only depend on the fixed diffusion tensor.
+
+        For the 'mf' model type, the direction cosines, weights, correlation times, and ti spectral density components are independent of the model-free model.  These are calculated once and cached, so that the target functions for the other models of the same spin can reuse them.
+
+
+        @param data:        The spin specific data, with the frequency data and XH unit vector set up.
+        @type data:         Data instance
+        @param diff_data:   The diffusion tensor data.
+        @type diff_data:    Data instance
+        """
+
+        # The cache key.
+        vector = None
+        if data.xh_unit_vector is not None:
+            vector = tuple(data.xh_unit_vector)
+        key = (diff_data.type, tuple(diff_data.params), vector, data.frq_key)
+
+        # Calculate and store the components.
+        if key not in FIXED_DIFF_CACHE:
+            # Direction cosine calculations.
+            if diff_data.calc_di:
+                diff_data.calc_di(data, diff_data)
+
+            # Diffusion tensor weight calculations.
+            diff_data.calc_ci(data, diff_data)
+
+            # Diffusion tensor correlation times.
+            diff_data.calc_ti(data, diff_data)
+
+            # ti spectral density components.
+            data.w_ti_sqrd = data.frq_sqrd_list_ext * data.ti ** 2
+            data.fact_ti = 1.0 / (1.0 + data.w_ti_sqrd)
+
+            # Store copies, as the target function modifies some of these in place.
+            if len(FIXED_DIFF_CACHE) >= CACHE_SIZE:
+                FIXED_DIFF_CACHE.clear()
+            FIXED_DIFF_CACHE[key] = [data.ci * 1.0, data.ti * 1.0, data.w_ti_sqrd * 1.0, data.fact_ti * 1.0]
+            return
+
+        # Copy the cached components.
+        ci, ti, w_ti_sqrd, fact_ti = FIXED_DIFF_CACHE[key]
+        data.ci = ci * 1.0
+        data.ti = ti * 1.0
+        data.w_ti_sqrd = w_ti_sqrd * 1.0
+        data.fact_ti = fact_ti * 1.0
+
+
+    def init_frq_data(self, data, frq, g_ratio):
+        """Initialise the five frequencies per field strength which cause R1, R2, and NOE relaxation.
+
+        The frequencies, their squares, and their extension over the diffusion tensor indices are cached, so that the target functions for the other models of the same spin can reuse them.
+
+
+        @param data:        The spin specific data.
+        @type data:         Data instance
+        @param frq:         The proton frequencies of the relaxation data, in Hz.
+        @type frq:          list of float
+        @param g_ratio:     The ratio of the proton to heteronucleus gyromagnetic ratios.
+        @type g_ratio:      float
+        """
+
+        # The cache key.
+        data.frq_key = (tuple(frq), g_ratio, self.diff_data.num_indices)
+
+        # Calculate and store the frequencies.
+        if data.frq_key not in FRQ_CACHE:
+            frq_list = zeros((len(frq), 5), float64)
+            frq_list_ext = zeros((len(frq), 5, self.diff_data.num_indices), float64)
+            frq_sqrd_list_ext = zeros((len(frq), 5, self.diff_data.num_indices), float64)
+            for j in range(len(frq)):
+                frqH = 2.0 * pi * frq[j]
+                frqX = frqH / g_ratio
+                frq_list[j, 1] = frqX
+                frq_list[j, 2] = frqH - frqX
+                frq_list[j, 3] = frqH
+                frq_list[j, 4] = frqH + frqX
+            frq_sqrd_list = frq_list ** 2
+            for j in range(self.diff_data.num_indices):
+                frq_list_ext[:,:, j] = frq_list
+                frq_sqrd_list_ext[:,:, j] = frq_sqrd_list
+
+            # Store the frequencies.
+            if len(FRQ_CACHE) >= CACHE_SIZE:
+                FRQ_CACHE.clear()
+            FRQ_CACHE[data.frq_key] = [frq_list, frq_list_ext, frq_sqrd_list, frq_sqrd_list_ext]
+
+        # Copy the cached frequencies.
+        frq_list, frq_list_ext, frq_sqrd_list, frq_sqrd_list_ext = FRQ_CACHE[data.frq_key]
+        data.frq_list = frq_list * 1.0
+        data.frq_list_ext = frq_list_ext * 1.0
+        data.frq_sqrd_list = frq_sqrd_list * 1.0
+        data.frq_sqrd_list_ext = frq_sqrd_list_ext * 1.0
+
+
     def init_res_data(self, data, diff_data):
         """Function for the initialisation of the residue specific data."""
 
@@ -1486,6 +1580,52 @@ class Mf:
         data.r1_data = r1_data
 
 
+    def init_stacked_data(self):
+        """Function for grouping the spins and stacking the residue specific data of each group.
+
+        The spins sharing the same model-free model, relaxation data structure and nuclei are placed into a single group.  The residue specific data of all spins of the group are then stacked along a final spin axis, so that the target functions, gradients, and Hessians of all spins of the group are calculated by a single set of numpy operations.
+        """
+
+        # Group the spins.
+        groups = {}
+        self.stacked_data = []
+        ri_index = 0
+        for i in range(self.num_spins):
+            # Alias.
+            data = self.data[i]
+
+            # The signature of the model and data.
+            key = (data.equations, tuple(data.param_types), tuple(data.frq), tuple(data.ri_labels), tuple(data.remap_table), tuple(data.noe_r1_table), data.gh, data.gx, data.xh_unit_vector is None, hasattr(data, 'r1_data'))
+
+            # A new group.
+            if key not in groups:
+                groups[key] = [[], []]
+                self.stacked_data.append(groups[key])
+
+            # Add the spin and the index of its first relaxation data point in the total Ri gradient.
+            groups[key][0].append(data)
+            groups[key][1].append(ri_index)
+            ri_index = ri_index + data.num_ri
+
+        # Stack the data of each group.
+        for i in range(len(self.stacked_data)):
+            spins, ri_indices = self.stacked_data[i]
+            stack = self.stack_res_data(spins)
+
+            # The vectors of the spins.
+            if stack.xh_unit_vector is not None:
+                stack.xh_unit_vector = array([data.xh_unit_vector for data in spins], float64)
+
+            # The model-free parameter indices [param, spin] for constructing the global generic model-free gradient and Hessian kite.
+            stack.mf_indices = stack.start_index + arange(stack.num_params)[:, None]
+
+            # The relaxation data indices [ri, spin] for constructing the total Ri gradient.
+            stack.ri_indices = array(ri_indices) + arange(stack.num_ri)[:, None]
+
+            # Store the stacked data.
+            self.stacked_data[i] = stack
+
+
     def lm_dri(self):
         """Return the function used for Levenberg-Marquardt minimisation."""
 
@@ -1496,23 +1636,10 @@ class Mf:
             # Set the total dri gradient to zero.
             self.total_dri = self.total_dri * 0.0
 
-            # Ri indices.
-            ri_start_index = 0
-            ri_end_index = 0
-
-            # Loop over the residues.
-            for i in range(self.num_spins):
-                # Set self.data[i] to data.
-                data = self.data[i]
-
-                # Increment Ri end index.
-                ri_end_index = ri_end_index + data.num_ri
-
+            # Loop over the groups of spins.
+            for data in self.stacked_data:
                 # Diffusion parameter part of the global generic model-free gradient.
-                self.total_dri[0:self.diff_data.num_params, ri_start_index:ri_end_index] = self.total_dri[0:self.diff_data.num_params, ri_start_index:ri_end_index] + data.dri[0:self.diff_data.num_params]
-
-                # Increment Ri start index.
-                ri_start_index = ri_start_index + data.num_ri
+                self.total_dri[0:self.diff_data.num_params, data.ri_indices] = self.total_dri[0:self.diff_data.num_params, data.ri_indices] + data.dri[0:self.diff_data.num_params]
 
             # dri.
             dri = self.total_dri
@@ -1521,26 +1648,17 @@ class Mf:
             # Set the total dri gradient to zero.
             self.total_dri = self.total_dri * 0.0
 
-            # Ri indices.
-            ri_start_index = 0
-            ri_end_index = 0
-
-            # Loop over the residues.
-            for i in range(self.num_spins):
-                # Set self.data[i] to data.
-                data = self.data[i]
-
-                # Increment Ri end index.
-                ri_end_index = ri_end_index + data.num_ri
+            # Loop over the groups of spins.
+            for data in self.stacked_data:
+                # The model-free parameter [param, 1, spin] and Ri [1, ri, spin] indices.
+                mf_rows = data.mf_indices[:, None]
+                ri_cols = data.ri_indices[None, :]
 
                 # Diffusion parameter part of the global generic model-free gradient.
-                self.total_dri[0:self.diff_data.num_params, ri_start_index:ri_end_index] = self.total_dri[0:self.diff_data.num_params, ri_start_index:ri_end_index] + data.dri[0:self.diff_data.num_params]
+                self.total_dri[0:self.diff_data.num_params, data.ri_indices] = self.total_dri[0:self.diff_data.num_params, data.ri_indices] + data.dri[0:self.diff_data.num_params]
 
                 # Model-free parameter part of the global generic model-free gradient.
-                self.total_dri[data.start_index:data.end_index, ri_start_index:ri_end_index] = self.total_dri[data.start_index:data.end_index, ri_start_index:ri_end_index] + data.dri[self.diff_data.num_params:]
-
-                # Increment Ri start index.
-                ri_start_index = ri_start_index + data.num_ri
+                self.total_dri[mf_rows, ri_cols] = self.total_dri[mf_rows, ri_cols] + data.dri[self.diff_data.num_params:]
 
             # dri.
             dri = self.total_dri
@@ -1556,6 +1674,74 @@ class Mf:
         return dri
 
 
+    def newton_step_all(self, params, shift=0.0):
+        """Calculate the Newton step for the 'all' model type without building the full Hessian.
+
+        The Hessian has a block-arrow structure, as the model-free parameters of each spin only
+        couple to themselves and to the diffusion tensor parameters.  The Newton equations are
+        therefore solved via the Schur complement of the per-spin blocks.
+
+
+        @param params:  The scaled parameter vector.
+        @type params:   numpy rank-1 array
+        @keyword shift: A value added to the diagonal of the scaled Hessian, used to force a descent direction.
+        @type shift:    float
+        @return:        The Newton step in the scaled parameter space.
+        @rtype:         numpy rank-1 array
+        """
+
+        # Check the model type.
+        if self.model_type != 'all':
+            raise RelaxError("The block-arrow Newton step is only available for the 'all' model type.")
+
+        # The gradient and the Hessian blocks of the groups of spins.
+        grad = self.dfunc(params)
+        self.d2func_all_blocks(params)
+
+        # The diagonal scaling factors.
+        if self.scaling_flag:
+            scale = self.scaling_matrix.diagonal()
+        else:
+            scale = ones(self.total_num_params, float64)
+
+        # The diffusion parameter block.
+        index = self.diff_data.num_params
+        diff_scale = scale[0:index]
+        A = shift * eye(index)
+
+        # Loop over the groups of spins, collecting the [spin, param, param] blocks.
+        B = []
+        C = []
+        c = []
+        for data in self.stacked_data:
+            # The scaling factors of the model-free parameters [param, spin].
+            mf_scale = scale[data.mf_indices]
+
+            # The diffusion tensor parameter block.
+            A = A + diff_scale[:, None] * sum(data.d2chi2[0:index, 0:index], axis=2) * diff_scale[None, :]
+
+            # The off diagonal diffusion and model-free parameter blocks.
+            B.append(moveaxis(mf_scale[:, None] * data.d2chi2[index:, 0:index] * diff_scale[None, :, None], -1, 0))
+
+            # The model-free parameter blocks.
+            C.append(moveaxis(mf_scale[:, None] * data.d2chi2[index:, index:] * mf_scale[None, :], -1, 0) + shift * eye(data.num_params))
+
+            # The negative model-free parameter gradient.
+            c.append(-transpose(grad[data.mf_indices]))
+
+        # Solve the Newton equations.
+        x, y = block_arrow_solve(A=A, B=B, C=C, a=-grad[0:index], c=c)
+
+        # Assemble the step.
+        step = zeros(self.total_num_params, float64)
+        step[0:index] = x
+        for i in range(len(self.stacked_data)):
+            step[self.stacked_data[i].mf_indices] = transpose(y[i])
+
+        # Return the step.
+        return step
+
+
     def setup_equations(self, data):
         """Setup all the residue specific equations."""
 
@@ -2976,6 +3162,44 @@ class Mf:
         return 1
 
 
+    def stack_res_data(self, spins):
+        """Stack the residue specific data of a group of spins along a final spin axis.
+
+        The numeric data, the parameter indices, and the start and end indices are stacked.  The arrays which only depend on the diffusion tensor and field strengths receive a final axis of size one, and the equations, function arrays, and sizes are shared by all spins of the group.
+
+
+        @param spins:   The residue specific data of the spins of the group.
+        @type spins:    list of Data instances
+        @return:        The stacked data.
+        @rtype:         Data instance
+        """
+
+        # The spin independent arrays, and the shared model-free parameter values.
+        unit_axis = ['d2ti', 'dti', 'frq_list', 'frq_list_ext', 'frq_sqrd_list', 'frq_sqrd_list_ext', 'tau_comps', 'tau_comps_cubed', 'tau_comps_sqrd', 'tau_scale', 'ti']
+        shared = ['param_values', 'xh_unit_vector']
+
+        # Loop over the data.
+        stack = Data()
+        for name, value in vars(spins[0]).items():
+            # The R1 data class.
+            if isinstance(value, Data):
+                value = self.stack_res_data([getattr(data, name) for data in spins])
+
+            # Spin independent arrays.
+            elif name in unit_axis:
+                value = value[..., None] * 1.0
+
+            # Stacked numeric data and indices.
+            elif name not in shared and (isinstance(value, (float, ndarray)) or (isinstance(value, int) and (name[-2:] == '_i' or name in ['start_index', 'end_index']))):
+                value = moveaxis(array([getattr(data, name) for data in spins]), 0, -1) * 1
+
+            # Store the value.
+            setattr(stack, name, value)
+
+        # Return the stacked data.
+        return stack
+
+
 class Data:
     def __init__(self):
         """Empty container for storing data."""
@@ -25,20 +25,22 @@
 """Target functions for relaxation dispersion."""
 
 # Python module imports.
-from copy import deepcopy
-from numpy import all, arctan2, cos, dot, float64, int16, isfinite, max, multiply, ones, rollaxis, pi, sin, sum, zeros
+from copy import copy, deepcopy
+from numpy import add, all, arange, array_equal, arctan2, cos, dot, errstate, float64, full, int16, isfinite, max, multiply, ndarray, nonzero, ones, rollaxis, pi, sin, sum, where, zeros
+from types import MethodType
 from numpy.ma import masked_equal
 
 # relax module imports.
-from lib.dispersion.b14 import r2eff_B14
-from lib.dispersion.cr72 import r2eff_CR72
-from lib.dispersion.dpl94 import r1rho_DPL94
+from lib.dispersion.b14 import r2eff_B14, r2eff_B14_derivs
+from lib.dispersion.cr72 import r2eff_CR72, r2eff_CR72_derivs
+from lib.dispersion.derivatives import variable
+from lib.dispersion.dpl94 import r1rho_DPL94, r1rho_DPL94_derivs
 from lib.dispersion.it99 import r2eff_IT99
-from lib.dispersion.lm63 import r2eff_LM63
-from lib.dispersion.lm63_3site import r2eff_LM63_3site
-from lib.dispersion.m61 import r1rho_M61
-from lib.dispersion.m61b import r1rho_M61b
-from lib.dispersion.mp05 import r1rho_MP05
+from lib.dispersion.lm63 import r2eff_LM63, r2eff_LM63_derivs
+from lib.dispersion.lm63_3site import r2eff_LM63_3site, r2eff_LM63_3site_derivs
+from lib.dispersion.m61 import r1rho_M61, r1rho_M61_derivs
+from lib.dispersion.m61b import r1rho_M61b, r1rho_M61b_derivs
+from lib.dispersion.mp05 import r1rho_MP05, r1rho_MP05_derivs
 from lib.dispersion.mmq_cr72 import r2eff_mmq_cr72
 from lib.dispersion.ns_cpmg_2site_3d import r2eff_ns_cpmg_2site_3D
 from lib.dispersion.ns_cpmg_2site_expanded import r2eff_ns_cpmg_2site_expanded
@@ -48,9 +50,9 @@ from lib.dispersion.ns_mmq_2site import r2eff_ns_mmq_2site_mq, r2eff_ns_mmq_2sit
 from lib.dispersion.ns_r1rho_2site import ns_r1rho_2site
 from lib.dispersion.ns_r1rho_3site import ns_r1rho_3site
 from lib.dispersion.ns_matrices import r180x_3d
-from lib.dispersion.tp02 import r1rho_TP02
-from lib.dispersion.tap03 import r1rho_TAP03
-from lib.dispersion.tsmfk01 import r2eff_TSMFK01
+from lib.dispersion.tp02 import r1rho_TP02, r1rho_TP02_derivs
+from lib.dispersion.tap03 import r1rho_TAP03, r1rho_TAP03_derivs
+from lib.dispersion.tsmfk01 import r2eff_TSMFK01, r2eff_TSMFK01_derivs
 from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_LIST_CPMG, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_IT99, MODEL_LIST_CPMG, MODEL_LIST_FULL, MODEL_LIST_DW_MIX_DOUBLE, MODEL_LIST_DW_MIX_QUADRUPLE, MODEL_LIST_INV_RELAX_TIMES, MODEL_LIST_R20B, MODEL_LIST_MMQ, MODEL_LIST_MQ_CPMG, MODEL_LIST_R1RHO, MODEL_LIST_R1RHO_OFF_RES, MODEL_LM63, MODEL_LM63_3SITE, MODEL_M61, MODEL_M61B, MODEL_MP05, MODEL_MMQ_CR72, MODEL_NOREX, MODEL_NS_CPMG_2SITE_3D, MODEL_NS_CPMG_2SITE_3D_FULL, MODEL_NS_CPMG_2SITE_EXPANDED, MODEL_NS_CPMG_2SITE_STAR, MODEL_NS_CPMG_2SITE_STAR_FULL, MODEL_NS_MMQ_2SITE, MODEL_NS_MMQ_3SITE, MODEL_NS_MMQ_3SITE_LINEAR, MODEL_NS_R1RHO_2SITE, MODEL_NS_R1RHO_3SITE, MODEL_NS_R1RHO_3SITE_LINEAR, MODEL_TAP03, MODEL_TP02, MODEL_TSMFK01
 from lib.errors import RelaxError
 from lib.float import isNaN
@@ -58,7 +60,7 @@ from target_functions.chi2 import chi2_rankN
 
 
 class Dispersion:
-    def __init__(self, model=None, num_params=None, num_spins=None, num_frq=None, exp_types=None, values=None, errors=None, missing=None, frqs=None, frqs_H=None, cpmg_frqs=None, spin_lock_nu1=None, chemical_shifts=None, offset=None, tilt_angles=None, r1=None, relax_times=None, scaling_matrix=None, recalc_tau=True, r1_fit=False):
+    def __init__(self, model=None, num_params=None, num_spins=None, num_frq=None, exp_types=None, values=None, errors=None, missing=None, frqs=None, frqs_H=None, cpmg_frqs=None, spin_lock_nu1=None, chemical_shifts=None, offset=None, tilt_angles=None, r1=None, relax_times=None, scaling_matrix=None, recalc_tau=True, r1_fit=False, stacked=False):
         """Relaxation dispersion target functions for optimisation.
 
         Models
@@ -96,6 +98,8 @@ class Dispersion:
             - 'NS R1rho 3-site linear':  The numerical solution for the 3-site Bloch-McConnell equations linearised with kAC = kCA = 0 for R1rho data with R20A = R20B = R20C.
             - 'NS R1rho 3-site':  The numerical solution for the 3-site Bloch-McConnell equations for R1rho data with R20A = R20B = R20C.
 
+        For the 'No Rex' model and the analytic models, excluding 'IT99', the exact chi-squared gradient and Hessian are available as the dfunc() and d2func() methods, allowing gradient based optimisation.  Otherwise these are None.  For the same models, the calc_grid_chi2() method evaluates the chi-squared values of a whole block of grid search points in one vectorised call, and with the stacked flag the calc_stacked_chi2() method evaluates the chi-squared values of many independent single spin clusters at once.
+
 
         Indices
         =======
@@ -163,6 +167,8 @@ class Dispersion:
         @type recalc_tau:           bool
         @keyword r1_fit:            A flag which if True will allow R1 values to be optimised.  If False, preloaded R1 values will be used instead.
         @type r1_fit:               bool
+        @keyword stacked:           A flag which if True will cause the spins to be treated as independent single spin clusters stacked along the spin dimension, for the lock-step optimisation of all clusters.  The parameters are then those of a single spin and the parameter values are supplied as a block of rank [NS][N], one vector per spin.  Only the calc_stacked_chi2() method and the derivs methods can be used, and only for the models having the derivs methods.
+        @type stacked:              bool
         """
 
         # Check the args.
@@ -183,6 +189,13 @@ class Dispersion:
         # Store the arguments.
         self.model = model
         self.num_params = num_params
+        self.stacked = stacked
+        self.stack_cache = None
+
+        # The axes of the data structures spanning a single cluster, excluding the spin dimension of the stacked clusters.
+        self.cluster_axes = (-5, -4, -3, -2, -1)
+        if stacked:
+            self.cluster_axes = (-5, -3, -2, -1)
         self.exp_types = exp_types
         self.scaling_matrix = scaling_matrix
         self.values_orig = values
@@ -399,6 +412,13 @@ class Dispersion:
         # This is to make sure, that the chi2 values is not affected by missing values.
         self.mask_replace_blank = masked_equal(self.missing, 1.0)
 
+        # The chi-squared weights of the gradient and Hessian, excluding the missing data and the padding at the end of arrays.
+        self.weights = self.disp_struct * (1.0 - self.missing) / self.errors**2
+
+        # The cache of the partial derivatives for the last parameter values.
+        self.derivs_params = None
+        self.derivs_cache = None
+
         # Check the experiment types, simplifying the data structures as needed.
         self.experiment_type_setup()
 
@@ -407,35 +427,38 @@ class Dispersion:
         if self.scaling_matrix is not None:
             self.scaling_flag = True
 
-        # Initialise the post spin parameter indices.
+        # Initialise the post spin parameter indices, for a single spin for the stacked clusters.
         self.end_index = []
+        NS_params = self.NS
+        if stacked:
+            NS_params = 1
 
         # The spin and frequency dependent R1 and R2 parameters, for models which fit R1.
         if r1_fit:
             # The spin and frequency dependent R1 parameters.
-            self.end_index.append(self.NE * self.NS * self.NM)
+            self.end_index.append(self.NE * NS_params * self.NM)
             # The spin and frequency dependent R2 parameters.
-            self.end_index.append(self.end_index[-1] + self.NE * self.NS * self.NM)
+            self.end_index.append(self.end_index[-1] + self.NE * NS_params * self.NM)
 
         # For all other models.
         else:
             # The spin and frequency dependent R2 parameters.
-            self.end_index.append(self.NE * self.NS * self.NM)
+            self.end_index.append(self.NE * NS_params * self.NM)
 
         if model in MODEL_LIST_R20B:
-            self.end_index.append(2 * self.NE * self.NS * self.NM)
+            self.end_index.append(2 * self.NE * NS_params * self.NM)
 
         # The spin and dependent parameters (phi_ex, dw, padw2).
-        self.end_index.append(self.end_index[-1] + self.NS)
+        self.end_index.append(self.end_index[-1] + NS_params)
 
         # For models with both dw and dwH or dw_AB and dw_BC or phi_ex_B and phi_ex_C.
         if model in MODEL_LIST_DW_MIX_DOUBLE:
-            self.end_index.append(self.end_index[-1] + self.NS)
+            self.end_index.append(self.end_index[-1] + NS_params)
 
         elif model in MODEL_LIST_DW_MIX_QUADRUPLE:
-            self.end_index.append(self.end_index[-1] + self.NS)
-            self.end_index.append(self.end_index[-1] + self.NS)
-            self.end_index.append(self.end_index[-1] + self.NS)
+            self.end_index.append(self.end_index[-1] + NS_params)
+            self.end_index.append(self.end_index[-1] + NS_params)
+            self.end_index.append(self.end_index[-1] + NS_params)
 
         # Pi-pulse propagators.
         if model in [MODEL_NS_CPMG_2SITE_3D, MODEL_NS_CPMG_2SITE_3D_FULL]:
@@ -496,32 +519,82 @@ class Dispersion:
             # Transpose M0, to prepare for dot operation. Roll the last axis one back, corresponds to a transpose for the outer two axis.
             self.M0_T = rollaxis(self.M0, 6, 5)
 
-        # Set up the model.
+        # The packed layout for the numeric R1rho models, flattening only the real data points so that no matrix exponentials are calculated for the padding of the ragged offset and dispersion point structure.
+        self.packed = model in [MODEL_NS_R1RHO_2SITE, MODEL_NS_R1RHO_3SITE, MODEL_NS_R1RHO_3SITE_LINEAR]
+        if self.packed:
+            # The index map from the packed data points back to the [NE][NS][NM][NO][ND] structure.
+            self.packed_index = nonzero(self.disp_struct)
+
+            # The packed constant structures.
+            self.M0_packed = self.M0[self.packed_index]
+            self.M0_T_packed = self.M0_T[self.packed_index]
+            self.chemical_shifts_packed = self.chemical_shifts[self.packed_index]
+            self.offset_packed = self.offset[self.packed_index]
+            self.r1_packed = self.r1[self.packed_index]
+            self.spin_lock_omega1_packed = self.spin_lock_omega1[self.packed_index]
+            self.relax_times_packed = self.relax_times[self.packed_index]
+            self.inv_relax_times_packed = self.inv_relax_times[self.packed_index]
+            self.back_calc_packed = zeros(len(self.packed_index[0]), float64)
+
+        # Set up the model.  The gradient, Hessian and the vectorised grid search are only available for the analytic models.
+        self.dfunc = None
+        self.d2func = None
+        self.derivs = None
         if model == MODEL_NOREX:
             # FIXME: Handle mixed experiment types here - probably by merging target functions.
             if self.exp_types[0] in EXP_TYPE_LIST_CPMG:
                 self.func = self.func_NOREX
+                self.dfunc = self.dfunc_NOREX
+                self.d2func = self.d2func_NOREX
+                self.derivs = self.derivs_NOREX
             else:
                 if r1_fit:
                     self.func = self.func_NOREX_R1RHO_FIT_R1
+                    self.dfunc = self.dfunc_NOREX_R1RHO_FIT_R1
+                    self.d2func = self.d2func_NOREX_R1RHO_FIT_R1
+                    self.derivs = self.derivs_NOREX_R1RHO_FIT_R1
                 else:
                     self.func = self.func_NOREX_R1RHO
+                    self.dfunc = self.dfunc_NOREX_R1RHO
+                    self.d2func = self.d2func_NOREX_R1RHO
+                    self.derivs = self.derivs_NOREX_R1RHO
         if model == MODEL_LM63:
             self.func = self.func_LM63
+            self.dfunc = self.dfunc_LM63
+            self.d2func = self.d2func_LM63
+            self.derivs = self.derivs_LM63
         if model == MODEL_LM63_3SITE:
             self.func = self.func_LM63_3site
+            self.dfunc = self.dfunc_LM63_3site
+            self.d2func = self.d2func_LM63_3site
+            self.derivs = self.derivs_LM63_3site
         if model == MODEL_CR72_FULL:
             self.func = self.func_CR72_full
+            self.dfunc = self.dfunc_CR72_full
+            self.d2func = self.d2func_CR72_full
+            self.derivs = self.derivs_CR72_full
         if model == MODEL_CR72:
             self.func = self.func_CR72
+            self.dfunc = self.dfunc_CR72
+            self.d2func = self.d2func_CR72
+            self.derivs = self.derivs_CR72
         if model == MODEL_IT99:
             self.func = self.func_IT99
         if model == MODEL_TSMFK01:
             self.func = self.func_TSMFK01
+            self.dfunc = self.dfunc_TSMFK01
+            self.d2func = self.d2func_TSMFK01
+            self.derivs = self.derivs_TSMFK01
         if model == MODEL_B14:
             self.func = self.func_B14
+            self.dfunc = self.dfunc_B14
+            self.d2func = self.d2func_B14
+            self.derivs = self.derivs_B14
         if model == MODEL_B14_FULL:
             self.func = self.func_B14_full
+            self.dfunc = self.dfunc_B14_full
+            self.d2func = self.d2func_B14_full
+            self.derivs = self.derivs_B14_full
         if model == MODEL_NS_CPMG_2SITE_3D_FULL:
             self.func = self.func_ns_cpmg_2site_3D_full
         if model == MODEL_NS_CPMG_2SITE_3D:
@@ -534,28 +607,58 @@ class Dispersion:
             self.func = self.func_ns_cpmg_2site_star
         if model == MODEL_M61:
             self.func = self.func_M61
+            self.dfunc = self.dfunc_M61
+            self.d2func = self.d2func_M61
+            self.derivs = self.derivs_M61
         if model == MODEL_M61B:
             self.func = self.func_M61b
+            self.dfunc = self.dfunc_M61b
+            self.d2func = self.d2func_M61b
+            self.derivs = self.derivs_M61b
         if model == MODEL_DPL94:
             if r1_fit:
                 self.func = self.func_DPL94_fit_r1
+                self.dfunc = self.dfunc_DPL94_fit_r1
+                self.d2func = self.d2func_DPL94_fit_r1
+                self.derivs = self.derivs_DPL94_fit_r1
             else:
                 self.func = self.func_DPL94
+                self.dfunc = self.dfunc_DPL94
+                self.d2func = self.d2func_DPL94
+                self.derivs = self.derivs_DPL94
         if model == MODEL_TP02:
             if r1_fit:
                 self.func = self.func_TP02_fit_r1
+                self.dfunc = self.dfunc_TP02_fit_r1
+                self.d2func = self.d2func_TP02_fit_r1
+                self.derivs = self.derivs_TP02_fit_r1
             else:
                 self.func = self.func_TP02
+                self.dfunc = self.dfunc_TP02
+                self.d2func = self.d2func_TP02
+                self.derivs = self.derivs_TP02
         if model == MODEL_TAP03:
             if r1_fit:
                 self.func = self.func_TAP03_fit_r1
+                self.dfunc = self.dfunc_TAP03_fit_r1
+                self.d2func = self.d2func_TAP03_fit_r1
+                self.derivs = self.derivs_TAP03_fit_r1
             else:
                 self.func = self.func_TAP03
+                self.dfunc = self.dfunc_TAP03
+                self.d2func = self.d2func_TAP03
+                self.derivs = self.derivs_TAP03
         if model == MODEL_MP05:
             if r1_fit:
                 self.func = self.func_MP05_fit_r1
+                self.dfunc = self.dfunc_MP05_fit_r1
+                self.d2func = self.d2func_MP05_fit_r1
+                self.derivs = self.derivs_MP05_fit_r1
             else:
                 self.func = self.func_MP05
+                self.dfunc = self.dfunc_MP05
+                self.d2func = self.d2func_MP05
+                self.derivs = self.derivs_MP05
         if model == MODEL_NS_R1RHO_2SITE:
             if r1_fit:
                 self.func = self.func_ns_r1rho_2site_fit_r1
@@ -654,6 +757,118 @@ class Dispersion:
         return chi2_rankN(self.values, self.back_calc, self.errors)
 
 
+    def calc_d2chi2(self, params, derivs):
+        """Calculate the chi-squared Hessian from the partial derivatives of the back-calculated values.
+
+        The Hessian is::
+
+            d2chi2/dtheta_j.dtheta_k = 2 sum_i 1/sigma_i^2 (dR_i/dtheta_j . dR_i/dtheta_k  -  (R_i - R_i(theta)) . d2R_i/dtheta_j.dtheta_k) ,
+
+        where R_i are the measured and R_i(theta) the back-calculated values.
+
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @param derivs:  The model specific function for the back-calculated values and their partial derivatives.
+        @type derivs:   method
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # The partial derivatives.
+        res, d, dd, index = self.calc_derivs(params, derivs)
+
+        # Sum over the offsets and dispersion points, and add the elements to the parameter positions of each variable pair.
+        d2chi2 = zeros((self.num_params, self.num_params), float64)
+        for i in range(len(index)):
+            for j in range(len(index)):
+                add.at(d2chi2, (index[i], index[j]), 2.0 * sum(self.weights * d[i] * d[j] - res * dd[i, j], axis=(3, 4)))
+
+        # Scaling.
+        if self.scaling_flag:
+            d2chi2 = dot(self.scaling_matrix, dot(d2chi2, self.scaling_matrix))
+
+        # Return the Hessian.
+        return d2chi2
+
+
+    def calc_dchi2(self, params, derivs):
+        """Calculate the chi-squared gradient from the partial derivatives of the back-calculated values.
+
+        The gradient is::
+
+            dchi2/dtheta_j = -2 sum_i 1/sigma_i^2 (R_i - R_i(theta)) . dR_i/dtheta_j ,
+
+        where R_i are the measured and R_i(theta) the back-calculated values.
+
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @param derivs:  The model specific function for the back-calculated values and their partial derivatives.
+        @type derivs:   method
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # The partial derivatives.
+        res, d, dd, index = self.calc_derivs(params, derivs)
+
+        # Sum over the offsets and dispersion points, and add the elements to the parameter positions of each variable.
+        dchi2 = zeros(self.num_params, float64)
+        for i in range(len(index)):
+            add.at(dchi2, index[i], -2.0 * sum(res * d[i], axis=(3, 4)))
+
+        # Scaling.
+        if self.scaling_flag:
+            dchi2 = dot(self.scaling_matrix, dchi2)
+
+        # Return the gradient.
+        return dchi2
+
+
+    def calc_derivs(self, params, derivs):
+        """Calculate the weighted residuals and the partial derivatives of the back-calculated values.
+
+        The target function is called first, to fill the parameter structures and the back-calculated values.  The model specific function then returns the jet of the back-calculated values (see L{lib.dispersion.derivatives}) together with the parameter indices of each variable.  As the gradient and Hessian are normally requested for the same parameter values, the last results are cached.
+
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @param derivs:  The model specific function for the back-calculated values and their partial derivatives.
+        @type derivs:   method
+        @return:        The weighted residuals, the first and second partial derivatives of the back-calculated values with respect to each variable, and the parameter indices of each variable.
+        @rtype:         numpy rank-5 float array, numpy rank-6 float array, numpy rank-7 float array, list of numpy rank-3 int arrays
+        """
+
+        # Use the cached values.
+        if self.derivs_params is not None and array_equal(params, self.derivs_params):
+            return self.derivs_cache
+
+        # The back-calculated values.
+        self.func(params)
+
+        # Scaling.
+        self.derivs_params = params.copy()
+        if self.scaling_flag:
+            params = dot(params, self.scaling_matrix)
+
+        # The partial derivatives, silencing the floating point warnings of the invalid parameter regions.
+        with errstate(all='ignore'):
+            jet, index = derivs(params)
+
+        # Remove the derivatives for the invalid parameter regions, which the target functions replace by a fill value.
+        valid = isfinite(jet.value)
+        d = where(valid & isfinite(jet.d), jet.d, 0.0)
+        dd = where(valid & isfinite(jet.dd), jet.dd, 0.0)
+
+        # The weighted residuals, excluding the missing data and the padding at the end of arrays.
+        res = self.weights * (self.values - self.back_calc)
+
+        # Store and return the results.
+        self.derivs_cache = res, d, dd, index
+        return self.derivs_cache
+
+
     def calc_DPL94(self, R1=None, r1rho_prime=None, phi_ex=None, kex=None):
         """Calculation function for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments.
 
@@ -690,6 +905,31 @@ class Dispersion:
         return chi2_rankN(self.values, self.back_calc, self.errors)
 
 
+    def calc_grid_chi2(self, params):
+        """Calculate the chi-squared values for a block of grid search points.
+
+        The model equations are evaluated for all points at once, with the points forming the additional leading dimension [G] of all data structures.  Back-calculated values which are not finite, for example in invalid parameter regions, are replaced by the fill value of 1e100 as in the target functions.
+
+
+        @param params:  The block of scaled parameter vectors.
+        @type params:   numpy rank-2 float array of rank [G][N]
+        @return:        The chi-squared value of each grid point.
+        @rtype:         numpy rank-1 float array of rank [G]
+        """
+
+        # Scaling.
+        if self.scaling_flag:
+            params = dot(params, self.scaling_matrix)
+
+        # The back-calculated values for all grid points, silencing the floating point warnings of the invalid parameter regions.
+        with errstate(all='ignore'):
+            back_calc = self.derivs(params, num=0)[0].value
+        back_calc = where(isfinite(back_calc), back_calc, 1e100)
+
+        # The chi-squared values, excluding the missing data and the padding at the end of arrays.
+        return sum(self.weights * (self.values - back_calc)**2, axis=(1, 2, 3, 4, 5))
+
+
     def calc_MP05(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
         """Calculation function for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model.
 
@@ -864,223 +1104,1251 @@ class Dispersion:
         @rtype:             float
         """
 
-        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
-        multiply( multiply.outer( dw_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_AB_struct )
-        multiply( multiply.outer( dw_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_BC_struct )
-        multiply( multiply.outer( dwH_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs_H, out=self.dwH_AB_struct )
-        multiply( multiply.outer( dwH_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs_H, out=self.dwH_BC_struct )
+        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
+        multiply( multiply.outer( dw_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_AB_struct )
+        multiply( multiply.outer( dw_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_BC_struct )
+        multiply( multiply.outer( dwH_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs_H, out=self.dwH_AB_struct )
+        multiply( multiply.outer( dwH_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs_H, out=self.dwH_BC_struct )
+
+        # Reshape R20A and R20B to per experiment, spin and frequency.
+        self.r20a_struct[:] = multiply.outer( R20A.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+        self.r20b_struct[:] = multiply.outer( R20B.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+        self.r20c_struct[:] = multiply.outer( R20C.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+
+        # Loop over the experiment types.
+        for ei in range(self.NE):
+            r20a = self.r20a_struct[ei]
+            r20b = self.r20b_struct[ei]
+            r20c = self.r20b_struct[ei]
+            dw_AB_frq = self.dw_AB_struct[ei]
+            dw_BC_frq = self.dw_BC_struct[ei]
+            dwH_AB_frq = self.dwH_AB_struct[ei]
+            dwH_BC_frq = self.dwH_BC_struct[ei]
+
+            # Alias the dw frequency combinations.
+            aliased_dwH_AB = 0.0 * self.dwH_AB_struct[ei]
+            aliased_dwH_BC = 0.0 * self.dwH_BC_struct[ei]
+            if self.exp_types[ei] == EXP_TYPE_CPMG_SQ:
+                aliased_dw_AB = dw_AB_frq
+                aliased_dw_BC = dw_BC_frq
+            elif self.exp_types[ei] == EXP_TYPE_CPMG_PROTON_SQ:
+                aliased_dw_AB = dwH_AB_frq
+                aliased_dw_BC = dwH_BC_frq
+            elif self.exp_types[ei] == EXP_TYPE_CPMG_DQ:
+                aliased_dw_AB = dw_AB_frq + dwH_AB_frq
+                aliased_dw_BC = dw_BC_frq + dwH_BC_frq
+            elif self.exp_types[ei] == EXP_TYPE_CPMG_ZQ:
+                aliased_dw_AB = dw_AB_frq - dwH_AB_frq
+                aliased_dw_BC = dw_BC_frq - dwH_BC_frq
+            elif self.exp_types[ei] == EXP_TYPE_CPMG_MQ:
+                aliased_dw_AB = dw_AB_frq
+                aliased_dw_BC = dw_BC_frq
+                aliased_dwH_AB = dwH_AB_frq
+                aliased_dwH_BC = dwH_BC_frq
+            elif self.exp_types[ei] == EXP_TYPE_CPMG_PROTON_MQ:
+                aliased_dw_AB = dwH_AB_frq
+                aliased_dw_BC = dwH_BC_frq
+                aliased_dwH_AB = dw_AB_frq
+                aliased_dwH_BC = dw_BC_frq
+
+            # Back calculate the R2eff values for each experiment type.
+            self.r2eff_ns_mmq[ei](M0=self.M0, R20A=r20a, R20B=r20b, R20C=r20c, pA=pA, pB=pB, dw_AB=aliased_dw_AB, dw_BC=aliased_dw_BC, dwH_AB=aliased_dwH_AB, dwH_BC=aliased_dwH_BC, kex_AB=kex_AB, kex_BC=kex_BC, kex_AC=kex_AC, inv_tcpmg=self.inv_relax_times[ei], tcp=self.tau_cpmg[ei], back_calc=self.back_calc[ei], num_points=self.num_disp_points[ei], power=self.power[ei])
+
+        # Clean the data for all values, which is left over at the end of arrays.
+        self.back_calc = self.back_calc*self.disp_struct
+
+        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
+        if self.has_missing:
+            # Replace with values.
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # Return the total chi-squared value.
+        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+
+    def calc_ns_r1rho_2site(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
+        """Calculation function for the reduced numerical solution for the 2-site Bloch-McConnell equations for R1rho data.
+
+        @keyword R1:            The R1 value.
+        @type R1:               list of float
+        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
+        @type r1rho_prime:      list of float
+        @keyword dw:            The chemical shift differences in ppm for each spin.
+        @type dw:               list of float
+        @keyword pA:            The population of state A.
+        @type pA:               float
+        @keyword kex:           The rate of exchange.
+        @type kex:              float
+        @return:                The chi-squared value.
+        @rtype:                 float
+        """
+
+        # Reshape r1rho_prime to per experiment, spin and frequency.
+        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+
+        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
+        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
+
+        # Back calculate the R1rho values for the packed data points, and unpack them.
+        ns_r1rho_2site(M0=self.M0_packed, M0_T=self.M0_T_packed, r1rho_prime=self.r1rho_prime_struct[self.packed_index], omega=self.chemical_shifts_packed, offset=self.offset_packed, r1=R1[self.packed_index], pA=pA, dw=self.dw_struct[self.packed_index], kex=kex, spin_lock_fields=self.spin_lock_omega1_packed, relax_time=self.relax_times_packed, inv_relax_time=self.inv_relax_times_packed, back_calc=self.back_calc_packed)
+        self.back_calc[self.packed_index] = self.back_calc_packed
+
+        # Clean the data for all values, which is left over at the end of arrays.
+        self.back_calc = self.back_calc*self.disp_struct
+
+        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
+        if self.has_missing:
+            # Replace with values.
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # Return the total chi-squared value.
+        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+
+    def calc_ns_r1rho_3site_chi2(self, r1rho_prime=None, dw_AB=None, dw_BC=None, pA=None, pB=None, kex_AB=None, kex_BC=None, kex_AC=None):
+        """Calculate the chi-squared value for the 'NS MMQ 3-site' models.
+
+        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
+        @type r1rho_prime:      list of float
+        @keyword dw_AB:         The chemical exchange difference between states A and B in rad/s.
+        @type dw_AB:            float
+        @keyword dw_BC:         The chemical exchange difference between states B and C in rad/s.
+        @type dw_BC:            float
+        @keyword pA:            The population of state A.
+        @type pA:               float
+        @keyword kex_AB:        The rate of exchange between states A and B.
+        @type kex_AB:           float
+        @keyword kex_BC:        The rate of exchange between states B and C.
+        @type kex_BC:           float
+        @keyword kex_AC:        The rate of exchange between states A and C.
+        @type kex_AC:           float
+        @return:                The chi-squared value.
+        @rtype:                 float
+        """
+
+        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
+        multiply( multiply.outer( dw_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_AB_struct )
+        multiply( multiply.outer( dw_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_BC_struct )
+
+        # Reshape R20 to per experiment, spin and frequency.
+        self.r20_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+
+        # Back calculate the R1rho values for the packed data points, and unpack them.
+        ns_r1rho_3site(M0=self.M0_packed, M0_T=self.M0_T_packed, r1rho_prime=self.r20_struct[self.packed_index], omega=self.chemical_shifts_packed, offset=self.offset_packed, r1=self.r1_packed, pA=pA, pB=pB, dw_AB=self.dw_AB_struct[self.packed_index], dw_BC=self.dw_BC_struct[self.packed_index], kex_AB=kex_AB, kex_BC=kex_BC, kex_AC=kex_AC, spin_lock_fields=self.spin_lock_omega1_packed, relax_time=self.relax_times_packed, inv_relax_time=self.inv_relax_times_packed, back_calc=self.back_calc_packed, num_points=self.num_disp_points)
+        self.back_calc[self.packed_index] = self.back_calc_packed
+
+        # Clean the data for all values, which is left over at the end of arrays.
+        self.back_calc = self.back_calc*self.disp_struct
+
+        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
+        if self.has_missing:
+            # Replace with values.
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # Return the total chi-squared value.
+        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+
+    def calc_stacked_chi2(self, params, index=None):
+        """Calculate the chi-squared values of the independent clusters stacked along the spin dimension.
+
+        This requires the stacked flag to be set on initialisation.  The model equations are evaluated for all clusters at once, and the back-calculated values which are not finite are replaced by the fill value of 1e100 as in the target functions.  The back-calculated values are stored for the get_back_calc() method.  For a subset of the clusters, the target function of the subset is created by the stack_subset() method and cached until the subset changes.
+
+
+        @param params:  The scaled parameter vectors of the clusters.
+        @type params:   numpy rank-2 float array of rank [NS][N] or [len(index)][N]
+        @keyword index: The indices of the subset of clusters to evaluate.  If None, all clusters are evaluated.
+        @type index:    None or numpy rank-1 int array
+        @return:        The chi-squared value of each cluster.
+        @rtype:         numpy rank-1 float array of rank [NS] or [len(index)]
+        """
+
+        # A subset of the clusters, reusing the target function of the last subset.
+        if index is not None and len(index) < self.NS:
+            if self.stack_cache is None or not array_equal(self.stack_cache[0], index):
+                self.stack_cache = [index, self.stack_subset(index)]
+            return self.stack_cache[1].calc_stacked_chi2(params)
+
+        # Scaling.
+        if self.scaling_flag:
+            params = dot(params, self.scaling_matrix)
+
+        # The back-calculated values for all clusters, silencing the floating point warnings of the invalid parameter regions.
+        with errstate(all='ignore'):
+            back_calc = self.derivs(params, num=0)[0].value
+        back_calc = where(isfinite(back_calc), back_calc, 1e100)
+
+        # Store the back-calculated values, cleaning the end of the arrays and setting the missing data points to the measured values as in the target functions.
+        self.back_calc = back_calc * self.disp_struct
+        if self.has_missing:
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # The chi-squared values, excluding the missing data and the padding at the end of arrays.
+        return sum(self.weights * (self.values - back_calc)**2, axis=(0, 2, 3, 4))
+
+
+    def calc_TAP03(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
+        """Calculation function for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model.
+
+        @keyword R1:            The R1 value.
+        @type R1:               list of float
+        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
+        @type r1rho_prime:      list of float
+        @keyword dw:            The chemical shift differences in ppm for each spin.
+        @type dw:               list of float
+        @keyword pA:            The population of state A.
+        @type pA:               float
+        @keyword kex:           The rate of exchange.
+        @type kex:              float
+        @return:                The chi-squared value.
+        @rtype:                 float
+        """
+
+        # Reshape r1rho_prime to per experiment, spin and frequency.
+        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+
+        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
+        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
+
+        # Back calculate the R1rho values.
+        r1rho_TAP03(r1rho_prime=self.r1rho_prime_struct, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=self.dw_struct, kex=kex, R1=R1, spin_lock_fields=self.spin_lock_omega1, spin_lock_fields2=self.spin_lock_omega1_squared, back_calc=self.back_calc)
+
+        # Clean the data for all values, which is left over at the end of arrays.
+        self.back_calc = self.back_calc*self.disp_struct
+
+        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
+        if self.has_missing:
+            # Replace with values.
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # Return the total chi-squared value.
+        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+
+    def calc_TP02(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
+        """Calculation function for the Trott and Palmer (2002) R1rho off-resonance 2-site model.
+
+        @keyword R1:            The R1 value.
+        @type R1:               list of float
+        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
+        @type r1rho_prime:      list of float
+        @keyword dw:            The chemical shift differences in ppm for each spin.
+        @type dw:               list of float
+        @keyword pA:            The population of state A.
+        @type pA:               float
+        @keyword kex:           The rate of exchange.
+        @type kex:              float
+        @return:                The chi-squared value.
+        @rtype:                 float
+        """
+
+        # Reshape r1rho_prime to per experiment, spin and frequency.
+        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+
+        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
+        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
+
+        # Back calculate the R1rho values.
+        r1rho_TP02(r1rho_prime=self.r1rho_prime_struct, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=self.dw_struct, kex=kex, R1=R1, spin_lock_fields=self.spin_lock_omega1, spin_lock_fields2=self.spin_lock_omega1_squared, back_calc=self.back_calc)
+
+        # Clean the data for all values, which is left over at the end of arrays.
+        self.back_calc = self.back_calc*self.disp_struct
+
+        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
+        if self.has_missing:
+            # Replace with values.
+            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+
+        # Return the total chi-squared value.
+        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+
+    def d2func_B14(self, params):
+        """Target function Hessian for the Baldwin (2014) 2-site exact solution model for all time scales, whereby the simplification R20A = R20B is assumed.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_B14)
+
+
+    def d2func_B14_full(self, params):
+        """Target function Hessian for the Baldwin (2014) 2-site exact solution model for all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_B14_full)
+
+
+    def d2func_CR72(self, params):
+        """Target function Hessian for the reduced Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_CR72)
+
+
+    def d2func_CR72_full(self, params):
+        """Target function Hessian for the full Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_CR72_full)
+
+
+    def d2func_DPL94(self, params):
+        """Target function Hessian for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_DPL94)
+
+
+    def d2func_DPL94_fit_r1(self, params):
+        """Target function Hessian for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_DPL94_fit_r1)
+
+
+    def d2func_LM63(self, params):
+        """Target function Hessian for the Luz and Meiboom (1963) fast 2-site exchange model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_LM63)
+
+
+    def d2func_LM63_3site(self, params):
+        """Target function Hessian for the Luz and Meiboom (1963) fast 3-site exchange model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_LM63_3site)
+
+
+    def d2func_M61(self, params):
+        """Target function Hessian for the Meiboom (1961) fast 2-site exchange model for R1rho-type experiments.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_M61)
+
+
+    def d2func_M61b(self, params):
+        """Target function Hessian for the Meiboom (1961) R1rho on-resonance 2-site model for skewed populations (pA >> pB).
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_M61b)
+
+
+    def d2func_MP05(self, params):
+        """Target function Hessian for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_MP05)
+
+
+    def d2func_MP05_fit_r1(self, params):
+        """Target function Hessian for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_MP05_fit_r1)
+
+
+    def d2func_NOREX(self, params):
+        """Target function Hessian for no exchange.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_NOREX)
+
+
+    def d2func_NOREX_R1RHO(self, params):
+        """Target function Hessian for no exchange, for R1rho off resonance models.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_NOREX_R1RHO)
+
+
+    def d2func_NOREX_R1RHO_FIT_R1(self, params):
+        """Target function Hessian for no exchange, for R1rho off resonance models, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_NOREX_R1RHO_FIT_R1)
+
+
+    def d2func_TAP03(self, params):
+        """Target function Hessian for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_TAP03)
+
+
+    def d2func_TAP03_fit_r1(self, params):
+        """Target function Hessian for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_TAP03_fit_r1)
+
+
+    def d2func_TP02(self, params):
+        """Target function Hessian for the Trott and Palmer (2002) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_TP02)
+
+
+    def d2func_TP02_fit_r1(self, params):
+        """Target function Hessian for the Trott and Palmer (2002) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_TP02_fit_r1)
+
+
+    def d2func_TSMFK01(self, params):
+        """Target function Hessian for the Tollinger et al. (2001) 2-site very-slow exchange model, range of microsecond to second time scale.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared Hessian.
+        @rtype:         numpy rank-2 float array
+        """
+
+        # Calculate and return the chi-squared Hessian.
+        return self.calc_d2chi2(params, self.derivs_TSMFK01)
+
+
+    def derivs_B14(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Baldwin (2014) 2-site exact solution model for all time scales, whereby the simplification R20A = R20B is assumed.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20, dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r20 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_B14_derivs(r20a=r20, r20b=r20, pA=pA, dw=dw, kex=kex, ncyc=self.power, inv_tcpmg=self.inv_relax_times, tcp=self.tau_cpmg), index
+
+
+    def derivs_B14_full(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the Baldwin (2014) 2-site exact solution model for all time scales.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20A, R20B, dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables, with the R20A and R20B parameters interleaved for each spin.
+        r20a = variable(self.param_struct(params, 0, self.end_index[1], pair=0), index=0, num=num)
+        r20b = variable(self.param_struct(params, 0, self.end_index[1], pair=1), index=1, num=num)
+        dw = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs, index=2, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[1], pair=0), self.param_index(0, self.end_index[1], pair=1), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_B14_derivs(r20a=r20a, r20b=r20b, pA=pA, dw=dw, kex=kex, ncyc=self.power, inv_tcpmg=self.inv_relax_times, tcp=self.tau_cpmg), index
+
+
+    def derivs_CR72(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the reduced Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20, dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r20 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_CR72_derivs(r20a=r20, r20b=r20, pA=pA, dw=dw, kex=kex, cpmg_frqs=self.cpmg_frqs, cluster_axes=self.cluster_axes), index
+
+
+    def derivs_CR72_full(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the full Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20A, R20B, dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables, with the R20A and R20B parameters interleaved for each spin.
+        r20a = variable(self.param_struct(params, 0, self.end_index[1], pair=0), index=0, num=num)
+        r20b = variable(self.param_struct(params, 0, self.end_index[1], pair=1), index=1, num=num)
+        dw = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs, index=2, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[1], pair=0), self.param_index(0, self.end_index[1], pair=1), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_CR72_derivs(r20a=r20a, r20b=r20b, pA=pA, dw=dw, kex=kex, cpmg_frqs=self.cpmg_frqs, cluster_axes=self.cluster_axes), index
+
+
+    def derivs_DPL94(self, params, num=3):
+        """The back-calculated values and their partial derivatives for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', phi_ex and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        phi_ex = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs_squared, index=1, deriv=self.frqs_squared, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1])]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_DPL94_derivs(r1rho_prime=r1rho_prime, phi_ex=phi_ex, kex=kex, theta=self.tilt_angles, R1=self.r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_DPL94_fit_r1(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments, whereby R1 is fitted.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1, R1rho', phi_ex and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        r1rho_prime = variable(self.param_struct(params, self.end_index[0], self.end_index[1]), index=1, num=num)
+        phi_ex = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs_squared, index=2, deriv=self.frqs_squared, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2])]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_DPL94_derivs(r1rho_prime=r1rho_prime, phi_ex=phi_ex, kex=kex, theta=self.tilt_angles, R1=r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_LM63(self, params, num=3):
+        """The back-calculated values and their partial derivatives for the Luz and Meiboom (1963) fast 2-site exchange model.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20, phi_ex and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r20 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        phi_ex = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs_squared, index=1, deriv=self.frqs_squared, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1])]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_LM63_derivs(r20=r20, phi_ex=phi_ex, kex=kex, cpmg_frqs=self.cpmg_frqs), index
+
+
+    def derivs_LM63_3site(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the Luz and Meiboom (1963) fast 3-site exchange model.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20, phi_ex_B, phi_ex_C, kB and kC variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r20 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        phi_ex_B = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs_squared, index=1, deriv=self.frqs_squared, num=num)
+        phi_ex_C = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs_squared, index=2, deriv=self.frqs_squared, num=num)
+        kB = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kC = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_LM63_3site_derivs(r20=r20, phi_ex_B=phi_ex_B, phi_ex_C=phi_ex_C, kB=kB, kC=kC, cpmg_frqs=self.cpmg_frqs, cluster_axes=self.cluster_axes), index
+
+
+    def derivs_M61(self, params, num=3):
+        """The back-calculated values and their partial derivatives for the Meiboom (1961) fast 2-site exchange model for R1rho-type experiments.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', phi_ex and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        phi_ex = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs_squared, index=1, deriv=self.frqs_squared, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1])]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_M61_derivs(r1rho_prime=r1rho_prime, phi_ex=phi_ex, kex=kex, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_M61b(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Meiboom (1961) R1rho on-resonance 2-site model for skewed populations (pA >> pB).
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_M61b_derivs(r1rho_prime=r1rho_prime, pA=pA, dw=dw, kex=kex, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_MP05(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_MP05_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=self.r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_MP05_fit_r1(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1, R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        r1rho_prime = variable(self.param_struct(params, self.end_index[0], self.end_index[1]), index=1, num=num)
+        dw = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs, index=2, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_MP05_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_NOREX(self, params, num=1):
+        """The back-calculated values and their partial derivatives for no exchange.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20 variable.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The R20 variable is the back-calculated value.
+        r20 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+
+        # Return the R2eff values and their derivatives.
+        return r20, [self.param_index(0, self.end_index[0])]
+
+
+    def derivs_NOREX_R1RHO(self, params, num=1):
+        """The back-calculated values and their partial derivatives for no exchange, for R1rho off resonance models.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho' variable.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_prime * sin(self.tilt_angles)**2 + self.r1 * cos(self.tilt_angles)**2, [self.param_index(0, self.end_index[0])]
+
+
+    def derivs_NOREX_R1RHO_FIT_R1(self, params, num=2):
+        """The back-calculated values and their partial derivatives for no exchange, for R1rho off resonance models, whereby R1 is fitted.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1 and R1rho' variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        r1rho_prime = variable(self.param_struct(params, self.end_index[0], self.end_index[1]), index=1, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1])]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1 * cos(self.tilt_angles)**2 + r1rho_prime * sin(self.tilt_angles)**2, index
+
+
+    def derivs_TAP03(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_TAP03_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=self.r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_TAP03_fit_r1(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1, R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        r1rho_prime = variable(self.param_struct(params, self.end_index[0], self.end_index[1]), index=1, num=num)
+        dw = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs, index=2, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_TAP03_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_TP02(self, params, num=4):
+        """The back-calculated values and their partial derivatives for the Trott and Palmer (2002) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1rho_prime = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+        kex = variable(self.param_struct(params, self.end_index[1]+1), index=3, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1]), self.param_index(self.end_index[1]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_TP02_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=self.r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_TP02_fit_r1(self, params, num=5):
+        """The back-calculated values and their partial derivatives for the Trott and Palmer (2002) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R1, R1rho', dw, pA and kex variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r1 = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        r1rho_prime = variable(self.param_struct(params, self.end_index[0], self.end_index[1]), index=1, num=num)
+        dw = variable(self.param_struct(params, self.end_index[1], self.end_index[2]) * self.frqs, index=2, deriv=self.frqs, num=num)
+        pA = variable(self.param_struct(params, self.end_index[2]), index=3, num=num)
+        kex = variable(self.param_struct(params, self.end_index[2]+1), index=4, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1], self.end_index[2]), self.param_index(self.end_index[2]), self.param_index(self.end_index[2]+1)]
+
+        # Back calculate the R1rho values and their derivatives.
+        return r1rho_TP02_derivs(r1rho_prime=r1rho_prime, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=dw, kex=kex, R1=r1, spin_lock_fields2=self.spin_lock_omega1_squared), index
+
+
+    def derivs_TSMFK01(self, params, num=3):
+        """The back-calculated values and their partial derivatives for the Tollinger et al. (2001) 2-site very-slow exchange model, range of microsecond to second time scale.
+
+        @param params:  The vector of unscaled parameter values, or the block of vectors of a grid search.
+        @type params:   numpy rank-1 or rank-2 float array
+        @keyword num:   The number of variables.  If zero, only the back-calculated values are propagated.
+        @type num:      int
+        @return:        The back-calculated values and their partial derivatives, and the parameter indices of the R20A, dw and k_AB variables.
+        @rtype:         Jet instance, list of numpy rank-3 int arrays
+        """
+
+        # The variables.
+        r20a = variable(self.param_struct(params, 0, self.end_index[0]), index=0, num=num)
+        dw = variable(self.param_struct(params, self.end_index[0], self.end_index[1]) * self.frqs, index=1, deriv=self.frqs, num=num)
+        k_AB = variable(self.param_struct(params, self.end_index[1]), index=2, num=num)
+
+        # The parameter indices.
+        index = [self.param_index(0, self.end_index[0]), self.param_index(self.end_index[0], self.end_index[1]), self.param_index(self.end_index[1])]
+
+        # Back calculate the R2eff values and their derivatives.
+        return r2eff_TSMFK01_derivs(r20a=r20a, dw=dw, k_AB=k_AB, tcp=self.tau_cpmg), index
+
+
+    def dfunc_B14(self, params):
+        """Target function gradient for the Baldwin (2014) 2-site exact solution model for all time scales, whereby the simplification R20A = R20B is assumed.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_B14)
+
+
+    def dfunc_B14_full(self, params):
+        """Target function gradient for the Baldwin (2014) 2-site exact solution model for all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_B14_full)
+
+
+    def dfunc_CR72(self, params):
+        """Target function gradient for the reduced Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_CR72)
+
+
+    def dfunc_CR72_full(self, params):
+        """Target function gradient for the full Carver and Richards (1972) 2-site exchange model on all time scales.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_CR72_full)
+
+
+    def dfunc_DPL94(self, params):
+        """Target function gradient for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_DPL94)
 
-        # Reshape R20A and R20B to per experiment, spin and frequency.
-        self.r20a_struct[:] = multiply.outer( R20A.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
-        self.r20b_struct[:] = multiply.outer( R20B.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
-        self.r20c_struct[:] = multiply.outer( R20C.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
 
-        # Loop over the experiment types.
-        for ei in range(self.NE):
-            r20a = self.r20a_struct[ei]
-            r20b = self.r20b_struct[ei]
-            r20c = self.r20b_struct[ei]
-            dw_AB_frq = self.dw_AB_struct[ei]
-            dw_BC_frq = self.dw_BC_struct[ei]
-            dwH_AB_frq = self.dwH_AB_struct[ei]
-            dwH_BC_frq = self.dwH_BC_struct[ei]
+    def dfunc_DPL94_fit_r1(self, params):
+        """Target function gradient for the Davis, Perlman and London (1994) fast 2-site off-resonance exchange model for R1rho-type experiments, whereby R1 is fitted.
 
-            # Alias the dw frequency combinations.
-            aliased_dwH_AB = 0.0 * self.dwH_AB_struct[ei]
-            aliased_dwH_BC = 0.0 * self.dwH_BC_struct[ei]
-            if self.exp_types[ei] == EXP_TYPE_CPMG_SQ:
-                aliased_dw_AB = dw_AB_frq
-                aliased_dw_BC = dw_BC_frq
-            elif self.exp_types[ei] == EXP_TYPE_CPMG_PROTON_SQ:
-                aliased_dw_AB = dwH_AB_frq
-                aliased_dw_BC = dwH_BC_frq
-            elif self.exp_types[ei] == EXP_TYPE_CPMG_DQ:
-                aliased_dw_AB = dw_AB_frq + dwH_AB_frq
-                aliased_dw_BC = dw_BC_frq + dwH_BC_frq
-            elif self.exp_types[ei] == EXP_TYPE_CPMG_ZQ:
-                aliased_dw_AB = dw_AB_frq - dwH_AB_frq
-                aliased_dw_BC = dw_BC_frq - dwH_BC_frq
-            elif self.exp_types[ei] == EXP_TYPE_CPMG_MQ:
-                aliased_dw_AB = dw_AB_frq
-                aliased_dw_BC = dw_BC_frq
-                aliased_dwH_AB = dwH_AB_frq
-                aliased_dwH_BC = dwH_BC_frq
-            elif self.exp_types[ei] == EXP_TYPE_CPMG_PROTON_MQ:
-                aliased_dw_AB = dwH_AB_frq
-                aliased_dw_BC = dwH_BC_frq
-                aliased_dwH_AB = dw_AB_frq
-                aliased_dwH_BC = dw_BC_frq
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-            # Back calculate the R2eff values for each experiment type.
-            self.r2eff_ns_mmq[ei](M0=self.M0, R20A=r20a, R20B=r20b, R20C=r20c, pA=pA, pB=pB, dw_AB=aliased_dw_AB, dw_BC=aliased_dw_BC, dwH_AB=aliased_dwH_AB, dwH_BC=aliased_dwH_BC, kex_AB=kex_AB, kex_BC=kex_BC, kex_AC=kex_AC, inv_tcpmg=self.inv_relax_times[ei], tcp=self.tau_cpmg[ei], back_calc=self.back_calc[ei], num_points=self.num_disp_points[ei], power=self.power[ei])
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_DPL94_fit_r1)
 
-        # Clean the data for all values, which is left over at the end of arrays.
-        self.back_calc = self.back_calc*self.disp_struct
 
-        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
-        if self.has_missing:
-            # Replace with values.
-            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+    def dfunc_LM63(self, params):
+        """Target function gradient for the Luz and Meiboom (1963) fast 2-site exchange model.
 
-        # Return the total chi-squared value.
-        return chi2_rankN(self.values, self.back_calc, self.errors)
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_LM63)
 
-    def calc_ns_r1rho_2site(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
-        """Calculation function for the reduced numerical solution for the 2-site Bloch-McConnell equations for R1rho data.
 
-        @keyword R1:            The R1 value.
-        @type R1:               list of float
-        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
-        @type r1rho_prime:      list of float
-        @keyword dw:            The chemical shift differences in ppm for each spin.
-        @type dw:               list of float
-        @keyword pA:            The population of state A.
-        @type pA:               float
-        @keyword kex:           The rate of exchange.
-        @type kex:              float
-        @return:                The chi-squared value.
-        @rtype:                 float
+    def dfunc_LM63_3site(self, params):
+        """Target function gradient for the Luz and Meiboom (1963) fast 3-site exchange model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
         """
 
-        # Reshape r1rho_prime to per experiment, spin and frequency.
-        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_LM63_3site)
 
-        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
-        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
 
-        # Back calculate the R1rho values.
-        ns_r1rho_2site(M0=self.M0, M0_T=self.M0_T, r1rho_prime=self.r1rho_prime_struct, omega=self.chemical_shifts, offset=self.offset, r1=R1, pA=pA, dw=self.dw_struct, kex=kex, spin_lock_fields=self.spin_lock_omega1, relax_time=self.relax_times, inv_relax_time=self.inv_relax_times, back_calc=self.back_calc)
+    def dfunc_M61(self, params):
+        """Target function gradient for the Meiboom (1961) fast 2-site exchange model for R1rho-type experiments.
 
-        # Clean the data for all values, which is left over at the end of arrays.
-        self.back_calc = self.back_calc*self.disp_struct
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
-        if self.has_missing:
-            # Replace with values.
-            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_M61)
 
-        # Return the total chi-squared value.
-        return chi2_rankN(self.values, self.back_calc, self.errors)
 
+    def dfunc_M61b(self, params):
+        """Target function gradient for the Meiboom (1961) R1rho on-resonance 2-site model for skewed populations (pA >> pB).
 
-    def calc_ns_r1rho_3site_chi2(self, r1rho_prime=None, dw_AB=None, dw_BC=None, pA=None, pB=None, kex_AB=None, kex_BC=None, kex_AC=None):
-        """Calculate the chi-squared value for the 'NS MMQ 3-site' models.
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
-        @type r1rho_prime:      list of float
-        @keyword dw_AB:         The chemical exchange difference between states A and B in rad/s.
-        @type dw_AB:            float
-        @keyword dw_BC:         The chemical exchange difference between states B and C in rad/s.
-        @type dw_BC:            float
-        @keyword pA:            The population of state A.
-        @type pA:               float
-        @keyword kex_AB:        The rate of exchange between states A and B.
-        @type kex_AB:           float
-        @keyword kex_BC:        The rate of exchange between states B and C.
-        @type kex_BC:           float
-        @keyword kex_AC:        The rate of exchange between states A and C.
-        @type kex_AC:           float
-        @return:                The chi-squared value.
-        @rtype:                 float
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_M61b)
+
+
+    def dfunc_MP05(self, params):
+        """Target function gradient for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
         """
 
-        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
-        multiply( multiply.outer( dw_AB.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_AB_struct )
-        multiply( multiply.outer( dw_BC.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_BC_struct )
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_MP05)
 
-        # Reshape R20 to per experiment, spin and frequency.
-        self.r20_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
 
-        # Back calculate the R2eff values for each experiment type.
-        ns_r1rho_3site(M0=self.M0, M0_T=self.M0_T, r1rho_prime=self.r20_struct, omega=self.chemical_shifts, offset=self.offset, r1=self.r1, pA=pA, pB=pB, dw_AB=self.dw_AB_struct, dw_BC=self.dw_BC_struct, kex_AB=kex_AB, kex_BC=kex_BC, kex_AC=kex_AC, spin_lock_fields=self.spin_lock_omega1, relax_time=self.relax_times, inv_relax_time=self.inv_relax_times, back_calc=self.back_calc, num_points=self.num_disp_points)
+    def dfunc_MP05_fit_r1(self, params):
+        """Target function gradient for the Miloushev and Palmer (2005) R1rho off-resonance 2-site model, whereby R1 is fitted.
 
-        # Clean the data for all values, which is left over at the end of arrays.
-        self.back_calc = self.back_calc*self.disp_struct
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
-        if self.has_missing:
-            # Replace with values.
-            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_MP05_fit_r1)
 
-        # Return the total chi-squared value.
-        return chi2_rankN(self.values, self.back_calc, self.errors)
 
+    def dfunc_NOREX(self, params):
+        """Target function gradient for no exchange.
 
-    def calc_TAP03(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
-        """Calculation function for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model.
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        @keyword R1:            The R1 value.
-        @type R1:               list of float
-        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
-        @type r1rho_prime:      list of float
-        @keyword dw:            The chemical shift differences in ppm for each spin.
-        @type dw:               list of float
-        @keyword pA:            The population of state A.
-        @type pA:               float
-        @keyword kex:           The rate of exchange.
-        @type kex:              float
-        @return:                The chi-squared value.
-        @rtype:                 float
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_NOREX)
+
+
+    def dfunc_NOREX_R1RHO(self, params):
+        """Target function gradient for no exchange, for R1rho off resonance models.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
         """
 
-        # Reshape r1rho_prime to per experiment, spin and frequency.
-        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_NOREX_R1RHO)
 
-        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
-        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
 
-        # Back calculate the R1rho values.
-        r1rho_TAP03(r1rho_prime=self.r1rho_prime_struct, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=self.dw_struct, kex=kex, R1=R1, spin_lock_fields=self.spin_lock_omega1, spin_lock_fields2=self.spin_lock_omega1_squared, back_calc=self.back_calc)
+    def dfunc_NOREX_R1RHO_FIT_R1(self, params):
+        """Target function gradient for no exchange, for R1rho off resonance models, whereby R1 is fitted.
 
-        # Clean the data for all values, which is left over at the end of arrays.
-        self.back_calc = self.back_calc*self.disp_struct
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
-        if self.has_missing:
-            # Replace with values.
-            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_NOREX_R1RHO_FIT_R1)
 
-        # Return the total chi-squared value.
-        return chi2_rankN(self.values, self.back_calc, self.errors)
 
+    def dfunc_TAP03(self, params):
+        """Target function gradient for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model.
 
-    def calc_TP02(self, R1=None, r1rho_prime=None, dw=None, pA=None, kex=None):
-        """Calculation function for the Trott and Palmer (2002) R1rho off-resonance 2-site model.
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        @keyword R1:            The R1 value.
-        @type R1:               list of float
-        @keyword r1rho_prime:   The R1rho value for all states in the absence of exchange.
-        @type r1rho_prime:      list of float
-        @keyword dw:            The chemical shift differences in ppm for each spin.
-        @type dw:               list of float
-        @keyword pA:            The population of state A.
-        @type pA:               float
-        @keyword kex:           The rate of exchange.
-        @type kex:              float
-        @return:                The chi-squared value.
-        @rtype:                 float
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_TAP03)
+
+
+    def dfunc_TAP03_fit_r1(self, params):
+        """Target function gradient for the Trott, Abergel and Palmer (2003) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
         """
 
-        # Reshape r1rho_prime to per experiment, spin and frequency.
-        self.r1rho_prime_struct[:] = multiply.outer( r1rho_prime.reshape(self.NE, self.NS, self.NM), self.no_nd_ones )
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_TAP03_fit_r1)
 
-        # Convert dw from ppm to rad/s. Use the out argument, to pass directly to structure.
-        multiply( multiply.outer( dw.reshape(1, self.NS), self.nm_no_nd_ones ), self.frqs, out=self.dw_struct )
 
-        # Back calculate the R1rho values.
-        r1rho_TP02(r1rho_prime=self.r1rho_prime_struct, omega=self.chemical_shifts, offset=self.offset, pA=pA, dw=self.dw_struct, kex=kex, R1=R1, spin_lock_fields=self.spin_lock_omega1, spin_lock_fields2=self.spin_lock_omega1_squared, back_calc=self.back_calc)
+    def dfunc_TP02(self, params):
+        """Target function gradient for the Trott and Palmer (2002) R1rho off-resonance 2-site model.
 
-        # Clean the data for all values, which is left over at the end of arrays.
-        self.back_calc = self.back_calc*self.disp_struct
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
 
-        # For all missing data points, set the back-calculated value to the measured values so that it has no effect on the chi-squared value.
-        if self.has_missing:
-            # Replace with values.
-            self.back_calc[self.mask_replace_blank.mask] = self.values[self.mask_replace_blank.mask]
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_TP02)
 
-        # Return the total chi-squared value.
-        return chi2_rankN(self.values, self.back_calc, self.errors)
+
+    def dfunc_TP02_fit_r1(self, params):
+        """Target function gradient for the Trott and Palmer (2002) R1rho off-resonance 2-site model, whereby R1 is fitted.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_TP02_fit_r1)
+
+
+    def dfunc_TSMFK01(self, params):
+        """Target function gradient for the Tollinger et al. (2001) 2-site very-slow exchange model, range of microsecond to second time scale.
+
+        @param params:  The vector of parameter values.
+        @type params:   numpy rank-1 float array
+        @return:        The chi-squared gradient.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # Calculate and return the chi-squared gradient.
+        return self.calc_dchi2(params, self.derivs_TSMFK01)
 
 
     def experiment_type_setup(self):
@@ -2192,3 +3460,114 @@ class Dispersion:
 
         return back_calc_return
 
+
+    def param_index(self, start, end=None, pair=None):
+        """Return the parameter vector indices of a variable for all experiments, spins and frequencies.
+
+        For the stacked clusters, the indices are those of the parameter vector of a single spin.
+
+
+        @param start:   The index of the global parameter, or the first index of the parameter block.
+        @type start:    int
+        @keyword end:   The index after the end of the parameter block.  For global parameters, this should be None.
+        @type end:      None or int
+        @keyword pair:  For the interleaved R20A and R20B parameter block of the full models, the index of the R20A (0) or R20B (1) parameters.
+        @type pair:     None or int
+        @return:        The parameter indices.
+        @rtype:         numpy int array of rank [NE][NS][NM]
+        """
+
+        # The number of spins of the parameter vector.
+        NS = self.NS
+        if self.stacked:
+            NS = 1
+
+        # The global parameters.
+        if end is None:
+            return full([self.NE, self.NS, self.NM], start, int)
+
+        # The interleaved R20A and R20B parameters.
+        if pair is not None:
+            return arange(start, end).reshape(self.NE, NS, 2, self.NM)[:, :, pair] + zeros([self.NE, self.NS, self.NM], int)
+
+        # The spin specific parameters.
+        if end - start == NS:
+            return arange(start, end).reshape(1, NS, 1) + zeros([self.NE, self.NS, self.NM], int)
+
+        # The experiment, spin and frequency specific parameters.
+        return arange(start, end).reshape(self.NE, NS, self.NM) + zeros([self.NE, self.NS, self.NM], int)
+
+
+    def param_struct(self, params, start, end=None, pair=None):
+        """Convert the parameter values of a variable into a structure which broadcasts against the [NE][NS][NM][NO][ND] data structures.
+
+        @param params:  The vector of unscaled parameter values, the block of vectors of a grid search, or the vectors of the stacked clusters.
+        @type params:   numpy rank-1 or rank-2 float array
+        @param start:   The index of the global parameter, or the first index of the parameter block.
+        @type start:    int
+        @keyword end:   The index after the end of the parameter block.  For global parameters, this should be None.
+        @type end:      None or int
+        @keyword pair:  For the interleaved R20A and R20B parameter block of the full models, the index of the R20A (0) or R20B (1) parameters.
+        @type pair:     None or int
+        @return:        The parameter values, with the leading grid dimension [G] for a block of vectors.
+        @rtype:         numpy float array of rank [NE][NS][NM][1][1], [1][NS][1][1][1] or [1][1][1][1][1]
+        """
+
+        # The stacked clusters, with one parameter vector per spin.
+        if self.stacked:
+            # The global and spin specific parameters of each cluster.
+            if end is None or end - start == 1:
+                return params[:, start].reshape(1, self.NS, 1, 1, 1)
+
+            # The interleaved R20A and R20B parameters.
+            block = params[:, start:end]
+            if pair is not None:
+                block = block.reshape(self.NS, self.NE, 2, self.NM)[:, :, pair]
+
+            # The experiment and frequency specific parameters of each cluster.
+            return block.reshape(self.NS, self.NE, self.NM).transpose(1, 0, 2).reshape(self.NE, self.NS, self.NM, 1, 1)
+
+        # The grid dimension.
+        lead = params.shape[:-1]
+
+        # The global parameters.
+        if end is None:
+            return params[..., start].reshape(lead + (1, 1, 1, 1, 1))
+
+        # The interleaved R20A and R20B parameters.
+        if pair is not None:
+            return params[..., start:end].reshape(lead + (self.NE, self.NS, 2, self.NM))[..., pair, :].reshape(lead + (self.NE, self.NS, self.NM, 1, 1))
+
+        # The spin specific parameters.
+        if end - start == self.NS:
+            return params[..., start:end].reshape(lead + (1, self.NS, 1, 1, 1))
+
+        # The experiment, spin and frequency specific parameters.
+        return params[..., start:end].reshape(lead + (self.NE, self.NS, self.NM, 1, 1))
+
+
+    def stack_subset(self, index):
+        """Create the target function for a subset of the stacked clusters.
+
+        This is a shallow copy in which the spin dimension of all [NE][NS][NM][NO][ND] data structures is reduced to the selected clusters, so that the converged clusters of a lock-step optimisation no longer need to be evaluated.
+
+
+        @param index:   The indices of the subset of clusters.
+        @type index:    numpy rank-1 int array
+        @return:        The target function of the subset.
+        @rtype:         Dispersion instance
+        """
+
+        # A shallow copy, with the back-calculation method bound to the copy.
+        subset = copy(self)
+        subset.NS = len(index)
+        subset.stack_cache = None
+        subset.derivs = MethodType(self.derivs.__func__, subset)
+
+        # Reduce the spin dimension of the data structures.
+        for name, value in vars(self).items():
+            if isinstance(value, ndarray) and value.ndim >= 4 and value.shape[1] == self.NS:
+                setattr(subset, name, value[:, index])
+
+        # Return the target function of the subset.
+        return subset
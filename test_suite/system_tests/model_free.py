@@ -20,10 +20,11 @@
 ###############################################################################
 
 # Python module imports.
+from copy import deepcopy
 from math import pi
 import platform
 import numpy
-from os import path, sep, walk
+from os import F_OK, access, path, sep, walk
 from re import search
 import sys
 from tempfile import mkdtemp, mkstemp
@@ -34,7 +35,7 @@ from data_store import Relax_data_store; ds = Relax_data_store()
 import dep_check
 from pipe_control import pipes
 from pipe_control.interatomic import interatomic_loop
-from pipe_control.mol_res_spin import spin_loop
+from pipe_control.mol_res_spin import return_spin, spin_loop
 from lib.errors import RelaxError, RelaxMultiSpinIDError
 from lib.physical_constants import N15_CSA
 from lib.io import DummyFileObject, open_read_file
@@ -238,6 +239,122 @@ class Mf(SystemTestCase):
                 self.assertEqual(str(sub_obj1), str(sub_obj2))
 
 
+    def setup_sphere_data(self, name=None):
+        """Set up the synthetic sphere data for the dauvergne_protocol auto-analysis tests.
+
+        @keyword name:  The name of the data pipe and pipe bundle.
+        @type name:     str
+        """
+
+        # The data directory.
+        dir = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'model_free'+sep+'sphere'
+
+        # Reset relax.
+        self.interpreter.reset()
+
+        # Set up a data pipe and bundle.
+        self.interpreter.pipe.create(name, 'mf', bundle=name)
+
+        # Load the sequence.
+        self.interpreter.sequence.read(file='noe.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, sep=None, spin_id=None)
+
+        # Load the relaxation data.
+        self.interpreter.relax_data.read(ri_id='r1.500', ri_type='R1', frq=500000000.0, file='r1.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.read(ri_id='r2.500', ri_type='R2', frq=500000000.0, file='r2.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.read(ri_id='noe.500', ri_type='NOE', frq=500000000.0, file='noe.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.read(ri_id='r1.900', ri_type='R1', frq=900000000.0, file='r1.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.read(ri_id='r2.900', ri_type='R2', frq=900000000.0, file='r2.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.read(ri_id='noe.900', ri_type='NOE', frq=900000000.0, file='noe.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
+        self.interpreter.relax_data.peak_intensity_type(ri_id='noe.900', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='r2.900', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.900', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='noe.500', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='r2.500', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.500', type='height')
+        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.500', type='height')
+
+        # Set up the interatomic interactions.
+        self.interpreter.structure.read_pdb(file='sphere.pdb', dir=dir, read_mol=None, set_mol_name=None, read_model=None, set_model_num=None, alt_loc=None, verbosity=1, merge=False)
+        self.interpreter.structure.get_pos(spin_id=None, ave_pos=True)
+        self.interpreter.interatom.define(spin_id1='@N*', spin_id2='@H*', direct_bond=True, spin_selection=True, pipe=None)
+        self.interpreter.interatom.set_dist(spin_id1='@N*', spin_id2='@H*', ave_dist=1.02e-10, unit='meter')
+        self.interpreter.interatom.unit_vectors(ave=True)
+
+        # Set the CSA value.
+        self.interpreter.value.set(val=-0.000172, param='csa', index=0, spin_id='@N*', error=False, force=True)
+
+        # Set up the isotope information.
+        self.interpreter.spin.isotope(isotope='15N', spin_id='@N*', force=True)
+        self.interpreter.spin.isotope(isotope='1H', spin_id='@H*', force=True)
+
+        # Create a temporary directory for dumping files.
+        ds.tmpdir = mkdtemp()
+
+
+    def test_block_arrow_newton(self):
+        """Compare the block-arrow Newton minimisation of the 'all' model type, selected by the 'block-arrow' Hessian modification, to the dense minfx Newton minimisation."""
+
+        # Path of the files.
+        path = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'model_free'+sep+'S2_0.970_te_2048_Rex_0.149'
+
+        # Read the PDF file and set the vectors.
+        self.interpreter.structure.read_pdb(file='pdb', dir=path, read_model=1)
+
+        # Load all N spins.
+        self.interpreter.structure.load_spins('@N')
+
+        # Read the relaxation data.
+        self.interpreter.relax_data.read('R1_600',  'R1',  600.0*1e6, 'r1.600.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+        self.interpreter.relax_data.read('R2_600',  'R2',  600.0*1e6, 'r2.600.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+        self.interpreter.relax_data.read('NOE_600', 'NOE', 600.0*1e6, 'noe.600.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+        self.interpreter.relax_data.read('R1_500',  'R1',  500.0*1e6, 'r1.500.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+        self.interpreter.relax_data.read('R2_500',  'R2',  500.0*1e6, 'r2.500.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+        self.interpreter.relax_data.read('NOE_500', 'NOE', 500.0*1e6, 'noe.500.out', dir=path, res_num_col=1, res_name_col=2, data_col=3, error_col=4)
+
+        # Set up the diffusion tensor.
+        self.interpreter.diffusion_tensor.init(10e-9, fixed=False)
+
+        # Define the magnetic dipole-dipole relaxation interaction.
+        self.interpreter.structure.load_spins('@H')
+        self.interpreter.interatom.define(spin_id1='@N', spin_id2='@H', direct_bond=True)
+        self.interpreter.interatom.set_dist(spin_id1='@N', spin_id2='@H', ave_dist=1.02 * 1e-10)
+        self.interpreter.interatom.unit_vectors()
+
+        # Set up the spin parameters.
+        self.interpreter.value.set(N15_CSA, 'csa')
+        self.interpreter.value.set([0.9, 50 * 1e-12], ['s2', 'te'])
+
+        # Set the spin information.
+        self.interpreter.spin.isotope('15N', spin_id='@N')
+        self.interpreter.spin.isotope('1H', spin_id='@H')
+
+        # Select the model and optimise all parameters.
+        self.interpreter.model_free.select_model(model='m2')
+        self.interpreter.fix('all', fixed=False)
+
+        # The dense minfx Newton minimisation in a copy of the data pipe.
+        self.interpreter.pipe.copy(pipe_from='mf', pipe_to='dense')
+        self.interpreter.pipe.switch('dense')
+        self.interpreter.minimise.execute('newton', constraints=False)
+
+        # The block-arrow Newton minimisation.
+        self.interpreter.pipe.switch('mf')
+        self.interpreter.minimise.execute('newton', hessian_mod='block-arrow', constraints=False)
+
+        # Check the global minimum.
+        dense = pipes.get_pipe('dense')
+        self.assertAlmostEqual(cdp.chi2 / dense.chi2, 1.0, 5)
+        self.assertAlmostEqual(cdp.diff_tensor.tm / dense.diff_tensor.tm, 1.0, 5)
+
+        # Check the model-free parameters.
+        for spin, spin_id in spin_loop('@N', return_id=True):
+            if not spin.select:
+                continue
+            dense_spin = return_spin(spin_id=spin_id, pipe='dense')
+            self.assertAlmostEqual(spin.s2, dense_spin.s2, 5)
+            self.assertAlmostEqual(spin.te / dense_spin.te, 1.0, 4)
+
+
     def test_bug_14872_unicode_selection(self):
         """Test catching U{bug #14872<https://web.archive.org/web/https://gna.org/bugs/?14872>}, the unicode string selection failure as submitted by Olivier Serve."""
 
@@ -799,57 +916,84 @@ class Mf(SystemTestCase):
                 self.assert_(path.isfile(file_path))
 
 
-    def test_dauvergne_protocol_sphere(self):
-        """Catch a failure when loading relaxation data."""
-
-        # The data directory.
-        dir = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'model_free'+sep+'sphere'
+    def test_dauvergne_protocol_branches(self):
+        """Test the concurrent optimisation of the sphere and prolate diffusion models of the dauvergne_protocol, checking that the results of each model are in its own data pipe."""
 
-        # Reset relax.
-        self.interpreter.reset()
+        # Set up the data.
+        self.setup_sphere_data(name='branch test')
 
-        # Set up a data pipe and bundle.
-        self.interpreter.pipe.create('sphere test', 'mf', bundle='sphere test')
+        # The dauvergne_protocol model-free auto-analysis, the sphere and prolate models being optimised together through the held processor queue.
+        dAuvergne_protocol(pipe_name='branch test', pipe_bundle='branch test', results_dir=ds.tmpdir, diff_model=['local_tm', 'sphere', 'prolate'], mf_models=['m1', 'm2'], local_tm_models=['tm0', 'tm1'], grid_inc=3, diff_tensor_grid_inc={'sphere': 5, 'prolate': 5, 'oblate': 5, 'ellipsoid': 3}, min_algor='newton', mc_sim_num=2, max_iter=1, conv_loop=True)
 
-        # Load the sequence.
-        self.interpreter.sequence.read(file='noe.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, sep=None, spin_id=None)
+        # Loop over the final data pipes of the two models.
+        for model, diff_type in [['sphere', 'sphere'], ['prolate', 'spheroid']]:
+            # Switch to the data pipe.
+            self.interpreter.pipe.switch("aic - %s - branch test" % model)
+            self.assertEqual(cdp.diff_tensor.type, diff_type)
 
-        # Load the relaxation data.
-        self.interpreter.relax_data.read(ri_id='r1.500', ri_type='R1', frq=500000000.0, file='r1.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.read(ri_id='r2.500', ri_type='R2', frq=500000000.0, file='r2.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.read(ri_id='noe.500', ri_type='NOE', frq=500000000.0, file='noe.500.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.read(ri_id='r1.900', ri_type='R1', frq=900000000.0, file='r1.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.read(ri_id='r2.900', ri_type='R2', frq=900000000.0, file='r2.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.read(ri_id='noe.900', ri_type='NOE', frq=900000000.0, file='noe.900.out', dir=dir, spin_id_col=None, mol_name_col=1, res_num_col=2, res_name_col=3, spin_num_col=4, spin_name_col=5, data_col=6, error_col=7, sep=None, spin_id=None)
-        self.interpreter.relax_data.peak_intensity_type(ri_id='noe.900', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='r2.900', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.900', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='noe.500', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='r2.500', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.500', type='height')
-        self.interpreter.relax_data.peak_intensity_type(ri_id='r1.500', type='height')
+            # The results files of the model.
+            self.assert_(access(ds.tmpdir+sep+model+sep+'round_1'+sep+'opt'+sep+'results.bz2', F_OK))
 
-        # Set up the interatomic interactions.
-        self.interpreter.structure.read_pdb(file='sphere.pdb', dir=dir, read_mol=None, set_mol_name=None, read_model=None, set_model_num=None, alt_loc=None, verbosity=1, merge=False)
-        self.interpreter.structure.get_pos(spin_id=None, ave_pos=True)
-        self.interpreter.interatom.define(spin_id1='@N*', spin_id2='@H*', direct_bond=True, spin_selection=True, pipe=None)
-        self.interpreter.interatom.set_dist(spin_id1='@N*', spin_id2='@H*', ave_dist=1.02e-10, unit='meter')
-        self.interpreter.interatom.unit_vectors(ave=True)
+            # The stored chi-squared value must match that of the data pipe's own parameters.
+            chi2 = cdp.chi2
+            self.interpreter.minimise.calculate()
+            self.assertAlmostEqual(cdp.chi2 / chi2, 1.0, 7)
 
-        # Set the CSA value.
-        self.interpreter.value.set(val=-0.000172, param='csa', index=0, spin_id='@N*', error=False, force=True)
 
-        # Set up the isotope information.
-        self.interpreter.spin.isotope(isotope='15N', spin_id='@N*', force=True)
-        self.interpreter.spin.isotope(isotope='1H', spin_id='@H*', force=True)
+    def test_dauvergne_protocol_sphere(self):
+        """Catch a failure when loading relaxation data."""
 
-        # Create a temporary directory for dumping files.
-        ds.tmpdir = mkdtemp()
+        # Set up the data.
+        self.setup_sphere_data(name='sphere test')
 
         # The dauvergne_protocol model-free auto-analysis.
         dAuvergne_protocol(pipe_name='sphere test', pipe_bundle='sphere test', results_dir=ds.tmpdir, diff_model=['local_tm', 'sphere'], mf_models=['m1', 'm2'], local_tm_models=['tm0', 'tm1'], grid_inc=3, diff_tensor_grid_inc={'sphere': 5, 'prolate': 5, 'oblate': 5, 'ellipsoid': 3}, min_algor='newton', mc_sim_num=2, max_iter=1, conv_loop=True)
 
 
+    def test_dauvergne_protocol_warm_start(self):
+        """Test the warm start of the model-free models between the rounds of the dauvergne_protocol, in which the grid searches are skipped."""
+
+        # Record the outcome of each warm start, together with the stored and the set spin values.
+        class Protocol(dAuvergne_protocol):
+            calls = []
+            def warm_start(self, model):
+                flag = dAuvergne_protocol.warm_start(self, model)
+                stored, current = {}, {}
+                if flag:
+                    stored = deepcopy(self.mf_cache[(self.diff_model, model)].spins)
+                    for spin_id in stored:
+                        spin = return_spin(spin_id)
+                        current[spin_id] = dict((param, getattr(spin, param)) for param in stored[spin_id])
+                Protocol.calls.append([self.round, model, flag, stored, current])
+                return flag
+
+        # Set up the data.
+        self.setup_sphere_data(name='warm start test')
+
+        # The dauvergne_protocol model-free auto-analysis, with a tolerance so large that the warm start is always used.
+        protocol = Protocol(pipe_name='warm start test', pipe_bundle='warm start test', results_dir=ds.tmpdir, diff_model=['local_tm', 'sphere'], mf_models=['m1', 'm2'], local_tm_models=['tm0', 'tm1'], grid_inc=3, diff_tensor_grid_inc={'sphere': 5, 'prolate': 5, 'oblate': 5, 'ellipsoid': 3}, min_algor='newton', mc_sim_num=2, max_iter=1, conv_loop=True, warm_start_tol=1e10)
+
+        # The optimised values of both models have been stored by warm_start_store().
+        self.assertEqual(sorted(protocol.mf_cache.keys()), [('sphere', 'm1'), ('sphere', 'm2')])
+        for key in protocol.mf_cache:
+            self.assertEqual(len(protocol.mf_cache[key].diff_vals), 1)
+            self.assert_(len(protocol.mf_cache[key].spins))
+
+        # The first round performs the grid searches, as there are no stored values.
+        self.assert_(len(Protocol.calls) >= 4)
+        for round, model, flag, stored, current in Protocol.calls:
+            if round == 1:
+                self.assertEqual(flag, False)
+
+        # The later rounds skip the grid searches, the spins starting from the stored values.
+        later = [call for call in Protocol.calls if call[0] > 1]
+        self.assert_(len(later))
+        for round, model, flag, stored, current in later:
+            self.assertEqual(flag, True)
+            self.assert_(len(stored))
+            self.assertEqual(current, stored)
+
+
     def test_generate_ri(self):
         """Back-calculate relaxation data."""
 
@@ -36,15 +36,16 @@ from auto_analyses import relax_disp
 from auto_analyses.relax_disp_repeat_cpmg import DIC_KEY_FORMAT, Relax_disp_rep
 from data_store import Relax_data_store; ds = Relax_data_store()
 import dep_check
-from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_LIST, EXP_TYPE_R1RHO, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_IT99, MODEL_LIST_FULL, MODEL_LM63, MODEL_M61, MODEL_M61B, MODEL_MP05, MODEL_NOREX, MODEL_NS_CPMG_2SITE_3D_FULL, MODEL_NS_CPMG_2SITE_EXPANDED, MODEL_NS_CPMG_2SITE_STAR_FULL, MODEL_NS_R1RHO_2SITE, MODEL_PARAMS, MODEL_R2EFF, MODEL_TP02, MODEL_TAP03
+from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_LIST, EXP_TYPE_R1RHO, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_IT99, MODEL_LIST_FULL, MODEL_LM63, MODEL_M61, MODEL_M61B, MODEL_MMQ_CR72, MODEL_MP05, MODEL_NOREX, MODEL_NS_CPMG_2SITE_3D_FULL, MODEL_NS_CPMG_2SITE_EXPANDED, MODEL_NS_CPMG_2SITE_STAR_FULL, MODEL_NS_MMQ_2SITE, MODEL_NS_R1RHO_2SITE, MODEL_PARAMS, MODEL_R2EFF, MODEL_TP02, MODEL_TAP03, MODEL_TSMFK01
 from lib.errors import RelaxError
 from lib.io import extract_data, get_file_path
 from lib.spectrum.nmrpipe import show_apod_extract, show_apod_rmsd, show_apod_rmsd_dir_to_files, show_apod_rmsd_to_file
+from multi import Processor_box
 from pipe_control.mol_res_spin import generate_spin_string, return_spin, spin_loop
 from pipe_control.minimise import assemble_scaling_matrix
 from specific_analyses.relax_disp.checks import check_missing_r1
-from specific_analyses.relax_disp.estimate_r2eff import estimate_r2eff
-from specific_analyses.relax_disp.data import average_intensity, check_intensity_errors, generate_r20_key, get_curve_type, has_exponential_exp_type, loop_exp_frq, loop_exp_frq_offset_point, loop_spectrum_ids, loop_time, return_grace_file_name_ini, return_param_key_from_data, spin_ids_to_containers
+from specific_analyses.relax_disp.estimate_r2eff import estimate_r2eff, estimate_r2eff_bulk
+from specific_analyses.relax_disp.data import average_intensity, check_intensity_errors, generate_r20_key, get_curve_type, has_exponential_exp_type, interpolate_disp, loop_exp_frq, loop_exp_frq_offset_point, loop_spectrum_ids, loop_time, return_grace_file_name_ini, return_param_key_from_data, return_r2eff_arrays, spin_ids_to_containers
 from specific_analyses.relax_disp.data import INTERPOLATE_DISP, INTERPOLATE_OFFSET, X_AXIS_DISP, X_AXIS_W_EFF, X_AXIS_THETA, Y_AXIS_R2_R1RHO, Y_AXIS_R2_EFF
 from specific_analyses.relax_disp.model import models_info, nesting_param
 from specific_analyses.relax_disp.parameters import linear_constraints
@@ -81,6 +82,7 @@ class Relax_disp(SystemTestCase):
                 "test_bug_21344_sparse_time_spinlock_acquired_r1rho_fail_relax_disp",
                 "test_bug_24601_r2eff_missing_data",
                 "test_bug_9999_slow_r1rho_r2eff_error_with_mc",
+                "test_estimate_r2eff_bulk",
                 "test_estimate_r2eff_err",
                 "test_estimate_r2eff_err_auto",
                 "test_estimate_r2eff_err_methods",
@@ -136,6 +138,39 @@ class Relax_disp(SystemTestCase):
                 status.skipped_tests.append([methodName, 'matplotlib module', self._skip_type])
 
 
+    def check_stacked_disp_curves(self):
+        """Check that the stacked back calculation of the interpolated dispersion curves of all selected spins, as used for plotting, matches the back calculation of each spin alone."""
+
+        # The selected spins.
+        spins = []
+        spin_ids = []
+        for spin, spin_id in spin_loop(return_id=True, skip_desel=True):
+            spins.append(spin)
+            spin_ids.append(spin_id)
+
+        # Loop over the spins.
+        stacked_back_calc = None
+        for si in range(len(spins)):
+            # The relaxation times.
+            values, errors, missing, frqs, frqs_H, exp_types, relax_times = return_r2eff_arrays(spins=[spins[si]], spin_ids=[spin_ids[si]], fields=cdp.spectrometer_frq_list, field_count=cdp.spectrometer_frq_count)
+
+            # Back calculate the curves of all spins together for the first spin, as the plotting does.
+            if stacked_back_calc == None:
+                stacked_back_calc = interpolate_disp(spin=spins[si], spin_id=spin_ids[si], si=si, num_points=20, extend_hz=500.0, relax_times=relax_times, stack_spins=spins, stack_spin_ids=spin_ids)[1]
+
+            # Back calculate the curves of the spin alone.
+            back_calc = interpolate_disp(spin=spins[si], spin_id=spin_ids[si], si=si, num_points=20, extend_hz=500.0, relax_times=relax_times)[1]
+
+            # Compare the curves, which must not contain the fill value of the non-finite values.
+            for ei in range(len(back_calc)):
+                for mi in range(len(back_calc[ei][0])):
+                    for oi in range(len(back_calc[ei][0][mi])):
+                        self.assertEqual(len(stacked_back_calc[ei][si][mi][oi]), len(back_calc[ei][0][mi][oi]))
+                        for value, stacked_value in zip(back_calc[ei][0][mi][oi], stacked_back_calc[ei][si][mi][oi]):
+                            self.assert_(stacked_value < 1e100)
+                            self.assertAlmostEqual(stacked_value, value, 8)
+
+
     def setUp(self):
         """Set up for all the functional tests."""
 
@@ -3465,6 +3500,73 @@ class Relax_disp(SystemTestCase):
         #self.assert_(pre_chi2 < test)
 
 
+    def test_estimate_r2eff_bulk(self):
+        """Test the storage in the spin containers of the R2eff values and errors from the bulk exponential curve fitting of all spins.
+
+        The values and errors are compared to the individual minfx curve fitting of the Kjaergaard et al., 2013 data, and the chi-squared values, function counts and warnings to those of the individual curves.
+        """
+
+        # Define data path.
+        prev_data_path = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'dispersion'+sep+'Kjaergaard_et_al_2013' +sep+ "check_graphs" +sep+ "mc_2000"  +sep+ "R2eff"
+
+        # Create the pipe and read the results.
+        self.interpreter.pipe.create('minfx', 'relax_disp')
+        self.interpreter.results.read(prev_data_path + sep + 'results')
+
+        # Delete the old errors.
+        for cur_spin in spin_loop(skip_desel=True):
+            delattr(cur_spin, 'r2eff_err')
+            delattr(cur_spin, 'i0_err')
+
+        # Set the model.
+        self.interpreter.relax_disp.select_model(MODEL_R2EFF)
+
+        # The reference values from the individual curve fitting.
+        self.interpreter.relax_disp.r2eff_estimate(method='minfx', verbosity=0)
+
+        # The bulk fitting in a copy of the data pipe.
+        self.interpreter.pipe.copy(pipe_from='minfx', pipe_to='bulk')
+        self.interpreter.pipe.switch(pipe_name='bulk')
+        self.interpreter.relax_disp.r2eff_estimate(method='bulk', verbosity=0)
+
+        # Loop over the spins.
+        for cur_spin, spin_id in spin_loop(return_id=True, skip_desel=True):
+            # The reference spin.
+            ref_spin = return_spin(spin_id=spin_id, pipe='minfx')
+
+            # Loop over the curves.
+            chi2 = 0.0
+            num = 0
+            for exp_type, frq, offset, point in loop_exp_frq_offset_point():
+                # The parameter key.
+                param_key = return_param_key_from_data(exp_type=exp_type, frq=frq, offset=offset, point=point)
+                num += 1
+
+                # The values and errors.
+                self.assertAlmostEqual(cur_spin.r2eff[param_key] / ref_spin.r2eff[param_key], 1.0, 5)
+                self.assertAlmostEqual(cur_spin.i0[param_key] / ref_spin.i0[param_key], 1.0, 5)
+                self.assertAlmostEqual(cur_spin.r2eff_err[param_key] / ref_spin.r2eff_err[param_key], 1.0, 4)
+                self.assertAlmostEqual(cur_spin.i0_err[param_key] / ref_spin.i0_err[param_key], 1.0, 4)
+
+                # The chi-squared value of the curve from the stored parameters.
+                for time in loop_time(exp_type=exp_type, frq=frq, offset=offset, point=point):
+                    value = average_intensity(spin=cur_spin, exp_type=exp_type, frq=frq, offset=offset, point=point, time=time)
+                    error = average_intensity(spin=cur_spin, exp_type=exp_type, frq=frq, offset=offset, point=point, time=time, error=True)
+                    chi2 += ((value - cur_spin.i0[param_key] * math.exp(-cur_spin.r2eff[param_key] * time)) / error)**2
+
+            # The summed statistics of the converged curves.
+            self.assertAlmostEqual(cur_spin.chi2 / chi2, 1.0, 8)
+            self.assert_(cur_spin.f_count > num)
+            self.assertEqual(cur_spin.warning, None)
+
+        # Without any iterations, each curve is evaluated once at its starting position and is not converged.
+        estimate_r2eff_bulk(max_iterations=0, verbosity=0)
+        for cur_spin in spin_loop(skip_desel=True):
+            num = len(list(loop_exp_frq_offset_point()))
+            self.assertEqual(cur_spin.f_count, num)
+            self.assertEqual(cur_spin.warning, "Maximum number of iterations reached")
+
+
     def test_estimate_r2eff_err(self):
         """Test the user function for estimating R2eff errors from exponential curve fitting.
 
@@ -4394,6 +4496,35 @@ class Relax_disp(SystemTestCase):
         self.assertAlmostEqual(spin71.chi2, 5.51703791653689, 3)
 
 
+    def test_hansen_cpmg_data_stacked_curves_tsmfk01(self):
+        """Compare the stacked and per-spin back calculated dispersion curves of the TSMFK01 model for Dr. Flemming Hansen's CPMG data, with one spin at dw = 0.
+
+        This uses the data from Dr. Flemming Hansen's paper at http://dx.doi.org/10.1021/jp074793o.  This is CPMG data with a fixed relaxation time period.
+        """
+
+        # Base data setup.
+        self.setup_hansen_cpmg_data(model=MODEL_TSMFK01)
+
+        # Alias the spins.
+        spin70 = return_spin(spin_id=":70")
+        spin71 = return_spin(spin_id=":71")
+
+        # The R20 keys.
+        r20_key1 = generate_r20_key(exp_type=EXP_TYPE_CPMG_SQ, frq=500e6)
+        r20_key2 = generate_r20_key(exp_type=EXP_TYPE_CPMG_SQ, frq=800e6)
+
+        # Set the parameter values, with no exchange for the first spin.
+        spin70.r2a = {r20_key1: 7.0, r20_key2: 9.0}
+        spin70.dw = 0.0
+        spin70.k_AB = 10.0
+        spin71.r2a = {r20_key1: 5.0, r20_key2: 9.0}
+        spin71.dw = 4.0
+        spin71.k_AB = 12.0
+
+        # Check the curves.
+        self.check_stacked_disp_curves()
+
+
     def test_hansen_cpmg_data_to_cr72(self):
         """Optimisation of Dr. Flemming Hansen's CPMG data to the CR72 dispersion model.
 
@@ -5795,6 +5926,64 @@ class Relax_disp(SystemTestCase):
         self.assertAlmostEqual(spin.chi2/1000, 162.511988511609/1000, 3)
 
 
+    def test_korzhnev_2005_held_queue(self):
+        """Optimisation of two MMQ models of the Korzhnev et al., 2005 1H SQ and 1H MQ CPMG data together via the held processor queue.
+
+        The models are optimised in copies of the same data pipe, hence the attached protons found via the spin hashes are present in both data pipes.  This checks that the back-calculated R2eff values of the protons are stored in the data pipe of each model rather than in the current data pipe.
+        """
+
+        # Base data setup.
+        self.setup_korzhnev_2005_data(data_list=['1H SQ', '1H MQ'])
+
+        # Set up the models in copies of the data pipe.
+        models = [MODEL_MMQ_CR72, MODEL_NS_MMQ_2SITE]
+        for model in models:
+            self.interpreter.pipe.copy(pipe_from='Korzhnev et al., 2005', pipe_to=model)
+            self.interpreter.pipe.switch(model)
+            self.interpreter.relax_disp.select_model(model)
+
+            # Set the initial parameter values.
+            spin = return_spin(spin_id=":9@N")
+            spin.r2 = {}
+            for exp_type in [EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_CPMG_PROTON_MQ]:
+                for frq in [500e6, 600e6, 800e6]:
+                    spin.r2[generate_r20_key(exp_type=exp_type, frq=frq)] = 5.0
+            spin.pA = 0.94
+            spin.dw = 4.4
+            spin.dwH = -0.27
+            spin.kex = 400.0
+
+        # Optimise the models together, as in the auto-analysis.
+        processor = Processor_box().processor
+        processor.hold_queue()
+        try:
+            for model in models:
+                self.interpreter.pipe.switch(model)
+                self.interpreter.minimise.execute(min_algor='simplex', max_iter=10)
+        except:
+            processor.release_queue(run=False)
+            raise
+        processor.release_queue()
+
+        # The back-calculated R2eff values of the proton of each model.
+        r2eff_bc = {}
+        for model in models:
+            self.interpreter.pipe.switch(model)
+            r2eff_bc[model] = copy.deepcopy(return_spin(spin_id=":9@H").r2eff_bc)
+
+        # The models must differ.
+        self.assertNotEqual(r2eff_bc[models[0]], r2eff_bc[models[1]])
+
+        # Loop over the models, checking the values against a back-calculation from the optimised parameters of the data pipe.
+        for model in models:
+            self.interpreter.pipe.switch(model)
+            self.interpreter.minimise.calculate()
+            proton = return_spin(spin_id=":9@H")
+            self.assertEqual(sorted(r2eff_bc[model].keys()), sorted(proton.r2eff_bc.keys()))
+            for key in proton.r2eff_bc:
+                self.assertAlmostEqual(r2eff_bc[model][key], proton.r2eff_bc[key], 6)
+
+
     def test_kteilum_fmpoulsen_makke_check_graphs(self):
         """Check of all possible dispersion graphs from optimisation of Kaare Teilum, Flemming M Poulsen, Mikael Akke 2006 "acyl-CoA binding protein" CPMG data to the CR72 dispersion model.
 
@@ -8640,6 +8829,49 @@ class Relax_disp(SystemTestCase):
         self.assertAlmostEqual(spin137F.chi2, 13.859423588071, 1)
 
 
+    def test_tp02_data_stacked_curves_tp02(self):
+        """Compare the stacked and per-spin back calculated dispersion curves of the TP02 model for the 'TP02' test data, with one spin at dw = 0."""
+
+        # Reset.
+        self.interpreter.reset()
+
+        # Create the data pipe and load the base data.
+        data_path = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'dispersion'+sep+'r1rho_off_res_tp02'
+        self.interpreter.state.load(data_path+sep+'r2eff_values')
+
+        # The model data pipe.
+        pipe_name = "%s - relax_disp" % MODEL_TP02
+        self.interpreter.pipe.copy(pipe_from='base pipe', pipe_to=pipe_name, bundle_to='relax_disp')
+        self.interpreter.pipe.switch(pipe_name=pipe_name)
+
+        # Set the model.
+        self.interpreter.relax_disp.select_model(model=MODEL_TP02)
+
+        # Copy the data.
+        self.interpreter.value.copy(pipe_from='R2eff', pipe_to=pipe_name, param='r2eff')
+
+        # Alias the spins.
+        spin1 = cdp.mol[0].res[0].spin[0]
+        spin2 = cdp.mol[0].res[1].spin[0]
+
+        # The R20 keys.
+        r20_key1 = generate_r20_key(exp_type=EXP_TYPE_R1RHO, frq=500e6)
+        r20_key2 = generate_r20_key(exp_type=EXP_TYPE_R1RHO, frq=800e6)
+
+        # Set the parameter values, with no exchange for the first spin.
+        spin1.r2 = {r20_key1: 10.0, r20_key2: 15.0}
+        spin1.pA = 0.8
+        spin1.dw = 0.0
+        spin1.kex = 1100.0
+        spin2.r2 = {r20_key1: 12.0, r20_key2: 18.0}
+        spin2.pA = 0.8
+        spin2.dw = 9.0
+        spin2.kex = 1400.0
+
+        # Check the curves.
+        self.check_stacked_disp_curves()
+
+
     def test_tp02_data_to_ns_r1rho_2site(self, model=None):
         """Test the relaxation dispersion 'NS R1rho 2-site' model fitting against the 'TP02' test data."""
 
@@ -0,0 +1,104 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import arange, array, diag, dot, exp, random, sqrt, sum, tile, transpose
+from numpy.linalg import inv
+from unittest import TestCase
+
+# relax module imports.
+from lib.curve_fit.exponential import fit_exponential_2param_neg
+
+
+class Test_exponential(TestCase):
+    """Unit tests for the lib.curve_fit.exponential relax module."""
+
+    def setup_curves(self, noise=0.0):
+        """Create 50 random decay curves with between 3 and 8 time points.
+
+        @keyword noise: The standard deviation of the Gaussian noise added to the intensities.
+        @type noise:    float
+        @return:        The times, values, errors, mask, rates and initial intensities.
+        @rtype:         numpy rank-2 float array, numpy rank-2 float array, numpy rank-2 float array, numpy rank-2 bool array, numpy rank-1 float array, numpy rank-1 float array
+        """
+
+        # Fixed random numbers.
+        random.seed(10)
+
+        # The ragged curves.
+        times = tile(array([0.0, 0.02, 0.04, 0.06, 0.08, 0.1, 0.12, 0.16]), (50, 1))
+        mask = arange(8)[None, :] < random.randint(3, 9, 50)[:, None]
+        rates = 5.0 + 40.0 * random.rand(50)
+        i0 = 1e5 * (0.5 + random.rand(50))
+        errors = 2000.0 + 0.0 * times
+        values = i0[:, None] * exp(-rates[:, None] * times) + noise * random.randn(50, 8)
+
+        # Return the data.
+        return times, values, errors, mask, rates, i0
+
+
+    def test_fit_exponential_2param_neg_exact(self):
+        """Test that the fit_exponential_2param_neg() function recovers the parameters of noise free ragged curves."""
+
+        # The data.
+        times, values, errors, mask, rates, i0 = self.setup_curves()
+
+        # Fit.
+        params, param_errors, chi2, iter_count, f_count, converged = fit_exponential_2param_neg(times=times, values=values, errors=errors, mask=mask)
+
+        # Check.
+        self.assertTrue(converged.all())
+        for i in range(50):
+            self.assertAlmostEqual(params[i, 0] / rates[i], 1.0, 8)
+            self.assertAlmostEqual(params[i, 1] / i0[i], 1.0, 8)
+
+
+    def test_fit_exponential_2param_neg_noise(self):
+        """Test that the fit_exponential_2param_neg() function finds the chi-squared minima and covariance errors of noisy ragged curves."""
+
+        # The data.
+        times, values, errors, mask, rates, i0 = self.setup_curves(noise=2000.0)
+
+        # Fit.
+        params, param_errors, chi2, iter_count, f_count, converged = fit_exponential_2param_neg(times=times, values=values, errors=errors, mask=mask)
+
+        # Loop over the curves.
+        self.assertTrue(converged.all())
+        for i in range(50):
+            # The real data points.
+            t = times[i][mask[i]]
+            w = 1.0 / errors[i][mask[i]]**2
+            back_calc = params[i, 1] * exp(-params[i, 0] * t)
+            res = values[i][mask[i]] - back_calc
+
+            # The chi-squared value.
+            self.assertAlmostEqual(chi2[i] / sum(w * res**2), 1.0, 10)
+
+            # The Jacobian and the vanishing weighted gradient at the minimum, relative to the largest Jacobian element.
+            J = transpose(array([-t * back_calc, back_calc / params[i, 1]]))
+            grad = dot(transpose(J), w * res)
+            self.assertAlmostEqual(grad[0] / sqrt(sum(w * J[:, 0]**2)), 0.0, 6)
+            self.assertAlmostEqual(grad[1] / sqrt(sum(w * J[:, 1]**2)), 0.0, 6)
+
+            # The errors from the covariance matrix.
+            covar = inv(dot(transpose(J) * w, J))
+            self.assertAlmostEqual(param_errors[i, 0] / sqrt(diag(covar))[0], 1.0, 6)
+            self.assertAlmostEqual(param_errors[i, 1] / sqrt(diag(covar))[1], 1.0, 6)
@@ -0,0 +1,240 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import array, cos, ones, sin, zeros
+from unittest import TestCase
+
+# relax module imports.
+from lib.dispersion.b14 import r2eff_B14, r2eff_B14_derivs
+from lib.dispersion.cr72 import r2eff_CR72, r2eff_CR72_derivs
+from lib.dispersion.derivatives import variable
+from lib.dispersion.tsmfk01 import r2eff_TSMFK01_derivs
+
+
+class Test_derivatives(TestCase):
+    """Unit tests for the lib.dispersion.derivatives relax module."""
+
+    def setUp(self):
+        """Set up for all unit tests."""
+
+        # The parameter values {r20a, r20b, dw, pA, kex}, with dw in rad/s.
+        self.params = array([10.0, 15.0, 800.0, 0.9, 1200.0])
+
+        # The dispersion point data.
+        self.cpmg_frqs = array([50.0, 100.0, 300.0, 600.0, 1000.0])
+        relax_time = 0.04
+        self.ncyc = self.cpmg_frqs * relax_time
+        self.tcp = 0.25 / self.cpmg_frqs
+        self.inv_tcpmg = ones(5) / relax_time
+
+
+    def check_derivs(self, func, derivs):
+        """Compare the jet derivatives to the central finite differences of the model function.
+
+        @param func:    The function returning the back-calculated values for the given parameter values.
+        @type func:     function
+        @param derivs:  The function returning the jet for the given parameter values.
+        @type derivs:   function
+        """
+
+        # The jet at the parameter values.
+        jet = derivs(self.params)
+
+        # The values.
+        for i in range(5):
+            self.assertAlmostEqual(jet.value[i], func(self.params)[i])
+
+        # Loop over the variables.
+        for i in range(5):
+            # The step size.
+            h = 1e-6 * max(1.0, abs(self.params[i]))
+            step = zeros(5)
+            step[i] = h
+
+            # The finite differences.
+            grad = (func(self.params + step) - func(self.params - step)) / (2.0 * h)
+            hess = (derivs(self.params + step).d - derivs(self.params - step).d) / (2.0 * h)
+
+            # Check the first and second partial derivatives.
+            for j in range(5):
+                self.assertAlmostEqual(jet.d[i, j] / 100.0, grad[j] / 100.0, 6)
+                for k in range(5):
+                    self.assertAlmostEqual(jet.dd[k, i, j] / 100.0, hess[k, j] / 100.0, 5)
+
+
+    def jets(self, params):
+        """Create the jets of the variables.
+
+        @param params:  The parameter values {r20a, r20b, dw, pA, kex}.
+        @type params:   numpy rank-1 float array
+        @return:        The variables.
+        @rtype:         list of Jet instances
+        """
+
+        return [variable(params[i]*ones(5), index=i, num=5) for i in range(5)]
+
+
+    def test_b14_derivs(self):
+        """Check the r2eff_B14_derivs() partial derivatives against finite differences."""
+
+        # The model function.
+        def func(params):
+            back_calc = zeros(5)
+            r2eff_B14(r20a=params[0]*ones(5), r20b=params[1]*ones(5), pA=params[3], dw=params[2]*ones(5), dw_orig=params[2:3], kex=params[4], ncyc=self.ncyc, inv_tcpmg=self.inv_tcpmg, tcp=self.tcp, back_calc=back_calc)
+            return back_calc
+
+        # The derivatives.
+        def derivs(params):
+            r20a, r20b, dw, pA, kex = self.jets(params)
+            return r2eff_B14_derivs(r20a=r20a, r20b=r20b, pA=pA, dw=dw, kex=kex, ncyc=self.ncyc, inv_tcpmg=self.inv_tcpmg, tcp=self.tcp)
+
+        # Check.
+        self.check_derivs(func, derivs)
+
+
+    def test_cr72_derivs(self):
+        """Check the r2eff_CR72_derivs() partial derivatives against finite differences."""
+
+        # The model function.
+        def func(params):
+            back_calc = zeros(5)
+            r2eff_CR72(r20a=params[0]*ones(5), r20a_orig=params[0:1], r20b=params[1]*ones(5), r20b_orig=params[1:2], pA=params[3], dw=params[2]*ones(5), dw_orig=params[2:3], kex=params[4], cpmg_frqs=self.cpmg_frqs, back_calc=back_calc)
+            return back_calc
+
+        # The derivatives.
+        def derivs(params):
+            r20a, r20b, dw, pA, kex = self.jets(params)
+            return r2eff_CR72_derivs(r20a=r20a, r20b=r20b, pA=pA, dw=dw, kex=kex, cpmg_frqs=self.cpmg_frqs)
+
+        # Check.
+        self.check_derivs(func, derivs)
+
+
+    def test_jet_arithmetic(self):
+        """Check the Jet operators and functions for f(x, y) = x.y / (1 - x) + sqrt(y)**3."""
+
+        # The variables.
+        x = variable(array([0.3]), index=0, num=2)
+        y = variable(array([2.0]), index=1, num=2)
+
+        # The function.
+        f = x * y / (1.0 - x) + y.sqrt()**3
+
+        # The value.
+        self.assertAlmostEqual(f.value[0], 0.3*2.0/0.7 + 2.0**1.5)
+
+        # The first partial derivatives.
+        self.assertAlmostEqual(f.d[0, 0], 2.0/0.7**2)
+        self.assertAlmostEqual(f.d[1, 0], 0.3/0.7 + 1.5*2.0**0.5)
+
+        # The second partial derivatives.
+        self.assertAlmostEqual(f.dd[0, 0, 0], 2.0*2.0/0.7**3)
+        self.assertAlmostEqual(f.dd[0, 1, 0], 1.0/0.7**2)
+        self.assertAlmostEqual(f.dd[1, 0, 0], 1.0/0.7**2)
+        self.assertAlmostEqual(f.dd[1, 1, 0], 0.75*2.0**-0.5)
+
+
+    def test_jet_replace(self):
+        """Check the Jet replace() function for a constant fill value and for another jet."""
+
+        # The variables.
+        x = variable(array([1.0, 2.0, 3.0]), index=0, num=2)
+        y = variable(array([4.0, 5.0, 6.0]), index=1, num=2)
+        f = x * y
+        mask = array([True, False, False])
+
+        # The constant fill value.
+        g = f.replace(mask, 1e100)
+        self.assertEqual(list(g.value), [1e100, 10.0, 18.0])
+        self.assertEqual(list(g.d[:, 0]), [0.0, 0.0])
+        self.assertEqual(list(g.d[:, 1]), [5.0, 2.0])
+        self.assertEqual(g.dd[0, 1, 0], 0.0)
+        self.assertEqual(g.dd[0, 1, 1], 1.0)
+
+        # Another jet.
+        g = f.replace(mask, y)
+        self.assertEqual(list(g.value), [4.0, 10.0, 18.0])
+        self.assertEqual(list(g.d[:, 0]), [0.0, 1.0])
+        self.assertEqual(list(g.d[:, 2]), [6.0, 3.0])
+        self.assertEqual(g.dd[0, 1, 0], 0.0)
+        self.assertEqual(g.dd[0, 1, 2], 1.0)
+
+
+    def test_jet_sinc(self):
+        """Check the Jet sinc() function against the closed forms and the limits at zero."""
+
+        # The values, on both sides of the switch to the Taylor series.
+        x_values = [0.0, 1e-6, 0.009, 0.011, 0.5, -3.0]
+        f = variable(array(x_values), index=0, num=1).sinc()
+
+        # Loop over the values.
+        for i in range(len(x_values)):
+            x = x_values[i]
+
+            # The limits at zero.
+            if x == 0.0:
+                value, deriv, deriv2 = 1.0, 0.0, -1.0/3.0
+
+            # The Taylor series for tiny values.
+            elif abs(x) < 1e-4:
+                value, deriv, deriv2 = 1.0 - x**2/6.0, -x/3.0, -1.0/3.0 + x**2/10.0
+
+            # The closed forms.
+            else:
+                value = sin(x) / x
+                deriv = (cos(x) - value) / x
+                deriv2 = -value - 2.0 * deriv / x
+
+            # Check.
+            self.assertAlmostEqual(f.value[i], value, 14)
+            self.assertAlmostEqual(f.d[0, i], deriv, 12)
+            self.assertAlmostEqual(f.dd[0, 0, i], deriv2, 10)
+
+
+    def test_tsmfk01_derivs_dw_zero(self):
+        """Check the r2eff_TSMFK01_derivs() values and partial derivatives at dw = 0, where there is no exchange."""
+
+        # The variables {r20a, dw, k_AB}.
+        r20a = variable(10.0*ones(5), index=0, num=3)
+        dw = variable(zeros(5), index=1, num=3)
+        k_AB = variable(20.0*ones(5), index=2, num=3)
+
+        # The jet.
+        jet = r2eff_TSMFK01_derivs(r20a=r20a, dw=dw, k_AB=k_AB, tcp=self.tcp)
+
+        # Loop over the dispersion points.
+        for i in range(5):
+            # The flat R20 line.
+            self.assertEqual(jet.value[i], 10.0)
+
+            # The first partial derivatives.
+            self.assertEqual(jet.d[0, i], 1.0)
+            self.assertEqual(jet.d[1, i], 0.0)
+            self.assertEqual(jet.d[2, i], 0.0)
+
+            # The second partial derivatives, with only d2R2eff/ddw2 = k_AB.tcp^2/3 non-zero.
+            for j in range(3):
+                for k in range(3):
+                    if j == 1 and k == 1:
+                        self.assertAlmostEqual(jet.dd[j, k, i] / (20.0 * self.tcp[i]**2 / 3.0), 1.0, 14)
+                    else:
+                        self.assertEqual(jet.dd[j, k, i], 0.0)
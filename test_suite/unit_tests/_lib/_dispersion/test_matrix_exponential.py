@@ -21,7 +21,7 @@
 
 # Python module imports.
 from os import sep
-from numpy import complex64, load, sum
+from numpy import array, complex64, exp, eye, load, random, sum
 from unittest import TestCase
 
 # relax module imports.
@@ -92,6 +92,82 @@ class Test_matrix_exponential(TestCase):
         return M0, r20a, r20b, pA, dw, dwH, kex, inv_tcpmg, tcp, num_points, power, back_calc, pB, k_BA, k_AB
 
 
+    def test_matrix_exponential_closed_2_2(self):
+        """Test the closed form matrix_exponential() back end against the eigenvalue decomposition for the data of systemtest Relax_disp.test_korzhnev_2005_15n_dq_data."""
+
+        fname = self.data + sep+ "test_korzhnev_2005_15n_dq_data"
+        M0, R20A, R20B, pA, dw, dwH, kex, inv_tcpmg, tcp, num_points, power, back_calc, pB, k_BA, k_AB = self.return_data_mmq_2site(fname)
+
+        # The exchange matrices.
+        m1_mat = rmmq_2site_rankN(R20A=R20A, R20B=R20B, dw=dw, k_AB=k_AB, k_BA=k_BA, tcp=tcp)
+
+        # The two back ends.
+        eA_closed = matrix_exponential(m1_mat, method='closed')
+        eA_eig = matrix_exponential(m1_mat, method='eig')
+
+        # Check the maximum deviation.
+        self.assertAlmostEqual(abs(eA_closed - eA_eig).max(), 0.0, 12)
+
+
+    def test_matrix_exponential_pade(self):
+        """Test the Pade approximant matrix_exponential() back end against the eigenvalue decomposition for random exchange-like matrices of all sizes of the numeric models."""
+
+        # Fixed random numbers.
+        random.seed(100)
+
+        # Loop over the matrix sizes and real and complex data.
+        for X in [2, 3, 6, 7, 9]:
+            for complex_flag in [False, True]:
+                # Random matrices, with a decaying diagonal and norms from small to large.
+                A = random.randn(2, 3, 1, 4, X, X) * array([1e-3, 0.1, 10.0, 100.0])[None, None, None, :, None, None]
+                if complex_flag:
+                    A = A + 1j * random.randn(*A.shape)
+                A = A - 10.0 * eye(X)
+
+                # The two back ends.
+                eA_pade = matrix_exponential(A, method='pade')
+                eA_eig = matrix_exponential(A, method='eig')
+
+                # Check the maximum relative deviation.
+                self.assertAlmostEqual(abs(eA_pade - eA_eig).max() / abs(eA_eig).max(), 0.0, 11)
+
+
+    def test_matrix_exponential_pade_ns_cpmg_2site_3d(self):
+        """Test the Pade approximant matrix_exponential() back end against the eigenvalue decomposition for the data of systemtest Relax_disp.test_hansen_cpmg_data_to_ns_cpmg_2site_3D."""
+
+        fname = self.data + sep+ "test_hansen_cpmg_data_to_ns_cpmg_2site_3D"
+        r180x, M0, r10a, r10b, r20a, r20b, pA, dw, dw_orig, kex, inv_tcpmg, tcp, num_points, power, back_calc, pB, k_BA, k_AB = self.return_data_ns_cpmg_2site_3d(fname)
+
+        # The evolution matrix.
+        R_mat = rcpmg_3d_rankN(R1A=r10a, R1B=r10b, R2A=r20a, R2B=r20b, pA=pA, pB=pB, dw=dw, k_AB=k_AB, k_BA=k_BA, tcp=tcp)
+
+        # The two back ends.
+        eA_pade = matrix_exponential(R_mat, method='pade')
+        eA_eig = matrix_exponential(R_mat, method='eig')
+
+        # Check the maximum deviation.
+        self.assertAlmostEqual(abs(eA_pade - eA_eig).max(), 0.0, 12)
+
+
+    def test_matrix_exponential_repeated_eigenvalues(self):
+        """Test the closed form and Pade approximant matrix_exponential() back ends for defective matrices with repeated eigenvalues."""
+
+        # The Jordan block [[-1, 1], [0, -1]], with the exponential e^-1 [[1, 1], [0, 1]].
+        A = array([[-1.0, 1.0], [0.0, -1.0]]).reshape(1, 1, 1, 1, 2, 2)
+        eA_true = exp(-1.0) * array([[1.0, 1.0], [0.0, 1.0]])
+
+        # Check both back ends.
+        for method in ['closed', 'pade']:
+            eA = matrix_exponential(A, method=method)
+            self.assertAlmostEqual(abs(eA[0, 0, 0, 0] - eA_true).max(), 0.0, 14)
+
+        # The 3x3 Jordan block, with the exponential e^-1 [[1, 1, 1/2], [0, 1, 1], [0, 0, 1]].
+        A = array([[-1.0, 1.0, 0.0], [0.0, -1.0, 1.0], [0.0, 0.0, -1.0]]).reshape(1, 1, 1, 1, 3, 3)
+        eA_true = exp(-1.0) * array([[1.0, 1.0, 0.5], [0.0, 1.0, 1.0], [0.0, 0.0, 1.0]])
+        eA = matrix_exponential(A, method='pade')
+        self.assertAlmostEqual(abs(eA[0, 0, 0, 0] - eA_true).max(), 0.0, 14)
+
+
     def test_ns_cpmg_2site_3d_hansen_cpmg_data(self):
         """Test the matrix_exponential() function for higher dimensional data, and compare to matrix_exponential.  This uses the data from systemtest Relax_disp.test_hansen_cpmg_data_to_ns_cpmg_2site_3D."""
 
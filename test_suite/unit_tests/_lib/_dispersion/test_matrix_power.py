@@ -0,0 +1,70 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import eye, ndindex, random, zeros
+from numpy.linalg import matrix_power
+from unittest import TestCase
+
+# relax module imports.
+from lib.dispersion.matrix_power import matrix_power_rank_N
+
+
+class Test_matrix_power(TestCase):
+    """Unit tests for the lib.dispersion.matrix_power relax module."""
+
+    def test_matrix_power_rank_N(self):
+        """Test the matrix_power_rank_N() function against the numpy matrix_power() function for real and complex matrices."""
+
+        # Fixed random numbers.
+        random.seed(10)
+
+        # Loop over the matrix sizes and real and complex data.
+        for X in [2, 3, 7]:
+            for complex_flag in [False, True]:
+                # Random matrices of rank [NS][NM][NO][ND][X][X], scaled to be contracting, and random powers including zero.
+                data = random.randn(2, 2, 1, 5, X, X) / X
+                if complex_flag:
+                    data = data + 1j * random.randn(2, 2, 1, 5, X, X) / X
+                power = random.randint(0, 70, (2, 2, 1, 5))
+                power[0, 0, 0, 0] = 0
+
+                # The batched powers.
+                calc = matrix_power_rank_N(data, power)
+
+                # Compare each matrix.
+                for index in ndindex(power.shape):
+                    diff = abs(calc[index] - matrix_power(data[index], int(power[index])))
+                    self.assertAlmostEqual(diff.max(), 0.0, 12)
+
+
+    def test_matrix_power_rank_N_identity(self):
+        """Test that the matrix_power_rank_N() function returns the identity matrix when all powers are zero."""
+
+        # The data.
+        data = random.randn(3, 4, 4)
+
+        # The zero powers.
+        calc = matrix_power_rank_N(data, zeros(3, int))
+
+        # Check.
+        for i in range(3):
+            self.assertAlmostEqual(abs(calc[i] - eye(4)).max(), 0.0, 15)
@@ -22,6 +22,7 @@
 
 __all__ = [
     'test___init__',
+    'test_block_arrow',
     'test_kronecker_prod',
     'test_matrix_exponential'
 ]
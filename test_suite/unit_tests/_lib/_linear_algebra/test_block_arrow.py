@@ -0,0 +1,95 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import concatenate, dot, eye, float64, transpose, zeros
+from numpy.linalg import solve
+from numpy.random import RandomState
+from unittest import TestCase
+
+# relax module imports.
+from lib.errors import RelaxError
+from lib.linear_algebra.block_arrow import block_arrow_solve
+
+
+class Test_block_arrow(TestCase):
+    """Unit tests for the lib.linear_algebra.block_arrow relax module."""
+
+    def test_block_arrow_solve(self):
+        """Compare block_arrow_solve() to the solution of the full linear system."""
+
+        # The batches of diagonal blocks {number of blocks, block size}, including empty blocks.
+        rng = RandomState(10)
+        k = 4
+        batches = [[3, 2], [5, 0], [2, 3], [4, 1]]
+
+        # The random blocks, the diagonal blocks being positive definite.
+        A = 10.0 * eye(k) + rng.rand(k, k)
+        A = A + transpose(A)
+        a = rng.randn(k)
+        B = []
+        C = []
+        c = []
+        for num, n in batches:
+            B.append(rng.randn(num, n, k))
+            C.append(zeros((num, n, n), float64))
+            for i in range(num):
+                block = rng.randn(n, n)
+                C[-1][i] = dot(block, transpose(block)) + n * eye(n)
+            c.append(rng.randn(num, n))
+
+        # Assemble the full matrix and right hand side.
+        size = k + sum([num * n for num, n in batches])
+        matrix = zeros((size, size), float64)
+        matrix[0:k, 0:k] = A
+        index = k
+        for j in range(len(batches)):
+            for i in range(batches[j][0]):
+                n = batches[j][1]
+                matrix[index:index+n, 0:k] = B[j][i]
+                matrix[0:k, index:index+n] = transpose(B[j][i])
+                matrix[index:index+n, index:index+n] = C[j][i]
+                index += n
+        rhs = concatenate([a] + [c[j].flatten() for j in range(len(batches))])
+
+        # Solve both systems.
+        x, y = block_arrow_solve(A=A, B=B, C=C, a=a, c=c)
+        sol = solve(matrix, rhs)
+
+        # Check the solution.
+        self.assertEqual(len(y), len(batches))
+        result = concatenate([x] + [y[j].flatten() for j in range(len(batches))])
+        for i in range(size):
+            self.assertAlmostEqual(result[i], sol[i], 10)
+
+
+    def test_block_arrow_solve_singular(self):
+        """Check that singular diagonal blocks are caught by block_arrow_solve()."""
+
+        # The blocks, the second diagonal block being singular.
+        A = eye(2)
+        B = [zeros((2, 2, 2), float64)]
+        C = [zeros((2, 2, 2), float64)]
+        C[0][0] = eye(2)
+        c = [zeros((2, 2), float64)]
+
+        # Check the error.
+        self.assertRaises(RelaxError, block_arrow_solve, A=A, B=B, C=C, a=zeros(2, float64), c=c)
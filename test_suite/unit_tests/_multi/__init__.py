@@ -20,5 +20,9 @@
 ###############################################################################
 
 
-__all__ = ['test___init__'
+__all__ = ['test___init__',
+           'test_journal',
+           'test_pool_processor',
+           'test_profiler',
+           'test_uni_processor'
 ]
@@ -0,0 +1,172 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+from os import close, remove
+from os.path import getsize
+from struct import pack
+import sys
+from tempfile import mkstemp
+from unittest import TestCase
+
+# relax module imports.
+from lib.compat import StringIO
+from lib.errors import RelaxError
+from multi.journal import HEADER, MAGIC, Result_journal
+
+
+class Test_journal(TestCase):
+    """Unit tests for the multi.journal relax module."""
+
+    def setUp(self):
+        """Create an empty journal file."""
+
+        # The temporary file.
+        handle, self.tmpfile = mkstemp()
+        close(handle)
+
+
+    def tearDown(self):
+        """Delete the journal file."""
+
+        remove(self.tmpfile)
+
+
+    def test_corrupted_header(self):
+        """Test that a corrupted record header raises a RelaxError in multi.journal.Result_journal without deleting any records."""
+
+        # Write a record followed by a header with a bad marker.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 0), 'result 0')
+        journal.close()
+        file = open(self.tmpfile, 'ab')
+        file.write(pack(HEADER, b'XXXX', 5) + b'12345')
+        file.close()
+        size = getsize(self.tmpfile)
+
+        # Reopen.
+        self.assertRaises(RelaxError, Result_journal, file=self.tmpfile, context='pipe')
+
+        # The file is untouched.
+        self.assertEqual(getsize(self.tmpfile), size)
+
+
+    def test_record_and_reload(self):
+        """Test that records written by multi.journal.Result_journal are reloaded for the same context only."""
+
+        # Write some records.
+        journal = Result_journal(file=self.tmpfile, context='pipe A')
+        journal.record(('sim', 0), 'result 0')
+        journal.record(('sim', 1), 'result 1a')
+        journal.record(('sim', 1), 'result 1b')
+        journal.close()
+        journal = Result_journal(file=self.tmpfile, context='pipe B')
+        journal.record(('sim', 0), 'other')
+        journal.close()
+
+        # Reload.
+        journal = Result_journal(file=self.tmpfile, context='pipe A')
+        journal.close()
+
+        # Checks.
+        self.assertEqual(journal.fetch(('sim', 0)), ['result 0'])
+        self.assertEqual(journal.fetch(('sim', 1)), ['result 1a', 'result 1b'])
+        self.assertEqual(journal.fetch(('sim', 2)), None)
+
+
+    def test_truncated_header(self):
+        """Test that a crash within the header of the final record is handled by multi.journal.Result_journal."""
+
+        # Write a record and a partial header.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 0), 'result 0')
+        journal.file.write(MAGIC[:2])
+        journal.close()
+
+        # Reopen and append a new record.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 1), 'result 1')
+        journal.close()
+
+        # Reload and check.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.close()
+        self.assertEqual(journal.fetch(('sim', 0)), ['result 0'])
+        self.assertEqual(journal.fetch(('sim', 1)), ['result 1'])
+
+
+    def test_truncated_record(self):
+        """Test that a truncated final record from a crash is discarded by multi.journal.Result_journal."""
+
+        # Write two records.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 0), 'result 0')
+        journal.record(('sim', 1), 'result 1')
+        journal.close()
+
+        # Chop the end off the file.
+        file = open(self.tmpfile, 'r+b')
+        data = file.read()
+        file.seek(0)
+        file.truncate()
+        file.write(data[:-3])
+        file.close()
+
+        # Reopen and append a new record.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 2), 'result 2')
+        journal.close()
+
+        # Reload and check.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.close()
+        self.assertEqual(journal.fetch(('sim', 0)), ['result 0'])
+        self.assertEqual(journal.fetch(('sim', 1)), None)
+        self.assertEqual(journal.fetch(('sim', 2)), ['result 2'])
+
+
+    def test_unloadable_record(self):
+        """Test that a complete record which cannot be unpickled is skipped by multi.journal.Result_journal, keeping all following records."""
+
+        # Write a record, a complete but unloadable record, and another record.
+        journal = Result_journal(file=self.tmpfile, context='pipe')
+        journal.record(('sim', 0), 'result 0')
+        journal.file.write(pack(HEADER, MAGIC, 5) + b'12345')
+        journal.record(('sim', 1), 'result 1')
+        journal.close()
+        size = getsize(self.tmpfile)
+
+        # Reopen, catching the warning.
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            journal = Result_journal(file=self.tmpfile, context='pipe')
+            journal.close()
+            warning = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        # Checks.
+        self.assertTrue(warning.startswith('warning: skipping the unloadable record'))
+        self.assertEqual(journal.fetch(('sim', 0)), ['result 0'])
+        self.assertEqual(journal.fetch(('sim', 1)), ['result 1'])
+        self.assertEqual(getsize(self.tmpfile), size)
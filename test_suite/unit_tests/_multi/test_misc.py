@@ -0,0 +1,77 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+from numpy import array, float32, float64, int32
+from unittest import TestCase
+
+# relax module imports.
+from multi.misc import data_hash
+
+
+class Test_misc(TestCase):
+    """Unit tests for the multi.misc relax module."""
+
+    def test_data_hash_arrays(self):
+        """Test the multi.misc.data_hash() content hashes of numpy arrays."""
+
+        # Equal content gives equal hashes.
+        data = array([[1.0, 2.0], [3.0, 4.0]])
+        self.assertEqual(data_hash(data), data_hash(data.copy()))
+
+        # Different values.
+        self.assertNotEqual(data_hash(data), data_hash(array([[1.0, 2.0], [3.0, 5.0]])))
+
+        # The same buffer with different shapes.
+        self.assertNotEqual(data_hash(data), data_hash(data.reshape(4)))
+
+        # Different types.
+        self.assertNotEqual(data_hash(array([1, 2], int32)), data_hash(array([1.0, 2.0], float64)))
+        self.assertNotEqual(data_hash(array([1.0, 2.0], float32)), data_hash(array([1.0, 2.0], float64)))
+
+        # Object arrays are hashed by content.
+        obj = array([array([1.0]), 'a', None], dtype=object)
+        self.assertEqual(data_hash(obj), data_hash(array([array([1.0]), 'a', None], dtype=object)))
+        self.assertNotEqual(data_hash(obj), data_hash(array([array([2.0]), 'a', None], dtype=object)))
+
+
+    def test_data_hash_nested(self):
+        """Test the multi.misc.data_hash() content hashes of nested lists and tuples versus arrays."""
+
+        # Nested lists of arrays with equal content.
+        data = [[array([1.0, 2.0]), 3.0], [array([4.0])]]
+        self.assertEqual(data_hash(data), data_hash([[array([1.0, 2.0]), 3.0], [array([4.0])]]))
+
+        # Different nestings of the same values.
+        self.assertNotEqual(data_hash([[1.0, 2.0], [3.0]]), data_hash([[1.0], [2.0, 3.0]]))
+        self.assertNotEqual(data_hash([[1.0, 2.0], [3.0]]), data_hash([1.0, 2.0, 3.0]))
+        self.assertNotEqual(data_hash([[1.0, 2.0]]), data_hash([1.0, 2.0]))
+
+        # Lists, tuples and arrays of the same values.
+        self.assertNotEqual(data_hash([1.0, 2.0]), data_hash((1.0, 2.0)))
+        self.assertNotEqual(data_hash([1.0, 2.0]), data_hash(array([1.0, 2.0])))
+        self.assertNotEqual(data_hash([[1.0, 2.0], [3.0, 4.0]]), data_hash(array([[1.0, 2.0], [3.0, 4.0]])))
+        self.assertNotEqual(data_hash([array([1.0, 2.0])]), data_hash(array([[1.0, 2.0]])))
+
+        # Other objects are hashed from their pickled form.
+        self.assertEqual(data_hash({'a': 1}), data_hash({'a': 1}))
+        self.assertNotEqual(data_hash({'a': 1}), data_hash({'a': 2}))
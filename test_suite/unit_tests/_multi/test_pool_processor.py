@@ -0,0 +1,73 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+import multiprocessing
+import os
+import signal
+import time
+from unittest import TestCase, skipIf
+
+# relax module imports.
+from multi.pool_processor import Pool_processor
+
+
+class Test_pool_processor(TestCase):
+    """Unit tests for the multi.pool_processor relax module."""
+
+    def test_context_no_start_methods(self):
+        """Test the process context for Python versions without the multiprocessing start methods."""
+
+        # Remove the Python 3.4+ context functions.
+        get_context = getattr(multiprocessing, 'get_context', None)
+        if get_context is not None:
+            del multiprocessing.get_context
+
+        # The processor falls back to the plain multiprocessing module.
+        try:
+            processor = Pool_processor(processor_size=2, callback=None)
+            self.assertEqual(processor._context, multiprocessing)
+
+        # Restore the functions.
+        finally:
+            if get_context is not None:
+                multiprocessing.get_context = get_context
+
+
+    @skipIf(not hasattr(signal, 'SIGSTOP'), "Stopping processes is not supported.")
+    def test_kill_slave(self):
+        """Test the killing of a stopped slave process, without relying on the Python 3.7+ Process.kill() method."""
+
+        # The processor and a stopped slave.
+        processor = Pool_processor(processor_size=1, callback=None)
+        slave = multiprocessing.Process(target=time.sleep, args=(60,))
+        slave.start()
+        os.kill(slave.pid, signal.SIGSTOP)
+        processor._slaves = [slave]
+
+        # Kill the slave.
+        processor._kill_slave(1)
+        slave.join(10)
+        self.assertFalse(slave.is_alive())
+
+        # Killing a terminated slave does nothing.
+        processor._kill_slave(1)
@@ -0,0 +1,499 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+from math import ceil
+from numpy import array
+import sys
+import time
+from unittest import TestCase
+
+# relax module imports.
+from lib.compat import StringIO
+from multi.misc import Data_reference, data_hash
+from multi.multi_processor_base import Multi_processor
+from multi.processor import command_cost, Data_store
+from multi.result_commands import Batched_result_command
+from multi.slave_commands import Slave_cache_command, Slave_command
+
+
+class Cost_command(Slave_command):
+    """A slave command with a cost hint and cacheable data, which records its execution."""
+
+    cache_names = ['data']
+
+    def __init__(self, name=None, cost=1.0, data=None, log=None):
+        """Set up the command.
+
+        @keyword name:  The name of the command.
+        @type name:     str
+        @keyword cost:  The cost hint.
+        @type cost:     float
+        @keyword data:  The cacheable data.
+        @type data:     anything
+        @keyword log:   The list to append the slave rank, name and data to when executed.
+        @type log:      list
+        """
+
+        # Execute the base class __init__() method.
+        super(Cost_command, self).__init__()
+
+        # Store the arguments.
+        self.name = name
+        self._cost = cost
+        self.data = data
+        self.log = log
+
+
+    def cost(self):
+        """Return the cost hint."""
+
+        return self._cost
+
+
+    def run(self, processor, completed):
+        """Record the execution."""
+
+        self.log.append([processor.slave_rank, self.name, self.data])
+
+
+
+class Sim_slave(object):
+    """The simulated slave processor, holding its own data store."""
+
+    def __init__(self, rank):
+        """Set up the slave.
+
+        @param rank:    The rank of the slave.
+        @type rank:     int
+        """
+
+        self.slave_rank = rank
+        self.data_store = Data_store()
+        self.NULL_RESULT = None
+
+
+    def fetch_data(self, name=None):
+        """Fetch the data structure from the data store."""
+
+        return getattr(self.data_store, name)
+
+
+    def return_object(self, result):
+        """The results are not needed."""
+
+
+
+class Sim_processor(Multi_processor):
+    """A multi-processor in which the slaves are simulated on the master, executing the batches in the order sent.
+
+    Slaves can be set to have died, in which case self.slave_alive() returns False, or to be hung, and the batches sent to these are never executed.
+    """
+
+    def __init__(self, processor_size):
+        """Set up the processor.
+
+        @param processor_size:  The number of slaves.
+        @type processor_size:   int
+        """
+
+        # Execute the base class __init__() method.
+        super(Sim_processor, self).__init__(processor_size=processor_size, callback=None)
+
+        # Process the results immediately.
+        self.threaded_result_processing = False
+
+        # The slaves, and the batches sent and still to be executed.
+        self.slaves = {}
+        for rank in range(1, processor_size+1):
+            self.slaves[rank] = Sim_slave(rank)
+        self.sent = []
+        self.pending = []
+
+        # The ranks of the failed slaves.
+        self.dead = set()
+        self.hung = set()
+
+
+    def assert_on_master(self):
+        """The simulation is always on the master."""
+
+
+    def master_queue_command(self, command, dest):
+        """Hold the batch for execution by self.master_receive_result()."""
+
+        # Record the batch.
+        self.sent.append([dest, command])
+
+        # Failed slaves never return results.
+        if dest not in self.dead and dest not in self.hung:
+            self.pending.append([dest, command])
+
+
+    def master_receive_result(self, timeout=None):
+        """Execute the oldest batch on its slave, returning the batched result."""
+
+        # Nothing to receive, so wait for the timeout.
+        if not len(self.pending):
+            time.sleep(timeout)
+            return None
+
+        # The batch.
+        dest, batch = self.pending.pop(0)
+        slave = self.slaves[dest]
+
+        # Execute.
+        for i in range(len(batch)):
+            batch[i].restore_cached_data(slave)
+            batch[i].run(slave, i == len(batch)-1)
+
+        # The result.
+        result = Batched_result_command(processor=self, result_commands=[], io_data=[], timings=[0.0]*len(batch))
+        result.rank = dest
+        return result
+
+
+    def rank(self):
+        return 0
+
+
+    def slave_alive(self, rank):
+        """The simulated slaves are alive unless set to have died."""
+
+        return rank not in self.dead
+
+
+
+class Test_processor(TestCase):
+    """Unit tests for the multi.processor relax module."""
+
+    def test_cache_batch(self):
+        """Test the replacement of the cacheable data by references in Processor.cache_batch()."""
+
+        # The processor, as at the start of a command queue.
+        processor = Sim_processor(processor_size=2)
+        processor.slave_cache = {1: None, 2: None}
+
+        # The commands, two sharing the same data, one with unset data and one without cacheable data.
+        data_a = array([1.0, 2.0])
+        data_b = [array([3.0]), 4.0]
+        commands = [Cost_command(name='a', data=data_a), Cost_command(name='a copy', data=data_a.copy()), Cost_command(name='none'), Slave_command()]
+        key_a = 'cache_' + data_hash(data_a)
+        key_b = 'cache_' + data_hash(data_b)
+
+        # The first batch sent to slave 1, prepended by the data which clears the cache of the last queue.
+        batch = processor.cache_batch(commands, 1)
+        self.assertEqual(len(batch), 5)
+        self.assertTrue(isinstance(batch[0], Slave_cache_command))
+        self.assertTrue(batch[0].reset)
+        self.assertEqual(batch[0].names, [key_a])
+        self.assertTrue(batch[0].values[0] is data_a)
+
+        # The cacheable data has been replaced by references in copies of the commands.
+        for i in range(2):
+            self.assertTrue(batch[i+1] is not commands[i])
+            self.assertTrue(isinstance(batch[i+1].data, Data_reference))
+            self.assertEqual(batch[i+1].data.name, key_a)
+            self.assertEqual(batch[i+1].name, commands[i].name)
+
+        # Unset data is not cached, and commands without cacheable data are sent unmodified.
+        self.assertEqual(batch[3].data, None)
+        self.assertTrue(batch[4] is commands[3])
+
+        # The commands of the master are unmodified.
+        self.assertTrue(commands[0].data is data_a)
+        self.assertTrue(isinstance(commands[1].data, type(data_a)))
+
+        # The second batch sent to slave 1 only sends the unseen data, without clearing the cache.
+        batch = processor.cache_batch([Cost_command(name='a', data=data_a), Cost_command(name='b', data=data_b)], 1)
+        self.assertEqual(len(batch), 3)
+        self.assertFalse(batch[0].reset)
+        self.assertEqual(batch[0].names, [key_b])
+        self.assertEqual(batch[1].data.name, key_a)
+        self.assertEqual(batch[2].data.name, key_b)
+
+        # Nothing new to send.
+        batch = processor.cache_batch([Cost_command(name='b', data=data_b)], 1)
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch[0].data.name, key_b)
+        self.assertEqual(processor.slave_cache[1], set([key_a, key_b]))
+
+        # Slave 2 has its own cache.
+        batch = processor.cache_batch([Cost_command(name='a', data=data_a)], 2)
+        self.assertEqual(len(batch), 2)
+        self.assertTrue(batch[0].reset)
+        self.assertEqual(batch[0].names, [key_a])
+
+        # A new queue resends the data, clearing the old cache.
+        processor.slave_cache[1] = None
+        batch = processor.cache_batch([Cost_command(name='a', data=data_a)], 1)
+        self.assertEqual(len(batch), 2)
+        self.assertTrue(batch[0].reset)
+        self.assertEqual(batch[0].names, [key_a])
+        self.assertEqual(processor.slave_cache[1], set([key_a]))
+
+
+    def test_command_cost(self):
+        """Test the cost hints of single and batched commands returned by multi.processor.command_cost()."""
+
+        # Single commands.
+        self.assertEqual(command_cost(Cost_command(cost=3.5)), 3.5)
+        self.assertEqual(command_cost(Slave_command()), 1.0)
+        self.assertEqual(command_cost(object()), 1.0)
+
+        # Batches.
+        self.assertEqual(command_cost([Cost_command(cost=3.5), Slave_command(), Cost_command(cost=0.25)]), 4.75)
+        self.assertEqual(command_cost([]), 0)
+
+
+    def test_next_batch(self):
+        """Test the adaptive batch sizes of Processor.next_batch()."""
+
+        # The processor.
+        processor = Sim_processor(processor_size=2)
+        processor.batch_time = 1.0
+
+        # No timings yet, so single commands are sent, popped off the end.
+        queue = [Cost_command(name=repr(i)) for i in range(9)]
+        batch = processor.next_batch(queue)
+        self.assertEqual([command.name for command in batch], ['8'])
+        self.assertEqual(len(queue), 8)
+
+        # Fast commands are capped at the fair share of the remaining queue.
+        queue = [Cost_command(name=repr(i)) for i in range(9)]
+        batch = processor.next_batch(queue, time_per_cost=1e-6)
+        self.assertEqual([command.name for command in batch], ['8', '7', '6', '5'])
+        self.assertEqual(len(batch), int(ceil(8 / 2.0)))
+        batch = processor.next_batch(queue, time_per_cost=1e-6)
+        self.assertEqual([command.name for command in batch], ['4', '3'])
+        for name in ['2', '1', '0']:
+            batch = processor.next_batch(queue, time_per_cost=1e-6)
+            self.assertEqual([command.name for command in batch], [name])
+        self.assertEqual(queue, [])
+
+        # Slower commands are cut off at the batch time.
+        queue = [Cost_command(name=repr(i)) for i in range(9)]
+        batch = processor.next_batch(queue, time_per_cost=0.4)
+        self.assertEqual([command.name for command in batch], ['8', '7'])
+
+        # The cut off uses the cost hints.
+        queue = [Cost_command(name=repr(i)) for i in range(7)] + [Cost_command(name='x', cost=3.0), Cost_command(name='y', cost=0.5), Cost_command(name='z', cost=0.5)]
+        batch = processor.next_batch(queue, time_per_cost=0.3)
+        self.assertEqual([command.name for command in batch], ['z', 'y'])
+
+        # A single command longer than the batch time is still sent.
+        queue = [Cost_command(name=repr(i)) for i in range(9)]
+        batch = processor.next_batch(queue, time_per_cost=10.0)
+        self.assertEqual([command.name for command in batch], ['8'])
+
+
+    def test_requeue(self):
+        """Test the re-queueing of the commands of a failed batch by Processor.requeue(), up to the maximum number of retries."""
+
+        # The processor.
+        processor = Sim_processor(processor_size=2)
+        processor.max_retries = 2
+
+        # The commands.
+        queue = [Cost_command(name='a')]
+        batch = [Cost_command(name='b'), Cost_command(name='c')]
+        failures = {}
+
+        # Two retries.
+        for i in range(2):
+            self.assertTrue(processor.requeue(queue, batch, failures))
+            self.assertEqual([command.name for command in queue], ['a'] + ['b', 'c']*(i+1))
+            self.assertEqual(failures, {id(batch[0]): i+1, id(batch[1]): i+1})
+
+        # The maximum has been reached.
+        self.assertFalse(processor.requeue(queue, batch, failures))
+        self.assertEqual(len(queue), 5)
+        self.assertEqual(failures, {id(batch[0]): 2, id(batch[1]): 2})
+
+        # A batch with one command at the maximum is not re-queued.
+        self.assertFalse(processor.requeue(queue, [Cost_command(name='d'), batch[0]], failures))
+        self.assertEqual(len(queue), 5)
+
+
+    def test_run_command_queue(self):
+        """Test the longest first streaming of the commands to the slaves by Processor.run_command_queue()."""
+
+        # The processor.
+        processor = Sim_processor(processor_size=2)
+
+        # The commands, with mixed costs.
+        log = []
+        costs = [1.0, 8.0, 2.0, 5.0, 3.0, 7.0, 1.5, 4.0, 6.0, 0.5]
+        queue = [Cost_command(name=repr(cost), cost=cost, log=log) for cost in costs]
+
+        # Execute.
+        processor.run_command_queue(queue)
+
+        # All commands have been executed once.
+        self.assertEqual(sorted([float(name) for rank, name, data in log]), sorted(costs))
+
+        # The most expensive commands were sent first.
+        sent = []
+        for dest, batch in processor.sent:
+            sent += [command._cost for command in batch]
+        self.assertEqual(sent, sorted(costs, reverse=True))
+
+        # The first batches are single commands to each slave.
+        self.assertEqual(sorted([dest for dest, batch in processor.sent[:2]]), [1, 2])
+        self.assertEqual([len(batch) for dest, batch in processor.sent[:2]], [1, 1])
+
+        # No batch is larger than the fair share of the remaining queue.
+        remaining = len(costs)
+        for dest, batch in processor.sent:
+            remaining -= len(batch)
+            self.assertTrue(len(batch) <= max(1, int(ceil((remaining + len(batch) - 1) / 2.0))))
+
+        # Both slaves have been used.
+        self.assertEqual(set([rank for rank, name, data in log]), set([1, 2]))
+
+
+    def test_run_command_queue_cache(self):
+        """Test the slave data cache over two command queues of Processor.run_command_queue()."""
+
+        # The processor.
+        processor = Sim_processor(processor_size=2)
+
+        # The first queue, all commands sharing the same data.
+        log = []
+        data = array([1.0, 2.0, 3.0])
+        key = 'cache_' + data_hash(data)
+        queue = [Cost_command(name=repr(i), data=data, log=log) for i in range(6)]
+        processor.run_command_queue(queue)
+
+        # The slaves received the real data, the master commands are unmodified.
+        self.assertEqual(len(log), 6)
+        for rank, name, value in log:
+            self.assertEqual(list(value), [1.0, 2.0, 3.0])
+        for command in queue:
+            self.assertTrue(command.data is data)
+
+        # The data was sent only once to each slave, and is held in its cache.
+        for rank in [1, 2]:
+            stores = [command for dest, batch in processor.sent if dest == rank for command in batch if isinstance(command, Slave_cache_command)]
+            self.assertEqual(len(stores), 1)
+            self.assertTrue(stores[0].reset)
+            self.assertEqual(processor.slaves[rank].data_store.cached_data_names, [key])
+            self.assertTrue(hasattr(processor.slaves[rank].data_store, key))
+
+        # The second queue, with new data.
+        processor.sent = []
+        data2 = array([4.0])
+        key2 = 'cache_' + data_hash(data2)
+        queue = [Cost_command(name=repr(i), data=data2, log=log) for i in range(2)]
+        processor.run_command_queue(queue)
+
+        # The old data has been cleared from the slaves.
+        for dest, batch in processor.sent:
+            self.assertTrue(isinstance(batch[0], Slave_cache_command))
+            self.assertTrue(batch[0].reset)
+            self.assertEqual(processor.slaves[dest].data_store.cached_data_names, [key2])
+            self.assertFalse(hasattr(processor.slaves[dest].data_store, key))
+        self.assertEqual(list(log[-1][2]), [4.0])
+
+
+    def test_run_command_queue_dead_slave(self):
+        """Test the dropping of a dead slave and the re-queueing of its commands by Processor.run_command_queue()."""
+
+        # The processor with a dead slave.
+        processor = Sim_processor(processor_size=2)
+        processor.dead.add(2)
+
+        # Execute, catching the warning.
+        log = []
+        queue = [Cost_command(name=repr(i), log=log) for i in range(6)]
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            processor.run_command_queue(queue)
+            warning = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        # All commands have been executed once on the healthy slave.
+        self.assertEqual(sorted([name for rank, name, data in log]), [repr(i) for i in range(6)])
+        self.assertEqual(set([rank for rank, name, data in log]), set([1]))
+
+        # The dead slave has been dropped.
+        self.assertEqual(processor.dead_ranks, set([2]))
+        self.assertTrue(warning.startswith("Warning: the slave processor of rank 2 has failed as the process has died, its 1 commands have been re-queued."))
+
+        # The dead slave is not used in the next queue.
+        processor.sent = []
+        processor.run_command_queue([Cost_command(name='next', log=log)])
+        self.assertEqual([dest for dest, batch in processor.sent], [1])
+        self.assertEqual(log[-1][:2], [1, 'next'])
+
+
+    def test_run_command_queue_failed_slaves(self):
+        """Test the failures of Processor.run_command_queue() when no slaves remain or the retries are exhausted."""
+
+        # All slaves have died (with a short timeout for polling).
+        processor = Sim_processor(processor_size=2)
+        processor.dead.update([1, 2])
+        processor.slave_timeout = 0.01
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            self.assertRaises(Exception, processor.run_command_queue, [Cost_command(name=repr(i), log=[]) for i in range(4)])
+        finally:
+            sys.stderr = stderr
+        self.assertEqual(processor.dead_ranks, set([1, 2]))
+
+        # No retries are allowed.
+        processor = Sim_processor(processor_size=2)
+        processor.dead.add(2)
+        processor.slave_timeout = 0.01
+        processor.max_retries = 0
+        self.assertRaises(Exception, processor.run_command_queue, [Cost_command(name=repr(i), log=[]) for i in range(4)])
+
+
+    def test_run_command_queue_hung_slave(self):
+        """Test the dropping of a slave which has not been heard from within the slave timeout by Processor.run_command_queue()."""
+
+        # The processor with a hung slave.
+        processor = Sim_processor(processor_size=2)
+        processor.hung.add(1)
+        processor.slave_timeout = 0.05
+
+        # Execute, catching the warning.
+        log = []
+        queue = [Cost_command(name=repr(i), log=log) for i in range(6)]
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            processor.run_command_queue(queue)
+            warning = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+
+        # All commands have been executed once on the healthy slave.
+        self.assertEqual(sorted([name for rank, name, data in log]), [repr(i) for i in range(6)])
+        self.assertEqual(set([rank for rank, name, data in log]), set([2]))
+
+        # The hung slave has been dropped.
+        self.assertEqual(processor.dead_ranks, set([1]))
+        self.assertTrue("no response has been received within 0.05 seconds" in warning)
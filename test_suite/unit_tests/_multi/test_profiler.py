@@ -0,0 +1,109 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+###############################################################################
+
+
+# Python module imports.
+from json import loads
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+from unittest import TestCase
+
+# relax module imports.
+from multi.profiler import Command_profiler
+
+
+class Test_profiler(TestCase):
+    """Unit tests for the multi.profiler relax module."""
+
+    def setUp(self):
+        """Create a profile of two batches of commands."""
+
+        # The profiler.
+        self.profiler = Command_profiler(fabric='Test_processor', processors=2)
+
+        # Two batches.
+        self.profiler.add_batch(rank=1, names=['A', 'A'], serialise_time=0.2, command_bytes=[100, 120], round_trip=3.0, compute_times=[1.0, 1.5], result_bytes=50)
+        self.profiler.add_batch(rank=2, names=['B'], serialise_time=0.1, command_bytes=[200], round_trip=2.0, compute_times=[1.0], result_bytes=30)
+
+        # The queue and result processing.
+        self.profiler.add_queue(busy_time={1: 3.0, 2: 2.0}, total_time=4.0)
+        self.profiler.add_result_time(0.25)
+
+
+    def test_report(self):
+        """Test the statistics assembled by multi.profiler.Command_profiler.report()."""
+
+        # The report.
+        report = self.profiler.report()
+
+        # The summary.
+        self.assertEqual(report['summary']['commands'], 3)
+        self.assertAlmostEqual(report['summary']['serialise_time'], 0.3)
+        self.assertAlmostEqual(report['summary']['compute_time'], 3.5)
+        self.assertAlmostEqual(report['summary']['transfer_time'], 1.5)
+        self.assertEqual(report['summary']['command_bytes'], 420)
+        self.assertAlmostEqual(report['summary']['result_bytes'], 80.0)
+        self.assertAlmostEqual(report['summary']['result_time'], 0.25)
+
+        # The ranks.
+        self.assertAlmostEqual(report['ranks']['1']['idle_time'], 1.0)
+        self.assertAlmostEqual(report['ranks']['2']['utilisation'], 0.5)
+
+        # The command types.
+        self.assertEqual(report['command_types']['A']['count'], 2)
+        self.assertAlmostEqual(report['command_types']['A']['transfer_time'], 0.5)
+        self.assertEqual(report['command_types']['B']['command_bytes'], 200)
+
+
+    def test_write(self):
+        """Test the JSON and text output of multi.profiler.Command_profiler."""
+
+        # The JSON report.
+        file = StringIO()
+        self.profiler.write_json(file)
+        report = loads(file.getvalue())
+        self.assertEqual(len(report['commands']), 3)
+        self.assertEqual(report['summary']['fabric'], 'Test_processor')
+
+        # The text report.
+        file = StringIO()
+        self.profiler.write_text(file)
+        lines = file.getvalue().split('\n')
+        self.assertEqual(lines[0], "Processor fabric:             Test_processor (2 slaves)")
+        self.assertTrue(lines[-2].startswith("B "))
+
+
+    def test_write_no_sizes(self):
+        """Test the text output of multi.profiler.Command_profiler without the size measurements."""
+
+        # A profile without sizes.
+        profiler = Command_profiler(fabric='Test_processor', processors=1, sizes=False)
+        profiler.add_batch(rank=1, names=['A'], command_bytes=[0], round_trip=1.0, compute_times=[1.0])
+
+        # The text report.
+        file = StringIO()
+        profiler.write_text(file)
+        lines = file.getvalue().split('\n')
+        self.assertEqual(lines[7], "Commands sent:                not measured")
+        self.assertEqual(lines[8], "Results returned:             not measured")
@@ -0,0 +1,191 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+import threading
+import time
+from unittest import TestCase
+
+# relax module imports.
+from multi.memo import Memo
+from multi.result_commands import Result_command
+from multi.slave_commands import Slave_command
+from multi.thread_processor import Thread_processor
+
+
+class Rank_command(Slave_command):
+    """A slave command which returns the rank of the slave thread it runs on."""
+
+    def __init__(self, data=None):
+        """Set up the command.
+
+        @keyword data:  The data to send to the slave.
+        @type data:     list
+        """
+
+        # Execute the base class __init__() method.
+        super(Rank_command, self).__init__()
+
+        # Store the argument.
+        self.data = data
+
+
+    def run(self, processor, completed):
+        """Return the rank, the data and the command itself."""
+
+        # Give the other slave a chance to pick up commands.
+        time.sleep(0.01)
+
+        # Return the result.
+        processor.return_object(Rank_result_command(processor=processor, memo_id=self.memo_id, rank=processor.rank(), data=self.data, command=self, completed=False))
+
+
+
+class Rank_memo(Memo):
+    """The memo for storing the results on the master."""
+
+    def __init__(self):
+        """Initialise the result storage."""
+
+        self.results = []
+
+
+
+class Rank_result_command(Result_command):
+    """The result command storing the slave rank in the memo."""
+
+    def __init__(self, processor, memo_id=None, rank=None, data=None, command=None, completed=True):
+        """Store the slave results.
+
+        @param processor:   The slave processor object.
+        @type processor:    Processor instance
+        @keyword memo_id:   The ID of the corresponding memo object.
+        @type memo_id:      int
+        @keyword rank:      The rank of the slave.
+        @type rank:         int
+        @keyword data:      The data sent to the slave.
+        @type data:         list
+        @keyword command:   The slave command.
+        @type command:      Rank_command instance
+        @keyword completed: A flag saying if the calculation on the slave processor completed correctly.
+        @type completed:    bool
+        """
+
+        # Execute the base class __init__() method.
+        super(Rank_result_command, self).__init__(processor=processor, completed=completed, memo_id=memo_id)
+
+        # Store the arguments.
+        self.slave_rank = rank
+        self.data = data
+        self.command = command
+
+
+    def run(self, processor, memo):
+        """Store the results in the memo."""
+
+        memo.results.append([self.slave_rank, self.data, self.command])
+
+
+
+class Test_thread_processor(TestCase):
+    """Unit tests for the multi.thread_processor relax module."""
+
+    def test_run_command_queue(self):
+        """Test the execution of commands with memos on a pool of two slave threads, from pre_run() to exit()."""
+
+        # The processor and slave threads.
+        processor = Thread_processor(processor_size=2, callback=None)
+        processor.pre_run()
+        slaves = processor._slaves[:]
+        self.assertEqual(len(slaves), 2)
+        for slave in slaves:
+            self.assertTrue(slave.is_alive())
+
+        # Queue the commands.
+        commands = []
+        memos = []
+        for i in range(8):
+            commands.append(Rank_command(data=[i]))
+            memos.append(Rank_memo())
+            processor.add_to_queue(commands[-1], memos[-1])
+
+        # Execute.
+        processor.run_queue()
+
+        # The master rank and state are untouched by the slaves.
+        self.assertEqual(processor.rank(), 0)
+        self.assertTrue(processor.on_master())
+        self.assertFalse(processor.do_quit)
+        self.assertEqual(processor.result_list, None)
+
+        # Each command has been executed once on a slave, with the commands and data passed by reference.
+        ranks = set()
+        for i in range(8):
+            self.assertEqual(len(memos[i].results), 1)
+            rank, data, command = memos[i].results[0]
+            self.assertTrue(rank in [1, 2])
+            self.assertTrue(data is commands[i].data)
+            self.assertTrue(command is commands[i])
+            ranks.add(rank)
+        self.assertEqual(ranks, set([1, 2]))
+
+        # The utilisation of both slaves has been measured.
+        self.assertEqual(sorted(processor.utilisation.keys()), [1, 2])
+
+        # Exit, terminating the slaves.
+        self.assertRaises(SystemExit, processor.exit)
+        for slave in slaves:
+            self.assertFalse(slave.is_alive())
+        self.assertEqual(processor._slaves, [])
+
+        # The final results have all been ditched, and the slave exit has not touched the master state.
+        self.assertTrue(processor._result_queue.empty())
+        self.assertFalse(processor.do_quit)
+
+
+    def test_thread_state(self):
+        """Test that the slave loop attributes of multi.thread_processor.Thread_processor are specific to each thread."""
+
+        # The processor.
+        processor = Thread_processor(processor_size=1, callback=None)
+
+        # Modify the state in another thread.
+        def slave():
+            processor._state.rank = 1
+            processor.do_quit = True
+            processor.result_list = ['result']
+            processor.io_data = ['io']
+            state.append([processor.rank(), processor.do_quit, processor.result_list, processor.io_data, processor.on_slave()])
+        state = []
+        thread = threading.Thread(target=slave)
+        thread.start()
+        thread.join()
+
+        # The state of the other thread.
+        self.assertEqual(state, [[1, True, ['result'], ['io'], True]])
+
+        # The state of the master.
+        self.assertEqual(processor.rank(), 0)
+        self.assertFalse(processor.do_quit)
+        self.assertEqual(processor.result_list, None)
+        self.assertEqual(processor.io_data, None)
+        self.assertTrue(processor.on_master())
@@ -0,0 +1,148 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+
+# Python module imports.
+from unittest import TestCase
+
+# relax module imports.
+from multi.slave_commands import Slave_command
+from multi.uni_processor import Uni_processor
+
+
+class Record_command(Slave_command):
+    """A slave command which records its execution."""
+
+    def __init__(self, index=None, record=None):
+        """Set up the command.
+
+        @keyword index:     The index of the command.
+        @type index:        int
+        @keyword record:    The list to append the index to when executed.
+        @type record:       list of int
+        """
+
+        # Execute the base class __init__() method.
+        super(Record_command, self).__init__()
+
+        # Store the arguments.
+        self.index = index
+        self.record = record
+
+
+    def run(self, processor, completed):
+        """Record the execution."""
+
+        self.record.append(self.index)
+
+
+
+class Unpicklable_command(Record_command):
+    """A slave command which cannot be pickled."""
+
+    def __init__(self, index=None, record=None):
+        """Set up the command.
+
+        @keyword index:     The index of the command.
+        @type index:        int
+        @keyword record:    The list to append the index to when executed.
+        @type record:       list of int
+        """
+
+        # Execute the base class __init__() method.
+        super(Unpicklable_command, self).__init__(index=index, record=record)
+
+        # A lambda function cannot be pickled.
+        self.func = lambda: None
+
+
+
+class Test_uni_processor(TestCase):
+    """Unit tests for the multi.uni_processor relax module."""
+
+    def test_hold_queue(self):
+        """Test that the commands of a held queue accumulate over the run_queue() calls until release_queue()."""
+
+        # The processor.
+        processor = Uni_processor(processor_size=1, callback=None)
+        record = []
+
+        # Queue commands in two separate calculations.
+        processor.hold_queue()
+        processor.add_to_queue(Record_command(index=0, record=record))
+        processor.run_queue()
+        processor.add_to_queue(Record_command(index=1, record=record))
+        processor.run_queue()
+
+        # Nothing is executed until the release.
+        self.assertEqual(record, [])
+        processor.release_queue()
+        self.assertEqual(record, [0, 1])
+        self.assertFalse(processor.is_queued())
+
+
+    def test_release_queue_discard(self):
+        """Test that the commands of a held queue are discarded by release_queue(run=False)."""
+
+        # The processor.
+        processor = Uni_processor(processor_size=1, callback=None)
+        record = []
+
+        # Queue and discard a command.
+        processor.hold_queue()
+        processor.add_to_queue(Record_command(index=0, record=record))
+        processor.release_queue(run=False)
+        self.assertFalse(processor.is_queued())
+
+        # The queue runs normally again.
+        processor.add_to_queue(Record_command(index=1, record=record))
+        processor.run_queue()
+        self.assertEqual(record, [1])
+
+
+    def test_profile_no_pickling(self):
+        """Test that the commands are only pickled when profiling with the size measurements."""
+
+        # The processor.
+        processor = Uni_processor(processor_size=1, callback=None)
+        record = []
+
+        # No profiling.
+        processor.add_to_queue(Unpicklable_command(index=0, record=record))
+        processor.run_queue()
+        self.assertEqual(record, [0])
+
+        # Profiling of the timings only.
+        processor.profile_start(sizes=False)
+        processor.add_to_queue(Unpicklable_command(index=1, record=record))
+        processor.run_queue()
+        processor.profile_stop()
+        self.assertEqual(record, [0, 1])
+        self.assertEqual(len(processor.profiler.commands), 1)
+        self.assertEqual(processor.profiler.commands[0]['command_bytes'], 0)
+
+        # Profiling with the size measurements.
+        processor.profile_start()
+        processor.add_to_queue(Record_command(index=2, record=record))
+        processor.run_queue()
+        processor.profile_stop()
+        self.assertEqual(record, [0, 1, 2])
+        self.assertTrue(processor.profiler.commands[0]['command_bytes'] > 0)
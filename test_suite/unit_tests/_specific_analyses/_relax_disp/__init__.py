@@ -26,6 +26,7 @@ __all__ = [
     'test_checks',
     'test_data',
     'test_model',
+    'test_optimisation',
     'test_parameters',
     'test_variables',
 ]
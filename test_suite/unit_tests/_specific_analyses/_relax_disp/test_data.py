@@ -28,7 +28,7 @@ from data_store import Relax_data_store; ds = Relax_data_store()
 from math import atan, pi
 from pipe_control import state
 from pipe_control.mol_res_spin import get_spin_ids, return_spin
-from specific_analyses.relax_disp.data import calc_rotating_frame_params, count_relax_times, find_intensity_keys, get_curve_type, has_exponential_exp_type, loop_exp_frq, loop_exp_frq_offset, loop_exp_frq_offset_point, loop_exp_frq_offset_point_time, loop_time, return_offset_data, return_spin_lock_nu1
+from specific_analyses.relax_disp.data import calc_rotating_frame_params, clear_data_sets, count_relax_times, find_intensity_keys, get_curve_type, has_exponential_exp_type, loop_exp_frq, loop_exp_frq_offset, loop_exp_frq_offset_point, loop_exp_frq_offset_point_time, loop_time, return_data_set, return_offset_data, return_r2eff_arrays, return_spin_lock_nu1
 from status import Status; status = Status()
 from test_suite.unit_tests.base_classes import UnitTestCase
 
@@ -679,6 +679,46 @@ class Test_data(UnitTestCase):
                 count += 1
 
 
+    def test_return_data_set(self):
+        """Unit test of the return_data_set() function and the repacking of the Monte Carlo simulation values."""
+
+        # Load the state.
+        statefile = status.install_path + sep+'test_suite'+sep+'shared_data'+sep+'dispersion'+sep+'r1rho_off_res_tp02'+sep+'r2eff_values.bz2'
+        state.load_state(statefile, force=True)
+
+        # The spin cluster.
+        spin_ids = [':1@N', ':2@N']
+        spins = [return_spin(spin_id=spin_id) for spin_id in spin_ids]
+        fields = cdp.spectrometer_frq_list
+
+        # Create simulated R2eff/R1rho values, with one point missing.
+        for spin in spins:
+            spin.r2eff_sim = []
+            for i in range(2):
+                spin.r2eff_sim.append({})
+                for key in spin.r2eff:
+                    spin.r2eff_sim[i][key] = spin.r2eff[key] + i + 1.0
+        del spins[1].r2eff['r1rho_800.00000000_110.000_3000.000']
+
+        # The data set is compiled once for all simulations, but rebuilt for the normal data.
+        clear_data_sets()
+        data = return_data_set(spins=spins, spin_ids=spin_ids, fields=fields, sim_index=0)
+        self.assertEqual(id(data), id(return_data_set(spins=spins, spin_ids=spin_ids, fields=fields, sim_index=1)))
+        self.assertNotEqual(id(data), id(return_data_set(spins=spins, spin_ids=spin_ids, fields=fields)))
+
+        # Check the repacked values against the full assembly of the simulation data.
+        for sim_index in [None, 0, 1]:
+            values, errors, missing, frqs, frqs_H, exp_types, relax_times = return_r2eff_arrays(spins=spins, spin_ids=spin_ids, fields=fields, field_count=len(fields), sim_index=sim_index)
+            sim_values = data.return_values(sim_index=sim_index)
+            for exp_type, frq, offset, ei, mi, oi in loop_exp_frq_offset(return_indices=True):
+                for si in range(len(spins)):
+                    self.assertEqual(list(sim_values[ei][si][mi][oi]), list(values[ei][si][mi][oi]))
+                    self.assertEqual(list(data.missing[ei][si][mi][oi]), list(missing[ei][si][mi][oi]))
+
+        # The normal data must be unchanged by the repacking.
+        self.assertNotEqual(list(data.return_values()[0][0][0][0]), list(data.return_values(sim_index=0)[0][0][0][0]))
+
+
     def test_return_offset_data(self):
         """Unit test of the return_offset_data() function for R1rho setup.
 
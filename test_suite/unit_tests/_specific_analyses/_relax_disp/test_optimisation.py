@@ -0,0 +1,145 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import array, inf, sum, zeros
+
+# relax module imports.
+from specific_analyses.relax_disp.optimisation import grid_vectorised, simplex_lockstep
+from test_suite.unit_tests.base_classes import UnitTestCase
+
+
+class Test_optimisation(UnitTestCase):
+    """Unit tests for the functions of the specific_analyses.relax_disp.optimisation module."""
+
+    def quadratic(self, points):
+        """A quadratic target function for a block of points, with the minimum at [1, 2].
+
+        @param points:  The block of parameter vectors.
+        @type points:   numpy rank-2 float array
+        @return:        The function values.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # The function values.
+        return sum((points - array([1.0, 2.0]))**2, axis=1)
+
+
+    def quadratic_stacked(self, x, index):
+        """Independent quadratic target functions for a stack of problems, with the minima at [1.1, 2.3], [-3.2, 0.7] and [10.4, -4.1].
+
+        @param x:       The parameter vectors of the problems.
+        @type x:        numpy rank-2 float array
+        @param index:   The indices of the problems.
+        @type index:    numpy rank-1 int array
+        @return:        The function values.
+        @rtype:         numpy rank-1 float array
+        """
+
+        # The minima of the stacked problems.
+        minima = array([[1.1, 2.3], [-3.2, 0.7], [10.4, -4.1]])[index]
+
+        # The function values.
+        return sum((x - minima)**2 * array([1.0, 10.0]), axis=1)
+
+
+    def test_grid_vectorised(self):
+        """Test the vectorised grid search of the specific_analyses.relax_disp.optimisation.grid_vectorised() function, for blocks smaller than the grid."""
+
+        # The grid search.
+        params, chi2, count, warning = grid_vectorised(func=self.quadratic, num_incs=[5, 9], lower=[0.0, 0.0], upper=[2.0, 4.0], block_size=7)
+
+        # Check the results.
+        self.assertEqual(list(params), [1.0, 2.0])
+        self.assertEqual(chi2, 0.0)
+        self.assertEqual(count, 45)
+        self.assertEqual(warning, None)
+
+
+    def test_grid_vectorised_constraints(self):
+        """Test the specific_analyses.relax_disp.optimisation.grid_vectorised() function with the linear constraint x0 >= 1.5 and a single increment."""
+
+        # The grid search.
+        params, chi2, count, warning = grid_vectorised(func=self.quadratic, num_incs=[5, 1], lower=[0.0, 0.0], upper=[2.0, 4.0], A=array([[1.0, 0.0]]), b=array([1.5]), block_size=100)
+
+        # Check the results.
+        self.assertEqual(list(params), [1.5, 2.0])
+        self.assertEqual(chi2, 0.25)
+        self.assertEqual(count, 2)
+
+
+    def test_simplex_lockstep(self):
+        """Test the lock-step simplex optimisation of the specific_analyses.relax_disp.optimisation.simplex_lockstep() function against the optimisation of the first problem alone."""
+
+        # Optimise the stacked problems and the first problem alone.
+        params, chi2, iter_count, f_count, warnings = simplex_lockstep(func=self.quadratic_stacked, x0=zeros((3, 2)), func_tol=1e-20, max_iterations=10000)
+        params_1, chi2_1, iter_count_1, f_count_1, warnings_1 = simplex_lockstep(func=self.quadratic_stacked, x0=zeros((1, 2)), func_tol=1e-20, max_iterations=10000)
+
+        # Check the minima.
+        self.assertAlmostEqual(params[0, 0], 1.1, 7)
+        self.assertAlmostEqual(params[0, 1], 2.3, 7)
+        self.assertAlmostEqual(params[1, 0], -3.2, 7)
+        self.assertAlmostEqual(params[1, 1], 0.7, 7)
+        self.assertAlmostEqual(params[2, 0], 10.4, 7)
+        self.assertAlmostEqual(params[2, 1], -4.1, 7)
+        self.assertEqual(warnings, [None, None, None])
+
+        # The independent convergence of the first problem.
+        self.assertEqual(list(params[0]), list(params_1[0]))
+        self.assertEqual(chi2[0], chi2_1[0])
+        self.assertEqual(iter_count[0], iter_count_1[0])
+        self.assertEqual(f_count[0], f_count_1[0])
+
+
+    def test_simplex_lockstep_constraints(self):
+        """Test the specific_analyses.relax_disp.optimisation.simplex_lockstep() function with the linear constraint x0 >= 2 and the maximum number of iterations."""
+
+        # Optimise the stacked problems.
+        params, chi2, iter_count, f_count, warnings = simplex_lockstep(func=self.quadratic_stacked, x0=zeros((3, 2)) + 5.0, func_tol=1e-20, max_iterations=10000, A=array([[1.0, 0.0]]), b=array([2.0]))
+
+        # Check the constrained minima.
+        self.assertAlmostEqual(params[0, 0], 2.0, 5)
+        self.assertAlmostEqual(params[1, 0], 2.0, 5)
+        self.assertAlmostEqual(params[2, 0], 10.4, 7)
+        self.assertAlmostEqual(params[2, 1], -4.1, 7)
+
+        # Optimisation limited by the number of iterations.
+        params, chi2, iter_count, f_count, warnings = simplex_lockstep(func=self.quadratic_stacked, x0=zeros((3, 2)), max_iterations=10)
+        self.assertEqual(list(iter_count), [10, 10, 10])
+        self.assertEqual(warnings, ["Maximum number of iterations reached"]*3)
+
+
+    def test_simplex_lockstep_infeasible_start(self):
+        """Test the specific_analyses.relax_disp.optimisation.simplex_lockstep() function with the linear constraint x0 >= 2 and the second problem starting in the infeasible region."""
+
+        # Optimise the stacked problems.
+        params, chi2, iter_count, f_count, warnings = simplex_lockstep(func=self.quadratic_stacked, x0=array([[5.0, 5.0], [0.0, 0.0], [5.0, 5.0]]), func_tol=1e-20, max_iterations=10000, A=array([[1.0, 0.0]]), b=array([2.0]))
+
+        # The infeasible problem is not optimised.
+        self.assertEqual(list(params[1]), [0.0, 0.0])
+        self.assertEqual(chi2[1], inf)
+        self.assertEqual(iter_count[1], 0)
+        self.assertEqual(warnings, [None, "Infeasible start", None])
+
+        # The other problems are unaffected.
+        self.assertAlmostEqual(params[0, 0], 2.0, 5)
+        self.assertAlmostEqual(params[2, 0], 10.4, 7)
+        self.assertAlmostEqual(params[2, 1], -4.1, 7)
@@ -0,0 +1,329 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from math import pi
+from numpy import array, eye, float64, ndindex, zeros
+from numpy.linalg import solve
+from unittest import TestCase
+
+# relax module imports.
+from target_functions.mf import FIXED_DIFF_CACHE, FRQ_CACHE, Mf
+
+
+# The model-free models {equation, parameter types, parameter values}.
+MODELS = [
+    ['mf_orig', [], []],
+    ['mf_orig', ['s2'], [0.8]],
+    ['mf_orig', ['s2', 'te'], [0.8, 20e-12]],
+    ['mf_orig', ['s2', 'te', 'rex'], [0.8, 20e-12, 1.0 / (2.0*pi*600e6)**2]],
+    ['mf_orig', ['s2', 'te', 'rex', 'r', 'csa'], [0.8, 20e-12, 1.0 / (2.0*pi*600e6)**2, 1.02e-10, -172e-6]],
+    ['mf_ext', ['s2f', 'tf', 's2', 'ts'], [0.9, 10e-12, 0.8, 1.5e-9]]
+]
+
+# The relaxation data sets {labels, frequencies, remap table, NOE to R1 table}, the second having no R1 data for the first NOE.
+RI_SETS = [
+    [['R1', 'R2', 'NOE', 'R1', 'R2', 'NOE'], [600e6, 500e6], [0, 0, 0, 1, 1, 1], [None, None, 0, None, None, 3]],
+    [['R2', 'NOE', 'R1', 'R2', 'NOE'], [600e6, 800e6], [0, 0, 1, 1, 1], [None, None, None, None, 2]]
+]
+
+# The diffusion tensor parameters.
+DIFF_PARAMS = {
+    'sphere': [10e-9],
+    'spheroid': [10e-9, 5e6, 1.0, 2.0],
+    'ellipsoid': [10e-9, 5e6, 0.3, 1.0, 2.0, 0.5]
+}
+
+
+class Test_mf(TestCase):
+    """Unit tests for the target_functions.mf relax module."""
+
+    def check_stacking(self, diff_type=None, model_type=None):
+        """Compare the target function, gradient, Hessian, and Jacobian of a set of spins to the sum of those of the individual spins.
+
+        The spins sharing the same model are stacked and evaluated together, whereas the single spin targets are each evaluated alone.
+
+
+        @keyword diff_type:     The diffusion tensor type.
+        @type diff_type:        str
+        @keyword model_type:    The model type, either 'diff' or 'all'.
+        @type model_type:       str
+        """
+
+        # The spins {model index, relaxation data index}, interleaving the models so that the groups are not contiguous.
+        spins = []
+        for i in range(3):
+            for j in range(len(MODELS)):
+                spins.append([j, (i + j) % 2])
+
+        # Set up the target functions.
+        mf, x = self.setup_target(diff_type=diff_type, model_type=model_type, spins=spins)
+        chi2 = mf.func(x)
+        grad = mf.dfunc(x)
+        hess = mf.d2func(x)
+        jacobian = mf.lm_dri()
+
+        # The sums over the single spin target functions.
+        num_diff = len(DIFF_PARAMS[diff_type])
+        chi2_sum = 0.0
+        grad_sum = zeros(len(x), float64)
+        hess_sum = zeros((len(x), len(x)), float64)
+        jacobian_sum = zeros(jacobian.shape, float64)
+        param_index = num_diff
+        ri_index = 0
+        for i in range(len(spins)):
+            # The single spin target function.
+            mf_single, x_single = self.setup_target(diff_type=diff_type, model_type=model_type, spins=spins[i:i+1], index=i, values=MODELS[spins[i][0]][2] if model_type == 'diff' else None)
+
+            # The parameter and relaxation data indices of the spin.
+            indices = list(range(num_diff))
+            if model_type == 'all':
+                indices += list(range(param_index, param_index + len(MODELS[spins[i][0]][1])))
+            num_ri = len(RI_SETS[spins[i][1]][0])
+
+            # Sum the chi-squared values, gradients, Hessians, and Jacobians.
+            chi2_sum += mf_single.func(x_single)
+            grad_sum[indices] += mf_single.dfunc(x_single)
+            hess_sum[array(indices)[:, None], array(indices)[None, :]] += mf_single.d2func(x_single)
+            jacobian_sum[ri_index:ri_index+num_ri, indices] += mf_single.lm_dri()
+
+            # Increment the indices.
+            param_index += len(MODELS[spins[i][0]][1])
+            ri_index += num_ri
+
+        # Check the values, relative to the largest element.
+        self.assertAlmostEqual(chi2 / chi2_sum, 1.0, 12)
+        for name, value, value_sum in [['gradient', grad, grad_sum], ['Hessian', hess, hess_sum], ['Jacobian', jacobian, jacobian_sum]]:
+            self.assertEqual(value.shape, value_sum.shape)
+            scale = abs(value_sum).max()
+            for index in ndindex(value.shape):
+                self.assertAlmostEqual(value[index] / scale, value_sum[index] / scale, 12, msg="%s element %s" % (name, index))
+
+
+    def check_newton_step(self, diff_type=None):
+        """Compare the block-arrow Newton step of the 'all' model type to that from the full Hessian.
+
+        @keyword diff_type:     The diffusion tensor type.
+        @type diff_type:        str
+        """
+
+        # The spins {model index, relaxation data index}.
+        spins = []
+        for i in range(2):
+            for j in range(len(MODELS)):
+                spins.append([j, (i + j) % 2])
+
+        # Set up the target function.
+        mf, x = self.setup_target(diff_type=diff_type, model_type='all', spins=spins)
+
+        # Loop over the Hessian diagonal shifts.
+        for shift in [0.0, 10.0]:
+            # The Newton step from the full Hessian.
+            step = solve(mf.d2func(x) + shift * eye(len(x)), -mf.dfunc(x))
+
+            # Check the block-arrow Newton step.
+            step_block = mf.newton_step_all(x, shift=shift)
+            scale = abs(step).max()
+            for i in range(len(x)):
+                self.assertAlmostEqual(step_block[i] / scale, step[i] / scale, 10)
+
+
+    def check_spin_cache(self, diff_type=None):
+        """Check that the cached model independent data of a spin gives the same results for all model-free models.
+
+        @keyword diff_type:     The diffusion tensor type.
+        @type diff_type:        str
+        """
+
+        # Empty the caches.
+        FIXED_DIFF_CACHE.clear()
+        FRQ_CACHE.clear()
+
+        # Set up the target functions for all models of the same spin, sharing the caches.
+        targets = []
+        for i in range(1, len(MODELS)):
+            targets.append(self.setup_target(diff_type=diff_type, model_type='mf', spins=[[i, 1]]))
+
+        # A single cache entry for the spin.
+        self.assertEqual(len(FIXED_DIFF_CACHE), 1)
+        self.assertEqual(len(FRQ_CACHE), 1)
+
+        # Loop over the models.
+        for i in range(len(targets)):
+            # The target function set up from scratch.
+            FIXED_DIFF_CACHE.clear()
+            FRQ_CACHE.clear()
+            mf_ref, x = self.setup_target(diff_type=diff_type, model_type='mf', spins=[[i+1, 1]])
+
+            # Check the values.
+            mf = targets[i][0]
+            self.assertAlmostEqual(mf.func(x) / mf_ref.func(x), 1.0, 14)
+            for value, value_ref in [[mf.dfunc(x), mf_ref.dfunc(x)], [mf.d2func(x), mf_ref.d2func(x)]]:
+                scale = abs(value_ref).max()
+                for index in ndindex(value.shape):
+                    self.assertAlmostEqual(value[index] / scale, value_ref[index] / scale, 14)
+
+
+    def setup_target(self, diff_type=None, model_type=None, spins=None, index=0, values=None):
+        """Set up the model-free target function for a set of spins.
+
+        @keyword diff_type:     The diffusion tensor type.
+        @type diff_type:        str
+        @keyword model_type:    The model type, either 'mf', 'diff' or 'all'.
+        @type model_type:       str
+        @keyword spins:         The spins as lists of the model index and relaxation data set index.
+        @type spins:            list of list of int
+        @keyword index:         The index of the first spin, used to vary the spin specific data.
+        @type index:            int
+        @keyword values:        The fixed model-free parameter values for the 'diff' model type, defaulting to those of all spins.
+        @type values:           list of float
+        @return:                The target function instance and the scaled parameter vector.
+        @rtype:                 Mf instance, numpy rank-1 array
+        """
+
+        # Initialise the spin specific data structures.
+        equations, param_types, relax_data, errors, r, csa, num_frq, frq, num_ri, remap_table, noe_r1_table, ri_labels, gx, gh, num_params, vectors = [], [], [], [], [], [], [], [], [], [], [], [], [], [], [], []
+        mf_params = []
+
+        # Loop over the spins.
+        for i in range(len(spins)):
+            # Aliases.
+            spin_index = index + i
+            equation, types, params = MODELS[spins[i][0]]
+            labels, frqs, remap, noe_r1 = RI_SETS[spins[i][1]]
+            base = {'R1': 1.5, 'R2': 12.0, 'NOE': 0.75}
+            base_err = {'R1': 0.05, 'R2': 0.4, 'NOE': 0.05}
+
+            # The model.
+            equations.append(equation)
+            param_types.append(types)
+            num_params.append(len(types))
+            mf_params += [value * (1.0 + 0.01*spin_index) for value in params]
+
+            # The relaxation data, varying from spin to spin.
+            relax_data.append(array([base[labels[j]] * (1.0 + 0.02*((spin_index + j) % 5)) for j in range(len(labels))], float64))
+            errors.append(array([base_err[labels[j]] * (1.0 + 0.1*((spin_index + 2*j) % 3)) for j in range(len(labels))], float64))
+            num_frq.append(len(frqs))
+            frq.append(frqs)
+            num_ri.append(len(labels))
+            remap_table.append(remap)
+            noe_r1_table.append(noe_r1)
+            ri_labels.append(labels)
+
+            # The interatomic data.
+            r.append(1.02e-10 * (1.0 + 0.001*spin_index))
+            csa.append(-172e-6 * (1.0 + 0.01*spin_index))
+            gx.append(-2.7126e7)
+            gh.append(26.7522212e7)
+            vector = array([1.0, 0.1*spin_index, 1.0 - 0.05*spin_index], float64)
+            vectors.append(vector / (vector**2).sum()**0.5 if diff_type != 'sphere' else None)
+
+        # The parameter vector, the fixed diffusion tensor parameters, and the fixed model-free parameter values.
+        diff_params = None
+        if model_type == 'mf':
+            x = array(mf_params, float64)
+            diff_params = DIFF_PARAMS[diff_type]
+            param_values = None
+        elif model_type == 'all':
+            x = array(DIFF_PARAMS[diff_type] + mf_params, float64)
+            param_values = None
+        else:
+            x = array(DIFF_PARAMS[diff_type], float64)
+            if values is not None:
+                mf_params = [value * (1.0 + 0.01*index) for value in values]
+            param_values = [array(mf_params, float64)] * len(spins)
+
+        # The scaling matrix.
+        scaling_matrix = zeros((len(x), len(x)), float64)
+        for i in range(len(x)):
+            scaling_matrix[i, i] = abs(x[i])
+
+        # Initialise the target function.
+        mf = Mf(init_params=x / abs(x), model_type=model_type, diff_type=diff_type, diff_params=diff_params, scaling_matrix=scaling_matrix, num_spins=len(spins), equations=equations, param_types=param_types, param_values=param_values, relax_data=relax_data, errors=errors, bond_length=r, csa=csa, num_frq=num_frq, frq=frq, num_ri=num_ri, remap_table=remap_table, noe_r1_table=noe_r1_table, ri_labels=ri_labels, gx=gx, gh=gh, h_bar=1.054571628e-34, mu0=4.0*pi*1e-7, num_params=num_params, vectors=vectors)
+
+        # Return the target function and the scaled parameters.
+        return mf, x / abs(x)
+
+
+    def test_newton_step_all_ellipsoid(self):
+        """Check the block-arrow Newton step for the 'all' model type and ellipsoidal diffusion."""
+
+        self.check_newton_step(diff_type='ellipsoid')
+
+
+    def test_newton_step_all_sphere(self):
+        """Check the block-arrow Newton step for the 'all' model type and spherical diffusion."""
+
+        self.check_newton_step(diff_type='sphere')
+
+
+    def test_spin_cache_ellipsoid(self):
+        """Check the cached spin data for the 'mf' model type and ellipsoidal diffusion."""
+
+        self.check_spin_cache(diff_type='ellipsoid')
+
+
+    def test_spin_cache_sphere(self):
+        """Check the cached spin data for the 'mf' model type and spherical diffusion."""
+
+        self.check_spin_cache(diff_type='sphere')
+
+
+    def test_spin_cache_spheroid(self):
+        """Check the cached spin data for the 'mf' model type and spheroidal diffusion."""
+
+        self.check_spin_cache(diff_type='spheroid')
+
+
+    def test_stacking_all_ellipsoid(self):
+        """Check the stacked spins for the 'all' model type and ellipsoidal diffusion."""
+
+        self.check_stacking(diff_type='ellipsoid', model_type='all')
+
+
+    def test_stacking_all_sphere(self):
+        """Check the stacked spins for the 'all' model type and spherical diffusion."""
+
+        self.check_stacking(diff_type='sphere', model_type='all')
+
+
+    def test_stacking_all_spheroid(self):
+        """Check the stacked spins for the 'all' model type and spheroidal diffusion."""
+
+        self.check_stacking(diff_type='spheroid', model_type='all')
+
+
+    def test_stacking_diff_ellipsoid(self):
+        """Check the stacked spins for the 'diff' model type and ellipsoidal diffusion."""
+
+        self.check_stacking(diff_type='ellipsoid', model_type='diff')
+
+
+    def test_stacking_diff_sphere(self):
+        """Check the stacked spins for the 'diff' model type and spherical diffusion."""
+
+        self.check_stacking(diff_type='sphere', model_type='diff')
+
+
+    def test_stacking_diff_spheroid(self):
+        """Check the stacked spins for the 'diff' model type and spheroidal diffusion."""
+
+        self.check_stacking(diff_type='spheroid', model_type='diff')
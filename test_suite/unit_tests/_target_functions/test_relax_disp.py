@@ -0,0 +1,454 @@
+###############################################################################
+#                                                                             #
+# Copyright (C) 2026 Edward d'Auvergne                                        #
+#                                                                             #
+# This file is part of the program relax (http://www.nmr-relax.com).          #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# (at your option) any later version.                                         #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+###############################################################################
+
+# Python module imports.
+from numpy import arctan2, array, diag, pi, zeros, zeros_like
+from unittest import TestCase
+
+# relax module imports.
+from lib.dispersion.ns_r1rho_2site import ns_r1rho_2site
+from lib.dispersion.ns_r1rho_3site import ns_r1rho_3site
+from lib.dispersion.variables import EXP_TYPE_CPMG_SQ, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_LM63, MODEL_LM63_3SITE, MODEL_M61, MODEL_M61B, MODEL_MP05, MODEL_NOREX, MODEL_NS_R1RHO_2SITE, MODEL_NS_R1RHO_3SITE, MODEL_TAP03, MODEL_TP02, MODEL_TSMFK01
+from target_functions.relax_disp import Dispersion
+
+
+class Test_relax_disp(TestCase):
+    """Unit tests for the target_functions.relax_disp relax module."""
+
+    def check_derivs(self, model=None, exp_type=None, params=None, index=None, r1_fit=False):
+        """Compare the dfunc() and d2func() values to the central finite differences of func() and dfunc().
+
+        @keyword model:     The dispersion model.
+        @type model:        str
+        @keyword exp_type:  The experiment type.
+        @type exp_type:     str
+        @keyword params:    The unscaled parameter values.
+        @type params:       list of float
+        @keyword index:     The indices of the parameters to check.  This is for the parameter values at which the model functions replace the back-calculated values, where the finite differences of the other parameters leave the replaced region.  If None, all parameters are checked.
+        @type index:        None or list of int
+        @keyword r1_fit:    A flag which if True will cause R1 to be optimised.
+        @type r1_fit:       bool
+        """
+
+        # Set up the target function.
+        model, x = self.setup_target(model=model, exp_type=exp_type, params=params, r1_fit=r1_fit)
+
+        # The gradient and Hessian.
+        grad = model.dfunc(x)
+        hess = model.d2func(x)
+
+        # Loop over the parameters.
+        if index is None:
+            index = range(len(x))
+        for i in index:
+            # The step size.
+            h = 1e-6
+            step = zeros(len(x))
+            step[i] = h
+
+            # The finite differences.
+            num_grad = (model.func(x + step) - model.func(x - step)) / (2.0 * h)
+            num_hess = (model.dfunc(x + step) - model.dfunc(x - step)) / (2.0 * h)
+
+            # Check the gradient element and the Hessian column, relative to the largest element.
+            self.assertAlmostEqual(grad[i] / abs(grad).max(), num_grad / abs(grad).max(), 6)
+            for j in range(len(x)):
+                self.assertAlmostEqual(hess[j, i] / abs(hess).max(), num_hess[j] / abs(hess).max(), 6)
+
+
+    def check_grid(self, model=None, exp_type=None, params=None, points=None, r1_fit=False):
+        """Compare the vectorised calc_grid_chi2() values for a block of parameter vectors to the func() values.
+
+        @keyword model:     The dispersion model.
+        @type model:        str
+        @keyword exp_type:  The experiment type.
+        @type exp_type:     str
+        @keyword params:    The unscaled parameter values, about which the block of parameter vectors is spread.
+        @type params:       list of float
+        @keyword points:    The unscaled parameter vectors of the block, such as the grid boundary points.  If None, the block is spread between 0.5 and 1.5 times the parameter values.
+        @type points:       None or list of list of float
+        @keyword r1_fit:    A flag which if True will cause R1 to be optimised.
+        @type r1_fit:       bool
+        """
+
+        # Set up the target function.
+        model, x = self.setup_target(model=model, exp_type=exp_type, params=params, r1_fit=r1_fit)
+
+        # The block of parameter vectors, spread between 0.5 and 1.5 times the parameter values.
+        if points is None:
+            block = array([x * (0.5 + 0.05*i) for i in range(20)])
+
+        # The given parameter vectors, scaled as the parameter values.
+        else:
+            block = array(points) / diag(model.scaling_matrix)
+
+        # The chi-squared values.
+        chi2 = model.calc_grid_chi2(block)
+
+        # Check each grid point.
+        self.assertEqual(chi2.shape, (len(block),))
+        for i in range(len(block)):
+            self.assertAlmostEqual(chi2[i] / model.func(block[i]), 1.0, 10)
+
+
+    def check_stacked_back_calc(self, model=None, exp_type=None, params=None, stacked_params=None, r1_fit=False):
+        """Compare the back-calculated values of the calc_stacked_chi2() stacked clusters to those of func() for the spins as one cluster, as used for the dispersion curve plotting.
+
+        @keyword model:             The dispersion model.
+        @type model:                str
+        @keyword exp_type:          The experiment type.
+        @type exp_type:             str
+        @keyword params:            The unscaled parameter values of the cluster, with the kinetic parameters shared between the spins.
+        @type params:               list of float
+        @keyword stacked_params:    The same unscaled parameter values split into one parameter vector per spin.
+        @type stacked_params:       list of list of float
+        @keyword r1_fit:            A flag which if True will cause R1 to be optimised.
+        @type r1_fit:               bool
+        """
+
+        # Set up the target functions.
+        model, x = self.setup_target(model=model, exp_type=exp_type, params=params, r1_fit=r1_fit)
+        stacked_model, stacked_x = self.setup_target(model=model.model, exp_type=exp_type, params=stacked_params, r1_fit=r1_fit, stacked=True)
+
+        # Back-calculate the values both ways.
+        model.func(x)
+        stacked_model.calc_stacked_chi2(stacked_x)
+
+        # Check each back-calculated value, which must not be the fill value for the non-finite values.
+        self.assertEqual(stacked_model.back_calc.shape, model.back_calc.shape)
+        for value, stacked_value in zip(model.back_calc.flatten(), stacked_model.back_calc.flatten()):
+            self.assertTrue(stacked_value < 1e100)
+            self.assertAlmostEqual(stacked_value, value, 10)
+
+
+    def check_stacked(self, model=None, exp_type=None, params=None, stacked_params=None, r1_fit=False):
+        """Compare the summed calc_stacked_chi2() values of the spins as independent clusters to the func() value of the spins as one cluster.
+
+        @keyword model:             The dispersion model.
+        @type model:                str
+        @keyword exp_type:          The experiment type.
+        @type exp_type:             str
+        @keyword params:            The unscaled parameter values of the cluster, with the kinetic parameters shared between the spins.
+        @type params:               list of float
+        @keyword stacked_params:    The same unscaled parameter values split into one parameter vector per spin.
+        @type stacked_params:       list of list of float
+        @keyword r1_fit:            A flag which if True will cause R1 to be optimised.
+        @type r1_fit:               bool
+        """
+
+        # Set up the target functions.
+        model, x = self.setup_target(model=model, exp_type=exp_type, params=params, r1_fit=r1_fit)
+        stacked_model, stacked_x = self.setup_target(model=model.model, exp_type=exp_type, params=stacked_params, r1_fit=r1_fit, stacked=True)
+
+        # The chi-squared values of the two independent clusters.
+        chi2 = stacked_model.calc_stacked_chi2(stacked_x)
+
+        # Check the sum against the single cluster.
+        self.assertEqual(chi2.shape, (2,))
+        self.assertAlmostEqual(chi2.sum() / model.func(x), 1.0, 10)
+
+
+    def test_derivs_b14(self):
+        """Check the B14 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_B14, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_b14_full(self):
+        """Check the B14 full model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_B14_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_cr72(self):
+        """Check the CR72 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_CR72, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_cr72_full(self):
+        """Check the CR72 full model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_CR72_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_cr72_full_dw_zero(self):
+        """Check the CR72 full model gradient and Hessian against finite differences at dw = 0, where the values are replaced by R20A."""
+
+        self.check_derivs(model=MODEL_CR72_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 0.0, 0.0, 0.9, 1200.0], index=[0, 1, 2, 3, 4, 5, 6, 7, 10, 11])
+
+
+    def test_derivs_dpl94(self):
+        """Check the DPL94 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_DPL94, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 2000.0])
+
+
+    def test_derivs_lm63(self):
+        """Check the LM63 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_LM63, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 1200.0])
+
+
+    def test_derivs_lm63_3site(self):
+        """Check the LM63 3-site model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_LM63_3SITE, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.1, 0.2, 1200.0, 5000.0])
+
+
+    def test_derivs_lm63_kex_zero(self):
+        """Check the LM63 model gradient and Hessian against finite differences at kex = 0, where the values are replaced by R20."""
+
+        self.check_derivs(model=MODEL_LM63, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.0], index=[0, 1, 2, 3, 4, 5])
+
+
+    def test_derivs_m61(self):
+        """Check the M61 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_M61, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 2000.0])
+
+
+    def test_derivs_m61b(self):
+        """Check the M61 skew model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_M61B, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_mp05(self):
+        """Check the MP05 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_MP05, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_norex(self):
+        """Check the No Rex model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_NOREX, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0])
+
+
+    def test_derivs_tap03(self):
+        """Check the TAP03 model gradient and Hessian against finite differences."""
+
+        self.check_derivs(model=MODEL_TAP03, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_derivs_tp02_fit_r1(self):
+        """Check the TP02 model gradient and Hessian against finite differences, whereby R1 is fitted."""
+
+        self.check_derivs(model=MODEL_TP02, exp_type=EXP_TYPE_R1RHO, params=[1.0, 1.1, 1.2, 1.3, 12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], r1_fit=True)
+
+
+    def test_derivs_tsmfk01_dw_zero(self):
+        """Check the TSMFK01 model gradient and Hessian against finite differences at dw = 0."""
+
+        self.check_derivs(model=MODEL_TSMFK01, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.0, 0.0, 20.0])
+
+
+    def test_grid_b14_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the B14 model at the grid boundaries of dw = 0, kex = 0 and pA = 1."""
+
+        self.check_grid(model=MODEL_B14, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 13.0, 14.0, 15.0, 0.0, 0.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 0.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 1.0, 1200.0]])
+
+
+    def test_grid_b14_full(self):
+        """Check the vectorised grid search chi-squared values of the B14 full model."""
+
+        self.check_grid(model=MODEL_B14_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_grid_b14_full_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the B14 full model at the grid boundaries of dw = 0, kex = 0, pA = 1 and a large kex."""
+
+        self.check_grid(model=MODEL_B14_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 0.0, 0.0, 0.9, 1200.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 0.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 1.0, 1200.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.5, 1e5]])
+
+
+    def test_grid_cr72(self):
+        """Check the vectorised grid search chi-squared values of the CR72 model."""
+
+        self.check_grid(model=MODEL_CR72, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+
+
+    def test_grid_cr72_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the CR72 model at the grid boundaries of dw = 0, kex = 0, pA = 1 and a large kex."""
+
+        self.check_grid(model=MODEL_CR72, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 13.0, 14.0, 15.0, 0.0, 0.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 0.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 1.0, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.5, 1e5]])
+
+
+    def test_grid_cr72_full_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the CR72 full model at the grid boundaries of dw = 0, kex = 0, pA = 1 and a large kex."""
+
+        self.check_grid(model=MODEL_CR72_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 0.0, 0.0, 0.9, 1200.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 0.0, 3.0, 0.9, 1200.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 0.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 1.0, 1200.0], [12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.5, 1e5]])
+
+
+    def test_grid_lm63_3site_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the LM63 3-site model at the grid boundaries of zero phi_ex and k values."""
+
+        self.check_grid(model=MODEL_LM63_3SITE, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.1, 0.2, 1200.0, 5000.0], points=[[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.1, 0.2, 0.0, 5000.0], [12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.1, 0.2, 1200.0, 0.0], [12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.1, 0.2, 0.0, 0.0], [12.0, 13.0, 14.0, 15.0, 0.0, 0.5, 0.0, 0.2, 1200.0, 5000.0]])
+
+
+    def test_grid_lm63_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the LM63 model at the grid boundaries of phi_ex = 0 and kex = 0."""
+
+        self.check_grid(model=MODEL_LM63, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 1200.0], points=[[12.0, 13.0, 14.0, 15.0, 0.0, 0.0, 1200.0], [12.0, 13.0, 14.0, 15.0, 0.3, 0.5, 0.0]])
+
+
+    def test_grid_m61b_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the M61 skew model at the grid boundaries of dw = 0, kex = 0 and pA = 1."""
+
+        self.check_grid(model=MODEL_M61B, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 0.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 1.0, 1200.0]])
+
+
+    def test_grid_tap03_boundaries(self):
+        """Check the vectorised grid search chi-squared values of the TAP03 model at the grid boundaries of dw = 0, kex = 0 and pA = 1, and for negative gamma factors."""
+
+        self.check_grid(model=MODEL_TAP03, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], points=[[12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 0.9, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 0.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 1.0, 1200.0], [12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.5, 3000.0]])
+
+
+    def test_grid_tp02_fit_r1(self):
+        """Check the vectorised grid search chi-squared values of the TP02 model, whereby R1 is fitted."""
+
+        self.check_grid(model=MODEL_TP02, exp_type=EXP_TYPE_R1RHO, params=[1.0, 1.1, 1.2, 1.3, 12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], r1_fit=True)
+
+
+    def test_grid_tsmfk01_dw_zero(self):
+        """Check the vectorised grid search chi-squared values of the TSMFK01 model at dw = 0, the no exchange corner of the grid."""
+
+        self.check_grid(model=MODEL_TSMFK01, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.0, 0.0, 20.0])
+
+
+    def test_packed_ns_r1rho_2site(self):
+        """Check the packed NS R1rho 2-site back calculation against the dense [NE][NS][NM][NO][ND] structure."""
+
+        # Set up the target function and calculate the chi-squared value.
+        model, x = self.setup_target(model=MODEL_NS_R1RHO_2SITE, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0])
+        model.func(x)
+
+        # The packed data points.
+        self.assertEqual(model.back_calc_packed.shape, (model.disp_struct.sum(),))
+
+        # The dense back calculation, using the R1rho' and dw structures of the last function call.
+        back_calc = zeros_like(model.back_calc)
+        ns_r1rho_2site(M0=model.M0, M0_T=model.M0_T, r1rho_prime=model.r1rho_prime_struct, omega=model.chemical_shifts, offset=model.offset, r1=model.r1, pA=0.9, dw=model.dw_struct, kex=1200.0, spin_lock_fields=model.spin_lock_omega1, relax_time=model.relax_times, inv_relax_time=model.inv_relax_times, back_calc=back_calc)
+
+        # Check the unpacked values, skipping the missing data point.
+        back_calc = back_calc * model.disp_struct
+        for value, dense, missing in zip(model.back_calc.flatten(), back_calc.flatten(), model.missing.flatten()):
+            if not missing:
+                self.assertAlmostEqual(value, dense, 10)
+
+
+    def test_packed_ns_r1rho_3site(self):
+        """Check the packed NS R1rho 3-site back calculation against the dense [NE][NS][NM][NO][ND] structure."""
+
+        # Set up the target function and calculate the chi-squared value.
+        model, x = self.setup_target(model=MODEL_NS_R1RHO_3SITE, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 1.0, 1.5, 0.85, 1200.0, 0.1, 800.0, 300.0])
+        model.func(x)
+
+        # The packed data points.
+        self.assertEqual(model.back_calc_packed.shape, (model.disp_struct.sum(),))
+
+        # The dense back calculation, using the R1rho' and dw structures of the last function call.
+        back_calc = zeros_like(model.back_calc)
+        ns_r1rho_3site(M0=model.M0, M0_T=model.M0_T, r1rho_prime=model.r20_struct, omega=model.chemical_shifts, offset=model.offset, r1=model.r1, pA=0.85, pB=0.1, dw_AB=model.dw_AB_struct, dw_BC=model.dw_BC_struct, kex_AB=1200.0, kex_BC=800.0, kex_AC=300.0, spin_lock_fields=model.spin_lock_omega1, relax_time=model.relax_times, inv_relax_time=model.inv_relax_times, back_calc=back_calc, num_points=model.num_disp_points)
+
+        # Check the unpacked values, skipping the missing data point.
+        back_calc = back_calc * model.disp_struct
+        for value, dense, missing in zip(model.back_calc.flatten(), back_calc.flatten(), model.missing.flatten()):
+            if not missing:
+                self.assertAlmostEqual(value, dense, 10)
+
+
+    def test_stacked_b14_full(self):
+        """Check the stacked cluster chi-squared values of the B14 full model."""
+
+        self.check_stacked(model=MODEL_B14_FULL, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 18.0, 13.0, 17.0, 14.0, 16.0, 15.0, 15.5, 2.0, 3.0, 0.9, 1200.0], stacked_params=[[12.0, 18.0, 13.0, 17.0, 2.0, 0.9, 1200.0], [14.0, 16.0, 15.0, 15.5, 3.0, 0.9, 1200.0]])
+
+
+    def test_stacked_cr72(self):
+        """Check the stacked cluster chi-squared values of the CR72 model."""
+
+        self.check_stacked(model=MODEL_CR72, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], stacked_params=[[12.0, 13.0, 2.0, 0.9, 1200.0], [14.0, 15.0, 3.0, 0.9, 1200.0]])
+
+
+    def test_stacked_tp02_fit_r1(self):
+        """Check the stacked cluster chi-squared values of the TP02 model, whereby R1 is fitted."""
+
+        self.check_stacked(model=MODEL_TP02, exp_type=EXP_TYPE_R1RHO, params=[1.0, 1.1, 1.2, 1.3, 12.0, 13.0, 14.0, 15.0, 2.0, 3.0, 0.9, 1200.0], stacked_params=[[1.0, 1.1, 12.0, 13.0, 2.0, 0.9, 1200.0], [1.2, 1.3, 14.0, 15.0, 3.0, 0.9, 1200.0]], r1_fit=True)
+
+
+    def test_stacked_back_calc_tp02_dw_zero(self):
+        """Check the stacked cluster back-calculated values of the TP02 model, with the first spin at dw = 0."""
+
+        self.check_stacked_back_calc(model=MODEL_TP02, exp_type=EXP_TYPE_R1RHO, params=[12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 0.9, 1200.0], stacked_params=[[12.0, 13.0, 0.0, 0.9, 1200.0], [14.0, 15.0, 3.0, 0.9, 1200.0]])
+
+
+    def test_stacked_back_calc_tsmfk01_dw_zero(self):
+        """Check the stacked cluster back-calculated values of the TSMFK01 model, with the first spin at dw = 0."""
+
+        self.check_stacked_back_calc(model=MODEL_TSMFK01, exp_type=EXP_TYPE_CPMG_SQ, params=[12.0, 13.0, 14.0, 15.0, 0.0, 3.0, 20.0], stacked_params=[[12.0, 13.0, 0.0, 20.0], [14.0, 15.0, 3.0, 20.0]])
+
+
+    def setup_target(self, model=None, exp_type=None, params=None, r1_fit=False, stacked=False):
+        """Set up the target function for 2 spins at 2 fields with 6 dispersion points each, with one missing data point.
+
+        @keyword model:     The dispersion model.
+        @type model:        str
+        @keyword exp_type:  The experiment type.
+        @type exp_type:     str
+        @keyword params:    The unscaled parameter values, or one parameter vector per spin for the stacked clusters.
+        @type params:       list of float or list of list of float
+        @keyword r1_fit:    A flag which if True will cause R1 to be optimised.
+        @type r1_fit:       bool
+        @keyword stacked:   A flag which if True will set up the spins as independent stacked clusters.
+        @type stacked:      bool
+        @return:            The target function instance and the scaled parameter vector, or the scaled parameter vectors of the stacked clusters.
+        @rtype:             Dispersion instance, numpy rank-1 or rank-2 float array
+        """
+
+        # The spin and field dependent data.
+        frqs = [[[2.0*pi*600.0e6/1e6, 2.0*pi*800.0e6/1e6]]*2]
+        values = [[[[[10.2, 11.5, 13.1, 12.0, 10.8, 10.4]], [[11.0, 12.6, 14.9, 13.3, 11.9, 11.2]]]]*2]
+        errors = [[[[[0.5, 0.6, 0.7, 0.8, 0.9, 1.0]]]*2]*2]
+        missing = [[[[[0, 0, 0, 0, 0, 0]], [[0, 0, 0, 0, 0, 0]]], [[[0, 0, 1, 0, 0, 0]], [[0, 0, 0, 0, 0, 0]]]]]
+        disp_points = [50.0, 100.0, 200.0, 400.0, 800.0, 1000.0]
+        relax_times = [[[[[0.04]]*6]]*2]
+        chemical_shifts = [[[2.0*pi*600.0*118.0, 2.0*pi*800.0*118.0]]*2]
+        offsets = [[[[2.0*pi*600.0*119.0], [2.0*pi*800.0*119.0]]]*2]
+        r1 = [[1.3, 1.4]]*2
+
+        # CPMG data.
+        if exp_type == EXP_TYPE_CPMG_SQ:
+            cpmg_frqs = [[[disp_points]]*2]
+            spin_lock_nu1 = None
+            tilt_angles = None
+
+        # R1rho data.
+        else:
+            cpmg_frqs = None
+            spin_lock_nu1 = [[[disp_points]]*2]
+            tilt_angles = [[[[list(arctan2(2.0*pi*array(disp_points), chemical_shifts[0][si][mi] - offsets[0][si][mi][0]))] for mi in range(2)] for si in range(2)]]
+
+        # Scale the parameters, using the largest values of the stacked clusters.
+        scaling_matrix = diag([max(1.0, param) for param in abs(array(params)).reshape(-1, array(params).shape[-1]).max(axis=0)])
+        x = array(params) / diag(scaling_matrix)
+
+        # Set up and return the target function.
+        return Dispersion(model=model, num_params=x.shape[-1], num_spins=2, num_frq=2, exp_types=[exp_type], values=values, errors=errors, missing=missing, frqs=frqs, cpmg_frqs=cpmg_frqs, spin_lock_nu1=spin_lock_nu1, chemical_shifts=chemical_shifts, offset=offsets, tilt_angles=tilt_angles, r1=r1, relax_times=relax_times, scaling_matrix=scaling_matrix, r1_fit=r1_fit, stacked=stacked), x
@@ -137,21 +137,23 @@ uf.add_keyarg(
     name = "hessian_mod",
     basic_types = ["str"],
     desc_short = "hessian modification",
-    desc = "The Hessian modification.  This will only be used in the algorithms which use the Hessian, and defaults to Gill, Murray, and Wright modified Cholesky algorithm.",
+    desc = "The Hessian modification.  This will only be used in the algorithms which use the Hessian, and defaults to Gill, Murray, and Wright modified Cholesky algorithm.  The block-arrow Newton step, solving the Newton equations through the Schur complement of the per-spin Hessian blocks, is only available for the unconstrained Newton minimisation of the model-free 'all' model type.",
     wiz_element_type = 'combo',
     wiz_combo_choices = [
         "Unmodified Hessian",
         "Eigenvalue modification",
         "Cholesky with added multiple of the identity",
         "The Gill, Murray, and Wright modified Cholesky algorithm",
-        "The Schnabel and Eskow 1999 algorithm"
+        "The Schnabel and Eskow 1999 algorithm",
+        "Block-arrow Newton step"
     ],
     wiz_combo_data = [
         "no hessian mod",
         "eigen",
         "chol",
         "gmw",
-        "se99"
+        "se99",
+        "block-arrow"
     ],
     wiz_read_only = True,
     can_be_none = True
@@ -217,9 +219,19 @@ uf.add_keyarg(
     desc_short = "verbosity level",
     desc = "The amount of information to print to screen.  Zero corresponds to minimal output while higher values increase the amount of output.  The default value is 1."
 )
+uf.add_keyarg(
+    name = "journal",
+    arg_type = "file sel write",
+    desc_short = "Monte Carlo journal file",
+    desc = "The optional name of a file in which the Monte Carlo simulation results are recorded as they are calculated.  If the file already exists, all simulations found in it will be skipped, allowing an interrupted run to be resumed.",
+    can_be_none = True
+)
 # Description.
 uf.desc.append(Desc_container())
 uf.desc[-1].add_paragraph("This will perform an optimisation starting from the current parameter values.  This is only suitable for data pipe types which have target functions and hence support optimisation.")
+# Journaling.
+uf.desc.append(Desc_container("Resuming Monte Carlo simulations"))
+uf.desc[-1].add_paragraph("For long Monte Carlo simulation runs, the journal argument can be used to protect against the loss of all results if relax is terminated.  Each simulation result is appended to the journal file as soon as it has been received and stored.  Executing the same script again with the same journal file will cause all simulations present in the journal to be restored from the file rather than optimised, so that the calculation continues from where it stopped.  The Monte Carlo simulation data does not need to be identical between runs, as only the optimised parameter values are restored.")
 # Diagonal scaling.
 uf.desc.append(Desc_container("Diagonal scaling"))
 uf.desc[-1].add_paragraph("Diagonal scaling is the transformation of parameter values such that each value has a similar order of magnitude.  Certain minimisation techniques, for example the trust region methods, perform extremely poorly with badly scaled problems.  In addition, methods which are insensitive to scaling such as Newton minimisation may still benefit due to the minimisation of round off errors.")
@@ -312,6 +324,8 @@ uf.desc[-1].add_prompt("relax> minimise.execute('newton', constraints=True, max_
 uf.desc[-1].add_prompt("relax> minimise.execute('newton', verbosity=1)")
 uf.desc[-1].add_paragraph("To use constrained Simplex minimisation with a maximum of 5000 iterations, type:")
 uf.desc[-1].add_prompt("relax> minimise.execute('simplex', constraints=True, max_iter=5000)")
+uf.desc[-1].add_paragraph("To optimise the Monte Carlo simulations, recording the results in the 'mc.journal' file to allow the run to be resumed, type:")
+uf.desc[-1].add_prompt("relax> minimise.execute('newton', journal='mc.journal')")
 uf.backend = minimise.minimise
 uf.menu_text = "&execute"
 uf.gui_icon = "relax.rosenbrock"
@@ -101,12 +101,21 @@ uf.add_keyarg(
     desc = "The fixed value to use when distribution is set to 'fixed'.",
     can_be_none = True
 )
+uf.add_keyarg(
+    name = "seed",
+    basic_types = ["int"],
+    default = None,
+    desc_short = "random number generator seed",
+    desc = "The seed for the random number generator, allowing the simulation data to be reproduced.  If not supplied, a random seed will be used.",
+    can_be_none = True
+)
 # Description.
 uf.desc.append(Desc_container())
 uf.desc[-1].add_paragraph("The method can either be set to back calculation (Monte Carlo) or direct (bootstrapping), the choice of which determines the simulation type.  If the values or parameters are calculated rather than minimised, this option will have no effect.  Errors should only be propagated via Monte Carlo simulations if errors have been measured. ")
 uf.desc[-1].add_paragraph("For error analysis, the method should be set to back calculation which will result in proper Monte Carlo simulations.  The data used for each simulation is back calculated from the minimised model parameters and is randomised using Gaussian noise where the standard deviation is from the original error set.  When the method is set to back calculation, this function should only be called after the model is fully minimised.")
 uf.desc[-1].add_paragraph("The simulation type can be changed by setting the method to direct.  This will result in bootstrapping simulations which cannot be used in error analysis (and which are no longer Monte Carlo simulations).  However, these simulations are required for certain model selection techniques (see the documentation for the model selection user function for details), and can be used for other purposes.  Rather than the data being back calculated from the fitted model parameters, the data is generated by taking the original data and randomising using Gaussian noise with the standard deviations set to the original error set.")
 uf.desc[-1].add_paragraph("The errors generated per simulation can either be generated indidual per datapoint and drawn from a gauss distrubtion described by the standard deviation of the indidual point, or it can be generated from a overall gauss distribution described by the standard deviation of the goodness of fit, where SD_fit = sqrt(chi2/(N-p)).  The last possibility is to supply a fixed value of the standard deviation, from which gauss distribution to draw errors from.")
+uf.desc[-1].add_paragraph("The random numbers for each block of base data, for example the data of a single spin, are drawn from a separate stream seeded from the seed argument and the identifiers of the data block.  The simulation data is therefore independent of the order in which the data is processed.  The seed used is stored in the current data pipe, so that the simulation data can be regenerated by supplying it to this user function.")
 uf.desc.append(monte_carlo_desc)
 uf.backend = error_analysis.monte_carlo_create_data
 uf.menu_text = "&create_data"
@@ -197,11 +206,30 @@ uf.add_keyarg(
     min = 3,
     max = 100000,
     desc_short = "number of Monte Carlo simulations",
-    desc = "The number of Monte Carlo simulations."
+    desc = "The number of Monte Carlo simulations.  If the tolerance is set, this is the maximum number."
+)
+uf.add_keyarg(
+    name = "tolerance",
+    basic_types = ["float"],
+    default = None,
+    desc_short = "error convergence tolerance",
+    desc = "The relative change of the parameter errors between blocks of simulations below which no further simulations are run.  If not supplied, all simulations will be run.",
+    can_be_none = True
+)
+uf.add_keyarg(
+    name = "block",
+    default = 50,
+    basic_types = ["int"],
+    min = 3,
+    max = 100000,
+    desc_short = "number of simulations per block",
+    desc = "The number of simulations per block for the adaptive mode."
 )
 # Description.
 uf.desc.append(Desc_container())
 uf.desc[-1].add_paragraph("This must be called prior to any of the other Monte Carlo functions.  The effect is that the number of simulations will be set and that simulations will be turned on.")
+uf.desc[-1].add_paragraph("If the tolerance argument is set, the simulations will be optimised in blocks.  After each block, the standard deviations of all parameters of each model (spin or spin cluster) are compared to those of the previous block.  Once the relative changes are all below the tolerance, the remaining simulations of that model are deselected and, for the analyses which support this, are no longer optimised.  The optimisation stops once all models have converged.  The total number of simulations used is stored in the current data pipe.  For example to run up to 500 simulations in blocks of 50, stopping when the errors change by less than 2 percent, type:")
+uf.desc[-1].add_prompt("relax> monte_carlo.setup(number=500, tolerance=0.02, block=50)")
 uf.desc.append(monte_carlo_desc)
 uf.backend = error_analysis.monte_carlo_setup
 uf.menu_text = "&setup"
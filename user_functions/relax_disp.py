@@ -28,14 +28,14 @@
 from os import sep
 
 # relax module imports.
-from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_IT99, MODEL_LIST_FIT_R1, MODEL_LM63, MODEL_LM63_3SITE, MODEL_M61, MODEL_M61B, MODEL_MMQ_CR72, MODEL_MP05, MODEL_NOREX, MODEL_NS_CPMG_2SITE_3D, MODEL_NS_CPMG_2SITE_3D_FULL, MODEL_NS_CPMG_2SITE_EXPANDED, MODEL_NS_CPMG_2SITE_STAR, MODEL_NS_CPMG_2SITE_STAR_FULL, MODEL_NS_MMQ_2SITE, MODEL_NS_MMQ_3SITE, MODEL_NS_MMQ_3SITE_LINEAR, MODEL_NS_R1RHO_2SITE, MODEL_NS_R1RHO_3SITE, MODEL_NS_R1RHO_3SITE_LINEAR, MODEL_R2EFF, MODEL_TAP03, MODEL_TP02, MODEL_TSMFK01
+from lib.dispersion.variables import EXP_TYPE_CPMG_DQ, EXP_TYPE_CPMG_MQ, EXP_TYPE_CPMG_SQ, EXP_TYPE_CPMG_ZQ, EXP_TYPE_CPMG_PROTON_MQ, EXP_TYPE_CPMG_PROTON_SQ, EXP_TYPE_R1RHO, MODEL_B14, MODEL_B14_FULL, MODEL_CR72, MODEL_CR72_FULL, MODEL_DPL94, MODEL_IT99, MODEL_LIST_DERIVS, MODEL_LIST_FIT_R1, MODEL_LM63, MODEL_LM63_3SITE, MODEL_M61, MODEL_M61B, MODEL_MMQ_CR72, MODEL_MP05, MODEL_NOREX, MODEL_NS_CPMG_2SITE_3D, MODEL_NS_CPMG_2SITE_3D_FULL, MODEL_NS_CPMG_2SITE_EXPANDED, MODEL_NS_CPMG_2SITE_STAR, MODEL_NS_CPMG_2SITE_STAR_FULL, MODEL_NS_MMQ_2SITE, MODEL_NS_MMQ_3SITE, MODEL_NS_MMQ_3SITE_LINEAR, MODEL_NS_R1RHO_2SITE, MODEL_NS_R1RHO_3SITE, MODEL_NS_R1RHO_3SITE_LINEAR, MODEL_R2EFF, MODEL_TAP03, MODEL_TP02, MODEL_TSMFK01
 from lib.text.gui import dw, dw_AB, dw_BC, dwH, dwH_AB, dwH_BC, i0, kex, kAB, kBC, kAC, phi_ex, phi_exB, phi_exC, nu_1, nu_cpmg, r1rho, r1rho_prime, r2, r2a, r2b, r2eff, tex, theta, w_eff, w_rf
 from graphics import ANALYSIS_IMAGE_PATH, WIZARD_IMAGE_PATH
 from pipe_control import pipes, spectrum
 from pipe_control.mol_res_spin import get_spin_ids
 from specific_analyses.relax_disp.catia import catia_execute, catia_input
 from specific_analyses.relax_disp.cpmgfit import cpmgfit_execute, cpmgfit_input
-from specific_analyses.relax_disp.estimate_r2eff import estimate_r2eff_err
+from specific_analyses.relax_disp.estimate_r2eff import estimate_r2eff, estimate_r2eff_err
 from specific_analyses.relax_disp.data import cpmg_setup, insignificance, plot_disp_curves, plot_exp_curves, r2eff_read, r2eff_read_spin, relax_time, set_exp_type, r20_from_min_r2eff, spin_lock_field, spin_lock_offset, write_disp_curves
 from specific_analyses.relax_disp.data import INTERPOLATE_DISP, INTERPOLATE_OFFSET, X_AXIS_DISP, X_AXIS_W_EFF, X_AXIS_THETA, Y_AXIS_R2_R1RHO, Y_AXIS_R2_EFF
 from specific_analyses.relax_disp.nessy import nessy_input
@@ -372,6 +372,28 @@ uf.wizard_apply_button = False
 uf.wizard_image = WIZARD_IMAGE_PATH + 'deselect.png'
 
 
+# The relax_disp.lockstep user function.
+uf = uf_info.add_uf('relax_disp.lockstep')
+uf.title = "Switch the lock-step optimisation of the free spins on or off."
+uf.title_short = "Lock-step optimisation flag."
+uf.add_keyarg(
+    name = "flag",
+    default = True,
+    basic_types = ["bool"],
+    desc_short = "lock-step optimisation flag",
+    desc = "The flag specifying if the spins which are not clustered should be optimised together in lock-step."
+)
+# Description.
+uf.desc.append(Desc_container())
+uf.desc[-1].add_paragraph("This user function allows the lock-step optimisation of the free spins, i.e. the spins which are not part of a cluster, to be turned on or off.  When turned on, the free spins having the same dispersion model are stacked together into a single target function and are optimised simultaneously, each spin still being an independent optimisation problem with its own convergence.  This replaces many small optimisations, dominated by the Python overhead, by one optimisation using large numpy arrays, which is much faster when there are many spins.")
+uf.desc[-1].add_paragraph("The lock-step optimisation is only used for the simplex algorithm and for the models %s for which the vectorised target functions are available.  The linear constraints are imposed by an extreme barrier, whereby the points violating the constraints are rejected, rather than the logarithmic barrier function.  For all other algorithms and models, this setting has no effect." % MODEL_LIST_DERIVS)
+uf.backend = relax_disp_uf.lockstep
+uf.menu_text = "&lockstep"
+uf.gui_icon = "oxygen.actions.system-run"
+uf.wizard_size = (800, 500)
+uf.wizard_image = ANALYSIS_IMAGE_PATH + 'relax_disp_200x200.png'
+
+
 # The relax_disp.nessy_input user function.
 uf = uf_info.add_uf('relax_disp.nessy_input')
 uf.title = "Create the input files for Michael Bieri's NESSY program."
@@ -652,6 +674,63 @@ uf.wizard_size = (800, 800)
 uf.wizard_image = ANALYSIS_IMAGE_PATH + sep + 'blank_150x150.png'
 
 
+# The relax_disp.r2eff_estimate user function.
+uf = uf_info.add_uf('relax_disp.r2eff_estimate')
+uf.title = "Estimate R2eff values and errors by exponential curve fitting."
+uf.title_short = "Estimate R2eff values and errors."
+uf.add_keyarg(
+    name = "spin_id",
+    arg_type = "spin ID",
+    desc_short = "spin ID to restrict value setting to",
+    desc = "The spin ID string to restrict value setting to.",
+    can_be_none = True
+)
+uf.add_keyarg(
+    name = "method",
+    default = "minfx",
+    basic_types = ["str"],
+    desc_short = "fitting method",
+    desc = "The method for fitting the exponential curves and estimating the errors.",
+    wiz_element_type = "combo",
+    wiz_combo_choices = [
+        "Fitting of each curve with minfx",
+        "Fitting of each curve with scipy.optimize.leastsq",
+        "Simultaneous fitting of all curves"
+    ],
+    wiz_combo_data = [
+        "minfx",
+        "scipy.optimize.leastsq",
+        "bulk"
+    ],
+    wiz_read_only = True
+)
+uf.add_keyarg(
+    name = "verbosity",
+    default = 1,
+    basic_types = ["int"],
+    desc_short = "amount of information to print.",
+    desc = "The higher the value, the greater the verbosity.",
+    can_be_none = False
+)
+# Description.
+uf.desc.append(Desc_container())
+uf.desc[-1].add_paragraph("This is a fast alternative to the optimisation of the 'R2eff' model followed by Monte Carlo simulations.  The two parameter exponential curve of each spin and dispersion point is fitted, starting from the log-linear estimates, and the R2eff and I0 errors are taken from the covariance matrix of the fit.  The chi-squared value and function count stored for each spin are the sums over its dispersion points.")
+uf.desc[-1].add_paragraph("The methods are:")
+uf.desc[-1].add_item_list_element("'minfx'", "Each curve is fitted separately with the simplex algorithm of minfx.")
+uf.desc[-1].add_item_list_element("'scipy.optimize.leastsq'", "Each curve is fitted separately with the Levenberg-Marquardt algorithm of scipy.optimize.leastsq.")
+uf.desc[-1].add_item_list_element("'bulk'", "The curves of all spins and dispersion points are fitted simultaneously by a vectorised Levenberg-Marquardt algorithm.  This is much faster when there are many spins.")
+uf.desc[-1].add_paragraph("As for the relax_disp.r2eff_err_estimate user function, the errors from the covariance matrix should only be used with care.")
+# Prompt examples.
+uf.desc.append(Desc_container("Prompt examples"))
+uf.desc[-1].add_paragraph("To fit all curves simultaneously, type:")
+uf.desc[-1].add_prompt("relax> relax_disp.r2eff_estimate(method='bulk')")
+uf.backend = estimate_r2eff
+uf.menu_text = "r2eff_e&stimate"
+uf.gui_icon = "relax.relax_fit"
+uf.wizard_size = (800, 700)
+uf.wizard_image = ANALYSIS_IMAGE_PATH + sep + 'blank_150x150.png'
+
+
 # The relax_disp.r2eff_read user function.
 uf = uf_info.add_uf('relax_disp.r2eff_read')
 uf.title = "Read R2eff/R1rho values and errors from a file."
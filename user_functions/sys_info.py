@@ -30,7 +30,7 @@ from os import sep
 from graphics import WIZARD_OXYGEN_PATH
 from info import print_sys_info
 from lib.timing import print_time
-from pipe_control.system import cd, pwd
+from pipe_control.system import cd, profile, profile_write, pwd
 from user_functions.data import Uf_info; uf_info = Uf_info()
 from user_functions.objects import Desc_container
 
@@ -68,6 +68,86 @@ uf.wizard_image = WIZARD_OXYGEN_PATH + 'places' + sep + 'folder-favorites.png'
 uf.wizard_apply_button = False
 
 
+# The system.profile user function.
+uf = uf_info.add_uf('system.profile')
+uf.title = "Turn the profiling of the parallel calculations on or off."
+uf.title_short = "Parallel profiling."
+uf.add_keyarg(
+    name = "flag",
+    default = True,
+    basic_types = ["bool"],
+    desc_short = "profiling flag",
+    desc = "The flag which if True will start a new profile, discarding any previous one, and if False will stop profiling."
+)
+uf.add_keyarg(
+    name = "sizes",
+    default = True,
+    basic_types = ["bool"],
+    desc_short = "byte count flag",
+    desc = "The flag which if True will cause the byte counts of the commands and results to be measured.  As this requires each command and result to be pickled an extra time, it can be turned off to profile only the timings."
+)
+# Description.
+uf.desc.append(Desc_container())
+uf.desc[-1].add_paragraph("This allows the time spent in each part of a parallel calculation to be measured.  For each command executed on the slave processors, the time spent serialising the command on the master, its size in bytes, the transfer time, the computation time on the slave and the size of the returned results are recorded.  The time spent processing the results on the master and the busy and idle times of each slave are also measured.  This works for all processor fabrics, including the uni-processor fabric where the byte counts are those which the commands and results would have if sent between processors.  This information is useful for sizing calculations and identifying bottlenecks.  The profile can be saved using the system.profile_write user function.")
+uf.desc[-1].add_paragraph("To profile an optimisation, type:")
+uf.desc[-1].add_prompt("relax> system.profile()")
+uf.desc[-1].add_prompt("relax> minimise.execute('newton')")
+uf.desc[-1].add_prompt("relax> system.profile(flag=False)")
+uf.desc[-1].add_prompt("relax> system.profile_write('profile.txt')")
+uf.backend = profile
+uf.menu_text = "pro&file"
+uf.gui_icon = "oxygen.actions.chronometer"
+uf.wizard_size = (700, 500)
+uf.wizard_apply_button = False
+
+
+# The system.profile_write user function.
+uf = uf_info.add_uf('system.profile_write')
+uf.title = "Write the profile of the parallel calculations to file."
+uf.title_short = "Parallel profile writing."
+uf.add_keyarg(
+    name = "file",
+    arg_type = "file sel write",
+    desc_short = "file name",
+    desc = "The name of the file to create."
+)
+uf.add_keyarg(
+    name = "dir",
+    arg_type = "dir",
+    desc_short = "directory name",
+    desc = "The directory to save the file to.",
+    can_be_none = True
+)
+uf.add_keyarg(
+    name = "format",
+    basic_types = ["str"],
+    default = "text",
+    desc_short = "output format",
+    desc = "The output format, either a human readable text summary or the full JSON formatted report.",
+    wiz_element_type = "combo",
+    wiz_combo_choices = ["Text file", "JSON file"],
+    wiz_combo_data = ["text", "json"],
+    wiz_read_only = True
+)
+uf.add_keyarg(
+    name = "force",
+    default = False,
+    basic_types = ["bool"],
+    desc_short = "force flag",
+    desc = "A flag which if set to True will cause any pre-existing file to be overwritten."
+)
+# Description.
+uf.desc.append(Desc_container())
+uf.desc[-1].add_paragraph("This will write out the profile recorded after turning profiling on with the system.profile user function.  The text format consists of a summary of the total serialisation, transfer, computation and result processing times and byte counts, the busy and idle times of each slave, and the totals per command type.  The JSON format additionally contains the record of each individual command.")
+uf.desc[-1].add_paragraph("To write the JSON report, type:")
+uf.desc[-1].add_prompt("relax> system.profile_write('profile.json', format='json', force=True)")
+uf.backend = profile_write
+uf.menu_text = "profile_&write"
+uf.gui_icon = "oxygen.actions.document-save"
+uf.wizard_size = (700, 500)
+uf.wizard_apply_button = False
+
+
 # The system.pwd user function.
 uf = uf_info.add_uf('system.pwd')
 uf.title = "Display the current working directory."